@@ -0,0 +1,133 @@
+"""Container de dependências da aplicação e seus provedores para o FastAPI."""
+from dataclasses import dataclass
+from fastapi import Depends, HTTPException, Query, Request
+from supabase import Client
+from app.infrastructure.persistence.agent_settings_repo import AgentSettingsRepository
+from app.infrastructure.persistence.artifacts_repo import ArtifactsRepository
+from app.infrastructure.persistence.config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+from app.infrastructure.persistence.conversations_repo import ConversationsRepository
+from app.infrastructure.persistence.feedbacks_repo import FeedbacksRepository
+from app.infrastructure.persistence.knowledge_repo import KnowledgeRepository
+from app.infrastructure.persistence.learnings_repo import LearningsRepository
+from app.infrastructure.persistence.pagination import Cursor
+from app.infrastructure.persistence.postgres.artifacts_repo import PostgresArtifactsRepository
+from app.infrastructure.persistence.postgres.conversations_repo import PostgresConversationsRepository
+from app.infrastructure.persistence.postgres.feedbacks_repo import PostgresFeedbacksRepository
+from app.infrastructure.persistence.postgres.knowledge_repo import PostgresKnowledgeRepository
+from app.infrastructure.persistence.postgres.learnings_repo import PostgresLearningsRepository
+from app.infrastructure.persistence.settings_repo import SettingsRepository
+from app.infrastructure.persistence.supabase_clients import SupabaseClientPool
+from app.infrastructure.persistence.topics_repo import TopicsRepository
+
+
+@dataclass
+class Container:
+    """
+    Clientes e repositórios compartilhados pelas requisições.
+    
+    Montado uma única vez no início da aplicação (lifespan) e guardado em
+    `app.state.container`; as rotas recebem os repositórios via `Depends`.
+    """
+    supabase: Client | None
+    storage: Client | None
+    artifacts_repo: ArtifactsRepository
+    conversations_repo: ConversationsRepository
+    knowledge_repo: KnowledgeRepository
+    agent_settings_repo: AgentSettingsRepository
+    topics_repo: TopicsRepository
+    feedbacks_repo: FeedbacksRepository
+    learnings_repo: LearningsRepository
+    settings_repo: SettingsRepository
+
+
+def build_container(clients: SupabaseClientPool, pool=None) -> Container:
+    """
+    Cria os repositórios sobre um cliente por conjunto de credenciais.
+    
+    Com `pool` (backend `postgres`), artefatos, conversas, feedbacks, aprendizados e
+    a busca RAG usam conexões diretas ao banco; tópicos e configurações, lidos
+    raramente e mantidos em cache, seguem pelo Supabase.
+    """
+    supabase = clients.default()
+    service = clients.service()
+    container = Container(
+        supabase=supabase,
+        storage=service,
+        artifacts_repo=ArtifactsRepository(supabase),
+        conversations_repo=ConversationsRepository(supabase),
+        knowledge_repo=KnowledgeRepository(client=service),
+        agent_settings_repo=AgentSettingsRepository(supabase),
+        topics_repo=TopicsRepository(supabase),
+        feedbacks_repo=FeedbacksRepository(supabase),
+        learnings_repo=LearningsRepository(supabase),
+        settings_repo=SettingsRepository(supabase),
+    )
+    if pool is not None:
+        container.artifacts_repo = PostgresArtifactsRepository(pool)
+        container.conversations_repo = PostgresConversationsRepository(pool)
+        container.knowledge_repo = PostgresKnowledgeRepository(pool, client=service)
+        container.feedbacks_repo = PostgresFeedbacksRepository(pool)
+        container.learnings_repo = PostgresLearningsRepository(pool)
+    return container
+
+
+def get_container(request: Request) -> Container:
+    return request.app.state.container
+
+
+def get_supabase(container: Container = Depends(get_container)) -> Client | None:
+    return container.supabase
+
+
+def get_storage(container: Container = Depends(get_container)) -> Client | None:
+    return container.storage
+
+
+def get_artifacts_repo(container: Container = Depends(get_container)) -> ArtifactsRepository:
+    return container.artifacts_repo
+
+
+def get_conversations_repo(container: Container = Depends(get_container)) -> ConversationsRepository:
+    return container.conversations_repo
+
+
+def get_knowledge_repo(container: Container = Depends(get_container)) -> KnowledgeRepository:
+    return container.knowledge_repo
+
+
+def get_agent_settings_repo(container: Container = Depends(get_container)) -> AgentSettingsRepository:
+    return container.agent_settings_repo
+
+
+def get_topics_repo(container: Container = Depends(get_container)) -> TopicsRepository:
+    return container.topics_repo
+
+
+def get_feedbacks_repo(container: Container = Depends(get_container)) -> FeedbacksRepository:
+    return container.feedbacks_repo
+
+
+def get_learnings_repo(container: Container = Depends(get_container)) -> LearningsRepository:
+    return container.learnings_repo
+
+
+def get_settings_repo(container: Container = Depends(get_container)) -> SettingsRepository:
+    return container.settings_repo
+
+
+@dataclass(frozen=True)
+class PageParams:
+    """Parâmetros de paginação já validados (cursor decodificado e tamanho da página)."""
+    cursor: Cursor | None
+    limit: int
+
+
+def get_page_params(
+    cursor: str | None = Query(None, description="`next_cursor` da página anterior"),
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX, description="Itens por página")
+) -> PageParams:
+    try:
+        decoded = Cursor.decode(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return PageParams(cursor=decoded, limit=limit)
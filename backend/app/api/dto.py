@@ -1,10 +1,19 @@
 """Data Transfer Objects (DTOs) para a API."""
 from pydantic import BaseModel
-from typing import Literal
+from typing import Generic, Literal, TypeVar
 from datetime import datetime
 from uuid import UUID
 
 
+T = TypeVar("T")
+
+
+class PageDTO(BaseModel, Generic[T]):
+    """Página de uma listagem; `next_cursor` vai no parâmetro `cursor` da próxima chamada."""
+    items: list[T]
+    next_cursor: str | None = None
+
+
 class ChunkMetadataDTO(BaseModel):
     """DTO para metadados de chunk."""
     section_title: str | None = None
@@ -71,9 +80,18 @@ class MessageDTO(BaseModel):
     created_at: datetime
 
 
+class KnowledgeFilterDTO(BaseModel):
+    """Filtros de metadados para restringir a busca de conhecimento."""
+    tags: list[str] = []
+    artifact_ids: list[UUID] = []
+    content_types: list[str] = []
+    section_prefixes: list[str] = []
+
+
 class CreateMessagePayload(BaseModel):
     """Payload para criar mensagem."""
     content: str
+    filters: KnowledgeFilterDTO | None = None
 
 
 class PendingFeedbackDTO(BaseModel):
@@ -132,6 +150,8 @@ class ConversationTopicDTO(BaseModel):
     """DTO para Tópico de uma Conversa."""
     topic: str | None
     is_processing: bool = False
+    # Estado do job de classificação: queued, running, retrying, done ou failed
+    status: str | None = None
 
 
 class BatchFeedbackRequestDTO(BaseModel):
@@ -139,6 +159,19 @@ class BatchFeedbackRequestDTO(BaseModel):
     message_ids: list[str]
 
 
+class BatchApproveFeedbacksPayload(BaseModel):
+    """Payload para aprovar feedbacks em lote."""
+    feedback_ids: list[UUID]
+
+
+class BatchApproveFeedbackItemDTO(BaseModel):
+    """Resultado da aprovação de um feedback do lote."""
+    feedback_id: UUID
+    status: Literal["APPROVED", "NOT_FOUND", "ALREADY_PROCESSED", "FAILED"]
+    learning: LearningDTO | None = None
+    error: str | None = None
+
+
 class ErrorDTO(BaseModel):
     """DTO para Erro."""
     detail: str
@@ -1,17 +1,17 @@
 """Rotas para configuração do Agente."""
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from app.api.dto import AgentInstructionDTO, UpdateAgentInstructionPayload
 from app.domain.agent.workflows import get_agent_instruction, update_agent_instruction
+from app.api.dependencies import get_agent_settings_repo
 from app.infrastructure.persistence.agent_settings_repo import AgentSettingsRepository
 
 router = APIRouter()
 
-# Inicializa serviços
-agent_settings_repo = AgentSettingsRepository()
-
 
 @router.get("/agent/instruction", response_model=AgentInstructionDTO)
-async def get_agent_instruction_route():
+async def get_agent_instruction_route(
+    agent_settings_repo: AgentSettingsRepository = Depends(get_agent_settings_repo)
+):
     """Obtém a Instrução Geral do Agente."""
     instruction = await get_agent_instruction(agent_settings_repo)
     
@@ -22,7 +22,10 @@ async def get_agent_instruction_route():
 
 
 @router.put("/agent/instruction", response_model=AgentInstructionDTO)
-async def update_agent_instruction_route(payload: UpdateAgentInstructionPayload):
+async def update_agent_instruction_route(
+    payload: UpdateAgentInstructionPayload,
+    agent_settings_repo: AgentSettingsRepository = Depends(get_agent_settings_repo)
+):
     """Atualiza a Instrução Geral do Agente."""
     instruction = await update_agent_instruction(
         new_content=payload.instruction,
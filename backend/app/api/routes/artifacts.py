@@ -1,24 +1,27 @@
 """Rotas para gerenciamento de Artefatos."""
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
 from fastapi.responses import JSONResponse
 from typing import Optional
+import asyncio
 from app.api.dto import (
     ArtifactDTO,
     ArtifactChunkDTO,
+    PageDTO,
     ChunkMetadataDTO,
     ErrorDTO,
     UpdateArtifactTagsPayload,
     UpdateArtifactPayload,
 )
 from app.domain.artifacts.workflows import create_artifact_from_text, create_artifact_from_pdf
-from app.domain.artifacts.types import ArtifactSourceType
-from app.infrastructure.persistence.artifacts_repo import ArtifactsRepository
+from app.domain.artifacts.types import ArtifactCard, ArtifactSourceType
+from app.infrastructure.persistence.blocking_io import supabase_io
+from app.infrastructure.persistence.artifacts_repo import ArtifactProjection, ArtifactsRepository
 from app.infrastructure.files.pdf_processor import PDFProcessor
 from app.infrastructure.ai.embedding_service import EmbeddingGenerator
 from app.infrastructure.persistence.config import GEMINI_API_KEY
-from app.infrastructure.persistence.config import SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY
-from supabase import create_client
-from datetime import datetime
+from app.api.dependencies import PageParams, get_artifacts_repo, get_page_params, get_storage
+from supabase import Client
+from dataclasses import replace
 import uuid
 
 router = APIRouter()
@@ -27,32 +30,20 @@ router = APIRouter()
 # As validações serão feitas dentro das rotas, não durante a importação
 pdf_processor = PDFProcessor()
 embedding_generator = EmbeddingGenerator(GEMINI_API_KEY) if GEMINI_API_KEY else None
-artifacts_repo = ArtifactsRepository()
-supabase_storage = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY) if (SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY) else None
 
 
-@router.get("/artifacts", response_model=list[ArtifactDTO])
-async def list_artifacts():
-    """Lista todos os Artefatos Culturais."""
-    artifacts = await artifacts_repo.find_all()
-    
-    result = []
-    for artifact in artifacts:
-        # Busca description, tags e color do banco
-        artifact_data = await artifacts_repo.get_artifact_data(artifact.id)
-        
-        result.append(ArtifactDTO(
-            id=artifact.id,
-            title=artifact.title,
-            source_type=artifact.source_type.name,
-            created_at=datetime.utcnow(),  # TODO: Buscar data real do banco
-            description=artifact_data.get('description') if artifact_data else None,
-            tags=artifact_data.get('tags', []) if artifact_data else [],
-            color=artifact_data.get('color') if artifact_data else None,
-            source_url=artifact.source_url
-        ))
-    
-    return result
+@router.get("/artifacts", response_model=PageDTO[ArtifactDTO])
+async def list_artifacts(
+    artifacts_repo: ArtifactsRepository = Depends(get_artifacts_repo),
+    page: PageParams = Depends(get_page_params)
+):
+    """Lista uma página de Artefatos Culturais (mais recentes primeiro)."""
+    cards = await artifacts_repo.list_cards(page.cursor, page.limit)
+    
+    return PageDTO(
+        items=[_to_artifact_dto(card) for card in cards.items],
+        next_cursor=cards.next_cursor
+    )
 
 
 @router.post("/artifacts", response_model=ArtifactDTO, status_code=201)
@@ -60,7 +51,9 @@ async def create_artifact(
     title: str = Form(...),
     text_content: Optional[str] = Form(None),
     file: Optional[UploadFile] = File(None),
-    color: Optional[str] = Form(None)
+    color: Optional[str] = Form(None),
+    artifacts_repo: ArtifactsRepository = Depends(get_artifacts_repo),
+    supabase_storage: Client | None = Depends(get_storage)
 ):
     """Cria um novo Artefato Cultural."""
     if not title:
@@ -85,8 +78,9 @@ async def create_artifact(
         if not file.filename.endswith('.pdf'):
             raise HTTPException(status_code=400, detail="Apenas arquivos PDF são aceitos")
         
-        # Cria artefato a partir do PDF
-        artifact = create_artifact_from_pdf(
+        # Cria artefato a partir do PDF (extração e embeddings rodam fora do event loop)
+        artifact = await asyncio.to_thread(
+            create_artifact_from_pdf,
             title=title,
             pdf_content=file_content,
             pdf_processor=pdf_processor,
@@ -95,7 +89,7 @@ async def create_artifact(
         
         # Salva o PDF no Supabase Storage
         storage_path = f"artifacts/{artifact.id}/{file.filename}"
-        supabase_storage.storage.from_("artifacts").upload(storage_path, file_content)
+        await supabase_io.run(supabase_storage.storage.from_("artifacts").upload, storage_path, file_content)
         
         # Obtém URL pública
         source_url = supabase_storage.storage.from_("artifacts").get_public_url(storage_path)
@@ -104,8 +98,9 @@ async def create_artifact(
         if not embedding_generator:
             raise HTTPException(status_code=500, detail="GEMINI_API_KEY não configurada. Configure a variável de ambiente GOOGLE_API_KEY no Vercel.")
         
-        # Cria artefato a partir de texto
-        artifact = create_artifact_from_text(
+        # Cria artefato a partir de texto (embeddings rodam fora do event loop)
+        artifact = await asyncio.to_thread(
+            create_artifact_from_text,
             title=title,
             text_content=text_content,
             embedding_generator=embedding_generator
@@ -114,23 +109,20 @@ async def create_artifact(
     # Salva no banco de dados
     await artifacts_repo.save(artifact, source_url, color)
     
-    # Busca dados completos do artefato
-    artifact_data = await artifacts_repo.get_artifact_data(artifact.id)
+    # Busca o artefato gravado (com a data de criação do banco)
+    card = await artifacts_repo.find_card_by_id(artifact.id)
     
-    return ArtifactDTO(
-        id=artifact.id,
-        title=artifact.title,
-        source_type=artifact.source_type.name,
-        created_at=datetime.utcnow(),
-        description=artifact_data.get('description') if artifact_data else None,
-        tags=artifact_data.get('tags', []) if artifact_data else [],
-        color=artifact_data.get('color') if artifact_data else None,
-        source_url=artifact.source_url
-    )
+    if not card:
+        raise HTTPException(status_code=404, detail="Artefato não encontrado")
+    
+    return _to_artifact_dto(card)
 
 
 @router.get("/artifacts/{artifact_id}", response_model=ArtifactDTO)
-async def get_artifact_by_id(artifact_id: str):
+async def get_artifact_by_id(
+    artifact_id: str,
+    artifacts_repo: ArtifactsRepository = Depends(get_artifacts_repo)
+):
     """Obtém um Artefato Cultural por ID."""
     from app.domain.shared_kernel import ArtifactId
     
@@ -139,28 +131,19 @@ async def get_artifact_by_id(artifact_id: str):
     except ValueError:
         raise HTTPException(status_code=400, detail="ID inválido")
     
-    artifact = await artifacts_repo.find_by_id(artifact_id_uuid)
+    card = await artifacts_repo.find_card_by_id(artifact_id_uuid)
     
-    if not artifact:
+    if not card:
         raise HTTPException(status_code=404, detail="Artefato não encontrado")
     
-    # Busca dados adicionais
-    artifact_data = await artifacts_repo.get_artifact_data(artifact_id_uuid)
-    
-    return ArtifactDTO(
-        id=artifact.id,
-        title=artifact.title,
-        source_type=artifact.source_type.name,
-        created_at=datetime.utcnow(),
-        description=artifact_data.get('description') if artifact_data else None,
-        tags=artifact_data.get('tags', []) if artifact_data else [],
-        color=artifact_data.get('color') if artifact_data else None,
-        source_url=artifact.source_url
-    )
+    return _to_artifact_dto(card)
 
 
 @router.get("/artifacts/{artifact_id}/content")
-async def get_artifact_content(artifact_id: str):
+async def get_artifact_content(
+    artifact_id: str,
+    artifacts_repo: ArtifactsRepository = Depends(get_artifacts_repo)
+):
     """Obtém o conteúdo completo de um artefato (chunks concatenados)."""
     from app.domain.shared_kernel import ArtifactId
     
@@ -169,22 +152,28 @@ async def get_artifact_content(artifact_id: str):
     except ValueError:
         raise HTTPException(status_code=400, detail="ID inválido")
     
-    artifact = await artifacts_repo.find_by_id(artifact_id_uuid)
+    artifact = await artifacts_repo.find_by_id(artifact_id_uuid, ArtifactProjection.HEADER)
     
     if not artifact:
         raise HTTPException(status_code=404, detail="Artefato não encontrado")
     
     if artifact.source_type.name == "TEXT":
-        if artifact.original_content:
-            return {"source_type": "TEXT", "content": artifact.original_content}
-        content = "\n".join([chunk.content for chunk in artifact.chunks])
+        original_content = await artifacts_repo.find_original_content(artifact_id_uuid)
+        if original_content:
+            return {"source_type": "TEXT", "content": original_content}
+        # Artefatos sem o conteúdo original: junta o texto dos chunks (sem os vetores)
+        with_chunks = await artifacts_repo.find_by_id(artifact_id_uuid, ArtifactProjection.CHUNKS)
+        content = "\n".join([chunk.content for chunk in with_chunks.chunks]) if with_chunks else ""
         return {"source_type": "TEXT", "content": content}
 
     return {"source_type": "PDF", "source_url": artifact.source_url}
 
 
 @router.get("/artifacts/{artifact_id}/chunks", response_model=list[ArtifactChunkDTO])
-async def get_artifact_chunks(artifact_id: str):
+async def get_artifact_chunks(
+    artifact_id: str,
+    artifacts_repo: ArtifactsRepository = Depends(get_artifacts_repo)
+):
     """Retorna os chunks de um artefato com metadados estruturados."""
     from app.domain.shared_kernel import ArtifactId
 
@@ -193,7 +182,7 @@ async def get_artifact_chunks(artifact_id: str):
     except ValueError:
         raise HTTPException(status_code=400, detail="ID inválido")
 
-    artifact = await artifacts_repo.find_by_id(artifact_id_uuid)
+    artifact = await artifacts_repo.find_by_id(artifact_id_uuid, ArtifactProjection.CHUNKS)
 
     if not artifact:
         raise HTTPException(status_code=404, detail="Artefato não encontrado")
@@ -224,7 +213,10 @@ async def get_artifact_chunks(artifact_id: str):
 
 
 @router.delete("/artifacts/{artifact_id}", status_code=204)
-async def delete_artifact(artifact_id: str):
+async def delete_artifact(
+    artifact_id: str,
+    artifacts_repo: ArtifactsRepository = Depends(get_artifacts_repo)
+):
     """Deleta um Artefato Cultural."""
     from app.domain.shared_kernel import ArtifactId
     
@@ -233,7 +225,7 @@ async def delete_artifact(artifact_id: str):
     except ValueError:
         raise HTTPException(status_code=400, detail="ID inválido")
     
-    artifact = await artifacts_repo.find_by_id(artifact_id_uuid)
+    artifact = await artifacts_repo.find_by_id(artifact_id_uuid, ArtifactProjection.HEADER)
     
     if not artifact:
         raise HTTPException(status_code=404, detail="Artefato não encontrado")
@@ -251,7 +243,11 @@ async def delete_artifact(artifact_id: str):
 
 
 @router.patch("/artifacts/{artifact_id}/tags", response_model=ArtifactDTO)
-async def update_artifact_tags(artifact_id: str, payload: UpdateArtifactTagsPayload):
+async def update_artifact_tags(
+    artifact_id: str,
+    payload: UpdateArtifactTagsPayload,
+    artifacts_repo: ArtifactsRepository = Depends(get_artifacts_repo)
+):
     """Atualiza as tags de um artefato."""
     from app.domain.shared_kernel import ArtifactId
     
@@ -260,27 +256,15 @@ async def update_artifact_tags(artifact_id: str, payload: UpdateArtifactTagsPayl
     except ValueError:
         raise HTTPException(status_code=400, detail="ID inválido")
     
-    artifact = await artifacts_repo.find_by_id(artifact_id_uuid)
+    card = await artifacts_repo.find_card_by_id(artifact_id_uuid)
     
-    if not artifact:
+    if not card:
         raise HTTPException(status_code=404, detail="Artefato não encontrado")
     
     # Atualiza as tags
     await artifacts_repo.update_artifact_tags(artifact_id_uuid, payload.tags)
     
-    # Busca dados atualizados
-    artifact_data = await artifacts_repo.get_artifact_data(artifact_id_uuid)
-    
-    return ArtifactDTO(
-        id=artifact.id,
-        title=artifact.title,
-        source_type=artifact.source_type.name,
-        created_at=datetime.utcnow(),
-        description=artifact_data.get('description') if artifact_data else None,
-        tags=artifact_data.get('tags', []) if artifact_data else [],
-        color=artifact_data.get('color') if artifact_data else None,
-        source_url=artifact.source_url
-    )
+    return _to_artifact_dto(replace(card, tags=payload.tags))
 
 
 @router.patch("/artifacts/{artifact_id}", response_model=ArtifactDTO)
@@ -291,7 +275,9 @@ async def update_artifact(
     tags: Optional[str] = Form(None),  # JSON string
     color: Optional[str] = Form(None),
     content: Optional[str] = Form(None),
-    file: Optional[UploadFile] = File(None)
+    file: Optional[UploadFile] = File(None),
+    artifacts_repo: ArtifactsRepository = Depends(get_artifacts_repo),
+    supabase_storage: Client | None = Depends(get_storage)
 ):
     """Atualiza um artefato (aceita form-data para suportar upload de arquivo)."""
     from app.domain.shared_kernel import ArtifactId
@@ -302,7 +288,7 @@ async def update_artifact(
     except ValueError:
         raise HTTPException(status_code=400, detail="ID inválido")
     
-    artifact = await artifacts_repo.find_by_id(artifact_id_uuid)
+    artifact = await artifacts_repo.find_by_id(artifact_id_uuid, ArtifactProjection.HEADER)
     
     if not artifact:
         raise HTTPException(status_code=404, detail="Artefato não encontrado")
@@ -334,7 +320,8 @@ async def update_artifact(
         
         # Processa novo PDF
         from app.domain.artifacts.workflows import create_artifact_from_pdf
-        temp_artifact = create_artifact_from_pdf(
+        temp_artifact = await asyncio.to_thread(
+            create_artifact_from_pdf,
             title=artifact.title,  # Mantém título atual
             pdf_content=file_content,
             pdf_processor=pdf_processor,
@@ -349,22 +336,31 @@ async def update_artifact(
         
         # Atualiza URL do PDF no storage
         storage_path = f"artifacts/{artifact_id_uuid}/{file.filename}"
-        supabase_storage.storage.from_("artifacts").upload(storage_path, file_content, {"upsert": "true"})
+        await supabase_io.run(
+            supabase_storage.storage.from_("artifacts").upload, storage_path, file_content, {"upsert": "true"}
+        )
         source_url = supabase_storage.storage.from_("artifacts").get_public_url(storage_path)
         await artifacts_repo.update_source_url(artifact_id_uuid, source_url)
     
     # Busca dados atualizados
-    artifact_data = await artifacts_repo.get_artifact_data(artifact_id_uuid)
-    updated_artifact = await artifacts_repo.find_by_id(artifact_id_uuid)
+    updated_card = await artifacts_repo.find_card_by_id(artifact_id_uuid)
     
+    if not updated_card:
+        # O artefato pode ter sido excluído durante a atualização
+        raise HTTPException(status_code=404, detail="Artefato não encontrado")
+    
+    return _to_artifact_dto(updated_card)
+
+
+def _to_artifact_dto(card: ArtifactCard) -> ArtifactDTO:
     return ArtifactDTO(
-        id=updated_artifact.id,
-        title=updated_artifact.title,
-        source_type=updated_artifact.source_type.name,
-        created_at=datetime.utcnow(),
-        description=artifact_data.get('description') if artifact_data else None,
-        tags=artifact_data.get('tags', []) if artifact_data else [],
-        color=artifact_data.get('color') if artifact_data else None,
-        source_url=updated_artifact.source_url
+        id=card.id,
+        title=card.title,
+        source_type=card.source_type.name,
+        created_at=card.created_at,
+        description=card.description,
+        tags=card.tags,
+        color=card.color,
+        source_url=card.source_url
     )
 
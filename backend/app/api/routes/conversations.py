@@ -1,89 +1,98 @@
 """Rotas para gerenciamento de Conversas."""
-from fastapi import APIRouter, HTTPException
-from app.api.dto import MessageDTO, CreateMessagePayload, CitedSourceDTO, ConversationTopicDTO
-from app.domain.conversations.workflows import continue_conversation
-from app.domain.shared_kernel import ConversationId, MessageId
+from dataclasses import replace
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from app.api.dependencies import (
+    PageParams,
+    get_agent_settings_repo,
+    get_conversations_repo,
+    get_knowledge_repo,
+    get_page_params,
+    get_topics_repo,
+)
+from app.api.dto import MessageDTO, CreateMessagePayload, CitedSourceDTO, ConversationTopicDTO, PageDTO
+from app.domain.conversations.types import Conversation, Message
+from app.domain.conversations.workflows import (
+    continue_conversation,
+    retrieve_knowledge,
+    build_turn_messages,
+    describe_first_exchange,
+    summarize_conversation,
+)
+from app.domain.shared_kernel import ConversationId, MessageId, ArtifactId
+from app.domain.artifacts.types import KnowledgeFilter
 from app.infrastructure.persistence.conversations_repo import ConversationsRepository
 from app.infrastructure.persistence.knowledge_repo import KnowledgeRepository
 from app.infrastructure.persistence.agent_settings_repo import AgentSettingsRepository
 from app.infrastructure.ai.gemini_service import GeminiService, get_gemini_api_key
 from app.infrastructure.ai.embedding_service import EmbeddingGenerator
-from app.infrastructure.ai.topic_classifier import TopicClassifier
+from app.infrastructure.ai.topic_classifier import CentroidTopicClassifier, TopicClassifier
+from app.infrastructure.ai.conversation_summarizer import ConversationSummarizer
 from app.infrastructure.persistence.topics_repo import TopicsRepository
-from app.infrastructure.persistence.config import GEMINI_API_KEY, SUPABASE_URL, SUPABASE_KEY
-from app.domain.shared_kernel import TopicId
-from supabase import create_client
+from app.infrastructure.persistence.config import GEMINI_API_KEY, CONVERSATION_RECENT_TURNS
+from app.infrastructure.tasks.worker import FAILED, PENDING_STATUSES, topic_classification_worker
+import json
+import logging
 import uuid
 from datetime import datetime
 
-router = APIRouter()
+logger = logging.getLogger("app.api.conversations")
 
-# Inicializa repositórios
-conversations_repo = ConversationsRepository()
-knowledge_repo = KnowledgeRepository()
-agent_settings_repo = AgentSettingsRepository()
-topics_repo = TopicsRepository()
+router = APIRouter()
 
 # Validação de GEMINI_API_KEY será feita dentro das rotas quando necessário
 # Não falha durante a importação para permitir que o servidor inicie
 
 
 @router.post("/conversations")
-async def create_conversation():
+async def create_conversation(
+    conversations_repo: ConversationsRepository = Depends(get_conversations_repo)
+):
     """Inicia uma nova conversa."""
     conversation = await conversations_repo.create()
     
     return {"conversation_id": str(conversation.id)}
 
 
-@router.get("/conversations/{conversation_id}/messages", response_model=list[MessageDTO])
-async def get_conversation_messages(conversation_id: str):
-    """Lista as mensagens de uma conversa."""
+@router.get("/conversations/{conversation_id}/messages", response_model=PageDTO[MessageDTO])
+async def get_conversation_messages(
+    conversation_id: str,
+    conversations_repo: ConversationsRepository = Depends(get_conversations_repo),
+    page: PageParams = Depends(get_page_params)
+):
+    """Lista uma página das mensagens de uma conversa, em ordem cronológica."""
     try:
         conversation_id_uuid = ConversationId(uuid.UUID(conversation_id))
     except ValueError:
         raise HTTPException(status_code=400, detail="ID inválido")
     
-    conversation = await conversations_repo.find_by_id(conversation_id_uuid)
+    messages = await conversations_repo.find_messages_page(conversation_id_uuid, page.cursor, page.limit)
     
-    if not conversation:
+    if messages is None:
         raise HTTPException(status_code=404, detail="Conversa não encontrada")
     
-    return [
-        MessageDTO(
-            id=msg.id,
-            conversation_id=msg.conversation_id,
-            author=msg.author.name,
-            content=msg.content,
-            cited_sources=[
-                CitedSourceDTO(
-                    chunk_id=cs.chunk_id,
-                    artifact_id=cs.artifact_id,
-                    title=cs.title,
-                    chunk_content_preview=cs.chunk_content_preview,
-                    section_title=cs.section_title,
-                    section_level=cs.section_level,
-                    content_type=cs.content_type,
-                    breadcrumbs=cs.breadcrumbs
-                )
-                for cs in msg.cited_sources
-            ],
-            created_at=msg.created_at
-        )
-        for msg in conversation.messages
-    ]
+    return PageDTO(items=[_to_message_dto(msg) for msg in messages.items], next_cursor=messages.next_cursor)
 
 
 @router.post("/conversations/{conversation_id}/messages", response_model=MessageDTO)
-async def post_message(conversation_id: str, payload: CreateMessagePayload):
+async def post_message(
+    conversation_id: str,
+    payload: CreateMessagePayload,
+    background_tasks: BackgroundTasks,
+    conversations_repo: ConversationsRepository = Depends(get_conversations_repo),
+    knowledge_repo: KnowledgeRepository = Depends(get_knowledge_repo),
+    agent_settings_repo: AgentSettingsRepository = Depends(get_agent_settings_repo),
+    topics_repo: TopicsRepository = Depends(get_topics_repo)
+):
     """Envia uma nova mensagem para o agente."""
     try:
         conversation_id_uuid = ConversationId(uuid.UUID(conversation_id))
     except ValueError:
         raise HTTPException(status_code=400, detail="ID inválido")
     
-    # Busca a conversa
-    conversation = await conversations_repo.find_by_id(conversation_id_uuid)
+    # Busca só o resumo e as mensagens que ele ainda não cobre (o que o prompt usa)
+    conversation = await conversations_repo.find_turn_context(conversation_id_uuid)
     
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversa não encontrada")
@@ -96,117 +105,140 @@ async def post_message(conversation_id: str, payload: CreateMessagePayload):
     gemini_service = GeminiService(api_key)
     embedding_generator = EmbeddingGenerator(api_key)
     
-    # Continua a conversa (gera resposta do agente)
-    updated_conversation = await continue_conversation(
+    # Continua a conversa (gera resposta do agente); retorna só as mensagens da troca
+    turn_messages = await continue_conversation(
         conversation=conversation,
         user_query=payload.content,
         embedding_generator=embedding_generator,
         knowledge_repo=knowledge_repo,
         llm_service=gemini_service,
-        agent_instruction=agent_instruction
+        agent_instruction=agent_instruction,
+        knowledge_filter=_build_knowledge_filter(payload)
     )
     
-    # Verifica se esta é a primeira resposta do agente ANTES de salvar
-    # (verifica se não havia mensagens do agente na conversa antes desta)
-    old_agent_messages = [msg for msg in conversation.messages if msg.author.value == 2]
-    is_first_agent_response = len(old_agent_messages) == 0
+    await _persist_turn(conversation, turn_messages, api_key, conversations_repo, topics_repo)
+    # O resumo da conversa é atualizado depois que a resposta é enviada
+    background_tasks.add_task(_update_context_summary, conversation, turn_messages, api_key, conversations_repo)
     
-    # Salva as mensagens
-    await conversations_repo.save_messages(updated_conversation)
+    # Retorna a última mensagem (do agente)
+    return _to_message_dto(turn_messages[-1])
+
+
+@router.post("/conversations/{conversation_id}/messages/stream")
+async def post_message_stream(
+    conversation_id: str,
+    payload: CreateMessagePayload,
+    conversations_repo: ConversationsRepository = Depends(get_conversations_repo),
+    knowledge_repo: KnowledgeRepository = Depends(get_knowledge_repo),
+    agent_settings_repo: AgentSettingsRepository = Depends(get_agent_settings_repo),
+    topics_repo: TopicsRepository = Depends(get_topics_repo)
+):
+    """
+    Envia uma nova mensagem para o agente e transmite a resposta via Server-Sent Events.
     
-    # Classifica a conversa por tópico se for a primeira resposta do agente
-    if is_first_agent_response:
-        print(f"[TOPIC] Primeira resposta do agente detectada para conversa {conversation_id_uuid}")
-        # Busca a primeira mensagem do usuário e do agente na conversa atualizada
-        user_messages = [msg for msg in updated_conversation.messages if msg.author.value == 1]
-        agent_messages = [msg for msg in updated_conversation.messages if msg.author.value == 2]
+    Eventos emitidos, em ordem:
+    - `retrieval`: fontes que serão citadas (assim que a busca termina)
+    - `delta`: trechos de texto da resposta, à medida que o Gemini os gera
+    - `done`: IDs das mensagens do usuário e do agente
+    - `error`: falha durante a geração
+    
+    A persistência, a classificação de tópico e o resumo da conversa acontecem
+    depois que o stream fecha.
+    """
+    try:
+        conversation_id_uuid = ConversationId(uuid.UUID(conversation_id))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ID inválido")
+    
+    conversation = await conversations_repo.find_turn_context(conversation_id_uuid)
+    
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversa não encontrada")
+    
+    agent_instruction = await agent_settings_repo.get_instruction()
+    api_key = await get_gemini_api_key()
+    gemini_service = GeminiService(api_key)
+    embedding_generator = EmbeddingGenerator(api_key)
+    
+    # Preenchido pelo stream; lido pela tarefa de persistência após o fechamento
+    completed: dict = {}
+    
+    async def event_stream():
+        try:
+            knowledge = await retrieve_knowledge(
+                payload.content, embedding_generator, knowledge_repo, _build_knowledge_filter(payload)
+            )
+        except ValueError as e:
+            yield _sse_event("error", {"detail": str(e)})
+            return
+        prompt, cited_chunks = gemini_service.build_advice_prompt(
+            agent_instruction,
+            conversation.unsummarized_messages(),
+            knowledge,
+            payload.content,
+            conversation.context_summary
+        )
         
-        print(f"[TOPIC] Mensagens encontradas: {len(user_messages)} do usuário, {len(agent_messages)} do agente")
+        # As mensagens são criadas antes da geração para que as citações saiam no primeiro evento
+        user_message, agent_message = build_turn_messages(conversation, payload.content, "", cited_chunks)
+        citations = [cs.model_dump(mode="json") for cs in _to_message_dto(agent_message).cited_sources]
+        yield _sse_event("retrieval", {"cited_sources": citations})
         
-        if user_messages and agent_messages:
-            # Busca todos os tópicos existentes
-            existing_topics = await topics_repo.find_all()
-            existing_topic_names = [topic.name for topic in existing_topics]
-            print(f"[TOPIC] Tópicos existentes: {existing_topic_names}")
-            
-            # Classifica a conversa usando a primeira troca
-            user_query = user_messages[0].content
-            agent_response = agent_messages[0].content
-            print(f"[TOPIC] Classificando conversa. Query: {user_query[:100]}...")
-            
-            # Cria o classificador com a chave de API
-            topic_classifier = TopicClassifier(api_key)
-            
-            try:
-                topic_name = await topic_classifier.classify_conversation(
-                    user_query=user_query,
-                    agent_response=agent_response,
-                    existing_topics=existing_topic_names
-                )
-                print(f"[TOPIC] Tópico classificado: '{topic_name}'")
-                
-                # Busca ou cria o tópico
-                topic = await topics_repo.find_by_name(topic_name)
-                if not topic:
-                    print(f"[TOPIC] Criando novo tópico: '{topic_name}'")
-                    topic = await topics_repo.create(topic_name)
-                    print(f"[TOPIC] Tópico criado com ID: {topic.id}")
-                else:
-                    print(f"[TOPIC] Tópico já existe: {topic.name} (ID: {topic.id})")
-                
-                # Atualiza a conversa com o tópico
-                print(f"[TOPIC] Atualizando conversa {conversation_id_uuid} com tópico {topic.id}")
-                await conversations_repo.update_topic(conversation_id_uuid, topic.id)
-                print(f"[TOPIC] Conversa atualizada com sucesso")
-                
-                # Gera título e resumo básicos
-                title = user_query.split('\n')[0][:100]
-                summary = agent_response[:300] + ("..." if len(agent_response) > 300 else "")
-                await conversations_repo.update_summary_and_title(
-                    conversation_id_uuid,
-                    summary=summary,
-                    title=title
-                )
-                print(f"[TOPIC] Título e resumo atualizados")
-            except Exception as e:
-                # Em caso de erro na classificação, loga mas não interrompe o fluxo
-                print(f"[TOPIC] Erro ao classificar conversa por tópico: {e}")
-                import traceback
-                traceback.print_exc()
-    
-    # Retorna a última mensagem (do agente)
-    agent_message = updated_conversation.messages[-1]
+        parts: list[str] = []
+        try:
+            async for delta in gemini_service.stream_advice(prompt):
+                parts.append(delta)
+                yield _sse_event("delta", {"text": delta})
+        except ValueError as e:
+            yield _sse_event("error", {"detail": str(e)})
+            return
+        
+        agent_message = Message(
+            id=agent_message.id,
+            conversation_id=agent_message.conversation_id,
+            author=agent_message.author,
+            content="".join(parts),
+            cited_sources=agent_message.cited_sources,
+            created_at=agent_message.created_at
+        )
+        completed["messages"] = [user_message, agent_message]
+        yield _sse_event("done", {
+            "message_id": str(agent_message.id),
+            "user_message_id": str(user_message.id),
+        })
     
-    return MessageDTO(
-        id=agent_message.id,
-        conversation_id=agent_message.conversation_id,
-        author=agent_message.author.name,
-        content=agent_message.content,
-        cited_sources=[
-            CitedSourceDTO(
-                chunk_id=cs.chunk_id,
-                artifact_id=cs.artifact_id,
-                title=cs.title,
-                chunk_content_preview=cs.chunk_content_preview,
-                section_title=cs.section_title,
-                section_level=cs.section_level,
-                content_type=cs.content_type,
-                breadcrumbs=cs.breadcrumbs
+    async def persist_after_stream():
+        if "messages" in completed:
+            await _persist_turn(
+                conversation, completed["messages"], api_key, conversations_repo, topics_repo
             )
-            for cs in agent_message.cited_sources
-        ],
-        created_at=agent_message.created_at
+            await _update_context_summary(conversation, completed["messages"], api_key, conversations_repo)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(persist_after_stream)
     )
 
 
 @router.get("/conversations/{conversation_id}/topic", response_model=ConversationTopicDTO)
-async def get_conversation_topic(conversation_id: str):
+async def get_conversation_topic(
+    conversation_id: str,
+    conversations_repo: ConversationsRepository = Depends(get_conversations_repo),
+    topics_repo: TopicsRepository = Depends(get_topics_repo)
+):
     """Busca o tópico de uma conversa."""
     try:
         conversation_id_uuid = ConversationId(uuid.UUID(conversation_id))
     except ValueError:
         raise HTTPException(status_code=400, detail="ID inválido")
     
+    # Classificação em andamento neste processo: responde sem consultar o banco
+    job_status = topic_classification_worker.status(str(conversation_id_uuid))
+    if job_status in PENDING_STATUSES:
+        return ConversationTopicDTO(topic=None, is_processing=True, status=job_status)
+    
     # Busca a conversa para verificar se tem mensagens do agente
     conversation = await conversations_repo.find_by_id(conversation_id_uuid)
     
@@ -221,30 +253,161 @@ async def get_conversation_topic(conversation_id: str):
         # Se ainda não tem resposta do agente, não tem tópico ainda
         return ConversationTopicDTO(topic=None, is_processing=False)
     
-    # Busca o tópico no banco
-    topic = None
-    is_processing = False
-    
     try:
-        if SUPABASE_URL and SUPABASE_KEY:
-            supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-            conv_row = supabase.table("conversations").select("topic_id").eq("id", str(conversation_id_uuid)).execute()
-            
-            if conv_row.data and conv_row.data[0]:
-                topic_id_from_db = conv_row.data[0].get("topic_id")
-                
-                if topic_id_from_db:
-                    # Tópico já foi definido
-                    topic_id_uuid = TopicId(uuid.UUID(topic_id_from_db))
-                    topic_obj = await topics_repo.find_by_id(topic_id_uuid)
-                    if topic_obj:
-                        topic = topic_obj.name
-                else:
-                    # Tópico ainda não foi definido (processando)
-                    is_processing = True
+        topic_id = await conversations_repo.find_topic_id(conversation_id_uuid)
     except Exception:
         # Em caso de erro, assume que está processando
-        is_processing = True
+        return ConversationTopicDTO(topic=None, is_processing=True, status=job_status)
+    
+    if topic_id is None:
+        # Sem tópico: ainda processando, a menos que o job tenha esgotado as tentativas
+        is_processing = job_status != FAILED
+        return ConversationTopicDTO(topic=None, is_processing=is_processing, status=job_status)
     
-    return ConversationTopicDTO(topic=topic, is_processing=is_processing)
+    topic = await topics_repo.find_by_id(topic_id)
+    return ConversationTopicDTO(
+        topic=topic.name if topic else None,
+        is_processing=False,
+        status=job_status,
+    )
+
+
+def _to_message_dto(msg: Message) -> MessageDTO:
+    return MessageDTO(
+        id=msg.id,
+        conversation_id=msg.conversation_id,
+        author=msg.author.name,
+        content=msg.content,
+        cited_sources=[
+            CitedSourceDTO(
+                chunk_id=cs.chunk_id,
+                artifact_id=cs.artifact_id,
+                title=cs.title,
+                chunk_content_preview=cs.chunk_content_preview,
+                section_title=cs.section_title,
+                section_level=cs.section_level,
+                content_type=cs.content_type,
+                breadcrumbs=cs.breadcrumbs
+            )
+            for cs in msg.cited_sources
+        ],
+        created_at=msg.created_at
+    )
+
 
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _build_knowledge_filter(payload: CreateMessagePayload) -> KnowledgeFilter | None:
+    """Converte os filtros opcionais do payload em um filtro de domínio."""
+    if not payload.filters:
+        return None
+    return KnowledgeFilter(
+        tags=payload.filters.tags,
+        artifact_ids=[ArtifactId(artifact_id) for artifact_id in payload.filters.artifact_ids],
+        content_types=payload.filters.content_types,
+        section_prefixes=payload.filters.section_prefixes,
+    )
+
+
+async def _persist_turn(
+    conversation: Conversation,
+    turn_messages: list[Message],
+    api_key: str,
+    conversations_repo: ConversationsRepository,
+    topics_repo: TopicsRepository
+) -> None:
+    """Salva as mensagens da troca e agenda a classificação do tópico na primeira resposta do agente."""
+    # Verifica se esta é a primeira resposta do agente ANTES de salvar
+    # (verifica se não havia mensagens do agente na conversa antes desta; uma
+    # conversa com mensagens já resumidas nunca está na primeira troca)
+    old_agent_messages = [msg for msg in conversation.messages if msg.author.value == 2]
+    is_first_agent_response = conversation.message_offset == 0 and len(old_agent_messages) == 0
+    
+    # Salva apenas as mensagens novas (custo constante por troca)
+    await conversations_repo.save_messages(turn_messages)
+    
+    # Na primeira resposta do agente, grava o título e o resumo (lidos pelas listas de
+    # conversas) e agenda a classificação do tópico, que roda no worker em segundo plano
+    if is_first_agent_response:
+        updated_conversation = replace(conversation, messages=conversation.messages + turn_messages)
+        description = describe_first_exchange(updated_conversation.messages)
+        if description is not None:
+            title, summary = description
+            await conversations_repo.update_summary_and_title(conversation.id, summary=summary, title=title)
+        topic_classification_worker.enqueue(
+            str(updated_conversation.id),
+            lambda: _classify_conversation_topic(updated_conversation, api_key, conversations_repo, topics_repo)
+        )
+
+
+async def _update_context_summary(
+    conversation: Conversation,
+    turn_messages: list[Message],
+    api_key: str,
+    conversations_repo: ConversationsRepository
+) -> None:
+    """Incorpora ao resumo as mensagens que saíram da janela de trocas recentes."""
+    try:
+        summarized = await summarize_conversation(
+            conversation,
+            ConversationSummarizer(api_key),
+            recent_messages=2 * CONVERSATION_RECENT_TURNS,
+            new_messages=turn_messages
+        )
+        if summarized is None:
+            return
+        await conversations_repo.update_context_summary(
+            summarized.id,
+            summarized.context_summary,
+            summarized.summarized_message_count
+        )
+    except Exception:
+        # Sem resumo atualizado, o próximo prompt usa o resumo anterior
+        logger.warning("Erro ao atualizar o resumo da conversa %s", conversation.id, exc_info=True)
+
+
+async def _classify_conversation_topic(
+    updated_conversation: Conversation,
+    api_key: str,
+    conversations_repo: ConversationsRepository,
+    topics_repo: TopicsRepository
+) -> None:
+    """
+    Classifica a conversa em um tópico usando a primeira troca de mensagens.
+    
+    Executado pelo worker de classificação: erros sobem para o worker, que repete o job.
+    """
+    conversation_id_uuid = updated_conversation.id
+    # Busca a primeira mensagem do usuário e do agente na conversa atualizada
+    user_messages = [msg for msg in updated_conversation.messages if msg.author.value == 1]
+    agent_messages = [msg for msg in updated_conversation.messages if msg.author.value == 2]
+    
+    if not user_messages or not agent_messages:
+        logger.debug(
+            "Conversa %s sem a primeira troca completa (%d do usuário, %d do agente)",
+            conversation_id_uuid, len(user_messages), len(agent_messages)
+        )
+        return
+    
+    # Classifica a conversa usando a primeira troca
+    user_query = user_messages[0].content
+    agent_response = agent_messages[0].content
+    logger.debug("Classificando o tópico da conversa %s", conversation_id_uuid)
+    
+    # O embedding da pergunta escolhe o tópico pelo centroide; o LLM só é chamado
+    # nos casos ambíguos ou para dar nome a um tópico novo
+    query_embedding = await EmbeddingGenerator(api_key).generate_query_embedding(user_query)
+    topic_classifier = CentroidTopicClassifier(TopicClassifier(api_key), topics_repo)
+    topic = await topic_classifier.classify(
+        user_query=user_query,
+        agent_response=agent_response,
+        query_embedding=query_embedding
+    )
+    
+    # Atualiza a conversa com o tópico; o centroide só recebe o embedding depois
+    # disso, para que uma falha aqui (e a nova tentativa do worker) não o conte duas vezes
+    await conversations_repo.update_topic(conversation_id_uuid, topic.id)
+    await topic_classifier.record_assignment(topic, query_embedding)
+    logger.info("Conversa %s classificada no tópico '%s' (%s)", conversation_id_uuid, topic.name, topic.id)
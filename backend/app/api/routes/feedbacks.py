@@ -1,28 +1,35 @@
 """Rotas para gerenciamento de Feedbacks."""
-from fastapi import APIRouter, HTTPException
-from app.api.dto import PendingFeedbackDTO, SubmitFeedbackPayload, BatchFeedbackRequestDTO
-from app.domain.feedbacks.workflows import submit_feedback, approve_feedback, reject_feedback
-from app.domain.feedbacks.types import FeedbackStatus
+from fastapi import APIRouter, Depends, HTTPException
+from app.api.dependencies import PageParams, get_feedbacks_repo, get_learnings_repo, get_page_params
+from app.api.dto import (
+    PendingFeedbackDTO,
+    SubmitFeedbackPayload,
+    BatchFeedbackRequestDTO,
+    BatchApproveFeedbacksPayload,
+    BatchApproveFeedbackItemDTO,
+    LearningDTO,
+    PageDTO,
+)
+from app.domain.feedbacks.workflows import submit_feedback, approve_feedback, approve_feedbacks, reject_feedback
+from app.domain.feedbacks.types import FeedbackStatus, FeedbackWithPreview
 from app.domain.shared_kernel import FeedbackId, MessageId
 from app.infrastructure.persistence.feedbacks_repo import FeedbacksRepository
-from app.infrastructure.persistence.conversations_repo import ConversationsRepository
 from app.infrastructure.persistence.learnings_repo import LearningsRepository
-from app.domain.learnings.workflows import synthesize_learning_from_feedback
+from app.domain.learnings.workflows import synthesize_learning_from_feedback, synthesize_learnings_from_feedbacks
 from app.infrastructure.ai.gemini_service import GeminiService, get_gemini_api_key
 from app.infrastructure.ai.embedding_service import EmbeddingGenerator
-from app.infrastructure.persistence.config import GEMINI_API_KEY
+from app.infrastructure.persistence.config import GEMINI_API_KEY, FEEDBACK_BATCH_MAX_ITEMS
 import uuid
 
 router = APIRouter()
 
-# Inicializa repositórios
-feedbacks_repo = FeedbacksRepository()
-conversations_repo = ConversationsRepository()
-learnings_repo = LearningsRepository()
-
 
 @router.post("/messages/{message_id}/feedback", response_model=PendingFeedbackDTO, status_code=201)
-async def submit_feedback_route(message_id: str, payload: SubmitFeedbackPayload):
+async def submit_feedback_route(
+    message_id: str,
+    payload: SubmitFeedbackPayload,
+    feedbacks_repo: FeedbacksRepository = Depends(get_feedbacks_repo)
+):
     """Envia feedback sobre uma mensagem do agente."""
     try:
         message_id_uuid = MessageId(uuid.UUID(message_id))
@@ -50,49 +57,90 @@ async def submit_feedback_route(message_id: str, payload: SubmitFeedbackPayload)
     )
 
 
-@router.get("/feedbacks/pending", response_model=list[PendingFeedbackDTO])
-async def list_pending_feedbacks():
-    """Lista todos os feedbacks pendentes de moderação."""
-    feedbacks = await feedbacks_repo.find_pending()
+@router.get("/feedbacks/pending", response_model=PageDTO[PendingFeedbackDTO])
+async def list_pending_feedbacks(
+    feedbacks_repo: FeedbacksRepository = Depends(get_feedbacks_repo),
+    page: PageParams = Depends(get_page_params)
+):
+    """Lista uma página de feedbacks pendentes de moderação."""
+    feedbacks = await feedbacks_repo.find_pending_with_preview(page.cursor, page.limit)
+    return PageDTO(items=[_to_moderation_dto(item) for item in feedbacks.items], next_cursor=feedbacks.next_cursor)
+
+
+@router.post("/feedbacks/batch/approve", response_model=list[BatchApproveFeedbackItemDTO])
+async def approve_feedbacks_batch_route(
+    payload: BatchApproveFeedbacksPayload,
+    feedbacks_repo: FeedbacksRepository = Depends(get_feedbacks_repo),
+    learnings_repo: LearningsRepository = Depends(get_learnings_repo)
+):
+    """
+    Aprova vários feedbacks pendentes e sintetiza seus aprendizados em lote.
     
-    # Adiciona preview das mensagens
-    feedbacks_with_preview = []
-    for feedback in feedbacks:
-        # Busca a mensagem para obter preview
-        message_preview = None
+    Os aprendizados são sintetizados em uma única chamada ao LLM, com um único lote
+    de embeddings e uma única escrita. O resultado informa o status de cada item;
+    feedbacks cujo aprendizado não pôde ser gerado voltam a ficar pendentes.
+    """
+    if not payload.feedback_ids:
+        raise HTTPException(status_code=400, detail="Nenhum feedback informado")
+    if len(payload.feedback_ids) > FEEDBACK_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"No máximo {FEEDBACK_BATCH_MAX_ITEMS} feedbacks por lote"
+        )
+    
+    feedback_ids = [FeedbackId(feedback_id) for feedback_id in payload.feedback_ids]
+    approved, skipped = await approve_feedbacks(feedback_ids, feedbacks_repo)
+    
+    learnings_by_feedback = {}
+    failures: dict[FeedbackId, str] = {}
+    if approved:
         try:
-            # Busca a mensagem no banco
-            from app.infrastructure.persistence.config import SUPABASE_URL, SUPABASE_KEY
-            from supabase import create_client
-            
-            supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-            message_result = supabase.table("messages").select("content").eq("id", str(feedback.message_id)).execute()
-            
-            if message_result.data:
-                message_content = message_result.data[0].get("content", "")
-                # Limita o preview para 200 caracteres
-                message_preview = message_content[:200] + "..." if len(message_content) > 200 else message_content
-        except Exception:
-            # Se não conseguir buscar, usa o feedback_text como fallback
-            message_preview = feedback.feedback_text[:100] + "..." if len(feedback.feedback_text) > 100 else feedback.feedback_text
-        
-        feedbacks_with_preview.append(
-            PendingFeedbackDTO(
-                id=feedback.id,
-                message_id=feedback.message_id,
-                feedback_text=feedback.feedback_text,
-                status=feedback.status.name,
-                created_at=feedback.created_at,
-                message_preview=message_preview,
-                feedback_type=feedback.feedback_type
+            api_key = await get_gemini_api_key()
+            learnings, missing = await synthesize_learnings_from_feedbacks(
+                feedbacks=approved,
+                llm_service=GeminiService(api_key),
+                embedding_generator=EmbeddingGenerator(api_key),
+                learning_repo=learnings_repo
             )
-        )
+            learnings_by_feedback = {learning.source_feedback_id: learning for learning in learnings}
+            failures = {feedback.id: "Aprendizado não retornado pelo modelo" for feedback in missing}
+        except Exception as e:
+            failures = {feedback.id: str(e) for feedback in approved}
+        
+        if failures:
+            # Sem aprendizado, a aprovação é desfeita para que o item possa ser reenviado
+            await feedbacks_repo.update_status_many(list(failures), FeedbackStatus.PENDING)
+    
+    results = []
+    for feedback_id in dict.fromkeys(feedback_ids):
+        if feedback_id in skipped:
+            results.append(BatchApproveFeedbackItemDTO(feedback_id=feedback_id, status=skipped[feedback_id].upper()))
+        elif feedback_id in failures:
+            results.append(BatchApproveFeedbackItemDTO(
+                feedback_id=feedback_id, status="FAILED", error=failures[feedback_id]
+            ))
+        else:
+            learning = learnings_by_feedback[feedback_id]
+            results.append(BatchApproveFeedbackItemDTO(
+                feedback_id=feedback_id,
+                status="APPROVED",
+                learning=LearningDTO(
+                    id=learning.id,
+                    content=learning.content,
+                    source_feedback_id=learning.source_feedback_id,
+                    created_at=learning.created_at
+                )
+            ))
     
-    return feedbacks_with_preview
+    return results
 
 
 @router.post("/feedbacks/{feedback_id}/approve")
-async def approve_feedback_route(feedback_id: str):
+async def approve_feedback_route(
+    feedback_id: str,
+    feedbacks_repo: FeedbacksRepository = Depends(get_feedbacks_repo),
+    learnings_repo: LearningsRepository = Depends(get_learnings_repo)
+):
     """Aprova um feedback pendente e sintetiza um aprendizado."""
     try:
         feedback_id_uuid = FeedbackId(uuid.UUID(feedback_id))
@@ -118,8 +166,6 @@ async def approve_feedback_route(feedback_id: str):
         learning_repo=learnings_repo
     )
     
-    from app.api.dto import LearningDTO
-    
     return {
         "feedback": PendingFeedbackDTO(
             id=approved_feedback.id,
@@ -139,7 +185,10 @@ async def approve_feedback_route(feedback_id: str):
 
 
 @router.post("/feedbacks/{feedback_id}/reject", response_model=PendingFeedbackDTO)
-async def reject_feedback_route(feedback_id: str):
+async def reject_feedback_route(
+    feedback_id: str,
+    feedbacks_repo: FeedbacksRepository = Depends(get_feedbacks_repo)
+):
     """Rejeita um feedback pendente."""
     try:
         feedback_id_uuid = FeedbackId(uuid.UUID(feedback_id))
@@ -161,49 +210,21 @@ async def reject_feedback_route(feedback_id: str):
     )
 
 
-@router.get("/feedbacks/reviewed", response_model=list[PendingFeedbackDTO])
-async def list_reviewed_feedbacks():
-    """Lista todos os feedbacks revisados (aprovados ou rejeitados)."""
-    feedbacks = await feedbacks_repo.find_reviewed()
-    
-    # Adiciona preview das mensagens
-    feedbacks_with_preview = []
-    for feedback in feedbacks:
-        # Busca a mensagem para obter preview
-        message_preview = None
-        try:
-            # Busca a mensagem no banco
-            from app.infrastructure.persistence.config import SUPABASE_URL, SUPABASE_KEY
-            from supabase import create_client
-            
-            supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-            message_result = supabase.table("messages").select("content").eq("id", str(feedback.message_id)).execute()
-            
-            if message_result.data:
-                message_content = message_result.data[0].get("content", "")
-                # Limita o preview para 200 caracteres
-                message_preview = message_content[:200] + "..." if len(message_content) > 200 else message_content
-        except Exception:
-            # Se não conseguir buscar, usa o feedback_text como fallback
-            message_preview = feedback.feedback_text[:100] + "..." if len(feedback.feedback_text) > 100 else feedback.feedback_text
-        
-        feedbacks_with_preview.append(
-            PendingFeedbackDTO(
-                id=feedback.id,
-                message_id=feedback.message_id,
-                feedback_text=feedback.feedback_text,
-                status=feedback.status.name,
-                created_at=feedback.created_at,
-                message_preview=message_preview,
-                feedback_type=feedback.feedback_type
-            )
-        )
-    
-    return feedbacks_with_preview
+@router.get("/feedbacks/reviewed", response_model=PageDTO[PendingFeedbackDTO])
+async def list_reviewed_feedbacks(
+    feedbacks_repo: FeedbacksRepository = Depends(get_feedbacks_repo),
+    page: PageParams = Depends(get_page_params)
+):
+    """Lista uma página de feedbacks revisados (aprovados ou rejeitados)."""
+    feedbacks = await feedbacks_repo.find_reviewed_with_preview(page.cursor, page.limit)
+    return PageDTO(items=[_to_moderation_dto(item) for item in feedbacks.items], next_cursor=feedbacks.next_cursor)
 
 
 @router.get("/messages/{message_id}/conversation_id")
-async def get_conversation_id_by_message_id(message_id: str):
+async def get_conversation_id_by_message_id(
+    message_id: str,
+    feedbacks_repo: FeedbacksRepository = Depends(get_feedbacks_repo)
+):
     """Busca o conversation_id a partir de um message_id."""
     try:
         message_id_uuid = MessageId(uuid.UUID(message_id))
@@ -219,7 +240,10 @@ async def get_conversation_id_by_message_id(message_id: str):
 
 
 @router.get("/messages/{message_id}/feedback", response_model=PendingFeedbackDTO | None)
-async def get_feedback_by_message_id(message_id: str):
+async def get_feedback_by_message_id(
+    message_id: str,
+    feedbacks_repo: FeedbacksRepository = Depends(get_feedbacks_repo)
+):
     """Busca o feedback de uma mensagem específica."""
     try:
         message_id_uuid = MessageId(uuid.UUID(message_id))
@@ -243,7 +267,11 @@ async def get_feedback_by_message_id(message_id: str):
 
 
 @router.put("/feedbacks/{feedback_id}", response_model=PendingFeedbackDTO)
-async def update_feedback_route(feedback_id: str, payload: SubmitFeedbackPayload):
+async def update_feedback_route(
+    feedback_id: str,
+    payload: SubmitFeedbackPayload,
+    feedbacks_repo: FeedbacksRepository = Depends(get_feedbacks_repo)
+):
     """Atualiza um feedback existente."""
     try:
         feedback_id_uuid = FeedbackId(uuid.UUID(feedback_id))
@@ -272,7 +300,10 @@ async def update_feedback_route(feedback_id: str, payload: SubmitFeedbackPayload
 
 
 @router.delete("/feedbacks/{feedback_id}", status_code=204)
-async def delete_feedback_route(feedback_id: str):
+async def delete_feedback_route(
+    feedback_id: str,
+    feedbacks_repo: FeedbacksRepository = Depends(get_feedbacks_repo)
+):
     """Deleta um feedback."""
     try:
         feedback_id_uuid = FeedbackId(uuid.UUID(feedback_id))
@@ -289,7 +320,10 @@ async def delete_feedback_route(feedback_id: str):
 
 
 @router.post("/messages/feedbacks/batch")
-async def get_feedbacks_by_message_ids(payload: BatchFeedbackRequestDTO):
+async def get_feedbacks_by_message_ids(
+    payload: BatchFeedbackRequestDTO,
+    feedbacks_repo: FeedbacksRepository = Depends(get_feedbacks_repo)
+):
     """
     Busca feedbacks para múltiplas mensagens de uma vez.
     Retorna um dicionário mapeando message_id para feedback (ou null se não houver).
@@ -318,4 +352,17 @@ async def get_feedbacks_by_message_ids(payload: BatchFeedbackRequestDTO):
         else:
             result[msg_id] = None
     
-    return result
\ No newline at end of file
+    return result
+
+
+def _to_moderation_dto(item: FeedbackWithPreview) -> PendingFeedbackDTO:
+    feedback = item.feedback
+    return PendingFeedbackDTO(
+        id=feedback.id,
+        message_id=feedback.message_id,
+        feedback_text=feedback.feedback_text,
+        status=feedback.status.name,
+        created_at=feedback.created_at,
+        message_preview=item.message_preview,
+        feedback_type=feedback.feedback_type
+    )
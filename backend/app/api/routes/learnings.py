@@ -1,26 +1,30 @@
 """Rotas para gerenciamento de Aprendizados."""
-from fastapi import APIRouter
-from app.api.dto import LearningDTO
+from fastapi import APIRouter, Depends
+from app.api.dto import LearningDTO, PageDTO
+from app.api.dependencies import PageParams, get_learnings_repo, get_page_params
 from app.infrastructure.persistence.learnings_repo import LearningsRepository
 
 router = APIRouter()
 
-# Inicializa serviços
-learnings_repo = LearningsRepository()
 
-
-@router.get("/learnings", response_model=list[LearningDTO])
-async def list_learnings():
-    """Lista todos os Aprendizados."""
-    learnings = await learnings_repo.find_all()
+@router.get("/learnings", response_model=PageDTO[LearningDTO])
+async def list_learnings(
+    learnings_repo: LearningsRepository = Depends(get_learnings_repo),
+    page: PageParams = Depends(get_page_params)
+):
+    """Lista uma página de Aprendizados (mais recentes primeiro)."""
+    learnings = await learnings_repo.find_page(page.cursor, page.limit)
     
-    return [
-        LearningDTO(
-            id=learning.id,
-            content=learning.content,
-            source_feedback_id=learning.source_feedback_id,
-            created_at=learning.created_at
-        )
-        for learning in learnings
-    ]
+    return PageDTO(
+        items=[
+            LearningDTO(
+                id=learning.id,
+                content=learning.content,
+                source_feedback_id=learning.source_feedback_id,
+                created_at=learning.created_at
+            )
+            for learning in learnings.items
+        ],
+        next_cursor=learnings.next_cursor
+    )
 
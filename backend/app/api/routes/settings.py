@@ -1,32 +1,36 @@
 """Rotas para gerenciamento de Configurações."""
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from app.api.dependencies import get_settings_repo
 from app.infrastructure.persistence.settings_repo import SettingsRepository
+from app.infrastructure.ai.gemini_service import gemini_api_key_cache
 
 router = APIRouter()
 
-# Inicializa repositório
-settings_repo = SettingsRepository()
-
 
 class GeminiApiKeyPayload(BaseModel):
     api_key: str
 
 
 @router.get("/settings")
-async def get_settings():
+async def get_settings(settings_repo: SettingsRepository = Depends(get_settings_repo)):
     """Retorna o status das configurações."""
     custom_api_key = await settings_repo.get_custom_gemini_api_key()
     return {"hasCustomApiKey": bool(custom_api_key)}
 
 
 @router.put("/settings/gemini-api-key")
-async def save_gemini_api_key(payload: GeminiApiKeyPayload):
+async def save_gemini_api_key(
+    payload: GeminiApiKeyPayload,
+    settings_repo: SettingsRepository = Depends(get_settings_repo)
+):
     """Salva ou remove a chave de API personalizada do Gemini."""
     if payload.api_key.strip():
         await settings_repo.save_custom_gemini_api_key(payload.api_key.strip())
+        gemini_api_key_cache.invalidate()
         return {"message": "Chave de API salva com sucesso"}
     else:
         await settings_repo.remove_custom_gemini_api_key()
+        gemini_api_key_cache.invalidate()
         return {"message": "Chave de API removida com sucesso"}
 
@@ -1,5 +1,6 @@
 """Tipos de dados do domínio de Artefatos."""
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from datetime import datetime
 from enum import Enum, auto
 from typing import Optional
 from app.domain.shared_kernel import ArtifactId, ChunkId, Embedding
@@ -44,3 +45,33 @@ class Artifact:
     source_url: Optional[str] = None  # Link para o PDF no Supabase Storage
     original_content: Optional[str] = None  # Conteúdo original quando texto puro
 
+
+# Modelo de leitura da listagem: só os campos exibidos no card do artefato
+@dataclass(frozen=True)
+class ArtifactCard:
+    """Resumo de um artefato para listagens (sem chunks nem conteúdo)."""
+    id: ArtifactId
+    title: str
+    source_type: ArtifactSourceType
+    created_at: datetime
+    description: Optional[str] = None
+    tags: list[str] = field(default_factory=list)
+    color: Optional[str] = None
+    source_url: Optional[str] = None
+
+
+# Value Object que restringe a busca RAG a um subconjunto dos chunks
+@dataclass(frozen=True)
+class KnowledgeFilter:
+    """
+    Filtros de metadados aplicados antes da busca por similaridade.
+
+    Valores de uma mesma dimensão são combinados com OU; dimensões diferentes, com E.
+    """
+    tags: list[str] = field(default_factory=list)
+    artifact_ids: list[ArtifactId] = field(default_factory=list)
+    content_types: list[str] = field(default_factory=list)
+    section_prefixes: list[str] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not (self.tags or self.artifact_ids or self.content_types or self.section_prefixes)
@@ -44,4 +44,25 @@ class Conversation:
     id: ConversationId
     messages: list[Message]
     created_at: datetime
+    # Resumo acumulado das mensagens mais antigas (as `summarized_message_count` primeiras)
+    context_summary: str | None = None
+    summarized_message_count: int = 0
+    # Mensagens anteriores a `messages` que não foram carregadas: ao continuar a conversa
+    # basta o resumo e as mensagens que ele ainda não cobre (nunca passa de
+    # `summarized_message_count`)
+    message_offset: int = 0
 
+    def unsummarized_messages(self) -> list[Message]:
+        """Mensagens que ainda não estão cobertas pelo resumo da conversa."""
+        return self.messages[self.summarized_message_count - self.message_offset:]
+
+
+# Modelo de leitura das listas de conversas
+@dataclass(frozen=True)
+class ConversationSummary:
+    """Título e resumo gravados de uma conversa, com o nome do seu tópico."""
+    id: ConversationId
+    title: str
+    summary: str
+    topic_name: str | None
+    created_at: datetime
@@ -1,14 +1,21 @@
 """Workflows do domínio de Conversas."""
-from typing import Protocol
+from typing import Iterable, Protocol
+from dataclasses import replace
+from itertools import chain, islice
 from datetime import datetime
 from app.domain.conversations.types import Conversation, Message, Author, CitedSource
-from app.domain.artifacts.types import ArtifactChunk
+from app.domain.artifacts.types import ArtifactChunk, KnowledgeFilter
 from app.domain.learnings.types import Learning
 from app.domain.agent.types import AgentInstruction
 from app.domain.shared_kernel import ConversationId, MessageId
 import uuid
 
 
+# Tamanho do título e do resumo gravados a partir da primeira troca
+TITLE_MAX_CHARS = 100
+SUMMARY_MAX_CHARS = 300
+
+
 # --- Interfaces de Dependência (Protocolos) ---
 
 class RelevantKnowledge(Protocol):
@@ -19,8 +26,13 @@ class RelevantKnowledge(Protocol):
 
 class KnowledgeRepository(Protocol):
     """Interface para buscar conhecimento relevante (RAG)."""
-    async def find_relevant_knowledge(self, user_query: str, embedding: list[float]) -> RelevantKnowledge:
-        """Busca conhecimento relevante usando busca vetorial."""
+    async def find_relevant_knowledge(
+        self,
+        user_query: str,
+        embedding: list[float],
+        knowledge_filter: KnowledgeFilter | None = None
+    ) -> RelevantKnowledge:
+        """Busca conhecimento relevante usando busca vetorial, opcionalmente filtrada por metadados."""
         ...
 
 
@@ -31,7 +43,8 @@ class LLMService(Protocol):
         instruction: AgentInstruction,
         conversation_history: list[Message],
         knowledge: RelevantKnowledge,
-        user_query: str
+        user_query: str,
+        conversation_summary: str | None = None
     ) -> tuple[str, list[ArtifactChunk]]:
         """
         Gera conselho cultural baseado no contexto.
@@ -42,45 +55,54 @@ class LLMService(Protocol):
         ...
 
 
+class ConversationSummarizer(Protocol):
+    """Interface para resumir incrementalmente uma conversa."""
+    async def summarize(self, previous_summary: str | None, messages: list[Message]) -> str:
+        """Incorpora as mensagens ao resumo anterior e retorna o novo resumo."""
+        ...
+
+
 class EmbeddingGenerator(Protocol):
     """Interface para geração de embeddings."""
     def generate(self, text: str) -> list[float]:
         """Gera um embedding para um texto."""
         ...
+    
+    async def generate_query_embedding(self, text: str) -> list[float]:
+        """Gera o embedding de uma consulta do usuário."""
+        ...
 
 
 # --- Assinatura do Workflow Principal ---
 
-async def continue_conversation(
-    conversation: Conversation,
+async def retrieve_knowledge(
     user_query: str,
     embedding_generator: EmbeddingGenerator,
     knowledge_repo: KnowledgeRepository,
-    llm_service: LLMService,
-    agent_instruction: AgentInstruction
-) -> Conversation:
+    knowledge_filter: KnowledgeFilter | None = None
+) -> RelevantKnowledge:
     """
-    Orquestra a continuação de uma conversa, gerando a resposta do agente.
-    1. Busca conhecimento relevante.
-    2. Constrói o prompt.
-    3. Chama o LLM.
-    4. Adiciona a mensagem do usuário e a resposta do agente à conversa.
-    5. Retorna o novo estado da conversa.
+    Busca o conhecimento relevante para a pergunta do usuário.
+    1. Gera o embedding da consulta.
+    2. Busca chunks e aprendizados (restritos por `knowledge_filter`, se informado).
     """
-    # Gera embedding para a consulta do usuário
-    query_embedding = embedding_generator.generate(user_query)
-    
-    # Busca conhecimento relevante
-    knowledge = await knowledge_repo.find_relevant_knowledge(user_query, query_embedding)
+    query_embedding = await embedding_generator.generate_query_embedding(user_query)
     
-    # Gera a resposta do agente
-    agent_content, cited_chunks = await llm_service.generate_advice(
-        instruction=agent_instruction,
-        conversation_history=conversation.messages,
-        knowledge=knowledge,
-        user_query=user_query
+    return await knowledge_repo.find_relevant_knowledge(
+        user_query, query_embedding, knowledge_filter=knowledge_filter
     )
-    
+
+
+def build_turn_messages(
+    conversation: Conversation,
+    user_query: str,
+    agent_content: str,
+    cited_chunks: list[ArtifactChunk]
+) -> tuple[Message, Message]:
+    """
+    Cria as mensagens de uma troca: a pergunta do usuário e a resposta do agente
+    com as fontes citadas.
+    """
     # Cria mensagem do usuário
     user_message = Message(
         id=MessageId(uuid.uuid4()),
@@ -117,13 +139,103 @@ async def continue_conversation(
         created_at=datetime.utcnow()
     )
     
-    # Adiciona as mensagens à conversa
-    new_messages = conversation.messages + [user_message, agent_message]
+    return user_message, agent_message
+
+
+async def continue_conversation(
+    conversation: Conversation,
+    user_query: str,
+    embedding_generator: EmbeddingGenerator,
+    knowledge_repo: KnowledgeRepository,
+    llm_service: LLMService,
+    agent_instruction: AgentInstruction,
+    knowledge_filter: KnowledgeFilter | None = None
+) -> list[Message]:
+    """
+    Orquestra a continuação de uma conversa, gerando a resposta do agente.
+    1. Busca conhecimento relevante (restrito por `knowledge_filter`, se informado).
+    2. Constrói o prompt.
+    3. Chama o LLM.
+    4. Retorna apenas as mensagens novas da troca: a do usuário e a resposta do agente.
+    
+    A conversa não é copiada: quem chama persiste só as mensagens novas.
+    """
+    # Busca conhecimento relevante
+    knowledge = await retrieve_knowledge(
+        user_query, embedding_generator, knowledge_repo, knowledge_filter
+    )
+    
+    # Gera a resposta do agente (o resumo cobre as mensagens mais antigas)
+    agent_content, cited_chunks = await llm_service.generate_advice(
+        instruction=agent_instruction,
+        conversation_history=conversation.unsummarized_messages(),
+        knowledge=knowledge,
+        user_query=user_query,
+        conversation_summary=conversation.context_summary
+    )
     
-    # Retorna a nova conversa
-    return Conversation(
-        id=conversation.id,
-        messages=new_messages,
-        created_at=conversation.created_at
+    user_message, agent_message = build_turn_messages(
+        conversation, user_query, agent_content, cited_chunks
     )
+    
+    return [user_message, agent_message]
 
+
+async def summarize_conversation(
+    conversation: Conversation,
+    summarizer: ConversationSummarizer,
+    recent_messages: int,
+    new_messages: list[Message] | None = None
+) -> Conversation | None:
+    """
+    Atualiza o resumo acumulado da conversa.
+    
+    As mensagens anteriores às `recent_messages` mais recentes que ainda não estão
+    no resumo são incorporadas a ele. `new_messages` são as mensagens da troca que
+    ainda não estão em `conversation.messages`. Retorna None quando não há nada a resumir.
+    
+    Funciona também com a conversa carregada a partir de `message_offset`: as
+    posições são contadas desde o início da conversa.
+    """
+    new_messages = new_messages or []
+    offset = conversation.message_offset
+    pending_end = offset + len(conversation.messages) + len(new_messages) - recent_messages
+    if pending_end <= conversation.summarized_message_count:
+        return None
+    
+    pending = list(islice(
+        chain(conversation.messages, new_messages),
+        conversation.summarized_message_count - offset,
+        pending_end - offset
+    ))
+    summary = await summarizer.summarize(conversation.context_summary, pending)
+    
+    return replace(
+        conversation,
+        context_summary=summary,
+        summarized_message_count=pending_end
+    )
+
+
+def describe_first_exchange(messages: Iterable[Message]) -> tuple[str, str] | None:
+    """
+    Título e resumo da conversa a partir da primeira troca.
+    
+    O título é a primeira linha da primeira pergunta e o resumo é o início da primeira
+    resposta do agente. Retorna None enquanto a conversa não tem as duas mensagens.
+    """
+    user_message = agent_message = None
+    for message in messages:
+        if message.author == Author.USER and user_message is None:
+            user_message = message
+        elif message.author == Author.AGENT and agent_message is None:
+            agent_message = message
+        if user_message and agent_message:
+            break
+    if user_message is None or agent_message is None:
+        return None
+    
+    title = user_message.content.split('\n')[0][:TITLE_MAX_CHARS]
+    content = agent_message.content
+    summary = content[:SUMMARY_MAX_CHARS] + ("..." if len(content) > SUMMARY_MAX_CHARS else "")
+    return title, summary
@@ -27,3 +27,11 @@ class PendingFeedback:
     created_at: datetime
     feedback_type: FeedbackType = None  # POSITIVE (thumbs up) ou NEGATIVE (thumbs down)
 
+
+
+# Modelo de leitura das listas de moderação
+@dataclass(frozen=True)
+class FeedbackWithPreview:
+    """Feedback acompanhado do início da mensagem avaliada."""
+    feedback: PendingFeedback
+    message_preview: str | None
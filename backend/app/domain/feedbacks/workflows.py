@@ -25,6 +25,19 @@ class FeedbackRepository(Protocol):
     async def update_status(self, feedback_id: FeedbackId, status: FeedbackStatus) -> PendingFeedback:
         """Atualiza o status de um feedback."""
         ...
+    
+    async def find_by_ids(self, feedback_ids: list[FeedbackId]) -> dict[FeedbackId, PendingFeedback]:
+        """Busca vários feedbacks de uma vez."""
+        ...
+    
+    async def update_status_many(
+        self,
+        feedback_ids: list[FeedbackId],
+        status: FeedbackStatus,
+        only_pending: bool = False
+    ) -> list[PendingFeedback]:
+        """Atualiza o status de vários feedbacks e retorna os que foram alterados."""
+        ...
 
 
 # --- Assinaturas dos Workflows ---
@@ -84,3 +97,43 @@ async def reject_feedback(
     
     return await feedback_repo.update_status(feedback_id, FeedbackStatus.REJECTED)
 
+
+async def approve_feedbacks(
+    feedback_ids: list[FeedbackId],
+    feedback_repo: FeedbackRepository
+) -> tuple[list[PendingFeedback], dict[FeedbackId, str]]:
+    """
+    Aprova vários feedbacks de uma vez, com uma leitura e uma escrita.
+    
+    Só feedbacks ainda pendentes são aprovados; a atualização é condicionada ao
+    status PENDING, então um feedback aprovado em paralelo por outro moderador não
+    é aprovado duas vezes.
+    
+    Returns:
+        Os feedbacks aprovados e, para os demais, o motivo ("not_found" ou
+        "already_processed")
+    """
+    found = await feedback_repo.find_by_ids(feedback_ids)
+    
+    skipped: dict[FeedbackId, str] = {}
+    pending_ids: list[FeedbackId] = []
+    for feedback_id in dict.fromkeys(feedback_ids):
+        feedback = found.get(feedback_id)
+        if feedback is None:
+            skipped[feedback_id] = "not_found"
+        elif feedback.status != FeedbackStatus.PENDING:
+            skipped[feedback_id] = "already_processed"
+        else:
+            pending_ids.append(feedback_id)
+    
+    approved = []
+    if pending_ids:
+        approved = await feedback_repo.update_status_many(
+            pending_ids, FeedbackStatus.APPROVED, only_pending=True
+        )
+    approved_ids = {feedback.id for feedback in approved}
+    for feedback_id in pending_ids:
+        if feedback_id not in approved_ids:
+            skipped[feedback_id] = "already_processed"
+    
+    return approved, skipped
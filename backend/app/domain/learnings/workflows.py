@@ -1,5 +1,6 @@
 """Workflows do domínio de Aprendizados."""
 from typing import Protocol
+import asyncio
 from datetime import datetime
 from app.domain.learnings.types import Learning
 from app.domain.feedbacks.types import PendingFeedback
@@ -14,6 +15,14 @@ class LLMService(Protocol):
     async def synthesize_learning(self, feedback_text: str) -> str:
         """Sintetiza um aprendizado a partir de um texto de feedback."""
         ...
+    
+    async def synthesize_learnings(self, feedback_texts: list[str]) -> list[str | None]:
+        """
+        Sintetiza aprendizados para vários feedbacks em uma única chamada.
+        
+        O resultado segue a ordem da entrada; None indica um item sem aprendizado.
+        """
+        ...
 
 
 class EmbeddingGenerator(Protocol):
@@ -21,6 +30,10 @@ class EmbeddingGenerator(Protocol):
     def generate(self, text: str) -> list[float]:
         """Gera um embedding para um texto."""
         ...
+    
+    def generate_batch(self, texts: list[str]) -> list[list[float]]:
+        """Gera embeddings para vários textos, na mesma ordem da entrada."""
+        ...
 
 
 class LearningRepository(Protocol):
@@ -29,6 +42,10 @@ class LearningRepository(Protocol):
         """Salva um aprendizado."""
         ...
     
+    async def save_many(self, learnings: list[Learning]) -> list[Learning]:
+        """Salva vários aprendizados em uma única escrita."""
+        ...
+    
     async def find_all(self) -> list[Learning]:
         """Busca todos os aprendizados."""
         ...
@@ -52,8 +69,9 @@ async def synthesize_learning_from_feedback(
     # Sintetiza o aprendizado usando o LLM
     learning_content = await llm_service.synthesize_learning(feedback.feedback_text)
     
-    # Gera embedding para o aprendizado
-    embedding_vector = embedding_generator.generate(learning_content)
+    # Gera embedding para o aprendizado; a chamada é bloqueante (retries e
+    # limite de taxa esperam com time.sleep), então roda fora do event loop
+    embedding_vector = await asyncio.to_thread(embedding_generator.generate, learning_content)
     embedding = Embedding(vector=embedding_vector)
     
     # Cria o aprendizado
@@ -68,3 +86,49 @@ async def synthesize_learning_from_feedback(
     # Persiste o aprendizado
     return await learning_repo.save(learning)
 
+
+async def synthesize_learnings_from_feedbacks(
+    feedbacks: list[PendingFeedback],
+    llm_service: LLMService,
+    embedding_generator: EmbeddingGenerator,
+    learning_repo: LearningRepository
+) -> tuple[list[Learning], list[PendingFeedback]]:
+    """
+    Versão em lote de `synthesize_learning_from_feedback`.
+    1. Uma única chamada ao LLM sintetiza os aprendizados de todos os feedbacks.
+    2. Uma única chamada gera os embeddings de todos os aprendizados.
+    3. Uma única escrita persiste os aprendizados.
+    
+    Returns:
+        Os aprendizados criados e os feedbacks para os quais o LLM não retornou
+        um aprendizado. Falhas no embedding ou na escrita afetam o lote inteiro e
+        são propagadas.
+    """
+    if not feedbacks:
+        return [], []
+    
+    contents = await llm_service.synthesize_learnings([feedback.feedback_text for feedback in feedbacks])
+    
+    synthesized = [(feedback, content) for feedback, content in zip(feedbacks, contents) if content]
+    missing = [feedback for feedback, content in zip(feedbacks, contents) if not content]
+    if not synthesized:
+        return [], missing
+    
+    # O lote de embeddings é bloqueante e pode esperar retries: roda fora do event loop
+    vectors = await asyncio.to_thread(
+        embedding_generator.generate_batch, [content for _, content in synthesized]
+    )
+    
+    created_at = datetime.utcnow()
+    learnings = [
+        Learning(
+            id=LearningId(uuid.uuid4()),
+            content=content,
+            embedding=Embedding(vector=vector),
+            source_feedback_id=feedback.id,
+            created_at=created_at
+        )
+        for (feedback, content), vector in zip(synthesized, vectors)
+    ]
+    
+    return await learning_repo.save_many(learnings), missing
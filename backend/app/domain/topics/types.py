@@ -12,3 +12,10 @@ class Topic:
     name: str
     created_at: datetime
 
+
+# Modelo de leitura da listagem de tópicos
+@dataclass(frozen=True)
+class TopicWithCount:
+    """Tópico acompanhado da contagem de conversas mantida na escrita."""
+    topic: Topic
+    conversation_count: int
@@ -0,0 +1,163 @@
+"""Pool de clientes do Gemini por chave de API."""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import google.ai.generativelanguage as glm
+import google.generativeai as genai
+
+from app.infrastructure.persistence.config import (
+    GEMINI_CLIENT_IDLE_SECONDS,
+    GEMINI_CLIENT_MAX_KEYS,
+)
+
+
+logger = logging.getLogger("app.ai.clients")
+
+
+class _ClientEntry:
+    """Clientes e modelos associados a uma única chave de API."""
+
+    def __init__(self, api_key: str):
+        options = {"api_key": api_key}
+        # Os clientes mantêm um canal gRPC (HTTP/2) persistente; reutilizá-los
+        # evita um novo handshake TLS a cada requisição.
+        self.client = glm.GenerativeServiceClient(client_options=options)
+        self.async_client = glm.GenerativeServiceAsyncClient(client_options=options)
+        self.options = options
+        self._cache_client = None
+        self.models: dict[str, genai.GenerativeModel] = {}
+        self.last_used = time.monotonic()
+
+    @property
+    def cache_client(self) -> glm.CacheServiceAsyncClient:
+        if self._cache_client is None:
+            self._cache_client = glm.CacheServiceAsyncClient(client_options=self.options)
+        return self._cache_client
+
+    def model(self, model_name: str, cached_content: str | None = None) -> genai.GenerativeModel:
+        key = f"{model_name}@{cached_content}" if cached_content else model_name
+        model = self.models.get(key)
+        if model is None:
+            model = genai.GenerativeModel(model_name)
+            if cached_content:
+                # Equivalente a `GenerativeModel.from_cached_content`, sem consultar a API.
+                # Só o conteúdo em cache mais recente de cada modelo é mantido.
+                model._cached_content = cached_content
+                for stale in [k for k in self.models if k.startswith(f"{model_name}@")]:
+                    del self.models[stale]
+            # Injeta os clientes desta chave: o modelo nunca recorre à
+            # configuração global definida por `genai.configure`.
+            model._client = self.client
+            model._async_client = self.async_client
+            self.models[key] = model
+        return model
+
+    async def close(self) -> None:
+        try:
+            self.client.transport.close()
+        except Exception:  # pragma: no-cover - encerramento em melhor esforço
+            logger.debug("Falha ao fechar o cliente síncrono do Gemini", exc_info=True)
+        # Os canais gRPC assíncronos são fechados com await, no event loop que os usou
+        for name, client in (("assíncrono", self.async_client), ("de cache", self._cache_client)):
+            if client is None:
+                continue
+            try:
+                await client.transport.close()
+            except Exception:  # pragma: no-cover - encerramento em melhor esforço
+                logger.debug("Falha ao fechar o cliente %s do Gemini", name, exc_info=True)
+
+
+class GeminiClientRegistry:
+    """
+    Registro de clientes do Gemini indexado pela chave de API.
+
+    Cada chave ganha um par de clientes (síncrono e assíncrono) e um cache de
+    `GenerativeModel` já ligados a eles, reaproveitados entre requisições. Chaves
+    sem uso há mais de `idle_seconds` são descartadas, e no máximo `max_keys`
+    chaves ficam residentes (a menos usada recentemente sai primeiro).
+    """
+
+    def __init__(
+        self,
+        idle_seconds: float = GEMINI_CLIENT_IDLE_SECONDS,
+        max_keys: int = GEMINI_CLIENT_MAX_KEYS,
+    ):
+        self.idle_seconds = idle_seconds
+        self.max_keys = max_keys
+        self._entries: OrderedDict[str, _ClientEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def model(
+        self, api_key: str, model_name: str, cached_content: str | None = None
+    ) -> genai.GenerativeModel:
+        """
+        Retorna o modelo `model_name` ligado aos clientes da chave informada.
+
+        Com `cached_content`, o modelo usa como contexto o conteúdo em cache de mesmo nome.
+        """
+        return self._entry(api_key).model(model_name, cached_content)
+
+    def cache_client(self, api_key: str) -> glm.CacheServiceAsyncClient:
+        """Retorna o cliente do cache de contexto da chave (criado na primeira chamada)."""
+        return self._entry(api_key).cache_client
+
+    def client(self, api_key: str) -> glm.GenerativeServiceClient:
+        """Retorna o cliente síncrono da chave (usado pelas chamadas de embedding)."""
+        return self._entry(api_key).client
+
+    def evict_idle(self) -> int:
+        """Remove as chaves ociosas. Retorna quantas foram removidas."""
+        with self._lock:
+            return self._evict_idle_locked(time.monotonic())
+
+    async def close(self) -> None:
+        """Fecha todos os clientes, síncronos e assíncronos (chamado no encerramento da aplicação)."""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            await entry.close()
+
+    def _entry(self, api_key: str) -> _ClientEntry:
+        if not api_key:
+            raise ValueError("Chave de API do Gemini não configurada")
+
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle_locked(now)
+            entry = self._entries.get(api_key)
+            if entry is None:
+                entry = _ClientEntry(api_key)
+                self._entries[api_key] = entry
+                while len(self._entries) > self.max_keys:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(api_key)
+            entry.last_used = now
+            return entry
+
+    def _evict_idle_locked(self, now: float) -> int:
+        # As entradas estão em ordem de uso, então as ociosas ficam no início.
+        # Os clientes removidos não são fechados aqui: uma chamada em andamento
+        # ainda pode usá-los, e o canal é liberado quando deixa de ser referenciado.
+        evicted = 0
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if now - entry.last_used < self.idle_seconds:
+                break
+            del self._entries[key]
+            evicted += 1
+        if evicted:
+            logger.debug("%d cliente(s) do Gemini ociosos removidos", evicted)
+        return evicted
+
+
+# Instância compartilhada pelo processo (todos os serviços que chamam o Gemini)
+gemini_clients = GeminiClientRegistry()
@@ -0,0 +1,57 @@
+"""Serviço para manter o resumo acumulado de uma conversa usando Gemini."""
+from app.domain.conversations.types import Message
+from app.infrastructure.ai.client_registry import GeminiClientRegistry, gemini_clients
+from app.infrastructure.ai.resilience import generation_resilience
+from app.infrastructure.ai.gemini_service import llm_call_stats
+
+
+class ConversationSummarizer:
+    """Resume incrementalmente as mensagens mais antigas de uma conversa."""
+
+    def __init__(self, api_key: str, registry: GeminiClientRegistry = gemini_clients):
+        """
+        Inicializa o serviço de resumo.
+
+        Args:
+            api_key: Chave da API do Google Gemini
+            registry: Pool de clientes por chave (o modelo e a conexão são reaproveitados)
+        """
+        self.model = registry.model(api_key, 'gemini-2.5-flash')
+
+    async def summarize(self, previous_summary: str | None, messages: list[Message]) -> str:
+        """
+        Incorpora novas mensagens ao resumo existente.
+
+        Args:
+            previous_summary: Resumo atual da conversa (None na primeira vez)
+            messages: Mensagens ainda não cobertas pelo resumo, em ordem cronológica
+
+        Returns:
+            Novo resumo, cobrindo o resumo anterior e as mensagens informadas
+        """
+        conversation_text = ""
+        for msg in messages:
+            author = "Usuário" if msg.author.value == 1 else "Agente"
+            conversation_text += f"\n{author}: {msg.content}\n"
+
+        prompt = f"""Você mantém o resumo de uma conversa entre um colaborador e um Conselheiro Cultural.
+
+RESUMO ATUAL:
+{previous_summary or "Nenhum resumo ainda."}
+
+NOVAS MENSAGENS:
+{conversation_text}
+
+Reescreva o resumo incorporando as novas mensagens. O resumo deve:
+- Ter no máximo 150 palavras
+- Preservar o dilema do usuário, fatos e decisões importantes e conselhos já dados
+- Ser escrito em terceira pessoa, sem comentários adicionais
+
+Resumo atualizado:"""
+
+        try:
+            async with llm_call_stats.track():
+                response = await generation_resilience.call(self.model.generate_content_async, prompt)
+            return response.text.strip()
+        except Exception as e:
+            raise ValueError(f"Erro ao resumir conversa: {str(e)}")
@@ -1,23 +1,34 @@
 """Serviço de geração de embeddings usando Google Gemini."""
+import asyncio
 import os
 import google.generativeai as genai
 from typing import Protocol
+from app.infrastructure.ai.client_registry import GeminiClientRegistry, gemini_clients
+from app.infrastructure.ai.resilience import embedding_resilience
+from app.infrastructure.single_flight import single_flight_group
+
+
+# Máximo de textos por requisição de embeddings em lote aceito pela API
+_EMBED_BATCH_SIZE = 100
+
+# Consultas idênticas e simultâneas (ex.: a mesma pergunta sugerida) geram um único embedding
+_query_embeddings = single_flight_group("embeddings.query")
 
 
 class EmbeddingGenerator:
     """Gera embeddings usando o modelo de embedding do Google Gemini."""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, registry: GeminiClientRegistry = gemini_clients):
         """
         Inicializa o serviço de embeddings.
         
         Args:
             api_key: Chave da API do Google Gemini
+            registry: Pool de clientes por chave (a conexão é reaproveitada)
         """
-        genai.configure(api_key=api_key)
-        # Para embeddings, usamos o modelo text-embedding-004
-        # Mas o Gemini também pode gerar embeddings através do modelo de embedding
-        self.model = None  # Será configurado quando necessário
+        # O cliente é passado explicitamente em cada chamada, sem `genai.configure`
+        self.api_key = api_key
+        self.client = registry.client(api_key)
     
     def generate(self, text: str) -> list[float]:
         """
@@ -30,36 +41,74 @@ class EmbeddingGenerator:
             Lista de floats representando o vetor de embedding
         """
         try:
-            # Google Gemini usa o modelo text-embedding-004 para embeddings
-            # O método embed_content retorna um objeto com o embedding
-            result = genai.embed_content(
+            # Google Gemini usa o modelo text-embedding-004 para embeddings (768 dimensões).
+            # Não há fallback para outro modelo: vetores de dimensões diferentes não
+            # seriam comparáveis com os já armazenados. Falhas transitórias são
+            # tratadas pela camada de resiliência (limitador, retry e circuit breaker).
+            result = embedding_resilience.call_sync(
+                genai.embed_content,
                 model="models/text-embedding-004",
                 content=text,
-                task_type="retrieval_document"
+                task_type="retrieval_document",
+                client=self.client
             )
+        except Exception as e:
+            raise ValueError(f"Erro ao gerar embedding: {str(e)}")
+        
+        # O resultado pode ser um dict ou um objeto com atributo 'embedding'
+        if isinstance(result, dict):
+            embedding = result.get('embedding', [])
+        else:
+            embedding = getattr(result, 'embedding', [])
+        
+        if not embedding:
+            raise ValueError("Erro ao gerar embedding: embedding não foi gerado")
+        
+        return embedding
+    
+    def generate_batch(self, texts: list[str]) -> list[list[float]]:
+        """
+        Gera embeddings para vários textos com uma requisição a cada 100 textos.
+        
+        Args:
+            texts: Textos para gerar embeddings
+        
+        Returns:
+            Vetores de embedding, na mesma ordem dos textos
+        """
+        embeddings: list[list[float]] = []
+        for start in range(0, len(texts), _EMBED_BATCH_SIZE):
+            batch = texts[start:start + _EMBED_BATCH_SIZE]
+            try:
+                result = embedding_resilience.call_sync(
+                    genai.embed_content,
+                    model="models/text-embedding-004",
+                    content=batch,
+                    task_type="retrieval_document",
+                    client=self.client
+                )
+            except Exception as e:
+                raise ValueError(f"Erro ao gerar embeddings: {str(e)}")
             
-            # O resultado pode ser um dict ou um objeto com atributo 'embedding'
             if isinstance(result, dict):
-                embedding = result.get('embedding', [])
+                vectors = result.get('embedding', [])
             else:
-                embedding = getattr(result, 'embedding', [])
-            
-            if not embedding:
-                raise ValueError("Embedding não foi gerado")
+                vectors = getattr(result, 'embedding', [])
             
-            return embedding
-        except Exception as e:
-            # Fallback: tenta usar o modelo genérico se o específico falhar
-            try:
-                result = genai.embed_content(
-                    model="models/embedding-001",
-                    content=text
-                )
-                if isinstance(result, dict):
-                    embedding = result.get('embedding', [])
-                else:
-                    embedding = getattr(result, 'embedding', [])
-                return embedding if embedding else []
-            except:
-                raise ValueError(f"Erro ao gerar embedding: {str(e)}")
-
+            if len(vectors) != len(batch) or not all(vectors):
+                raise ValueError("Erro ao gerar embeddings: resposta incompleta")
+            embeddings.extend(vectors)
+        
+        return embeddings
+    
+    async def generate_query_embedding(self, text: str) -> list[float]:
+        """
+        Gera o embedding de uma consulta sem bloquear o event loop.
+        
+        Chamadas concorrentes com o mesmo texto (e a mesma chave) compartilham uma
+        única chamada ao Gemini.
+        """
+        return await _query_embeddings.do(
+            (self.api_key, text),
+            lambda: asyncio.to_thread(self.generate, text)
+        )
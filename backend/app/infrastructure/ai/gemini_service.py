@@ -1,11 +1,79 @@
 """Serviço de integração com Google Gemini 2.5 Flash."""
+import asyncio
+import json
 import os
-import google.generativeai as genai
-from typing import Protocol
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Protocol
 from app.domain.agent.types import AgentInstruction
 from app.domain.conversations.types import Message
 from app.domain.artifacts.types import ArtifactChunk
 from app.domain.learnings.types import Learning
+from app.infrastructure.ai.client_registry import GeminiClientRegistry, gemini_clients
+from app.infrastructure.ai.resilience import generation_resilience
+from app.infrastructure.ai.prompt_builder import AdvicePrompt, AdvicePromptBuilder
+from app.infrastructure.ai.prompt_cache import PromptPrefixCache, prompt_prefix_cache
+from app.infrastructure.persistence.config import GEMINI_API_KEY_CACHE_SECONDS
+
+
+class GeminiApiKeyCache:
+    """
+    Mantém em memória a chave de API do Gemini já resolvida.
+
+    A chave é relida da tabela `settings` no máximo uma vez a cada `ttl` segundos,
+    o que propaga alterações feitas por outras instâncias. Na instância que recebe
+    `PUT /settings/gemini-api-key`, `invalidate` força a releitura imediata.
+    """
+
+    def __init__(self, ttl: float = GEMINI_API_KEY_CACHE_SECONDS):
+        self.ttl = ttl
+        self._value: str | None = None
+        self._loaded_at: float | None = None
+        self._settings_repo = None
+        self._lock = asyncio.Lock()
+
+    def configure(self, settings_repo) -> None:
+        """Usa o repositório de configurações do container da aplicação."""
+        self._settings_repo = settings_repo
+
+    def invalidate(self) -> None:
+        """Descarta a chave em cache; a próxima chamada relê as configurações."""
+        self._loaded_at = None
+
+    def reset(self) -> None:
+        """Descarta a chave e o repositório de configurações."""
+        self.invalidate()
+        self._value = None
+        self._settings_repo = None
+
+    async def get(self) -> str:
+        if self._is_fresh():
+            return self._value
+
+        async with self._lock:
+            if self._is_fresh():
+                return self._value
+
+            from app.infrastructure.persistence.settings_repo import SettingsRepository
+            from app.infrastructure.persistence import config
+
+            if self._settings_repo is None:
+                self._settings_repo = SettingsRepository()
+            custom_key = await self._settings_repo.get_custom_gemini_api_key()
+
+            self._value = custom_key if custom_key else config.GEMINI_API_KEY
+            self._loaded_at = time.monotonic()
+            return self._value
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._loaded_at is not None
+            and time.monotonic() - self._loaded_at < self.ttl
+        )
+
+
+# Cache compartilhado pelo processo (rotas de chat, feedbacks e configurações)
+gemini_api_key_cache = GeminiApiKeyCache()
 
 
 async def get_gemini_api_key() -> str:
@@ -13,13 +81,78 @@ async def get_gemini_api_key() -> str:
     Retorna a chave de API do Gemini.
     Prioriza a chave personalizada do usuário, senão usa a padrão do sistema.
     """
-    from app.infrastructure.persistence.settings_repo import SettingsRepository
-    from app.infrastructure.persistence.config import GEMINI_API_KEY
-    
-    settings_repo = SettingsRepository()
-    custom_key = await settings_repo.get_custom_gemini_api_key()
-    
-    return custom_key if custom_key else GEMINI_API_KEY
+    return await gemini_api_key_cache.get()
+
+
+class LLMCallStats:
+    """
+    Métricas de concorrência das chamadas ao LLM neste processo.
+
+    Como as chamadas usam a API assíncrona, várias gerações ficam em andamento ao
+    mesmo tempo; `peak_in_flight` mostra quantas chegaram a se sobrepor.
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_calls = 0
+        self.total_seconds = 0.0
+        self.streams_started = 0
+        self.total_first_token_seconds = 0.0
+        self.prompts_built = 0
+        self.prompt_section_tokens: dict[str, int] = {}
+
+    def record_prompt(self, section_tokens: dict[str, int]) -> None:
+        """Acumula os tokens gastos por seção em um prompt montado."""
+        self.prompts_built += 1
+        for section, tokens in section_tokens.items():
+            self.prompt_section_tokens[section] = self.prompt_section_tokens.get(section, 0) + tokens
+
+    def record_first_token(self, seconds: float) -> None:
+        """Registra o tempo até o primeiro token de uma geração em streaming."""
+        self.streams_started += 1
+        self.total_first_token_seconds += seconds
+
+    @asynccontextmanager
+    async def track(self):
+        self.in_flight += 1
+        self.total_calls += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.total_seconds += time.perf_counter() - started
+
+    def snapshot(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "total_calls": self.total_calls,
+            "avg_seconds": self.total_seconds / self.total_calls if self.total_calls else 0.0,
+            "avg_time_to_first_token_seconds": (
+                self.total_first_token_seconds / self.streams_started if self.streams_started else 0.0
+            ),
+            "avg_prompt_tokens_by_section": {
+                section: tokens / self.prompts_built
+                for section, tokens in self.prompt_section_tokens.items()
+            },
+        }
+
+    def reset(self) -> None:
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_calls = 0
+        self.total_seconds = 0.0
+        self.streams_started = 0
+        self.total_first_token_seconds = 0.0
+        self.prompts_built = 0
+        self.prompt_section_tokens = {}
+
+
+# Métricas compartilhadas por todos os serviços que chamam o Gemini
+llm_call_stats = LLMCallStats()
 
 
 class RelevantKnowledge:
@@ -36,96 +169,108 @@ class RelevantKnowledge:
 class GeminiService:
     """Serviço para integração com Google Gemini 2.5 Flash."""
     
-    def __init__(self, api_key: str):
+    MODEL_NAME = 'gemini-2.5-flash'
+    
+    def __init__(
+        self,
+        api_key: str,
+        registry: GeminiClientRegistry = gemini_clients,
+        prompt_builder: AdvicePromptBuilder | None = None,
+        prefix_cache: PromptPrefixCache | None = None
+    ):
         """
         Inicializa o serviço Gemini.
         
         Args:
             api_key: Chave da API do Google Gemini
+            registry: Pool de clientes por chave (o modelo e a conexão são reaproveitados)
+            prompt_builder: Montador do prompt (padrão: orçamento de `PROMPT_TOKEN_BUDGET`)
+            prefix_cache: Cache de contexto do prefixo do prompt (padrão: o do processo)
         """
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.api_key = api_key
+        self.model = registry.model(api_key, self.MODEL_NAME)
+        self.prompt_builder = prompt_builder or AdvicePromptBuilder()
+        self.prefix_cache = prefix_cache or prompt_prefix_cache
+    
+    def build_advice_prompt(
+        self,
+        instruction: AgentInstruction,
+        conversation_history: list[Message],
+        knowledge: RelevantKnowledge,
+        user_query: str,
+        conversation_summary: str | None = None
+    ) -> tuple[AdvicePrompt, list[ArtifactChunk]]:
+        """
+        Monta o prompt de conselho (RAG) e seleciona os chunks que serão citados.
+        
+        O prompt respeita o orçamento de tokens do `AdvicePromptBuilder`; os tokens
+        gastos por seção ficam registrados em `llm_call_stats`.
+        
+        Returns:
+            Tupla com (prompt dividido em prefixo estável e sufixo, lista de chunks citados)
+        """
+        prompt = self.prompt_builder.build(
+            instruction,
+            conversation_history,
+            knowledge.relevant_artifacts,
+            knowledge.relevant_learnings,
+            user_query,
+            conversation_summary=conversation_summary,
+        )
+        llm_call_stats.record_prompt(prompt.section_tokens)
+        return prompt, prompt.cited_chunks
+    
+    async def _resolve_prompt(self, prompt: AdvicePrompt | str):
+        """
+        Escolhe o modelo e o conteúdo a enviar.
+        
+        Se o prefixo estiver no cache de contexto, envia só o sufixo para um modelo
+        que já o tem como contexto; caso contrário, envia o prompt completo.
+        """
+        if isinstance(prompt, str):
+            return self.model, prompt
+        cached_model = await self.prefix_cache.model_for(
+            self.api_key,
+            self.MODEL_NAME,
+            prompt.prefix_version,
+            prompt.prefix,
+            prompt.prefix_tokens,
+        )
+        if cached_model is not None:
+            return cached_model, prompt.suffix
+        return self.model, prompt.text
     
     async def generate_advice(
         self,
         instruction: AgentInstruction,
         conversation_history: list[Message],
         knowledge: RelevantKnowledge,
-        user_query: str
+        user_query: str,
+        conversation_summary: str | None = None
     ) -> tuple[str, list[ArtifactChunk]]:
         """
         Gera conselho cultural baseado no contexto (RAG).
         
         Args:
             instruction: Instrução geral do agente
-            conversation_history: Histórico da conversa
+            conversation_history: Mensagens recentes da conversa (ainda não resumidas)
             knowledge: Conhecimento relevante encontrado
             user_query: Pergunta do usuário
+            conversation_summary: Resumo acumulado das mensagens anteriores
         
         Returns:
             Tupla com (conteúdo da resposta em markdown, lista de chunks citados)
         """
-        # Constrói o contexto dos artefatos
-        artifacts_context = ""
-        cited_chunks = []
-        
-        for idx, chunk in enumerate(knowledge.relevant_artifacts[:5], start=1):  # Limita a 5 chunks mais relevantes
-            metadata = chunk.metadata
-            section_title = metadata.section_title if metadata else None
-            breadcrumbs = " › ".join(metadata.breadcrumbs) if metadata and metadata.breadcrumbs else ""
-            content_type = metadata.content_type if metadata else None
-            header_title = section_title or f"Trecho {idx}"
-            header = f"### Fonte {idx} — {header_title}"
-            details = []
-            if breadcrumbs:
-                details.append(f"Breadcrumbs: {breadcrumbs}")
-            if content_type:
-                details.append(f"Tipo: {content_type}")
-            metadata_block = "\n".join(details)
-            chunk_text = f"{header}\n{metadata_block}\n\n{chunk.content}" if metadata_block else f"{header}\n\n{chunk.content}"
-            artifacts_context += f"\n\n{chunk_text.strip()}"
-            cited_chunks.append(chunk)
-        
-        # Constrói o contexto dos aprendizados
-        learnings_context = ""
-        for learning in knowledge.relevant_learnings[:3]:  # Limita a 3 aprendizados
-            learnings_context += f"\n\n--- Aprendizado ---\n{learning.content}\n"
-        
-        # Constrói o histórico da conversa
-        conversation_context = ""
-        for msg in conversation_history[-5:]:  # Últimas 5 mensagens
-            author = "Usuário" if msg.author.value == 1 else "Agente"
-            conversation_context += f"\n{author}: {msg.content}\n"
-        
-        # Monta o prompt completo
-        system_prompt = f"""Você é um Conselheiro Cultural de uma organização. Sua missão é ajudar colaboradores a refletirem sobre dilemas do dia a dia, sempre baseando suas respostas nos valores e práticas documentadas da organização.
-
-{instruction.content}
-
-REGRAS IMPORTANTES:
-1. Sempre cite as fontes quando usar informações dos artefatos culturais. Use o formato [Fonte X] onde X é o número da fonte.
-2. Seja reflexivo e não prescritivo. Ajude o usuário a pensar, não a obedecer.
-3. Use Markdown para formatar suas respostas (negrito, itálico, listas, etc.).
-4. Base suas respostas nos artefatos e aprendizados fornecidos abaixo.
-
-ARTEFATOS CULTURAIS RELEVANTES:
-{artifacts_context}
-
-APRENDIZADOS RELEVANTES:
-{learnings_context}
-
-HISTÓRICO DA CONVERSA:
-{conversation_context}
-
-PERGUNTA DO USUÁRIO:
-{user_query}
-
-RESPOSTA (use Markdown e cite as fontes):"""
+        prompt, cited_chunks = self.build_advice_prompt(
+            instruction, conversation_history, knowledge, user_query, conversation_summary
+        )
 
         # Gera a resposta
         try:
-            # Usa generate_content com o prompt como conteúdo da mensagem
-            response = self.model.generate_content(system_prompt)
+            model, contents = await self._resolve_prompt(prompt)
+            # Usa a API assíncrona para não bloquear o event loop durante a geração
+            async with llm_call_stats.track():
+                response = await generation_resilience.call(model.generate_content_async, contents)
             # O Gemini retorna um objeto com .text
             if hasattr(response, 'text'):
                 content = response.text
@@ -141,6 +286,33 @@ RESPOSTA (use Markdown e cite as fontes):"""
         except Exception as e:
             raise ValueError(f"Erro ao gerar conselho: {str(e)}")
     
+    async def stream_advice(self, prompt: AdvicePrompt | str) -> AsyncIterator[str]:
+        """
+        Gera a resposta em streaming, entregando os trechos de texto à medida que chegam.
+        
+        Args:
+            prompt: Prompt montado por `build_advice_prompt` (ou texto já pronto)
+        
+        Yields:
+            Trechos (deltas) do texto da resposta
+        """
+        try:
+            model, contents = await self._resolve_prompt(prompt)
+            async with llm_call_stats.track():
+                started = time.perf_counter()
+                first_token = True
+                response = await generation_resilience.call(model.generate_content_async, contents, stream=True)
+                async for chunk in response:
+                    text = getattr(chunk, 'text', '')
+                    if not text:
+                        continue
+                    if first_token:
+                        llm_call_stats.record_first_token(time.perf_counter() - started)
+                        first_token = False
+                    yield text
+        except Exception as e:
+            raise ValueError(f"Erro ao gerar conselho: {str(e)}")
+    
     async def synthesize_learning(self, feedback_text: str) -> str:
         """
         Sintetiza um aprendizado a partir de um texto de feedback.
@@ -164,8 +336,64 @@ Sintetize este feedback em um aprendizado conciso (máximo 2-3 frases) que possa
 Aprendizado sintetizado:"""
 
         try:
-            response = self.model.generate_content(prompt)
+            async with llm_call_stats.track():
+                response = await generation_resilience.call(self.model.generate_content_async, prompt)
             return response.text.strip()
         except Exception as e:
             raise ValueError(f"Erro ao sintetizar aprendizado: {str(e)}")
+    
+    async def synthesize_learnings(self, feedback_texts: list[str]) -> list[str | None]:
+        """
+        Sintetiza aprendizados para vários feedbacks em uma única chamada.
+        
+        A resposta é pedida em JSON (um objeto por feedback, identificado pelo índice),
+        o que permite associar cada aprendizado ao seu feedback.
+        
+        Args:
+            feedback_texts: Textos dos feedbacks
+        
+        Returns:
+            Aprendizados na mesma ordem dos feedbacks; None para os itens que o
+            modelo não retornou
+        """
+        if not feedback_texts:
+            return []
+        
+        feedbacks_list = "\n".join(
+            f"{index}. {json.dumps(text, ensure_ascii=False)}"
+            for index, text in enumerate(feedback_texts)
+        )
+        prompt = f"""Você é um assistente que sintetiza feedbacks em aprendizados concisos e reutilizáveis.
+
+Os feedbacks recebidos foram (um por linha, precedidos pelo índice):
+{feedbacks_list}
+
+Sintetize cada feedback, separadamente, em um aprendizado conciso (máximo 2-3 frases) que possa ser usado para melhorar futuras respostas do agente cultural. Cada aprendizado deve ser:
+- Conciso e direto
+- Reutilizável (não específico demais)
+- Focado em melhorias práticas
+
+Responda apenas com um array JSON contendo um objeto por feedback, no formato:
+[{{"indice": 0, "aprendizado": "..."}}]"""
+
+        try:
+            async with llm_call_stats.track():
+                response = await generation_resilience.call(
+                    self.model.generate_content_async,
+                    prompt,
+                    generation_config={"response_mime_type": "application/json"}
+                )
+            items = json.loads(response.text)
+        except Exception as e:
+            raise ValueError(f"Erro ao sintetizar aprendizados: {str(e)}")
+        
+        learnings: list[str | None] = [None] * len(feedback_texts)
+        for item in items if isinstance(items, list) else []:
+            if not isinstance(item, dict):
+                continue
+            index = item.get("indice")
+            content = item.get("aprendizado")
+            if isinstance(index, int) and 0 <= index < len(learnings) and isinstance(content, str):
+                learnings[index] = content.strip() or None
+        return learnings
 
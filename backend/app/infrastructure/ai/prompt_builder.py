@@ -0,0 +1,220 @@
+"""Montagem do prompt de conselho (RAG) dentro de um orçamento de tokens."""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from app.domain.agent.types import AgentInstruction
+from app.domain.artifacts.types import ArtifactChunk
+from app.domain.conversations.types import Message
+from app.domain.learnings.types import Learning
+from app.infrastructure.files.structured_chunker import estimate_tokens
+from app.infrastructure.persistence.config import CONVERSATION_RECENT_TURNS, PROMPT_TOKEN_BUDGET
+
+
+logger = logging.getLogger("app.rag.prompt")
+
+# Prefixo estável: muda apenas quando a instrução do agente é alterada, por isso
+# pode ser registrado no cache de contexto do Gemini.
+_PREFIX_TEMPLATE = """Você é um Conselheiro Cultural de uma organização. Sua missão é ajudar colaboradores a refletirem sobre dilemas do dia a dia, sempre baseando suas respostas nos valores e práticas documentadas da organização.
+
+{instruction}
+
+REGRAS IMPORTANTES:
+1. Sempre cite as fontes quando usar informações dos artefatos culturais. Use o formato [Fonte X] onde X é o número da fonte.
+2. Seja reflexivo e não prescritivo. Ajude o usuário a pensar, não a obedecer.
+3. Use Markdown para formatar suas respostas (negrito, itálico, listas, etc.).
+4. Base suas respostas nos artefatos e aprendizados fornecidos abaixo.
+
+"""
+
+# Sufixo montado a cada troca
+_SUFFIX_TEMPLATE = """ARTEFATOS CULTURAIS RELEVANTES:
+{artifacts}
+
+APRENDIZADOS RELEVANTES:
+{learnings}
+
+HISTÓRICO DA CONVERSA:
+{history}
+
+PERGUNTA DO USUÁRIO:
+{query}
+
+RESPOSTA (use Markdown e cite as fontes):"""
+
+
+@lru_cache(maxsize=1)
+def _template_tokens() -> tuple[int, int]:
+    """Tokens do texto fixo do prefixo e do sufixo (regras, títulos das seções)."""
+    return (
+        estimate_tokens(_PREFIX_TEMPLATE.format(instruction="")),
+        estimate_tokens(_SUFFIX_TEMPLATE.format(artifacts="", learnings="", history="", query="")),
+    )
+
+
+@dataclass
+class AdvicePrompt:
+    """
+    Prompt montado, com os chunks citados e os tokens gastos por seção.
+
+    `prefix` (preâmbulo, instrução e regras) é idêntico em todas as trocas enquanto a
+    instrução não muda; `prefix_version` identifica essa versão. `suffix` traz o
+    contexto recuperado, o histórico e a pergunta.
+    """
+    prefix: str
+    suffix: str
+    prefix_version: str
+    prefix_tokens: int
+    cited_chunks: list[ArtifactChunk]
+    token_budget: int
+    section_tokens: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def text(self) -> str:
+        return self.prefix + self.suffix
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.section_tokens.values())
+
+
+def _chunk_block(position: int, chunk: ArtifactChunk) -> str:
+    metadata = chunk.metadata
+    section_title = metadata.section_title if metadata else None
+    breadcrumbs = " › ".join(metadata.breadcrumbs) if metadata and metadata.breadcrumbs else ""
+    content_type = metadata.content_type if metadata else None
+    header = f"### Fonte {position} — {section_title or f'Trecho {position}'}"
+    details = []
+    if breadcrumbs:
+        details.append(f"Breadcrumbs: {breadcrumbs}")
+    if content_type:
+        details.append(f"Tipo: {content_type}")
+    metadata_block = "\n".join(details)
+    if metadata_block:
+        return f"{header}\n{metadata_block}"
+    return header
+
+
+def _chunk_tokens(chunk: ArtifactChunk, header: str) -> int:
+    # O token_count já foi calculado na ingestão; só o cabeçalho é estimado aqui
+    stored = chunk.metadata.token_count if chunk.metadata else 0
+    content_tokens = stored if stored and stored > 0 else estimate_tokens(chunk.content)
+    return content_tokens + estimate_tokens(header)
+
+
+class AdvicePromptBuilder:
+    """
+    Preenche um orçamento de tokens por prioridade.
+
+    A instrução, a pergunta e o texto fixo do template sempre entram. O restante do
+    orçamento vai, nesta ordem, para os chunks mais relevantes, os aprendizados, o
+    histórico recente (das mensagens mais recentes para as mais antigas) e o resumo
+    das mensagens anteriores. Um item que não cabe é descartado, e os itens menos
+    prioritários seguem tentando usar a sobra.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = PROMPT_TOKEN_BUDGET,
+        max_chunks: int = 5,
+        max_learnings: int = 3,
+        max_history_messages: int = 2 * CONVERSATION_RECENT_TURNS,
+    ):
+        self.token_budget = token_budget
+        self.max_chunks = max_chunks
+        self.max_learnings = max_learnings
+        self.max_history_messages = max_history_messages
+
+    def build(
+        self,
+        instruction: AgentInstruction,
+        conversation_history: list[Message],
+        relevant_chunks: list[ArtifactChunk],
+        relevant_learnings: list[Learning],
+        user_query: str,
+        conversation_summary: str | None = None,
+    ) -> AdvicePrompt:
+        prefix_template_tokens, suffix_template_tokens = _template_tokens()
+        section_tokens = {
+            "template": prefix_template_tokens + suffix_template_tokens,
+            "instruction": estimate_tokens(instruction.content),
+            "query": estimate_tokens(user_query),
+        }
+        remaining = self.token_budget - sum(section_tokens.values())
+
+        # Chunks mais relevantes primeiro; a numeração segue os que entraram
+        artifact_blocks: list[str] = []
+        cited_chunks: list[ArtifactChunk] = []
+        chunk_tokens = 0
+        for chunk in relevant_chunks[: self.max_chunks]:
+            header = _chunk_block(len(cited_chunks) + 1, chunk)
+            cost = _chunk_tokens(chunk, header)
+            if cost > remaining:
+                continue
+            remaining -= cost
+            chunk_tokens += cost
+            cited_chunks.append(chunk)
+            artifact_blocks.append(f"\n\n{header}\n\n{chunk.content}".rstrip())
+        section_tokens["chunks"] = chunk_tokens
+
+        learning_blocks: list[str] = []
+        learning_tokens = 0
+        for learning in relevant_learnings[: self.max_learnings]:
+            block = f"\n\n--- Aprendizado ---\n{learning.content}\n"
+            cost = estimate_tokens(block)
+            if cost > remaining:
+                continue
+            remaining -= cost
+            learning_tokens += cost
+            learning_blocks.append(block)
+        section_tokens["learnings"] = learning_tokens
+
+        # Histórico: das mais recentes para as mais antigas, parando na primeira que
+        # não cabe para não deixar buracos na conversa
+        history_lines: list[str] = []
+        history_tokens = 0
+        for msg in reversed(conversation_history[-self.max_history_messages:]):
+            author = "Usuário" if msg.author.value == 1 else "Agente"
+            line = f"\n{author}: {msg.content}\n"
+            cost = estimate_tokens(line)
+            if cost > remaining:
+                break
+            remaining -= cost
+            history_tokens += cost
+            history_lines.append(line)
+        history_lines.reverse()
+        section_tokens["history"] = history_tokens
+
+        summary_block = ""
+        if conversation_summary:
+            block = f"\nResumo das mensagens anteriores:\n{conversation_summary}\n"
+            cost = estimate_tokens(block)
+            if cost <= remaining:
+                remaining -= cost
+                summary_block = block
+        section_tokens["summary"] = estimate_tokens(summary_block)
+
+        prompt = AdvicePrompt(
+            prefix=_PREFIX_TEMPLATE.format(instruction=instruction.content),
+            suffix=_SUFFIX_TEMPLATE.format(
+                artifacts="".join(artifact_blocks),
+                learnings="".join(learning_blocks),
+                history=summary_block + "".join(history_lines),
+                query=user_query,
+            ),
+            prefix_version=instruction.updated_at.isoformat(),
+            prefix_tokens=prefix_template_tokens + section_tokens["instruction"],
+            cited_chunks=cited_chunks,
+            token_budget=self.token_budget,
+            section_tokens=section_tokens,
+        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Prompt montado com %d/%d tokens: %s",
+                prompt.total_tokens,
+                self.token_budget,
+                section_tokens,
+            )
+        return prompt
@@ -0,0 +1,185 @@
+"""Cache do prefixo estável do prompt no cache de contexto do Gemini."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Protocol
+
+import google.ai.generativelanguage as glm
+import google.generativeai as genai
+
+from app.infrastructure.ai.client_registry import GeminiClientRegistry, gemini_clients
+from app.infrastructure.persistence.config import (
+    PROMPT_PREFIX_CACHE,
+    PROMPT_PREFIX_CACHE_MIN_TOKENS,
+    PROMPT_PREFIX_CACHE_TTL_SECONDS,
+)
+
+
+logger = logging.getLogger("app.ai.prompt_cache")
+
+# Depois de uma falha ao registrar um prefixo, espera este tempo antes de tentar de novo
+_RETRY_AFTER_SECONDS = 60.0
+# Renova o conteúdo em cache um pouco antes de ele expirar no provedor
+_EXPIRY_MARGIN_SECONDS = 60.0
+
+
+class PrefixCacheBackend(Protocol):
+    """Interface do armazenamento onde os prefixos são registrados."""
+    async def create(self, api_key: str, model_name: str, prefix: str, ttl_seconds: float) -> str:
+        """Registra o prefixo e retorna o nome do conteúdo em cache."""
+        ...
+
+
+class GeminiPrefixCacheBackend:
+    """Registra o prefixo como `system_instruction` de um `CachedContent` do Gemini."""
+
+    def __init__(self, registry: GeminiClientRegistry = gemini_clients):
+        self.registry = registry
+
+    async def create(self, api_key: str, model_name: str, prefix: str, ttl_seconds: float) -> str:
+        request = glm.CreateCachedContentRequest(
+            cached_content=glm.CachedContent(
+                model=f"models/{model_name}",
+                system_instruction=glm.Content(parts=[glm.Part(text=prefix)]),
+                ttl=timedelta(seconds=ttl_seconds),
+            )
+        )
+        cached = await self.registry.cache_client(api_key).create_cached_content(request=request)
+        return cached.name
+
+
+class LocalPrefixCacheBackend:
+    """
+    Substituto local do cache de contexto, para testes e desenvolvimento offline.
+
+    Guarda os prefixos em memória e gera nomes no mesmo formato do provedor.
+    """
+
+    def __init__(self):
+        self.contents: dict[str, str] = {}
+
+    async def create(self, api_key: str, model_name: str, prefix: str, ttl_seconds: float) -> str:
+        name = f"cachedContents/local-{len(self.contents) + 1}"
+        self.contents[name] = prefix
+        return name
+
+
+@dataclass
+class _CachedPrefix:
+    version: str
+    name: str
+    expires_at: float
+
+
+class PromptPrefixCache:
+    """
+    Mantém, por chave de API e modelo, o prefixo do prompt registrado no provedor.
+
+    A versão do prefixo é o `updated_at` da instrução do agente: quando a instrução
+    muda, um novo conteúdo em cache é criado e o anterior deixa de ser usado (ele
+    expira sozinho pelo TTL). Prefixos menores que `min_tokens` não são registrados,
+    pois o provedor exige um tamanho mínimo; nesses casos o prompt segue inteiro.
+    """
+
+    def __init__(
+        self,
+        backend: PrefixCacheBackend | None,
+        registry: GeminiClientRegistry = gemini_clients,
+        ttl_seconds: float = PROMPT_PREFIX_CACHE_TTL_SECONDS,
+        min_tokens: int = PROMPT_PREFIX_CACHE_MIN_TOKENS,
+    ):
+        self.backend = backend
+        self.registry = registry
+        self.ttl_seconds = ttl_seconds
+        self.min_tokens = min_tokens
+        self.hits = 0
+        self.created = 0
+        self.failures = 0
+        self._entries: dict[tuple[str, str], _CachedPrefix] = {}
+        self._retry_at: dict[tuple[str, str, str], float] = {}
+        self._locks: dict[tuple[str, str], asyncio.Lock] = {}
+
+    async def model_for(
+        self,
+        api_key: str,
+        model_name: str,
+        prefix_version: str,
+        prefix: str,
+        prefix_tokens: int,
+    ) -> genai.GenerativeModel | None:
+        """
+        Retorna um modelo que já tem o prefixo como contexto em cache.
+
+        Retorna None quando o cache está desabilitado, o prefixo é pequeno demais ou o
+        registro falhou; o chamador então envia o prompt completo.
+        """
+        if self.backend is None or prefix_tokens < self.min_tokens:
+            return None
+
+        key = (api_key, model_name)
+        entry = self._valid_entry(key, prefix_version)
+        if entry is None:
+            if time.monotonic() < self._retry_at.get((api_key, model_name, prefix_version), 0.0):
+                return None
+            lock = self._locks.setdefault(key, asyncio.Lock())
+            async with lock:
+                entry = self._valid_entry(key, prefix_version)
+                if entry is None:
+                    entry = await self._register(key, prefix_version, prefix)
+                    if entry is None:
+                        return None
+        else:
+            self.hits += 1
+
+        return self.registry.model(api_key, model_name, cached_content=entry.name)
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": self.backend is not None,
+            "hits": self.hits,
+            "created": self.created,
+            "failures": self.failures,
+        }
+
+    def _valid_entry(self, key: tuple[str, str], prefix_version: str) -> _CachedPrefix | None:
+        entry = self._entries.get(key)
+        if entry and entry.version == prefix_version and time.monotonic() < entry.expires_at:
+            return entry
+        return None
+
+    async def _register(
+        self, key: tuple[str, str], prefix_version: str, prefix: str
+    ) -> _CachedPrefix | None:
+        api_key, model_name = key
+        try:
+            name = await self.backend.create(api_key, model_name, prefix, self.ttl_seconds)
+        except Exception as e:
+            self.failures += 1
+            self._retry_at[(api_key, model_name, prefix_version)] = time.monotonic() + _RETRY_AFTER_SECONDS
+            logger.warning("Falha ao registrar o prefixo do prompt no cache de contexto: %s", e)
+            return None
+
+        self.created += 1
+        entry = _CachedPrefix(
+            version=prefix_version,
+            name=name,
+            expires_at=time.monotonic() + max(self.ttl_seconds - _EXPIRY_MARGIN_SECONDS, 0.0),
+        )
+        self._entries[key] = entry
+        return entry
+
+
+def _default_backend() -> PrefixCacheBackend | None:
+    if PROMPT_PREFIX_CACHE == "gemini":
+        return GeminiPrefixCacheBackend()
+    if PROMPT_PREFIX_CACHE == "local":
+        return LocalPrefixCacheBackend()
+    return None
+
+
+# Instância compartilhada pelo processo (geração de conselhos)
+prompt_prefix_cache = PromptPrefixCache(_default_backend())
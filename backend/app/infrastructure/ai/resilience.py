@@ -0,0 +1,294 @@
+"""Camada de resiliência compartilhada pelas chamadas ao Gemini."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Awaitable, Callable, TypeVar
+
+from google.api_core import exceptions as api_exceptions
+
+from app.infrastructure.persistence.config import (
+    GEMINI_BREAKER_FAILURE_THRESHOLD,
+    GEMINI_BREAKER_RESET_SECONDS,
+    GEMINI_EMBED_RPM,
+    GEMINI_GENERATE_RPM,
+    GEMINI_RETRY_ATTEMPTS,
+    GEMINI_RETRY_BASE_SECONDS,
+    GEMINI_RETRY_MAX_SECONDS,
+)
+
+
+logger = logging.getLogger("app.ai.resilience")
+
+T = TypeVar("T")
+
+# Cota excedida: o limitador reduz a taxa, mas o provedor não está fora do ar
+_THROTTLING_ERRORS = (api_exceptions.ResourceExhausted, api_exceptions.TooManyRequests)
+# Indisponibilidade do provedor: contam para o circuit breaker
+_UNAVAILABLE_ERRORS = (
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.InternalServerError,
+    api_exceptions.BadGateway,
+    api_exceptions.GatewayTimeout,
+    api_exceptions.DeadlineExceeded,
+    asyncio.TimeoutError,
+    ConnectionError,
+)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Erros transitórios, que podem dar certo em uma nova tentativa."""
+    return isinstance(error, _THROTTLING_ERRORS + _UNAVAILABLE_ERRORS)
+
+
+class CircuitOpenError(Exception):
+    """O circuito está aberto: o provedor falhou repetidamente e as chamadas são recusadas."""
+
+
+class TokenBucket:
+    """
+    Limitador token bucket com taxa adaptativa.
+
+    A taxa começa em `rate_per_minute` (a cota) e cai pela metade a cada erro de cota
+    excedida; cada sucesso a recupera aos poucos até a cota (AIMD). Pode ser usado
+    tanto por código assíncrono (`acquire`) quanto síncrono (`acquire_sync`).
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float | None = None):
+        self.max_rate = rate_per_minute / 60.0
+        self.min_rate = self.max_rate / 16
+        self.rate = self.max_rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate_per_minute / 6)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.throttled = 0
+        self.throttled_seconds = 0.0
+
+    def _reserve(self) -> float:
+        """Reserva um token e retorna quanto tempo esperar até que ele esteja disponível."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            wait = -self._tokens / self.rate
+            self.throttled += 1
+            self.throttled_seconds += wait
+            return wait
+
+    async def acquire(self) -> None:
+        wait = self._reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self) -> None:
+        wait = self._reserve()
+        if wait:
+            time.sleep(wait)
+
+    def on_throttled(self) -> None:
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def on_success(self) -> None:
+        if self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def snapshot(self) -> dict:
+        return {
+            "rate_per_minute": self.rate * 60,
+            "throttled": self.throttled,
+            "throttled_seconds": self.throttled_seconds,
+        }
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker de três estados.
+
+    Após `failure_threshold` falhas de indisponibilidade seguidas, o circuito abre e
+    as chamadas falham imediatamente por `reset_seconds`. Depois disso uma única
+    chamada de teste é liberada (meio-aberto): se der certo o circuito fecha, senão
+    volta a abrir.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.rejected = 0
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_seconds:
+                    self.rejected += 1
+                    raise CircuitOpenError("Serviço do Gemini indisponível no momento; tente novamente em instantes")
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    self.rejected += 1
+                    raise CircuitOpenError("Serviço do Gemini indisponível no momento; tente novamente em instantes")
+                self._probe_in_flight = True
+
+    def on_success(self) -> None:
+        with self._lock:
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+            self.state = self.CLOSED
+
+    def on_failure(self) -> None:
+        with self._lock:
+            self._consecutive_failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.opened += 1
+                    logger.warning("Circuit breaker do Gemini aberto após %d falhas", self._consecutive_failures)
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def on_other_outcome(self) -> None:
+        """
+        Erro que não indica indisponibilidade (ex.: requisição inválida) ou chamada
+        cancelada: libera a sonda sem contar falha.
+        """
+        with self._lock:
+            self._probe_in_flight = False
+
+    def snapshot(self) -> dict:
+        return {"state": self.state, "opened": self.opened, "rejected": self.rejected}
+
+
+class ResilientCaller:
+    """
+    Aplica limitador, retry com backoff exponencial (com jitter) e circuit breaker
+    a uma família de chamadas ao provedor (geração ou embeddings).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limiter: TokenBucket,
+        breaker: CircuitBreaker,
+        max_attempts: int = GEMINI_RETRY_ATTEMPTS,
+        base_delay: float = GEMINI_RETRY_BASE_SECONDS,
+        max_delay: float = GEMINI_RETRY_MAX_SECONDS,
+    ):
+        self.name = name
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+
+    def _backoff(self, attempt: int) -> float:
+        # "Full jitter": espera aleatória entre 0 e o teto exponencial da tentativa
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _record_error(self, error: Exception) -> bool:
+        """Atualiza limitador e breaker; retorna se vale tentar de novo."""
+        if isinstance(error, _THROTTLING_ERRORS):
+            self.limiter.on_throttled()
+            self.breaker.on_other_outcome()
+        elif isinstance(error, _UNAVAILABLE_ERRORS):
+            self.breaker.on_failure()
+        else:
+            self.breaker.on_other_outcome()
+        return is_retryable(error)
+
+    def _record_success(self) -> None:
+        self.limiter.on_success()
+        self.breaker.on_success()
+
+    async def call(self, fn: Callable[..., Awaitable[T]], *args, **kwargs) -> T:
+        """Executa uma chamada assíncrona ao provedor com a política de resiliência."""
+        self.calls += 1
+        for attempt in range(self.max_attempts):
+            self.breaker.before_call()
+            try:
+                await self.limiter.acquire()
+                result = await fn(*args, **kwargs)
+            except Exception as error:
+                if not self._record_error(error) or attempt + 1 >= self.max_attempts:
+                    self.failures += 1
+                    raise
+                self.retries += 1
+                await asyncio.sleep(self._backoff(attempt))
+            except BaseException:
+                # Cancelamento (cliente desconectado, timeout): libera a sonda sem contar falha
+                self.breaker.on_other_outcome()
+                raise
+            else:
+                self._record_success()
+                return result
+        raise AssertionError("inalcançável")  # pragma: no-cover
+
+    def call_sync(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Versão síncrona de `call` (usada pelo gerador de embeddings).
+
+        Bloqueia a thread durante o backoff e a espera do limitador: quem está
+        no event loop deve chamá-la via `asyncio.to_thread`.
+        """
+        self.calls += 1
+        for attempt in range(self.max_attempts):
+            self.breaker.before_call()
+            try:
+                self.limiter.acquire_sync()
+                result = fn(*args, **kwargs)
+            except Exception as error:
+                if not self._record_error(error) or attempt + 1 >= self.max_attempts:
+                    self.failures += 1
+                    raise
+                self.retries += 1
+                time.sleep(self._backoff(attempt))
+            except BaseException:
+                self.breaker.on_other_outcome()
+                raise
+            else:
+                self._record_success()
+                return result
+        raise AssertionError("inalcançável")  # pragma: no-cover
+
+    def snapshot(self) -> dict:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "limiter": self.limiter.snapshot(),
+            "breaker": self.breaker.snapshot(),
+        }
+
+
+def _caller(name: str, rate_per_minute: float) -> ResilientCaller:
+    return ResilientCaller(
+        name,
+        TokenBucket(rate_per_minute),
+        CircuitBreaker(GEMINI_BREAKER_FAILURE_THRESHOLD, GEMINI_BREAKER_RESET_SECONDS),
+    )
+
+
+# Instâncias compartilhadas pelo processo: gerações (conselhos, tópicos, resumos) e embeddings
+generation_resilience = _caller("generate", GEMINI_GENERATE_RPM)
+embedding_resilience = _caller("embed", GEMINI_EMBED_RPM)
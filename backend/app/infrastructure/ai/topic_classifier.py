@@ -1,20 +1,31 @@
 """Serviço para classificar conversas em tópicos usando Gemini."""
-import google.generativeai as genai
-from typing import Optional
+import logging
+from typing import Optional, Protocol
+from app.domain.topics.types import Topic
+from app.infrastructure.ai.client_registry import GeminiClientRegistry, gemini_clients
+from app.infrastructure.ai.resilience import generation_resilience
+from app.infrastructure.ai.gemini_service import llm_call_stats
+from app.infrastructure.persistence.config import (
+    TOPIC_CENTROID_CANDIDATES,
+    TOPIC_CENTROID_MARGIN,
+    TOPIC_CENTROID_THRESHOLD,
+)
 
 
+logger = logging.getLogger("app.topics.classifier")
+
 class TopicClassifier:
     """Serviço para classificar conversas em tópicos usando Gemini Flash 2.5."""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, registry: GeminiClientRegistry = gemini_clients):
         """
         Inicializa o classificador de tópicos.
         
         Args:
             api_key: Chave da API do Google Gemini
+            registry: Pool de clientes por chave (o modelo e a conexão são reaproveitados)
         """
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.model = registry.model(api_key, 'gemini-2.5-flash')
     
     async def classify_conversation(
         self,
@@ -32,6 +43,9 @@ class TopicClassifier:
             
         Returns:
             Nome do tópico (priorizando existentes, ou criando novo se necessário)
+
+        Raises:
+            Exception: Falhas do Gemini são propagadas para que a tarefa seja repetida
         """
         # Constrói a lista de tópicos existentes
         topics_list = "\n".join([f"- {topic}" for topic in existing_topics]) if existing_topics else "Nenhum tópico existente ainda."
@@ -56,32 +70,141 @@ Agente: {agent_response}
 TÓPICO (apenas o nome, priorizando existente):"""
 
         try:
-            response = self.model.generate_content(prompt)
-            
-            if hasattr(response, 'text'):
-                topic_name = response.text.strip()
-            elif hasattr(response, 'parts') and response.parts:
-                topic_name = response.parts[0].text.strip()
-            else:
-                topic_name = str(response).strip()
-            
-            # Remove pontuação extra e normaliza
-            topic_name = topic_name.strip('.,!?;:')
-            
-            # Se o tópico retornado está na lista de existentes, retorna ele
-            # Caso contrário, pode ser um novo tópico ou uma variação
-            # Vamos verificar se há correspondência aproximada
-            for existing in existing_topics:
-                if existing.lower() in topic_name.lower() or topic_name.lower() in existing.lower():
-                    return existing
-            
-            # Se não encontrou correspondência, retorna o tópico retornado (novo)
-            return topic_name if topic_name else "Geral"
-            
-        except Exception as e:
-            # Em caso de erro, loga e retorna um tópico padrão
-            print(f"Erro ao classificar tópico: {e}")
-            import traceback
-            traceback.print_exc()
-            return "Geral"
+            async with llm_call_stats.track():
+                response = await generation_resilience.call(self.model.generate_content_async, prompt)
+        except Exception:
+            # O erro sobe para o worker repetir o job; "Geral" fica só para respostas vazias
+            logger.warning("Falha ao classificar tópico com o LLM", exc_info=True)
+            raise
+
+        if hasattr(response, 'text'):
+            topic_name = response.text.strip()
+        elif hasattr(response, 'parts') and response.parts:
+            topic_name = response.parts[0].text.strip()
+        else:
+            topic_name = str(response).strip()
+        
+        # Remove pontuação extra e normaliza
+        topic_name = topic_name.strip('.,!?;:')
+        
+        # Se o tópico retornado está na lista de existentes, retorna ele
+        # Caso contrário, pode ser um novo tópico ou uma variação
+        # Vamos verificar se há correspondência aproximada
+        for existing in existing_topics:
+            if existing.lower() in topic_name.lower() or topic_name.lower() in existing.lower():
+                return existing
+        
+        # Se não encontrou correspondência, retorna o tópico retornado (novo)
+        return topic_name if topic_name else "Geral"
+
+
+class TopicStore(Protocol):
+    """Interface do repositório de tópicos usada pelo classificador por centroide."""
+    async def find_nearest(self, embedding: list[float], limit: int) -> list[tuple[Topic, float]]:
+        ...
+
+    async def find_without_centroid(self) -> list[Topic]:
+        ...
+
+    async def find_by_name(self, name: str) -> Topic | None:
+        ...
+
+    async def create(self, name: str) -> Topic:
+        ...
+
+    async def add_to_centroid(self, topic: Topic, embedding: list[float]) -> None:
+        ...
+
+
+class TopicClassificationStats:
+    """Contadores de quantas classificações foram resolvidas por centroide ou pelo LLM."""
+
+    def __init__(self):
+        self.by_centroid = 0
+        self.by_llm = 0
+
+    def snapshot(self) -> dict:
+        total = self.by_centroid + self.by_llm
+        return {
+            "by_centroid": self.by_centroid,
+            "by_llm": self.by_llm,
+            "centroid_ratio": self.by_centroid / total if total else 0.0,
+        }
 
+
+# Instância compartilhada pelo processo, exposta em /metrics
+topic_classification_stats = TopicClassificationStats()
+
+
+class CentroidTopicClassifier:
+    """
+    Classifica conversas pelo centroide de embedding mais próximo.
+    
+    A conversa vai direto para o tópico cujo centroide é mais similar ao embedding
+    da primeira pergunta, quando a similaridade passa de `threshold` e supera a do
+    segundo colocado por pelo menos `margin`. Nos casos ambíguos (ou sem tópicos),
+    o LLM escolhe entre os `candidates` tópicos mais próximos ou dá nome a um novo.
+    `record_assignment` incorpora o embedding ao centroide do tópico escolhido e deve
+    ser chamado só depois que a conversa recebe o tópico, para que uma tentativa
+    repetida do job não conte a mesma conversa duas vezes.
+    """
+    
+    def __init__(
+        self,
+        llm_classifier: TopicClassifier,
+        topics: TopicStore,
+        threshold: float = TOPIC_CENTROID_THRESHOLD,
+        margin: float = TOPIC_CENTROID_MARGIN,
+        candidates: int = TOPIC_CENTROID_CANDIDATES,
+        stats: TopicClassificationStats = topic_classification_stats,
+    ):
+        self.llm_classifier = llm_classifier
+        self.topics = topics
+        self.threshold = threshold
+        self.margin = margin
+        self.candidates = candidates
+        self.stats = stats
+    
+    async def classify(
+        self,
+        user_query: str,
+        agent_response: str,
+        query_embedding: list[float]
+    ) -> Topic:
+        """
+        Retorna o tópico da conversa, criando-o se necessário, sem alterar centroides.
+        
+        Args:
+            user_query: A pergunta original do usuário
+            agent_response: A primeira resposta do agente
+            query_embedding: Embedding da pergunta original
+        """
+        matches = await self.topics.find_nearest(query_embedding, self.candidates)
+        
+        if self._is_confident(matches):
+            topic = matches[0][0]
+            self.stats.by_centroid += 1
+        else:
+            # Tópicos sem centroide ainda não podem ser comparados: vão para o LLM junto
+            # com os mais próximos, mantendo o prompt limitado
+            candidates = [match for match, _ in matches] + await self.topics.find_without_centroid()
+            topic_name = await self.llm_classifier.classify_conversation(
+                user_query=user_query,
+                agent_response=agent_response,
+                existing_topics=[candidate.name for candidate in candidates]
+            )
+            self.stats.by_llm += 1
+            topic = next((candidate for candidate in candidates if candidate.name == topic_name), None)
+            if topic is None:
+                topic = await self.topics.find_by_name(topic_name) or await self.topics.create(topic_name)
+        
+        return topic
+    
+    async def record_assignment(self, topic: Topic, query_embedding: list[float]) -> None:
+        """Incorpora o embedding da pergunta ao centroide do tópico atribuído à conversa."""
+        await self.topics.add_to_centroid(topic, query_embedding)
+    
+    def _is_confident(self, matches: list[tuple[Topic, float]]) -> bool:
+        if not matches or matches[0][1] < self.threshold:
+            return False
+        return len(matches) == 1 or matches[0][1] - matches[1][1] >= self.margin
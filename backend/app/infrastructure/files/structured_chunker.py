@@ -14,12 +14,16 @@ except ImportError:  # pragma: no-cover - fallback sem tiktoken
 
 
 _ENCODER = None
+_ENCODER_LOADED = False
 
 
 def _get_encoder():
-    global _ENCODER
-    if _ENCODER or not tiktoken:  # type: ignore[truthy-bool]
+    global _ENCODER, _ENCODER_LOADED
+    if _ENCODER_LOADED or not tiktoken:  # type: ignore[truthy-bool]
         return _ENCODER
+    # Uma falha ao carregar (ex.: sem rede para baixar o vocabulário) não é
+    # repetida a cada chamada; o fallback heurístico passa a ser usado
+    _ENCODER_LOADED = True
     try:  # pragma: no-cover - inicialização depende da lib externa
         _ENCODER = tiktoken.get_encoding("cl100k_base")  # type: ignore[attr-defined]
     except Exception:  # pragma: no-cover - fallback
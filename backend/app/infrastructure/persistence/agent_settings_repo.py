@@ -1,25 +1,33 @@
 """Repositório de Configurações do Agente usando Supabase."""
-from supabase import create_client, Client
+from supabase import Client
 from app.domain.agent.types import AgentInstruction
-from app.infrastructure.persistence.config import SUPABASE_URL, SUPABASE_KEY
+from app.infrastructure.persistence.blocking_io import supabase_io
+from app.infrastructure.persistence.supabase_clients import supabase_clients
+from app.infrastructure.single_flight import coalesce
 from datetime import datetime
 
 
 class AgentSettingsRepository:
     """Repositório para persistência de configurações do agente no Supabase."""
     
-    def __init__(self):
-        """Inicializa o repositório com cliente Supabase."""
+    def __init__(self, client: Client | None = None):
+        """
+        Inicializa o repositório.
+        
+        Args:
+            client: Cliente Supabase compartilhado (padrão: o do pool do processo)
+        """
         try:
-            if SUPABASE_URL and SUPABASE_KEY:
-                self.supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-            else:
-                self.supabase = None
+            self.supabase: Client | None = client if client is not None else supabase_clients.default()
         except Exception:
             self.supabase = None
     
+    @coalesce("agent_settings.get_instruction")
     async def get_instruction(self) -> AgentInstruction:
-        """Obtém a instrução atual do agente."""
+        """Obtém a instrução atual do agente (chamadas concorrentes compartilham a consulta)."""
+        return await supabase_io.run(self._load_instruction)
+    
+    def _load_instruction(self) -> AgentInstruction:
         if not self.supabase:
             # Retorna instrução padrão se não houver Supabase
             default_instruction = """Você é um Conselheiro Cultural de uma organização. Sua missão é ajudar colaboradores a refletirem sobre dilemas do dia a dia, sempre baseando suas respostas nos valores e práticas documentadas da organização."""
@@ -61,20 +69,20 @@ class AgentSettingsRepository:
     async def update_instruction(self, content: str) -> AgentInstruction:
         """Atualiza a instrução do agente."""
         # Verifica se já existe uma configuração
-        result = self.supabase.table("agent_settings").select("*").limit(1).execute()
+        result = await supabase_io.execute(self.supabase.table("agent_settings").select("*").limit(1))
         
         if result.data:
             # Atualiza a existente
-            self.supabase.table("agent_settings").update({
+            await supabase_io.execute(self.supabase.table("agent_settings").update({
                 "instruction": content,
                 "updated_at": datetime.utcnow().isoformat()
-            }).eq("id", result.data[0]["id"]).execute()
+            }).eq("id", result.data[0]["id"]))
         else:
             # Cria nova
-            self.supabase.table("agent_settings").insert({
+            await supabase_io.execute(self.supabase.table("agent_settings").insert({
                 "instruction": content,
                 "updated_at": datetime.utcnow().isoformat()
-            }).execute()
+            }))
         
         return AgentInstruction(
             content=content,
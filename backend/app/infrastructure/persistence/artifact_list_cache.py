@@ -0,0 +1,69 @@
+"""Cache, em memória do processo, das páginas da listagem de artefatos."""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+from app.domain.artifacts.types import ArtifactCard
+from app.infrastructure.persistence.config import ARTIFACT_LIST_CACHE_SECONDS
+from app.infrastructure.persistence.pagination import Page
+
+
+class ArtifactListCache:
+    """
+    Guarda as páginas de `list_cards` (por cursor e tamanho) até a próxima escrita.
+
+    As escritas chamam `invalidate`, que também avança a geração: uma leitura que
+    começou antes da escrita não grava seu resultado (já desatualizado) no cache.
+    O prazo `ttl_seconds` limita quanto tempo escritas de outras instâncias demoram
+    a aparecer; no máximo `max_pages` páginas ficam guardadas.
+    """
+
+    def __init__(self, ttl_seconds: float = ARTIFACT_LIST_CACHE_SECONDS, max_pages: int = 64):
+        self.ttl_seconds = ttl_seconds
+        self.max_pages = max_pages
+        self.hits = 0
+        self.misses = 0
+        self._pages: OrderedDict[Hashable, tuple[float, Page[ArtifactCard]]] = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: Hashable) -> Page[ArtifactCard] | None:
+        """Retorna a página em cache, ou None se ausente ou expirada."""
+        with self._lock:
+            entry = self._pages.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+                self._pages.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def store(self, key: Hashable, page: Page[ArtifactCard], generation: int) -> None:
+        """Guarda a página lida na `generation` informada, se nada mudou desde então."""
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._pages[key] = (time.monotonic(), page)
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """Descarta todas as páginas (chamado em toda escrita na tabela de artefatos)."""
+        with self._lock:
+            self._pages.clear()
+            self._generation += 1
+
+    def snapshot(self) -> dict:
+        return {"pages": len(self._pages), "hits": self.hits, "misses": self.misses}
+
+
+# Instância compartilhada pelo processo (listagem e escritas de artefatos)
+artifact_list_cache = ArtifactListCache()
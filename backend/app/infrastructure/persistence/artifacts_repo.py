@@ -1,19 +1,52 @@
 """Repositório de Artefatos usando Supabase."""
+from enum import Enum, auto
 from typing import Protocol
+import asyncio
 import json
-from supabase import create_client, Client
-from app.domain.artifacts.types import Artifact, ArtifactChunk, ArtifactSourceType, ChunkMetadata
+from supabase import Client
+from app.domain.artifacts.types import Artifact, ArtifactCard, ArtifactChunk, ArtifactSourceType, ChunkMetadata
 from app.domain.shared_kernel import ArtifactId, ChunkId, Embedding
-from app.infrastructure.persistence.config import SUPABASE_URL, SUPABASE_KEY
+from app.infrastructure.persistence.blocking_io import supabase_io
+from app.infrastructure.persistence.supabase_clients import supabase_clients
+from app.infrastructure.persistence.artifact_list_cache import artifact_list_cache
+from app.infrastructure.persistence.chunk_filter_index import chunk_filter_index
+from app.infrastructure.persistence.citation_cache import citation_cache
+from app.infrastructure.persistence.config import PAGE_SIZE_DEFAULT
+from app.infrastructure.persistence.pagination import Cursor, Page, build_page, keyset_query
+from app.infrastructure.single_flight import coalesce
+from datetime import datetime
 import uuid
 
 
+# Colunas exibidas no card da listagem (sem o conteúdo original)
+ARTIFACT_CARD_COLUMNS = "id, title, source_type, description, tags, color, source_url, created_at"
+
+# Cabeçalho do artefato (as mesmas colunas do card) e chunks sem o vetor, para as
+# projeções de `find_by_id`
+ARTIFACT_HEADER_COLUMNS = ARTIFACT_CARD_COLUMNS
+CHUNK_COLUMNS_WITHOUT_EMBEDDING = (
+    "id, artifact_id, content, section_title, section_level, content_type, position, token_count, breadcrumbs"
+)
+
+
+class ArtifactProjection(Enum):
+    """O quanto de um artefato `find_by_id` carrega."""
+    HEADER = auto()  # Só o cabeçalho: sem o conteúdo original e sem chunks
+    CHUNKS = auto()  # Cabeçalho e chunks, sem os embeddings
+    FULL = auto()  # Tudo, inclusive o conteúdo original e os embeddings
+
+
 class ArtifactsRepository:
     """Repositório para persistência de artefatos no Supabase."""
     
-    def __init__(self):
-        """Inicializa o repositório com cliente Supabase."""
-        self.supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    def __init__(self, client: Client | None = None):
+        """
+        Inicializa o repositório.
+        
+        Args:
+            client: Cliente Supabase compartilhado (padrão: o do pool do processo)
+        """
+        self.supabase: Client = client if client is not None else supabase_clients.default()
     
     async def save(self, artifact: Artifact, source_url: str | None = None, color: str | None = None) -> Artifact:
         """
@@ -38,7 +71,7 @@ class ArtifactsRepository:
             "created_at": "now()"
         }
         
-        self.supabase.table("artifacts").insert(artifact_data).execute()
+        await supabase_io.execute(self.supabase.table("artifacts").insert(artifact_data))
         
         # Salva os chunks com seus embeddings
         for chunk in artifact.chunks:
@@ -56,25 +89,49 @@ class ArtifactsRepository:
                 "breadcrumbs": metadata.breadcrumbs if metadata else None,
             }
             
-            self.supabase.table("artifact_chunks").insert(chunk_data).execute()
+            await supabase_io.execute(self.supabase.table("artifact_chunks").insert(chunk_data))
         
+        chunk_filter_index.invalidate()
+        artifact_list_cache.invalidate()
         return artifact
     
-    async def find_by_id(self, artifact_id: ArtifactId) -> Artifact | None:
-        """Busca um artefato por ID."""
-        result = self.supabase.table("artifacts").select("*").eq("id", str(artifact_id)).execute()
+    async def find_by_id(
+        self,
+        artifact_id: ArtifactId,
+        projection: ArtifactProjection = ArtifactProjection.FULL
+    ) -> Artifact | None:
+        """
+        Busca um artefato por ID.
+        
+        `projection` limita o que é lido: fora de FULL os embeddings e o conteúdo
+        original não são trafegados (os chunks vêm com o vetor vazio), e HEADER
+        também não lê os chunks.
+        """
+        full = projection is ArtifactProjection.FULL
+        artifact_query = self.supabase.table("artifacts").select("*" if full else ARTIFACT_HEADER_COLUMNS).eq("id", str(artifact_id))
+        
+        if projection is ArtifactProjection.HEADER:
+            result = await supabase_io.execute(artifact_query)
+            chunk_rows = []
+        else:
+            # O artefato e seus chunks são buscados em paralelo
+            result, chunks_result = await asyncio.gather(
+                supabase_io.execute(artifact_query),
+                supabase_io.execute(
+                    self.supabase.table("artifact_chunks")
+                    .select("*" if full else CHUNK_COLUMNS_WITHOUT_EMBEDDING)
+                    .eq("artifact_id", str(artifact_id))
+                )
+            )
+            chunk_rows = chunks_result.data
         
         if not result.data:
             return None
         
         artifact_row = result.data[0]
         
-        # Busca os chunks do artefato
-        chunks_result = self.supabase.table("artifact_chunks").select("*").eq("artifact_id", str(artifact_id)).execute()
-        
-        # Converte os chunks (precisa dos embeddings)
         chunks = []
-        for chunk_row in chunks_result.data:
+        for chunk_row in chunk_rows:
             breadcrumbs = chunk_row.get("breadcrumbs") or []
             if isinstance(breadcrumbs, str):
                 try:
@@ -85,7 +142,7 @@ class ArtifactsRepository:
                 id=ChunkId(uuid.UUID(chunk_row["id"])),
                 artifact_id=ArtifactId(uuid.UUID(chunk_row["artifact_id"])),
                 content=chunk_row["content"],
-                embedding=Embedding(vector=chunk_row["embedding"]),
+                embedding=Embedding(vector=chunk_row.get("embedding") or []),
                 metadata=None
             )
             if any(
@@ -129,45 +186,57 @@ class ArtifactsRepository:
             original_content=artifact_row.get("original_content")
         )
     
-    async def get_artifact_data(self, artifact_id: ArtifactId) -> dict | None:
-        """Busca dados adicionais do artefato (description, tags, color)."""
-        result = self.supabase.table("artifacts").select("description, tags, color").eq("id", str(artifact_id)).execute()
+    async def find_original_content(self, artifact_id: ArtifactId) -> str | None:
+        """Busca só o conteúdo original do artefato (None se não houver)."""
+        result = await supabase_io.execute(self.supabase.table("artifacts").select("original_content").eq("id", str(artifact_id)))
         
         if not result.data:
             return None
+        return result.data[0].get("original_content")
+    
+    async def find_card_by_id(self, artifact_id: ArtifactId) -> ArtifactCard | None:
+        """Busca os campos do card de um artefato (os mesmos da listagem), em uma consulta."""
+        result = await supabase_io.execute(
+            self.supabase.table("artifacts").select(ARTIFACT_CARD_COLUMNS).eq("id", str(artifact_id))
+        )
         
-        return {
-            "description": result.data[0].get("description"),
-            "tags": result.data[0].get("tags", []) or [],
-            "color": result.data[0].get("color"),
-            "original_content": result.data[0].get("original_content")
-        }
+        if not result.data:
+            return None
+        return self._row_to_card(result.data[0])
     
     async def update_artifact_tags(self, artifact_id: ArtifactId, tags: list[str]) -> None:
         """Atualiza as tags de um artefato."""
-        self.supabase.table("artifacts").update({"tags": tags}).eq("id", str(artifact_id)).execute()
+        await supabase_io.execute(self.supabase.table("artifacts").update({"tags": tags}).eq("id", str(artifact_id)))
+        chunk_filter_index.invalidate()
+        artifact_list_cache.invalidate()
     
     async def update_artifact_title(self, artifact_id: ArtifactId, title: str) -> None:
         """Atualiza o título de um artefato."""
-        self.supabase.table("artifacts").update({"title": title}).eq("id", str(artifact_id)).execute()
+        await supabase_io.execute(self.supabase.table("artifacts").update({"title": title}).eq("id", str(artifact_id)))
+        # O título aparece nas citações em cache
+        citation_cache.invalidate()
+        artifact_list_cache.invalidate()
     
     async def update_artifact_description(self, artifact_id: ArtifactId, description: str | None) -> None:
         """Atualiza a descrição de um artefato."""
-        self.supabase.table("artifacts").update({"description": description}).eq("id", str(artifact_id)).execute()
+        await supabase_io.execute(self.supabase.table("artifacts").update({"description": description}).eq("id", str(artifact_id)))
+        artifact_list_cache.invalidate()
     
     async def update_artifact_color(self, artifact_id: ArtifactId, color: str | None) -> None:
         """Atualiza a cor de um artefato."""
-        self.supabase.table("artifacts").update({"color": color}).eq("id", str(artifact_id)).execute()
+        await supabase_io.execute(self.supabase.table("artifacts").update({"color": color}).eq("id", str(artifact_id)))
+        artifact_list_cache.invalidate()
     
     async def update_artifact_content(self, artifact_id: ArtifactId, new_content: str, embedding_generator) -> None:
         """Atualiza o conteúdo de um artefato TEXT re-processando os chunks."""
         from app.domain.artifacts.workflows import _generate_structured_chunks
         
         # Deleta chunks antigos
-        self.supabase.table("artifact_chunks").delete().eq("artifact_id", str(artifact_id)).execute()
+        await supabase_io.execute(self.supabase.table("artifact_chunks").delete().eq("artifact_id", str(artifact_id)))
         
-        # Cria novos chunks
-        artifact_chunks = _generate_structured_chunks(
+        # Cria novos chunks (embeddings rodam fora do event loop)
+        artifact_chunks = await asyncio.to_thread(
+            _generate_structured_chunks,
             text_content=new_content,
             artifact_id=artifact_id,
             embedding_generator=embedding_generator,
@@ -188,12 +257,19 @@ class ArtifactsRepository:
                 "breadcrumbs": metadata.breadcrumbs if metadata else None,
             }
 
-            self.supabase.table("artifact_chunks").insert(chunk_data).execute()
+            await supabase_io.execute(self.supabase.table("artifact_chunks").insert(chunk_data))
         # Atualiza o conteúdo original
-        self.supabase.table("artifacts").update({"original_content": new_content}).eq("id", str(artifact_id)).execute()
+        await supabase_io.execute(self.supabase.table("artifacts").update({"original_content": new_content}).eq("id", str(artifact_id)))
+        chunk_filter_index.invalidate()
+        citation_cache.invalidate()
+        artifact_list_cache.invalidate()
     
+    @coalesce("artifacts.find_all")
     async def find_all(self) -> list[Artifact]:
         """Busca todos os artefatos (sem chunks, apenas metadados)."""
+        return await supabase_io.run(self._load_all)
+    
+    def _load_all(self) -> list[Artifact]:
         result = self.supabase.table("artifacts").select("*").order("created_at", desc=True).execute()
         
         artifacts = []
@@ -212,17 +288,56 @@ class ArtifactsRepository:
         
         return artifacts
     
+    async def list_cards(self, cursor: Cursor | None = None, limit: int = PAGE_SIZE_DEFAULT) -> Page[ArtifactCard]:
+        """
+        Lista uma página de artefatos com os campos do card, em uma consulta.
+        
+        As páginas ficam em cache no processo até a próxima escrita de artefato.
+        """
+        page = artifact_list_cache.get((cursor, limit))
+        if page is not None:
+            return page
+        return await self._load_cards(cursor, limit)
+    
+    @coalesce("artifacts.list_cards")
+    async def _load_cards(self, cursor: Cursor | None, limit: int) -> Page[ArtifactCard]:
+        generation = artifact_list_cache.generation
+        result = await supabase_io.execute(
+            keyset_query(self.supabase.table("artifacts").select(ARTIFACT_CARD_COLUMNS), cursor, limit)
+        )
+        page = build_page(result.data, limit, self._row_to_card)
+        artifact_list_cache.store((cursor, limit), page, generation)
+        return page
+    
+    @staticmethod
+    def _row_to_card(row: dict) -> ArtifactCard:
+        return ArtifactCard(
+            id=ArtifactId(uuid.UUID(row["id"])),
+            title=row["title"],
+            source_type=ArtifactSourceType[row["source_type"]],
+            created_at=datetime.fromisoformat(row["created_at"].replace("Z", "+00:00")),
+            description=row.get("description"),
+            tags=row.get("tags") or [],
+            color=row.get("color"),
+            source_url=row.get("source_url")
+        )
+    
     async def delete(self, artifact_id: ArtifactId) -> None:
         """Deleta um artefato e seus chunks."""
         # Deleta chunks primeiro
-        self.supabase.table("artifact_chunks").delete().eq("artifact_id", str(artifact_id)).execute()
+        await supabase_io.execute(self.supabase.table("artifact_chunks").delete().eq("artifact_id", str(artifact_id)))
         
         # Deleta o artefato
-        self.supabase.table("artifacts").delete().eq("id", str(artifact_id)).execute()
+        await supabase_io.execute(self.supabase.table("artifacts").delete().eq("id", str(artifact_id)))
+        chunk_filter_index.invalidate()
+        citation_cache.invalidate()
+        artifact_list_cache.invalidate()
     
     async def delete_chunks(self, artifact_id: ArtifactId) -> None:
         """Deleta apenas os chunks de um artefato."""
-        self.supabase.table("artifact_chunks").delete().eq("artifact_id", str(artifact_id)).execute()
+        await supabase_io.execute(self.supabase.table("artifact_chunks").delete().eq("artifact_id", str(artifact_id)))
+        chunk_filter_index.invalidate()
+        citation_cache.invalidate()
     
     async def save_chunks(self, artifact_id: ArtifactId, chunks: list) -> None:
         """Salva chunks de um artefato."""
@@ -240,11 +355,13 @@ class ArtifactsRepository:
                 "token_count": metadata.token_count if metadata else None,
                 "breadcrumbs": metadata.breadcrumbs if metadata else None,
             }
-            self.supabase.table("artifact_chunks").insert(chunk_data).execute()
+            await supabase_io.execute(self.supabase.table("artifact_chunks").insert(chunk_data))
+        chunk_filter_index.invalidate()
     
     async def update_source_url(self, artifact_id: ArtifactId, source_url: str) -> None:
         """Atualiza a URL do source de um artefato."""
-        self.supabase.table("artifacts").update({"source_url": source_url}).eq("id", str(artifact_id)).execute()
+        await supabase_io.execute(self.supabase.table("artifacts").update({"source_url": source_url}).eq("id", str(artifact_id)))
+        artifact_list_cache.invalidate()
     
     async def find_chunks_by_embedding(self, embedding: list[float], limit: int = 5) -> list[ArtifactChunk]:
         """
@@ -0,0 +1,75 @@
+"""Execução das chamadas síncronas do cliente Supabase fora do event loop."""
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from app.infrastructure.persistence.config import SUPABASE_IO_WORKERS
+
+
+T = TypeVar("T")
+
+
+class BoundedExecutor:
+    """
+    Pool de threads de tamanho fixo para I/O bloqueante.
+
+    O supabase-py 2.8 é síncrono: cada `.execute()` espera a resposta HTTP e, se
+    rodasse no event loop, serializaria todas as requisições. Aqui as chamadas vão
+    para no máximo `max_workers` threads (as demais aguardam na fila sem bloquear o
+    loop), separadas do executor padrão usado por `asyncio.to_thread`.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Executa `fn(*args, **kwargs)` em uma thread do pool e aguarda o resultado."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            return await loop.run_in_executor(self._get_executor(), functools.partial(fn, *args, **kwargs))
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    async def execute(self, query):
+        """Executa um query builder do supabase-py (`query.execute()`)."""
+        return await self.run(query.execute)
+
+    def shutdown(self) -> None:
+        """Encerra as threads; o pool é recriado se voltar a ser usado."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def snapshot(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "calls": self.calls,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+        }
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix=self.name)
+            return self._executor
+
+
+# Instância compartilhada pelo processo (repositórios, índices e rotas que usam o Supabase)
+supabase_io = BoundedExecutor("supabase-io", SUPABASE_IO_WORKERS)
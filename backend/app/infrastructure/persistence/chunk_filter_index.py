@@ -0,0 +1,191 @@
+"""Índice de postings em bitmap para pré-filtrar chunks por metadados."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+
+from app.domain.artifacts.types import KnowledgeFilter
+from app.infrastructure.persistence.blocking_io import supabase_io
+from app.infrastructure.persistence.config import CHUNK_FILTER_INDEX_REFRESH_SECONDS
+
+
+logger = logging.getLogger("app.rag.retrieval")
+
+_PAGE_SIZE = 1000
+_SECTION_SEPARATOR = " › "
+
+
+def _normalize(value: str) -> str:
+    return value.strip().casefold()
+
+
+def _section_path(row: dict) -> str:
+    breadcrumbs = row.get("breadcrumbs") or []
+    if isinstance(breadcrumbs, str):
+        try:
+            breadcrumbs = json.loads(breadcrumbs)
+        except json.JSONDecodeError:
+            breadcrumbs = []
+    if breadcrumbs:
+        return _normalize(_SECTION_SEPARATOR.join(breadcrumbs))
+    return _normalize(row.get("section_title") or "")
+
+
+class ChunkFilterIndex:
+    """
+    Mantém, para cada valor de metadado, o conjunto de chunks que o possuem.
+
+    Cada posting é um bitmap (um `int` do Python) indexado pela posição do chunk, então
+    resolver um filtro é uma sequência de OR/AND bit a bit. O resultado é a lista de IDs
+    candidatos enviada à RPC de similaridade, que só compara esses vetores.
+    """
+
+    def __init__(self, refresh_interval: float = CHUNK_FILTER_INDEX_REFRESH_SECONDS):
+        self.refresh_interval = refresh_interval
+        self._chunk_ids: list[str] = []
+        self._by_artifact: dict[str, int] = {}
+        self._by_tag: dict[str, int] = {}
+        self._by_content_type: dict[str, int] = {}
+        self._by_section: dict[str, int] = {}
+        self._loaded_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._chunk_ids)
+
+    def invalidate(self) -> None:
+        """Força a reconstrução na próxima consulta (chamado em escritas de artefatos)."""
+        self._loaded_at = None
+
+    def build(self, chunk_rows: list[dict], artifact_rows: list[dict]) -> None:
+        """Reconstrói os postings a partir das linhas de chunks e artefatos."""
+        tags_by_artifact = {
+            row["id"]: [_normalize(tag) for tag in (row.get("tags") or [])]
+            for row in artifact_rows
+            if row.get("id")
+        }
+
+        chunk_ids: list[str] = []
+        by_artifact: dict[str, int] = {}
+        by_tag: dict[str, int] = {}
+        by_content_type: dict[str, int] = {}
+        by_section: dict[str, int] = {}
+
+        for row in chunk_rows:
+            chunk_id = row.get("id")
+            artifact_id = row.get("artifact_id")
+            if not chunk_id or not artifact_id:
+                continue
+            bit = 1 << len(chunk_ids)
+            chunk_ids.append(chunk_id)
+
+            by_artifact[artifact_id] = by_artifact.get(artifact_id, 0) | bit
+            for tag in tags_by_artifact.get(artifact_id, []):
+                by_tag[tag] = by_tag.get(tag, 0) | bit
+            content_type = row.get("content_type")
+            if content_type:
+                key = _normalize(content_type)
+                by_content_type[key] = by_content_type.get(key, 0) | bit
+            section = _section_path(row)
+            if section:
+                by_section[section] = by_section.get(section, 0) | bit
+
+        self._chunk_ids = chunk_ids
+        self._by_artifact = by_artifact
+        self._by_tag = by_tag
+        self._by_content_type = by_content_type
+        self._by_section = by_section
+        self._loaded_at = time.monotonic()
+
+    async def ensure_fresh(self, client) -> None:
+        """Carrega (ou recarrega, se expirado/invalidado) os postings a partir do banco."""
+        if self._is_fresh():
+            return
+
+        async with self._lock:
+            if self._is_fresh():
+                return
+            chunk_rows, artifact_rows = await supabase_io.run(self._fetch_rows, client)
+            self.build(chunk_rows, artifact_rows)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Índice de filtros carregado: %d chunks, %d tags, %d seções",
+                    len(self._chunk_ids),
+                    len(self._by_tag),
+                    len(self._by_section),
+                )
+
+    def resolve(self, knowledge_filter: KnowledgeFilter | None) -> list[str] | None:
+        """
+        Converte um filtro na lista de IDs de chunks candidatos.
+
+        Retorna None quando não há filtro (busca em todo o corpus).
+        """
+        if knowledge_filter is None or knowledge_filter.is_empty():
+            return None
+
+        selected = (1 << len(self._chunk_ids)) - 1
+        if knowledge_filter.artifact_ids:
+            selected &= self._union(self._by_artifact, [str(a) for a in knowledge_filter.artifact_ids])
+        if knowledge_filter.tags:
+            selected &= self._union(self._by_tag, [_normalize(t) for t in knowledge_filter.tags])
+        if knowledge_filter.content_types:
+            selected &= self._union(
+                self._by_content_type, [_normalize(c) for c in knowledge_filter.content_types]
+            )
+        if knowledge_filter.section_prefixes:
+            prefixes = tuple(_normalize(p) for p in knowledge_filter.section_prefixes)
+            selected &= self._union(
+                self._by_section, [s for s in self._by_section if s.startswith(prefixes)]
+            )
+
+        chunk_ids = []
+        while selected:
+            lowest = selected & -selected
+            chunk_ids.append(self._chunk_ids[lowest.bit_length() - 1])
+            selected ^= lowest
+        return chunk_ids
+
+    @staticmethod
+    def _union(postings: dict[str, int], keys: list[str]) -> int:
+        bitmap = 0
+        for key in keys:
+            bitmap |= postings.get(key, 0)
+        return bitmap
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._loaded_at is not None
+            and time.monotonic() - self._loaded_at < self.refresh_interval
+        )
+
+    @staticmethod
+    def _fetch_rows(client) -> tuple[list[dict], list[dict]]:
+        def _paged(table: str, columns: str) -> list[dict]:
+            rows: list[dict] = []
+            offset = 0
+            while True:
+                response = (
+                    client.table(table)
+                    .select(columns)
+                    .order("id")
+                    .range(offset, offset + _PAGE_SIZE - 1)
+                    .execute()
+                )
+                page = getattr(response, "data", None) or []
+                rows.extend(page)
+                if len(page) < _PAGE_SIZE:
+                    return rows
+                offset += _PAGE_SIZE
+
+        chunk_rows = _paged(
+            "artifact_chunks", "id, artifact_id, content_type, section_title, breadcrumbs"
+        )
+        artifact_rows = _paged("artifacts", "id, tags")
+        return chunk_rows, artifact_rows
+
+
+# Instância compartilhada pelo processo (busca RAG e escritas de artefatos)
+chunk_filter_index = ChunkFilterIndex()
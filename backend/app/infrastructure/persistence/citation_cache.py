@@ -0,0 +1,80 @@
+"""Cache LRU, compartilhado pelo processo, dos metadados de chunks citados."""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+
+from app.domain.conversations.types import CitedSource
+from app.infrastructure.persistence.config import CITATION_CACHE_MAX_ENTRIES, CITATION_CACHE_SECONDS
+
+
+class CitationCache:
+    """
+    Guarda o `CitedSource` de cada chunk já citado, indexado pelo ID do chunk.
+
+    Um chunk não muda depois de ingerido: só some ou é recriado com outro ID quando
+    o artefato é reprocessado. As escritas de artefatos deste processo chamam
+    `invalidate` (o que também cobre a troca de título, que aparece nas citações) e
+    avançam a geração: uma leitura que começou antes da escrita não grava seu
+    resultado no cache. O prazo `ttl_seconds` limita quanto tempo escritas de outras
+    instâncias demoram a aparecer; os menos usados saem quando passa de `max_entries`.
+    """
+
+    def __init__(self, max_entries: int = CITATION_CACHE_MAX_ENTRIES, ttl_seconds: float = CITATION_CACHE_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, CitedSource]] = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get_many(self, chunk_ids: list[str]) -> tuple[dict[str, CitedSource], list[str]]:
+        """Retorna as citações em cache e os IDs que precisam ser buscados no banco."""
+        found: dict[str, CitedSource] = {}
+        missing: list[str] = []
+        now = time.monotonic()
+        with self._lock:
+            for chunk_id in chunk_ids:
+                entry = self._entries.get(chunk_id)
+                if entry is None or now - entry[0] >= self.ttl_seconds:
+                    missing.append(chunk_id)
+                else:
+                    self._entries.move_to_end(chunk_id)
+                    found[chunk_id] = entry[1]
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def put_many(self, sources: dict[str, CitedSource], generation: int) -> None:
+        """Guarda as citações lidas na `generation` informada, se nada mudou desde então."""
+        now = time.monotonic()
+        with self._lock:
+            if generation != self._generation:
+                return
+            for chunk_id, source in sources.items():
+                self._entries[chunk_id] = (now, source)
+                self._entries.move_to_end(chunk_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """Descarta todas as entradas (chamado quando artefatos ou chunks mudam)."""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def snapshot(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Instância compartilhada pelo processo (leitura de conversas e escritas de artefatos)
+citation_cache = CitationCache()
@@ -15,6 +15,87 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 # Database
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Backend dos repositórios: "supabase" (PostgREST via HTTP) ou "postgres" (conexão direta
+# por um pool assíncrono em DATABASE_URL). Com "postgres", consultas executadas a partir de
+# DATABASE_PREPARE_THRESHOLD vezes viram prepared statements ("none" desativa, necessário
+# atrás de um pooler em modo transação)
+PERSISTENCE_BACKEND = os.getenv("PERSISTENCE_BACKEND", "supabase").lower()
+DATABASE_POOL_MIN_SIZE = int(os.getenv("DATABASE_POOL_MIN_SIZE", "2"))
+DATABASE_POOL_MAX_SIZE = int(os.getenv("DATABASE_POOL_MAX_SIZE", "10"))
+_prepare_threshold = os.getenv("DATABASE_PREPARE_THRESHOLD", "0").lower()
+DATABASE_PREPARE_THRESHOLD = None if _prepare_threshold in ("", "none") else int(_prepare_threshold)
+
+# Threads dedicadas às chamadas síncronas do cliente Supabase (máximo de chamadas simultâneas)
+SUPABASE_IO_WORKERS = int(os.getenv("SUPABASE_IO_WORKERS", "16"))
+
+# Índice de aprendizados em memória (intervalo do poll de mudanças, em segundos)
+LEARNINGS_INDEX_REFRESH_SECONDS = float(os.getenv("LEARNINGS_INDEX_REFRESH_SECONDS", "30"))
+# Janela revista a cada poll (atraso tolerado entre o `created_at` e o commit em outra
+# instância) e intervalo da recarga completa, que também remove aprendizados apagados
+LEARNINGS_INDEX_LOOKBACK_SECONDS = float(os.getenv("LEARNINGS_INDEX_LOOKBACK_SECONDS", "300"))
+LEARNINGS_INDEX_FULL_RELOAD_SECONDS = float(os.getenv("LEARNINGS_INDEX_FULL_RELOAD_SECONDS", "900"))
+
+# Índice de filtros de metadados dos chunks (tempo máximo antes de recarregar, em segundos)
+CHUNK_FILTER_INDEX_REFRESH_SECONDS = float(os.getenv("CHUNK_FILTER_INDEX_REFRESH_SECONDS", "300"))
+
+# Pool de clientes do Gemini por chave de API (tempo ocioso antes do descarte, em segundos)
+GEMINI_CLIENT_IDLE_SECONDS = float(os.getenv("GEMINI_CLIENT_IDLE_SECONDS", "900"))
+GEMINI_CLIENT_MAX_KEYS = int(os.getenv("GEMINI_CLIENT_MAX_KEYS", "32"))
+
+# Resiliência das chamadas ao Gemini: cotas (requisições por minuto), retry e circuit breaker
+GEMINI_GENERATE_RPM = float(os.getenv("GEMINI_GENERATE_RPM", "300"))
+GEMINI_EMBED_RPM = float(os.getenv("GEMINI_EMBED_RPM", "1500"))
+GEMINI_RETRY_ATTEMPTS = int(os.getenv("GEMINI_RETRY_ATTEMPTS", "4"))
+GEMINI_RETRY_BASE_SECONDS = float(os.getenv("GEMINI_RETRY_BASE_SECONDS", "0.5"))
+GEMINI_RETRY_MAX_SECONDS = float(os.getenv("GEMINI_RETRY_MAX_SECONDS", "8"))
+GEMINI_BREAKER_FAILURE_THRESHOLD = int(os.getenv("GEMINI_BREAKER_FAILURE_THRESHOLD", "5"))
+GEMINI_BREAKER_RESET_SECONDS = float(os.getenv("GEMINI_BREAKER_RESET_SECONDS", "30"))
+
+# Cache da chave de API do Gemini resolvida (intervalo do poll de mudanças, em segundos)
+GEMINI_API_KEY_CACHE_SECONDS = float(os.getenv("GEMINI_API_KEY_CACHE_SECONDS", "10"))
+
+# Orçamento de tokens do prompt de conselho (instrução, pergunta, chunks, aprendizados, histórico)
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+
+# Cache de contexto do prefixo estável do prompt: "gemini", "local" (substituto em memória,
+# para testes offline) ou "off". O Gemini exige um tamanho mínimo de conteúdo em cache.
+PROMPT_PREFIX_CACHE = os.getenv("PROMPT_PREFIX_CACHE", "gemini").lower()
+PROMPT_PREFIX_CACHE_TTL_SECONDS = float(os.getenv("PROMPT_PREFIX_CACHE_TTL_SECONDS", "3600"))
+PROMPT_PREFIX_CACHE_MIN_TOKENS = int(os.getenv("PROMPT_PREFIX_CACHE_MIN_TOKENS", "1024"))
+
+# Trocas (pergunta + resposta) mais recentes enviadas na íntegra; as anteriores vão para o resumo
+CONVERSATION_RECENT_TURNS = int(os.getenv("CONVERSATION_RECENT_TURNS", "2"))
+
+# Worker em processo da classificação de tópicos: tarefas simultâneas, tentativas por job e
+# tempo máximo (em segundos) para concluir os jobs pendentes no encerramento
+TOPIC_WORKER_CONCURRENCY = int(os.getenv("TOPIC_WORKER_CONCURRENCY", "2"))
+TOPIC_WORKER_MAX_ATTEMPTS = int(os.getenv("TOPIC_WORKER_MAX_ATTEMPTS", "3"))
+TOPIC_WORKER_DRAIN_SECONDS = float(os.getenv("TOPIC_WORKER_DRAIN_SECONDS", "10"))
+
+# Classificação de tópicos por centroide de embeddings: similaridade mínima para atribuir
+# sem o LLM, vantagem mínima sobre o segundo colocado, quantos tópicos próximos o LLM recebe
+# nos casos ambíguos e intervalo de recarga dos centroides (em segundos)
+TOPIC_CENTROID_THRESHOLD = float(os.getenv("TOPIC_CENTROID_THRESHOLD", "0.80"))
+TOPIC_CENTROID_MARGIN = float(os.getenv("TOPIC_CENTROID_MARGIN", "0.03"))
+TOPIC_CENTROID_CANDIDATES = int(os.getenv("TOPIC_CENTROID_CANDIDATES", "5"))
+TOPIC_CENTROID_REFRESH_SECONDS = float(os.getenv("TOPIC_CENTROID_REFRESH_SECONDS", "60"))
+
+# Máximo de feedbacks por aprovação em lote (todos vão em uma única chamada ao LLM)
+FEEDBACK_BATCH_MAX_ITEMS = int(os.getenv("FEEDBACK_BATCH_MAX_ITEMS", "100"))
+
+# Cache LRU dos metadados de chunks citados nas conversas (máximo de chunks em memória)
+CITATION_CACHE_MAX_ENTRIES = int(os.getenv("CITATION_CACHE_MAX_ENTRIES", "5000"))
+# Validade das citações em cache (segundos; cobre artefatos alterados por outras instâncias)
+CITATION_CACHE_SECONDS = float(os.getenv("CITATION_CACHE_SECONDS", "600"))
+
+# Cache da listagem de artefatos (segundos; as escritas deste processo invalidam na hora,
+# o prazo cobre escritas feitas por outras instâncias)
+ARTIFACT_LIST_CACHE_SECONDS = float(os.getenv("ARTIFACT_LIST_CACHE_SECONDS", "60"))
+
+# Paginação por cursor das listagens (tamanho padrão e máximo da página)
+PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", "50"))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "200"))
+
 # As validações serão feitas quando necessário, não na importação
 # Isso permite que o servidor inicie mesmo sem todas as variáveis
 
@@ -1,23 +1,34 @@
 """Repositório de Conversas usando Supabase."""
+import asyncio
 import json
-from supabase import create_client, Client
-from app.domain.conversations.types import Conversation, Message, Author, CitedSource
+import logging
+from supabase import Client
+from app.domain.conversations.types import Conversation, ConversationSummary, Message, Author, CitedSource
 from app.domain.shared_kernel import ConversationId, MessageId, ArtifactId, TopicId, ChunkId
-from app.infrastructure.persistence.config import SUPABASE_URL, SUPABASE_KEY
+from app.infrastructure.persistence.blocking_io import supabase_io
+from app.infrastructure.persistence.citation_cache import citation_cache
+from app.infrastructure.persistence.config import PAGE_SIZE_DEFAULT
+from app.infrastructure.persistence.pagination import Cursor, Page, build_page, keyset_query
+from app.infrastructure.persistence.supabase_clients import MISSING_FUNCTION, in_batches, is_missing_schema_error, supabase_clients
 from datetime import datetime
 import uuid
 
 
+logger = logging.getLogger("app.persistence.conversations")
+
+
 class ConversationsRepository:
     """Repositório para persistência de conversas no Supabase."""
     
-    def __init__(self):
-        """Inicializa o repositório com cliente Supabase."""
+    def __init__(self, client: Client | None = None):
+        """
+        Inicializa o repositório.
+        
+        Args:
+            client: Cliente Supabase compartilhado (padrão: o do pool do processo)
+        """
         try:
-            if SUPABASE_URL and SUPABASE_KEY:
-                self.supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-            else:
-                self.supabase = None
+            self.supabase: Client | None = client if client is not None else supabase_clients.default()
         except Exception:
             self.supabase = None
     
@@ -31,7 +42,7 @@ class ConversationsRepository:
                 "created_at": "now()"
             }
             
-            self.supabase.table("conversations").insert(conversation_data).execute()
+            await supabase_io.execute(self.supabase.table("conversations").insert(conversation_data))
         except Exception as e:
             # Se não conseguir salvar no Supabase, ainda retorna a conversa
             # para que o sistema possa funcionar
@@ -48,13 +59,30 @@ class ConversationsRepository:
         conversation_id: ConversationId,
         topic_id: TopicId | None
     ) -> None:
-        """Atualiza o tópico de uma conversa."""
+        """
+        Atualiza o tópico de uma conversa.
+        
+        A função `set_conversation_topic` (migração 006) troca o tópico e ajusta as
+        contagens de conversas dos dois tópicos na mesma transação.
+        """
         if not self.supabase:
             return
         
+        try:
+            await supabase_io.execute(self.supabase.rpc("set_conversation_topic", {
+                "p_conversation_id": str(conversation_id),
+                "p_topic_id": str(topic_id) if topic_id else None,
+            }))
+            return
+        except Exception as error:
+            if not is_missing_schema_error(error, MISSING_FUNCTION):
+                logger.warning("Erro ao trocar o tópico da conversa %s", conversation_id, exc_info=True)
+                raise
+        
+        # Banco sem a função: só troca o tópico (a reconciliação corrige as contagens)
         try:
             update_data = {"topic_id": str(topic_id) if topic_id else None}
-            self.supabase.table("conversations").update(update_data).eq("id", str(conversation_id)).execute()
+            await supabase_io.execute(self.supabase.table("conversations").update(update_data).eq("id", str(conversation_id)))
         except Exception:
             pass
     
@@ -76,40 +104,136 @@ class ConversationsRepository:
                 update_data["title"] = title
             
             if update_data:
-                self.supabase.table("conversations").update(update_data).eq("id", str(conversation_id)).execute()
+                await supabase_io.execute(self.supabase.table("conversations").update(update_data).eq("id", str(conversation_id)))
         except Exception:
             pass
     
-    async def find_by_topic(self, topic_id: TopicId | None) -> list[Conversation]:
-        """Busca conversas por tópico (None para todas)."""
-        # Otimizado: busca apenas IDs das conversas, não carrega todas as mensagens
-        # Isso é usado apenas para contar conversas, então não precisamos das mensagens completas
+    async def update_context_summary(
+        self,
+        conversation_id: ConversationId,
+        context_summary: str,
+        summarized_message_count: int
+    ) -> None:
+        """
+        Atualiza o resumo acumulado da conversa.
+        
+        Só sobrescreve um resumo que cubra menos mensagens, para que uma atualização
+        atrasada não desfaça uma mais recente.
+        """
         if not self.supabase:
-            return []
+            return
         
         try:
-            query = self.supabase.table("conversations").select("id, created_at")
-            if topic_id is not None:
-                query = query.eq("topic_id", str(topic_id))
-            query = query.order("created_at", desc=True)
-            
-            result = query.execute()
-            
-            # Cria objetos Conversation mínimos (sem mensagens) apenas para contar
-            conversations = []
-            for row in result.data:
-                conv_id = ConversationId(uuid.UUID(row["id"]))
-                created_at = datetime.fromisoformat(row["created_at"].replace("Z", "+00:00"))
-                conversation = Conversation(
-                    id=conv_id,
-                    messages=[],  # Não carrega mensagens para contagem
-                    created_at=created_at
-                )
-                conversations.append(conversation)
-            
-            return conversations
+            await supabase_io.execute(
+                self.supabase.table("conversations")
+                .update({
+                    "context_summary": context_summary,
+                    "summarized_message_count": summarized_message_count,
+                })
+                .eq("id", str(conversation_id))
+                .lt("summarized_message_count", summarized_message_count)
+            )
         except Exception:
-            return []
+            pass
+    
+    async def find_topic_id(self, conversation_id: ConversationId) -> TopicId | None:
+        """Busca apenas o tópico de uma conversa (None se ainda não classificada)."""
+        if not self.supabase:
+            return None
+        
+        result = await supabase_io.execute(
+            self.supabase.table("conversations")
+            .select("topic_id")
+            .eq("id", str(conversation_id))
+        )
+        if not result.data or not result.data[0].get("topic_id"):
+            return None
+        return TopicId(uuid.UUID(result.data[0]["topic_id"]))
+    
+    async def find_summaries_page(
+        self,
+        topic_id: TopicId | None,
+        cursor: Cursor | None = None,
+        limit: int = PAGE_SIZE_DEFAULT
+    ) -> Page[ConversationSummary]:
+        """
+        Busca uma página de resumos de conversas por tópico (None para todas).
+        
+        Título e resumo são gravados na primeira troca (e pelo backfill nas conversas
+        antigas), então a página é uma única consulta; conversas ainda sem título
+        ficam de fora.
+        """
+        if not self.supabase:
+            return Page()
+        
+        query = (
+            self.supabase.table("conversations")
+            .select("id, title, summary, created_at, topics(name)")
+            .not_.is_("title", "null")
+        )
+        if topic_id is not None:
+            query = query.eq("topic_id", str(topic_id))
+        
+        result = await supabase_io.execute(keyset_query(query, cursor, limit))
+        return build_page(result.data, limit, lambda row: ConversationSummary(
+            id=ConversationId(uuid.UUID(row["id"])),
+            title=row["title"],
+            summary=row.get("summary") or "",
+            topic_name=(row.get("topics") or {}).get("name"),
+            created_at=datetime.fromisoformat(row["created_at"].replace("Z", "+00:00"))
+        ))
+    
+    async def find_untitled_page(
+        self,
+        cursor: Cursor | None = None,
+        limit: int = PAGE_SIZE_DEFAULT
+    ) -> Page[Conversation]:
+        """
+        Busca uma página de conversas sem título, em ordem cronológica (usado pelo backfill).
+        
+        As mensagens de toda a página vêm em uma consulta, sem as citações.
+        """
+        if not self.supabase:
+            return Page()
+        
+        result = await supabase_io.execute(keyset_query(
+            self.supabase.table("conversations").select("id, created_at").is_("title", "null"),
+            cursor,
+            limit,
+            desc=False
+        ))
+        rows_page = build_page(result.data, limit, lambda row: row)
+        conversation_ids = [row["id"] for row in rows_page.items]
+        
+        messages_by_conversation: dict[str, list[Message]] = {}
+        for batch in in_batches(conversation_ids):
+            messages_result = await supabase_io.execute(
+                self.supabase.table("messages")
+                .select("id, conversation_id, author, content, created_at")
+                .in_("conversation_id", batch)
+                .order("created_at")
+            )
+            for row in messages_result.data:
+                messages_by_conversation.setdefault(row["conversation_id"], []).append(Message(
+                    id=MessageId(uuid.UUID(row["id"])),
+                    conversation_id=ConversationId(uuid.UUID(row["conversation_id"])),
+                    author=Author.USER if row["author"] == "USER" else Author.AGENT,
+                    content=row["content"],
+                    cited_sources=[],
+                    created_at=datetime.fromisoformat(row["created_at"].replace("Z", "+00:00"))
+                ))
+        
+        return Page(
+            items=[
+                Conversation(
+                    id=ConversationId(uuid.UUID(row["id"])),
+                    messages=messages_by_conversation.get(row["id"], []),
+                    created_at=datetime.fromisoformat(row["created_at"].replace("Z", "+00:00"))
+                )
+                for row in rows_page.items
+            ],
+            next_cursor=rows_page.next_cursor
+        )
     
     async def find_by_id(self, conversation_id: ConversationId) -> Conversation | None:
         """Busca uma conversa por ID."""
@@ -123,7 +247,7 @@ class ConversationsRepository:
         
         try:
             # Busca a conversa
-            result = self.supabase.table("conversations").select("*").eq("id", str(conversation_id)).execute()
+            result = await supabase_io.execute(self.supabase.table("conversations").select("*").eq("id", str(conversation_id)))
             
             if not result.data:
                 return None
@@ -139,146 +263,223 @@ class ConversationsRepository:
         
         # Busca as mensagens
         try:
-            messages_result = self.supabase.table("messages").select("*").eq("conversation_id", str(conversation_id)).order("created_at").execute()
+            messages_result = await supabase_io.execute(self.supabase.table("messages").select("*").eq("conversation_id", str(conversation_id)).order("created_at"))
         except Exception:
             messages_result = type('obj', (object,), {'data': []})()
         
-        # Converte as mensagens
-        messages = []
-        if not messages_result.data:
-            messages_result.data = []
-        
-        # Otimização: coleta todos os chunk_ids de todas as mensagens primeiro
-        all_chunk_ids = []
-        chunk_id_to_message_index = {}  # Mapeia chunk_id -> lista de índices de mensagens
-        
-        for idx, msg_row in enumerate(messages_result.data):
-            if msg_row.get("cited_artifact_chunk_ids"):
-                for chunk_id in msg_row["cited_artifact_chunk_ids"]:
-                    if chunk_id not in chunk_id_to_message_index:
-                        chunk_id_to_message_index[chunk_id] = []
-                        all_chunk_ids.append(chunk_id)
-                    chunk_id_to_message_index[chunk_id].append(idx)
-        
-        # Busca todos os chunks de uma vez
-        chunks_data = {}
-        if all_chunk_ids:
-            try:
-                # Busca chunks com join em artifacts de uma vez
-                # Supabase não suporta IN() direto, então fazemos queries em batch
-                # ou uma query por chunk (ainda melhor que N queries por mensagem)
-                for chunk_id in all_chunk_ids:
-                    try:
-                        chunk_result = (
-                            self.supabase
-                            .table("artifact_chunks")
-                            .select(
-                                "id, artifact_id, content, section_title, section_level, content_type, position, token_count, breadcrumbs, artifacts(title)"
-                            )
-                            .eq("id", chunk_id)
-                            .limit(1)
-                            .execute()
-                        )
-                        if chunk_result.data:
-                            chunks_data[chunk_id] = chunk_result.data[0]
-                    except Exception:
-                        pass
-            except Exception:
-                pass
-        
-        # Agora processa as mensagens usando os chunks já carregados
-        for idx, msg_row in enumerate(messages_result.data):
-            # Converte cited_artifact_chunk_ids para CitedSource
-            cited_sources = []
-            
-            # Busca informações dos chunks citados do cache
-            if msg_row.get("cited_artifact_chunk_ids"):
-                for chunk_id in msg_row["cited_artifact_chunk_ids"]:
-                    chunk_data = chunks_data.get(chunk_id)
-                    if chunk_data:
-                        # Extrai título do artefato
-                        artifact_title = ""
-                        if chunk_data.get("artifacts"):
-                            if isinstance(chunk_data["artifacts"], dict):
-                                artifact_title = chunk_data["artifacts"].get("title", "")
-                            elif isinstance(chunk_data["artifacts"], list) and chunk_data["artifacts"]:
-                                artifact_title = chunk_data["artifacts"][0].get("title", "")
-                        breadcrumbs = chunk_data.get("breadcrumbs") or []
-                        if isinstance(breadcrumbs, str):
-                            try:
-                                breadcrumbs = json.loads(breadcrumbs)
-                            except json.JSONDecodeError:
-                                breadcrumbs = []
-                        cited_source = CitedSource(
-                            chunk_id=ChunkId(uuid.UUID(chunk_data["id"])),
-                            artifact_id=ArtifactId(uuid.UUID(chunk_data["artifact_id"])),
-                            title=artifact_title,
-                            chunk_content_preview=chunk_data.get("content", "")[:200],
-                            section_title=chunk_data.get("section_title"),
-                            section_level=chunk_data.get("section_level"),
-                            content_type=chunk_data.get("content_type"),
-                            breadcrumbs=breadcrumbs,
-                        )
-                        cited_sources.append(cited_source)
-            
-            author = Author.USER if msg_row["author"] == "USER" else Author.AGENT
-            
-            message = Message(
-                id=MessageId(uuid.UUID(msg_row["id"])),
-                conversation_id=ConversationId(uuid.UUID(msg_row["conversation_id"])),
-                author=author,
-                content=msg_row["content"],
-                cited_sources=cited_sources,
-                created_at=datetime.fromisoformat(msg_row["created_at"].replace("Z", "+00:00"))
-            )
-            messages.append(message)
+        messages = await self._rows_to_messages(messages_result.data or [])
         
         created_at = datetime.fromisoformat(conversation_row["created_at"].replace("Z", "+00:00"))
         
         return Conversation(
             id=ConversationId(uuid.UUID(conversation_row["id"])),
             messages=messages,
-            created_at=created_at
+            created_at=created_at,
+            context_summary=conversation_row.get("context_summary"),
+            summarized_message_count=conversation_row.get("summarized_message_count") or 0
         )
     
-    async def save_messages(self, conversation: Conversation) -> Conversation:
-        """Salva as mensagens de uma conversa."""
+    async def find_turn_context(self, conversation_id: ConversationId) -> Conversation | None:
+        """
+        Busca o que é preciso para continuar a conversa: o resumo acumulado e as
+        mensagens que ele ainda não cobre, sem as citações.
+        
+        As mensagens já resumidas não são lidas (`message_offset` indica quantas são).
+        Retorna None se a conversa não existir.
+        """
         if not self.supabase:
-            # Se não houver Supabase, apenas retorna a conversa
-            return conversation
+            return Conversation(id=conversation_id, messages=[], created_at=datetime.utcnow())
         
+        result = await supabase_io.execute(
+            self.supabase.table("conversations")
+            .select("id, created_at, context_summary, summarized_message_count")
+            .eq("id", str(conversation_id))
+        )
+        if not result.data:
+            return None
+        
+        row = result.data[0]
+        summarized_message_count = row.get("summarized_message_count") or 0
+        messages_result = await supabase_io.execute(
+            self.supabase.table("messages")
+            .select("id, conversation_id, author, content, created_at")
+            .eq("conversation_id", str(conversation_id))
+            .order("created_at")
+            .offset(summarized_message_count)
+        )
+        
+        return Conversation(
+            id=ConversationId(uuid.UUID(row["id"])),
+            messages=[
+                Message(
+                    id=MessageId(uuid.UUID(message_row["id"])),
+                    conversation_id=ConversationId(uuid.UUID(message_row["conversation_id"])),
+                    author=Author.USER if message_row["author"] == "USER" else Author.AGENT,
+                    content=message_row["content"],
+                    cited_sources=[],
+                    created_at=datetime.fromisoformat(message_row["created_at"].replace("Z", "+00:00"))
+                )
+                for message_row in messages_result.data or []
+            ],
+            created_at=datetime.fromisoformat(row["created_at"].replace("Z", "+00:00")),
+            context_summary=row.get("context_summary"),
+            summarized_message_count=summarized_message_count,
+            message_offset=summarized_message_count
+        )
+    
+    async def find_messages_page(
+        self,
+        conversation_id: ConversationId,
+        cursor: Cursor | None = None,
+        limit: int = PAGE_SIZE_DEFAULT
+    ) -> Page[Message] | None:
+        """
+        Busca uma página de mensagens da conversa, em ordem cronológica.
+        
+        A existência da conversa e a página são consultadas em paralelo; retorna None
+        se a conversa não existir.
+        """
+        if not self.supabase:
+            # Sem Supabase a conversa é tratada como vazia, como em `find_by_id`
+            return Page()
+        
+        conversation_result, messages_result = await asyncio.gather(
+            supabase_io.execute(self.supabase.table("conversations").select("id").eq("id", str(conversation_id))),
+            supabase_io.execute(keyset_query(
+                self.supabase.table("messages").select("*").eq("conversation_id", str(conversation_id)),
+                cursor,
+                limit,
+                desc=False
+            ))
+        )
+        if not conversation_result.data:
+            return None
+        
+        rows = messages_result.data or []
+        page = build_page(rows, limit, lambda row: row)
+        return Page(items=await self._rows_to_messages(page.items), next_cursor=page.next_cursor)
+    
+    async def _rows_to_messages(self, rows: list[dict]) -> list[Message]:
+        """Converte linhas de mensagens, hidratando as citações de todas de uma vez."""
+        all_chunk_ids = list(dict.fromkeys(
+            chunk_id
+            for row in rows
+            for chunk_id in row.get("cited_artifact_chunk_ids") or []
+        ))
+        cited_by_chunk = await self._load_cited_sources(all_chunk_ids)
+        
+        return [
+            Message(
+                id=MessageId(uuid.UUID(row["id"])),
+                conversation_id=ConversationId(uuid.UUID(row["conversation_id"])),
+                author=Author.USER if row["author"] == "USER" else Author.AGENT,
+                content=row["content"],
+                cited_sources=[
+                    cited_by_chunk[chunk_id]
+                    for chunk_id in row.get("cited_artifact_chunk_ids") or []
+                    if chunk_id in cited_by_chunk
+                ],
+                created_at=datetime.fromisoformat(row["created_at"].replace("Z", "+00:00"))
+            )
+            for row in rows
+        ]
+    
+    async def _load_cited_sources(self, chunk_ids: list[str]) -> dict[str, CitedSource]:
+        """
+        Monta as citações dos chunks informados, indexadas pelo ID do chunk.
+        
+        O que já está no cache do processo não vai ao banco; o restante é buscado com
+        filtros `in_` (em lotes que cabem na URL) executados em paralelo.
+        """
+        if not chunk_ids:
+            return {}
+        
+        cited, missing = citation_cache.get_many(chunk_ids)
+        if not missing:
+            return cited
+        
+        generation = citation_cache.generation
         try:
-            # Salva apenas as novas mensagens (as que ainda não têm ID no banco)
-            # Por simplicidade, vamos salvar todas as mensagens
-            
-            for msg in conversation.messages:
-                # Verifica se a mensagem já existe
-                try:
-                    existing = self.supabase.table("messages").select("*").eq("id", str(msg.id)).execute()
-                except Exception:
-                    existing = type('obj', (object,), {'data': []})()
-                
-                if not existing.data:
-                    # Prepara cited_artifact_chunk_ids
-                    cited_chunk_ids = [str(cs.chunk_id) for cs in msg.cited_sources if cs.chunk_id]
-                    
-                    message_data = {
-                        "id": str(msg.id),
-                        "conversation_id": str(msg.conversation_id),
-                        "author": msg.author.name,
-                        "content": msg.content,
-                        "cited_artifact_chunk_ids": cited_chunk_ids,
-                        "created_at": msg.created_at.isoformat()
-                    }
-                    
-                    try:
-                        self.supabase.table("messages").insert(message_data).execute()
-                    except Exception:
-                        # Se não conseguir salvar, continua
-                        pass
+            results = await asyncio.gather(*(
+                supabase_io.execute(
+                    self.supabase
+                    .table("artifact_chunks")
+                    .select(
+                        "id, artifact_id, content, section_title, section_level, content_type, breadcrumbs, artifacts(title)"
+                    )
+                    .in_("id", batch)
+                )
+                for batch in in_batches(missing)
+            ))
         except Exception:
-            # Se houver erro, apenas retorna a conversa
-            pass
+            # Sem as citações a conversa ainda pode ser exibida
+            return cited
+        
+        loaded = {
+            row["id"]: self._row_to_cited_source(row)
+            for result in results
+            for row in result.data or []
+        }
+        citation_cache.put_many(loaded, generation)
+        cited.update(loaded)
+        return cited
+    
+    @staticmethod
+    def _row_to_cited_source(chunk_data: dict) -> CitedSource:
+        # O join com artifacts pode vir como objeto ou lista, conforme a relação
+        artifact_title = ""
+        if chunk_data.get("artifacts"):
+            if isinstance(chunk_data["artifacts"], dict):
+                artifact_title = chunk_data["artifacts"].get("title", "")
+            elif isinstance(chunk_data["artifacts"], list) and chunk_data["artifacts"]:
+                artifact_title = chunk_data["artifacts"][0].get("title", "")
+        breadcrumbs = chunk_data.get("breadcrumbs") or []
+        if isinstance(breadcrumbs, str):
+            try:
+                breadcrumbs = json.loads(breadcrumbs)
+            except json.JSONDecodeError:
+                breadcrumbs = []
+        return CitedSource(
+            chunk_id=ChunkId(uuid.UUID(chunk_data["id"])),
+            artifact_id=ArtifactId(uuid.UUID(chunk_data["artifact_id"])),
+            title=artifact_title,
+            chunk_content_preview=(chunk_data.get("content") or "")[:200],
+            section_title=chunk_data.get("section_title"),
+            section_level=chunk_data.get("section_level"),
+            content_type=chunk_data.get("content_type"),
+            breadcrumbs=breadcrumbs,
+        )
+    
+    async def save_messages(self, messages: list[Message]) -> list[Message]:
+        """
+        Salva as mensagens novas de uma troca em um único upsert de várias linhas.
+        
+        Mensagens já gravadas (mesmo ID) são ignoradas, então repetir a chamada é seguro.
+        """
+        if not self.supabase or not messages:
+            return messages
+        
+        rows = [
+            {
+                "id": str(msg.id),
+                "conversation_id": str(msg.conversation_id),
+                "author": msg.author.name,
+                "content": msg.content,
+                "cited_artifact_chunk_ids": [str(cs.chunk_id) for cs in msg.cited_sources if cs.chunk_id],
+                "created_at": msg.created_at.isoformat()
+            }
+            for msg in messages
+        ]
+        
+        try:
+            await supabase_io.execute(
+                self.supabase.table("messages").upsert(
+                    rows, on_conflict="id", ignore_duplicates=True, returning="minimal"
+                )
+            )
+        except Exception:
+            # Falha na gravação não derruba a resposta já gerada
+            logger.warning("Erro ao salvar %d mensagens", len(rows), exc_info=True)
         
-        return conversation
+        return messages
 
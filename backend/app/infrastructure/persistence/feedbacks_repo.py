@@ -1,18 +1,41 @@
 """Repositório de Feedbacks usando Supabase."""
-from supabase import create_client, Client
-from app.domain.feedbacks.types import PendingFeedback, FeedbackStatus
+import logging
+from supabase import Client
+from app.domain.feedbacks.types import PendingFeedback, FeedbackStatus, FeedbackWithPreview
 from app.domain.shared_kernel import FeedbackId, MessageId
-from app.infrastructure.persistence.config import SUPABASE_URL, SUPABASE_KEY
+from app.infrastructure.persistence.blocking_io import supabase_io
+from app.infrastructure.persistence.config import PAGE_SIZE_DEFAULT
+from app.infrastructure.persistence.pagination import Cursor, Page, build_page, keyset_query
+from app.infrastructure.persistence.supabase_clients import MISSING_RELATION, is_missing_schema_error, supabase_clients
 from datetime import datetime
 import uuid
 
 
+logger = logging.getLogger("app.persistence.feedbacks")
+
+# Tamanho do preview da mensagem nas listas de moderação (o mesmo da view feedback_moderation)
+MESSAGE_PREVIEW_CHARS = 200
+
+_REVIEWED_STATUSES = [FeedbackStatus.APPROVED.name, FeedbackStatus.REJECTED.name]
+
+
+def truncate_preview(content: str | None) -> str | None:
+    if content is None:
+        return None
+    return content[:MESSAGE_PREVIEW_CHARS] + "..." if len(content) > MESSAGE_PREVIEW_CHARS else content
+
+
 class FeedbacksRepository:
     """Repositório para persistência de feedbacks no Supabase."""
     
-    def __init__(self):
-        """Inicializa o repositório com cliente Supabase."""
-        self.supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    def __init__(self, client: Client | None = None):
+        """
+        Inicializa o repositório.
+        
+        Args:
+            client: Cliente Supabase compartilhado (padrão: o do pool do processo)
+        """
+        self.supabase: Client = client if client is not None else supabase_clients.default()
     
     async def save(self, feedback: PendingFeedback) -> PendingFeedback:
         """Salva um feedback."""
@@ -25,13 +48,13 @@ class FeedbacksRepository:
             "feedback_type": feedback.feedback_type
         }
         
-        self.supabase.table("pending_feedbacks").insert(feedback_data).execute()
+        await supabase_io.execute(self.supabase.table("pending_feedbacks").insert(feedback_data))
         
         return feedback
     
     async def find_by_id(self, feedback_id: FeedbackId) -> PendingFeedback | None:
         """Busca um feedback por ID."""
-        result = self.supabase.table("pending_feedbacks").select("*").eq("id", str(feedback_id)).execute()
+        result = await supabase_io.execute(self.supabase.table("pending_feedbacks").select("*").eq("id", str(feedback_id)))
         
         if not result.data:
             return None
@@ -49,7 +72,7 @@ class FeedbacksRepository:
     
     async def find_pending(self) -> list[PendingFeedback]:
         """Busca todos os feedbacks pendentes."""
-        result = self.supabase.table("pending_feedbacks").select("*, messages(content)").eq("status", "PENDING").order("created_at", desc=True).execute()
+        result = await supabase_io.execute(self.supabase.table("pending_feedbacks").select("*").eq("status", "PENDING").order("created_at", desc=True))
         
         feedbacks = []
         for row in result.data:
@@ -67,7 +90,7 @@ class FeedbacksRepository:
     
     async def find_reviewed(self) -> list[PendingFeedback]:
         """Busca todos os feedbacks revisados (aprovados ou rejeitados)."""
-        result = self.supabase.table("pending_feedbacks").select("*").in_("status", ["APPROVED", "REJECTED"]).order("created_at", desc=True).execute()
+        result = await supabase_io.execute(self.supabase.table("pending_feedbacks").select("*").in_("status", ["APPROVED", "REJECTED"]).order("created_at", desc=True))
         
         feedbacks = []
         for row in result.data:
@@ -83,10 +106,51 @@ class FeedbacksRepository:
         
         return feedbacks
     
+    async def find_pending_with_preview(
+        self, cursor: Cursor | None = None, limit: int = PAGE_SIZE_DEFAULT
+    ) -> Page[FeedbackWithPreview]:
+        """Busca uma página de feedbacks pendentes com o preview da mensagem, em uma consulta."""
+        return await self._find_with_preview([FeedbackStatus.PENDING.name], cursor, limit)
+    
+    async def find_reviewed_with_preview(
+        self, cursor: Cursor | None = None, limit: int = PAGE_SIZE_DEFAULT
+    ) -> Page[FeedbackWithPreview]:
+        """Busca uma página de feedbacks revisados com o preview da mensagem, em uma consulta."""
+        return await self._find_with_preview(_REVIEWED_STATUSES, cursor, limit)
+    
+    async def _find_with_preview(
+        self, statuses: list[str], cursor: Cursor | None, limit: int
+    ) -> Page[FeedbackWithPreview]:
+        try:
+            # A view corta o conteúdo no banco (migração 004)
+            result = await supabase_io.execute(keyset_query(
+                self.supabase.table("feedback_moderation").select("*").in_("status", statuses),
+                cursor,
+                limit
+            ))
+            return build_page(
+                result.data, limit,
+                lambda row: FeedbackWithPreview(self._row_to_feedback(row), row.get("message_preview"))
+            )
+        except Exception as error:
+            if not is_missing_schema_error(error, MISSING_RELATION):
+                logger.warning("Erro ao consultar a view feedback_moderation", exc_info=True)
+                raise
+        
+        # Banco sem a view: a mensagem vem pelo join embutido e é cortada aqui
+        result = await supabase_io.execute(keyset_query(
+            self.supabase.table("pending_feedbacks").select("*, messages(content)").in_("status", statuses),
+            cursor,
+            limit
+        ))
+        return build_page(result.data, limit, lambda row: FeedbackWithPreview(
+            self._row_to_feedback(row), truncate_preview((row.get("messages") or {}).get("content"))
+        ))
+    
     async def get_conversation_id_by_message_id(self, message_id: MessageId) -> str | None:
         """Busca o conversation_id a partir de um message_id."""
         try:
-            result = self.supabase.table("messages").select("conversation_id").eq("id", str(message_id)).execute()
+            result = await supabase_io.execute(self.supabase.table("messages").select("conversation_id").eq("id", str(message_id)))
             if result.data and result.data[0]:
                 return result.data[0].get("conversation_id")
         except Exception:
@@ -95,7 +159,7 @@ class FeedbacksRepository:
     
     async def find_by_message_id(self, message_id: MessageId) -> PendingFeedback | None:
         """Busca um feedback por message_id."""
-        result = self.supabase.table("pending_feedbacks").select("*").eq("message_id", str(message_id)).order("created_at", desc=True).limit(1).execute()
+        result = await supabase_io.execute(self.supabase.table("pending_feedbacks").select("*").eq("message_id", str(message_id)).order("created_at", desc=True).limit(1))
         
         if not result.data:
             return None
@@ -117,20 +181,71 @@ class FeedbacksRepository:
         if feedback_type is not None:
             update_data["feedback_type"] = feedback_type
         
-        self.supabase.table("pending_feedbacks").update(update_data).eq("id", str(feedback_id)).execute()
+        await supabase_io.execute(self.supabase.table("pending_feedbacks").update(update_data).eq("id", str(feedback_id)))
         
         return await self.find_by_id(feedback_id)
     
     async def delete(self, feedback_id: FeedbackId) -> None:
         """Deleta um feedback."""
-        self.supabase.table("pending_feedbacks").delete().eq("id", str(feedback_id)).execute()
+        await supabase_io.execute(self.supabase.table("pending_feedbacks").delete().eq("id", str(feedback_id)))
     
     async def update_status(self, feedback_id: FeedbackId, status: FeedbackStatus) -> PendingFeedback:
         """Atualiza o status de um feedback."""
-        self.supabase.table("pending_feedbacks").update({"status": status.name}).eq("id", str(feedback_id)).execute()
+        await supabase_io.execute(self.supabase.table("pending_feedbacks").update({"status": status.name}).eq("id", str(feedback_id)))
         
         return await self.find_by_id(feedback_id)
     
+    async def find_by_ids(self, feedback_ids: list[FeedbackId]) -> dict[FeedbackId, PendingFeedback]:
+        """Busca vários feedbacks em uma única consulta, indexados pelo ID."""
+        if not feedback_ids:
+            return {}
+        
+        result = await supabase_io.execute(
+            self.supabase.table("pending_feedbacks")
+            .select("*")
+            .in_("id", [str(feedback_id) for feedback_id in feedback_ids])
+        )
+        
+        feedbacks = [self._row_to_feedback(row) for row in result.data]
+        return {feedback.id: feedback for feedback in feedbacks}
+    
+    async def update_status_many(
+        self,
+        feedback_ids: list[FeedbackId],
+        status: FeedbackStatus,
+        only_pending: bool = False
+    ) -> list[PendingFeedback]:
+        """
+        Atualiza o status de vários feedbacks em uma única escrita.
+        
+        Com `only_pending`, só altera os que ainda estão pendentes. Retorna os
+        feedbacks efetivamente alterados.
+        """
+        if not feedback_ids:
+            return []
+        
+        query = (
+            self.supabase.table("pending_feedbacks")
+            .update({"status": status.name})
+            .in_("id", [str(feedback_id) for feedback_id in feedback_ids])
+        )
+        if only_pending:
+            query = query.eq("status", FeedbackStatus.PENDING.name)
+        result = await supabase_io.execute(query)
+        
+        return [self._row_to_feedback(row) for row in result.data]
+    
+    @staticmethod
+    def _row_to_feedback(row: dict) -> PendingFeedback:
+        return PendingFeedback(
+            id=FeedbackId(uuid.UUID(row["id"])),
+            message_id=MessageId(uuid.UUID(row["message_id"])),
+            feedback_text=row["feedback_text"],
+            status=FeedbackStatus[row["status"]],
+            created_at=datetime.fromisoformat(row["created_at"].replace("Z", "+00:00")),
+            feedback_type=row.get("feedback_type")
+        )
+    
     async def find_by_message_ids(self, message_ids: list[MessageId]) -> dict[str, PendingFeedback]:
         """
         Busca feedbacks por múltiplos message_ids de uma vez.
@@ -145,7 +260,7 @@ class FeedbacksRepository:
             
             # Busca todos os feedbacks de uma vez usando in_
             # Nota: Supabase pode ter limites no número de itens no in_, então pode precisar fazer em batches
-            result = self.supabase.table("pending_feedbacks").select("*").in_("message_id", message_id_strings).execute()
+            result = await supabase_io.execute(self.supabase.table("pending_feedbacks").select("*").in_("message_id", message_id_strings))
             
             # Cria dicionário de feedbacks por message_id
             feedbacks_dict = {}
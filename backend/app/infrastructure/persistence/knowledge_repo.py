@@ -1,16 +1,22 @@
 """Repositório para busca de conhecimento relevante (RAG)."""
-import asyncio
 import json
 import logging
 import uuid
-from datetime import datetime
 
-from supabase import Client, create_client
+from supabase import Client
 
-from app.domain.artifacts.types import ArtifactChunk, ChunkMetadata
+from app.domain.artifacts.types import ArtifactChunk, ChunkMetadata, KnowledgeFilter
 from app.domain.learnings.types import Learning
-from app.domain.shared_kernel import ArtifactId, ChunkId, Embedding, FeedbackId, LearningId
+from app.domain.shared_kernel import ArtifactId, ChunkId, Embedding
+from app.infrastructure.persistence.blocking_io import supabase_io
+from app.infrastructure.persistence.chunk_filter_index import ChunkFilterIndex, chunk_filter_index
 from app.infrastructure.persistence.config import SUPABASE_SERVICE_ROLE_KEY, SUPABASE_URL
+from app.infrastructure.persistence.learnings_index import (
+    LearningsIndex,
+    _row_to_learning,
+    learnings_index,
+)
+from app.infrastructure.persistence.supabase_clients import supabase_clients
 
 
 logger = logging.getLogger("app.rag.retrieval")
@@ -42,20 +48,33 @@ class RelevantKnowledge:
 class KnowledgeRepository:
     """Repositório para busca vetorial de conhecimento relevante."""
 
-    def __init__(self, client: Client | None = None):
+    def __init__(
+        self,
+        client: Client | None = None,
+        index: LearningsIndex | None = None,
+        filter_index: ChunkFilterIndex | None = None,
+    ):
         """Inicializa o repositório utilizando o client do Supabase."""
         self.supabase_url = SUPABASE_URL
         self.supabase_service_key = SUPABASE_SERVICE_ROLE_KEY
         self.client: Client | None = client
+        self.learnings_index = index if index is not None else learnings_index
+        self.filter_index = filter_index if filter_index is not None else chunk_filter_index
 
-        if self.client is None and self.supabase_url and self.supabase_service_key:
-            self.client = create_client(self.supabase_url, self.supabase_service_key)
+        if self.client is None:
+            self.client = supabase_clients.get(self.supabase_url, self.supabase_service_key)
 
     async def find_relevant_knowledge(
-        self, user_query: str, embedding: list[float]
+        self,
+        user_query: str,
+        embedding: list[float],
+        knowledge_filter: KnowledgeFilter | None = None,
     ) -> RelevantKnowledge:
         """
         Busca conhecimento relevante usando funções RPC expostas no Supabase.
+
+        Com `knowledge_filter`, os chunks candidatos são resolvidos antes da busca
+        pelo índice de metadados e só esses vetores são comparados pela RPC.
         """
         if not self.client:
             if logger.isEnabledFor(logging.DEBUG):
@@ -66,10 +85,20 @@ class KnowledgeRepository:
             return RelevantKnowledge(relevant_artifacts=[], relevant_learnings=[])
 
         try:
-            artifact_rows = await self._call_supabase_rpc(
-                "rag_get_relevant_chunks",
-                {"query_embedding": embedding, "match_limit": 5},
-            )
+            params = {"query_embedding": embedding, "match_limit": 5}
+            if knowledge_filter is not None and not knowledge_filter.is_empty():
+                await self.filter_index.ensure_fresh(self.client)
+                params["filter_chunk_ids"] = self.filter_index.resolve(knowledge_filter)
+                logger.debug(
+                    "Filtro de metadados restringiu a busca a %d de %d chunks",
+                    len(params["filter_chunk_ids"]),
+                    len(self.filter_index),
+                )
+
+            if params.get("filter_chunk_ids") == []:
+                artifact_rows = []
+            else:
+                artifact_rows = await self._call_supabase_rpc("rag_get_relevant_chunks", params)
 
             artifact_chunks: list[ArtifactChunk] = []
             for row in artifact_rows:
@@ -110,44 +139,7 @@ class KnowledgeRepository:
                 )
                 artifact_chunks.append(chunk)
 
-            learnings_rows = await self._call_supabase_rpc(
-                "rag_get_relevant_learnings",
-                {"query_embedding": embedding, "match_limit": 3},
-            )
-
-            learnings: list[Learning] = []
-            for row in learnings_rows:
-                learning_id = row.get("id")
-                source_feedback_id = row.get("source_feedback_id")
-                if not learning_id or not source_feedback_id:
-                    continue
-                content = row.get("content") or ""
-                embedding_vec = row.get("embedding") or []
-                created_at_raw = row.get("created_at")
-
-                if isinstance(created_at_raw, datetime):
-                    created_at_value = created_at_raw
-                elif isinstance(created_at_raw, str):
-                    normalized = (
-                        created_at_raw.replace("Z", "+00:00")
-                        if created_at_raw.endswith("Z")
-                        else created_at_raw
-                    )
-                    try:
-                        created_at_value = datetime.fromisoformat(normalized)
-                    except ValueError:
-                        created_at_value = datetime.utcnow()
-                else:
-                    created_at_value = datetime.utcnow()
-
-                learning = Learning(
-                    id=LearningId(uuid.UUID(learning_id)),
-                    content=content,
-                    embedding=Embedding(vector=embedding_vec),
-                    source_feedback_id=FeedbackId(uuid.UUID(source_feedback_id)),
-                    created_at=created_at_value,
-                )
-                learnings.append(learning)
+            learnings = await self._find_relevant_learnings(embedding, limit=3)
 
             query_preview = user_query[:80] + ("…" if len(user_query) > 80 else "")
 
@@ -213,6 +205,27 @@ class KnowledgeRepository:
             logger.exception("Erro durante a busca de conhecimento relevante: %s", e)
             return RelevantKnowledge(relevant_artifacts=[], relevant_learnings=[])
 
+    async def _find_relevant_learnings(self, embedding: list[float], limit: int) -> list[Learning]:
+        """
+        Busca aprendizados no índice residente em memória.
+
+        Só recorre à RPC `rag_get_relevant_learnings` se o índice não puder ser carregado.
+        """
+        try:
+            await self.learnings_index.ensure_fresh(self.client)
+        except Exception as e:
+            if not self.learnings_index.is_loaded:
+                logger.warning("Índice de aprendizados indisponível, usando RPC: %s", e)
+                rows = await self._call_supabase_rpc(
+                    "rag_get_relevant_learnings",
+                    {"query_embedding": embedding, "match_limit": limit},
+                )
+                return [learning for learning in map(_row_to_learning, rows) if learning]
+            # Falha apenas no poll: segue com o conteúdo já carregado
+            logger.warning("Falha ao atualizar o índice de aprendizados: %s", e)
+
+        return self.learnings_index.search(embedding, limit=limit)
+
     async def _call_supabase_rpc(self, function_name: str, params: dict) -> list[dict]:
         """Executa uma função RPC no Supabase de forma assíncrona."""
         if not self.client:
@@ -226,4 +239,4 @@ class KnowledgeRepository:
                 raise RuntimeError(f"Erro ao executar RPC '{function_name}': {message}")
             return getattr(response, "data", []) or []
 
-        return await asyncio.to_thread(_execute)
+        return await supabase_io.run(_execute)
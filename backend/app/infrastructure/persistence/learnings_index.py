@@ -0,0 +1,250 @@
+"""Índice residente em memória para busca vetorial de aprendizados."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import math
+import time
+import uuid
+from array import array
+from datetime import datetime, timedelta, timezone
+
+from app.domain.learnings.types import Learning
+from app.domain.shared_kernel import Embedding, FeedbackId, LearningId
+from app.infrastructure.persistence.blocking_io import supabase_io
+from app.infrastructure.persistence.config import (
+    LEARNINGS_INDEX_FULL_RELOAD_SECONDS,
+    LEARNINGS_INDEX_LOOKBACK_SECONDS,
+    LEARNINGS_INDEX_REFRESH_SECONDS,
+)
+
+try:  # pragma: no-cover - dependência opcional
+    import numpy as np  # type: ignore
+except ImportError:  # pragma: no-cover - fallback em Python puro
+    np = None  # type: ignore
+
+
+logger = logging.getLogger("app.rag.retrieval")
+
+_PAGE_SIZE = 1000
+_COLUMNS = "id, content, embedding, source_feedback_id, created_at"
+
+
+def _parse_vector(raw) -> list[float]:
+    """Converte o embedding vindo do PostgREST (lista ou string pgvector) em lista."""
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except json.JSONDecodeError:
+            return []
+    return [float(value) for value in raw or []]
+
+
+def _parse_datetime(raw) -> datetime:
+    if isinstance(raw, datetime):
+        return raw
+    if isinstance(raw, str):
+        try:
+            return datetime.fromisoformat(raw.replace("Z", "+00:00"))
+        except ValueError:
+            pass
+    return datetime.utcnow()
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _row_to_learning(row: dict) -> Learning | None:
+    learning_id = row.get("id")
+    source_feedback_id = row.get("source_feedback_id")
+    if not learning_id or not source_feedback_id:
+        return None
+    return Learning(
+        id=LearningId(uuid.UUID(learning_id)),
+        content=row.get("content") or "",
+        embedding=Embedding(vector=_parse_vector(row.get("embedding"))),
+        source_feedback_id=FeedbackId(uuid.UUID(source_feedback_id)),
+        created_at=_parse_datetime(row.get("created_at")),
+    )
+
+
+class LearningsIndex:
+    """
+    Mantém os aprendizados em memória como uma matriz float32 de vetores normalizados.
+
+    A busca é um único produto escalar vetorizado (similaridade de cosseno). Novos
+    aprendizados criados neste processo entram via `add`; os criados por outras
+    instâncias são descobertos por um poll incremental em `created_at`, feito no
+    máximo uma vez a cada `refresh_interval` segundos.
+
+    O `created_at` é definido pelo cliente que grava, então não é monotônico entre
+    instâncias: o poll relê os últimos `lookback` segundos antes do maior `created_at`
+    já lido do banco (deduplicando por ID), e a cada `full_reload_interval` segundos o
+    índice é recarregado por inteiro.
+    """
+
+    def __init__(
+        self,
+        refresh_interval: float = LEARNINGS_INDEX_REFRESH_SECONDS,
+        lookback: float = LEARNINGS_INDEX_LOOKBACK_SECONDS,
+        full_reload_interval: float = LEARNINGS_INDEX_FULL_RELOAD_SECONDS,
+    ):
+        self.refresh_interval = refresh_interval
+        self.lookback = lookback
+        self.full_reload_interval = full_reload_interval
+        self._learnings: list[Learning] = []
+        self._ids: set[LearningId] = set()
+        self._dimension: int | None = None
+        self._matrix = None  # np.ndarray (capacidade, dimensão) quando numpy está disponível
+        self._rows: list[array] = []  # fallback sem numpy
+        self._watermark: datetime | None = None
+        self._loaded = False
+        self._last_poll = 0.0
+        self._last_full_load = 0.0
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._learnings)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def reset(self) -> None:
+        """Descarta o conteúdo do índice, forçando um recarregamento completo."""
+        self._learnings = []
+        self._ids = set()
+        self._dimension = None
+        self._matrix = None
+        self._rows = []
+        self._watermark = None
+        self._loaded = False
+        self._last_poll = 0.0
+        self._last_full_load = 0.0
+
+    def add(self, learning: Learning) -> bool:
+        """Adiciona um aprendizado ao índice. Retorna False se ele foi ignorado."""
+        if learning.id in self._ids:
+            return False
+
+        vector = learning.embedding.vector
+        if not vector:
+            return False
+        if self._dimension is None:
+            self._dimension = len(vector)
+        elif len(vector) != self._dimension:
+            logger.warning(
+                "Aprendizado %s ignorado no índice: dimensão %d difere de %d",
+                learning.id,
+                len(vector),
+                self._dimension,
+            )
+            return False
+
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        position = len(self._learnings)
+
+        if np is not None:
+            if self._matrix is None:
+                self._matrix = np.zeros((16, self._dimension), dtype=np.float32)
+            elif position >= self._matrix.shape[0]:
+                grown = np.zeros((self._matrix.shape[0] * 2, self._dimension), dtype=np.float32)
+                grown[:position] = self._matrix[:position]
+                self._matrix = grown
+            self._matrix[position] = np.asarray(vector, dtype=np.float32) / norm
+        else:
+            self._rows.append(array("f", (value / norm for value in vector)))
+
+        self._learnings.append(learning)
+        self._ids.add(learning.id)
+        return True
+
+    async def ensure_fresh(self, client) -> None:
+        """Carrega o índice na primeira chamada e faz o poll de mudanças quando expira."""
+        if self._loaded and time.monotonic() - self._last_poll < self.refresh_interval:
+            return
+
+        async with self._lock:
+            if self._loaded and time.monotonic() - self._last_poll < self.refresh_interval:
+                return
+
+            full = not self._loaded or time.monotonic() - self._last_full_load >= self.full_reload_interval
+            since = None
+            if not full and self._watermark is not None:
+                since = self._watermark - timedelta(seconds=self.lookback)
+            rows = await supabase_io.run(self._fetch_rows, client, since)
+            if full:
+                # Troca o conteúdo só depois da leitura: as buscas nunca veem o índice vazio
+                self.reset()
+                self._last_full_load = time.monotonic()
+            added = 0
+            for row in rows:
+                learning = _row_to_learning(row)
+                if learning is None:
+                    continue
+                # O watermark só avança com linhas lidas do banco, nunca com `add` local
+                created_at = _as_utc(learning.created_at)
+                if self._watermark is None or created_at > self._watermark:
+                    self._watermark = created_at
+                if self.add(learning):
+                    added += 1
+
+            if added and logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Índice de aprendizados %s com %d itens (total=%d)",
+                    "carregado" if full else "atualizado",
+                    added,
+                    len(self._learnings),
+                )
+
+            self._loaded = True
+            self._last_poll = time.monotonic()
+
+    def search(self, query_embedding: list[float], limit: int = 3) -> list[Learning]:
+        """Retorna os `limit` aprendizados mais similares ao embedding da consulta."""
+        size = len(self._learnings)
+        if not size or limit <= 0 or len(query_embedding) != self._dimension:
+            return []
+
+        norm = math.sqrt(sum(value * value for value in query_embedding)) or 1.0
+        limit = min(limit, size)
+
+        if np is not None:
+            query = np.asarray(query_embedding, dtype=np.float32) / norm
+            scores = self._matrix[:size] @ query
+            if limit < size:
+                top = np.argpartition(-scores, limit - 1)[:limit]
+            else:
+                top = np.arange(size)
+            ordered = top[np.argsort(-scores[top], kind="stable")]
+            return [self._learnings[int(idx)] for idx in ordered]
+
+        query = [value / norm for value in query_embedding]
+        scores = [sum(a * b for a, b in zip(row, query)) for row in self._rows]
+        ordered = sorted(range(size), key=lambda idx: scores[idx], reverse=True)
+        return [self._learnings[idx] for idx in ordered[:limit]]
+
+    def _fetch_rows(self, client, since: datetime | None) -> list[dict]:
+        rows: list[dict] = []
+        offset = 0
+        while True:
+            query = client.table("learnings").select(_COLUMNS)
+            if since is not None:
+                # A janela de `lookback` + deduplicação por ID cobre timestamps fora de ordem
+                query = query.gte("created_at", since.isoformat())
+            response = (
+                query.order("created_at")
+                .range(offset, offset + _PAGE_SIZE - 1)
+                .execute()
+            )
+            page = getattr(response, "data", None) or []
+            rows.extend(page)
+            if len(page) < _PAGE_SIZE:
+                return rows
+            offset += _PAGE_SIZE
+
+
+# Instância compartilhada pelo processo (busca RAG e persistência de aprendizados)
+learnings_index = LearningsIndex()
@@ -1,8 +1,12 @@
 """Repositório de Aprendizados usando Supabase."""
-from supabase import create_client, Client
+from supabase import Client
 from app.domain.learnings.types import Learning
-from app.domain.shared_kernel import LearningId, FeedbackId
-from app.infrastructure.persistence.config import SUPABASE_URL, SUPABASE_KEY
+from app.domain.shared_kernel import Embedding, LearningId, FeedbackId
+from app.infrastructure.persistence.blocking_io import supabase_io
+from app.infrastructure.persistence.config import PAGE_SIZE_DEFAULT
+from app.infrastructure.persistence.pagination import Cursor, Page, build_page, keyset_query
+from app.infrastructure.persistence.supabase_clients import supabase_clients
+from app.infrastructure.persistence.learnings_index import learnings_index
 from datetime import datetime
 import uuid
 
@@ -10,9 +14,14 @@ import uuid
 class LearningsRepository:
     """Repositório para persistência de aprendizados no Supabase."""
     
-    def __init__(self):
-        """Inicializa o repositório com cliente Supabase."""
-        self.supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    def __init__(self, client: Client | None = None):
+        """
+        Inicializa o repositório.
+        
+        Args:
+            client: Cliente Supabase compartilhado (padrão: o do pool do processo)
+        """
+        self.supabase: Client = client if client is not None else supabase_clients.default()
     
     async def save(self, learning: Learning) -> Learning:
         """Salva um aprendizado."""
@@ -24,26 +33,71 @@ class LearningsRepository:
             "created_at": learning.created_at.isoformat()
         }
         
-        self.supabase.table("learnings").insert(learning_data).execute()
+        await supabase_io.execute(self.supabase.table("learnings").insert(learning_data))
+        
+        # Disponibiliza o novo aprendizado para a busca RAG deste processo sem recarregar
+        learnings_index.add(learning)
         
         return learning
     
-    async def find_all(self) -> list[Learning]:
-        """Busca todos os aprendizados."""
-        result = self.supabase.table("learnings").select("*").order("created_at", desc=True).execute()
+    async def save_many(self, learnings: list[Learning]) -> list[Learning]:
+        """Salva vários aprendizados em uma única escrita."""
+        if not learnings:
+            return []
+        
+        await supabase_io.execute(self.supabase.table("learnings").insert([
+            {
+                "id": str(learning.id),
+                "content": learning.content,
+                "embedding": learning.embedding.vector,
+                "source_feedback_id": str(learning.source_feedback_id),
+                "created_at": learning.created_at.isoformat()
+            }
+            for learning in learnings
+        ]))
+        
+        for learning in learnings:
+            learnings_index.add(learning)
+        
+        return learnings
+    
+    async def find_all(self, with_embeddings: bool = False) -> list[Learning]:
+        """
+        Busca todos os aprendizados.
+        
+        Os vetores só são lidos com `with_embeddings=True`; sem eles o embedding vem vazio.
+        """
+        columns = "id, content, source_feedback_id, created_at" + (", embedding" if with_embeddings else "")
+        result = await supabase_io.execute(self.supabase.table("learnings").select(columns).order("created_at", desc=True))
         
         learnings = []
         for row in result.data:
-            from app.domain.shared_kernel import Embedding
-            
             learning = Learning(
                 id=LearningId(uuid.UUID(row["id"])),
                 content=row["content"],
-                embedding=Embedding(vector=row["embedding"]),
+                embedding=Embedding(vector=row.get("embedding") or []),
                 source_feedback_id=FeedbackId(uuid.UUID(row["source_feedback_id"])),
                 created_at=datetime.fromisoformat(row["created_at"].replace("Z", "+00:00"))
             )
             learnings.append(learning)
         
         return learnings
-
+    
+    async def find_page(self, cursor: Cursor | None = None, limit: int = PAGE_SIZE_DEFAULT) -> Page[Learning]:
+        """
+        Busca uma página de aprendizados, do mais recente ao mais antigo.
+        
+        A listagem não usa os vetores, então o embedding não é lido (vem vazio).
+        """
+        result = await supabase_io.execute(keyset_query(
+            self.supabase.table("learnings").select("id, content, source_feedback_id, created_at"),
+            cursor,
+            limit
+        ))
+        return build_page(result.data, limit, lambda row: Learning(
+            id=LearningId(uuid.UUID(row["id"])),
+            content=row["content"],
+            embedding=Embedding(vector=[]),
+            source_feedback_id=FeedbackId(uuid.UUID(row["source_feedback_id"])),
+            created_at=datetime.fromisoformat(row["created_at"].replace("Z", "+00:00"))
+        ))
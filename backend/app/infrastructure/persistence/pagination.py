@@ -0,0 +1,100 @@
+"""Paginação por cursor (keyset) em `(created_at, id)` para as listagens."""
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Generic, TypeVar
+
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class Cursor:
+    """Posição da última linha entregue: a próxima página começa logo depois dela."""
+    created_at: str
+    id: str
+
+    def encode(self) -> str:
+        raw = json.dumps([self.created_at, self.id], separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> "Cursor":
+        """Lê um cursor recebido do cliente; levanta ValueError se for inválido."""
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+            uuid.UUID(row_id)
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+            raise ValueError("Cursor inválido") from e
+        return cls(created_at=created_at, id=row_id)
+
+    @classmethod
+    def from_row(cls, row: dict) -> "Cursor":
+        created_at = row["created_at"]
+        if isinstance(created_at, datetime):
+            created_at = created_at.isoformat()
+        return cls(created_at=created_at, id=str(row["id"]))
+
+
+@dataclass(frozen=True)
+class Page(Generic[T]):
+    """Uma página de resultados e o cursor da seguinte (None na última)."""
+    items: list[T] = field(default_factory=list)
+    next_cursor: str | None = None
+
+
+def build_page(rows: list[dict], limit: int, to_item: Callable[[dict], T]) -> Page[T]:
+    """
+    Monta a página a partir de até `limit + 1` linhas.
+
+    A linha extra só indica que há uma próxima página; o cursor aponta para a última
+    linha entregue.
+    """
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = Cursor.from_row(rows[-1]).encode() if has_more and rows else None
+    return Page(items=[to_item(row) for row in rows], next_cursor=next_cursor)
+
+
+def keyset_query(query, cursor: Cursor | None, limit: int, desc: bool = True):
+    """
+    Aplica ordenação por `(created_at, id)`, o filtro do cursor e o limite (uma
+    linha a mais, para saber se há próxima página) a um query builder do PostgREST.
+    """
+    if cursor is not None:
+        op = "lt" if desc else "gt"
+        # Valores entre aspas: o timestamp tem ":" e "+", que o PostgREST interpretaria
+        created_at, row_id = f'"{cursor.created_at}"', f'"{cursor.id}"'
+        query = query.or_(
+            f"created_at.{op}.{created_at},and(created_at.eq.{created_at},id.{op}.{row_id})"
+        )
+    return query.order("created_at", desc=desc).order("id", desc=desc).limit(limit + 1)
+
+
+def keyset_sql(cursor: Cursor | None, desc: bool = True, alias: str = "") -> tuple[str, tuple]:
+    """
+    Trecho SQL (`and ...`) e parâmetros do filtro do cursor, para o backend Postgres.
+
+    A comparação de tupla `(created_at, id) < (%s, %s)` usa o índice composto.
+    """
+    if cursor is None:
+        return "", ()
+    column = f"{alias}." if alias else ""
+    op = "<" if desc else ">"
+    return (
+        f" and ({column}created_at, {column}id) {op} (%s::timestamptz, %s::uuid)",
+        (cursor.created_at, cursor.id),
+    )
+
+
+def order_sql(desc: bool = True, alias: str = "") -> str:
+    column = f"{alias}." if alias else ""
+    direction = "desc" if desc else "asc"
+    return f" order by {column}created_at {direction}, {column}id {direction} limit %s"
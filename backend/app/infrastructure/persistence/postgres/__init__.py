@@ -0,0 +1 @@
+# Postgres persistence module
@@ -0,0 +1,316 @@
+"""Repositório de Artefatos sobre o pool de conexões do Postgres."""
+import asyncio
+from app.domain.artifacts.types import Artifact, ArtifactCard, ArtifactChunk, ArtifactSourceType, ChunkMetadata
+from app.domain.shared_kernel import ArtifactId, ChunkId, Embedding
+from app.infrastructure.persistence.artifact_list_cache import artifact_list_cache
+from app.infrastructure.persistence.artifacts_repo import (
+    ARTIFACT_CARD_COLUMNS,
+    ARTIFACT_HEADER_COLUMNS,
+    CHUNK_COLUMNS_WITHOUT_EMBEDDING,
+    ArtifactProjection,
+)
+from app.infrastructure.persistence.config import PAGE_SIZE_DEFAULT
+from app.infrastructure.persistence.pagination import Cursor, Page, build_page, keyset_sql, order_sql
+from app.infrastructure.persistence.chunk_filter_index import chunk_filter_index
+from app.infrastructure.persistence.citation_cache import citation_cache
+from app.infrastructure.persistence.postgres.pool import as_list, as_uuid, from_vector, to_vector
+from app.infrastructure.single_flight import coalesce
+
+
+_INSERT_CHUNK = """
+    insert into artifact_chunks (
+        id, artifact_id, content, embedding, section_title, section_level,
+        content_type, position, token_count, breadcrumbs
+    ) values (%s, %s, %s, %b, %s, %s, %s, %s, %s, %s)
+"""
+
+_CHUNK_COLUMNS = """
+    id, artifact_id, content, embedding, section_title, section_level,
+    content_type, position, token_count, breadcrumbs
+"""
+
+
+def _chunk_params(artifact_id: ArtifactId, chunk: ArtifactChunk) -> tuple:
+    metadata = chunk.metadata
+    return (
+        chunk.id,
+        artifact_id,
+        chunk.content,
+        to_vector(chunk.embedding.vector),
+        metadata.section_title if metadata else None,
+        metadata.section_level if metadata else None,
+        metadata.content_type if metadata else None,
+        metadata.position if metadata else None,
+        metadata.token_count if metadata else None,
+        metadata.breadcrumbs if metadata else None,
+    )
+
+
+def _row_to_chunk(row: dict) -> ArtifactChunk:
+    return ArtifactChunk(
+        id=ChunkId(as_uuid(row["id"])),
+        artifact_id=ArtifactId(as_uuid(row["artifact_id"])),
+        content=row["content"],
+        embedding=Embedding(vector=from_vector(row.get("embedding"))),
+        metadata=ChunkMetadata(
+            section_title=row.get("section_title"),
+            section_level=row.get("section_level"),
+            content_type=row.get("content_type"),
+            position=row.get("position") or 0,
+            token_count=row.get("token_count") or 0,
+            breadcrumbs=as_list(row.get("breadcrumbs")),
+        ),
+    )
+
+
+def _row_to_artifact(row: dict, chunks: list[ArtifactChunk]) -> Artifact:
+    return Artifact(
+        id=ArtifactId(as_uuid(row["id"])),
+        title=row["title"],
+        source_type=ArtifactSourceType[row["source_type"]],
+        chunks=chunks,
+        source_url=row.get("source_url"),
+        original_content=row.get("original_content")
+    )
+
+
+def _row_to_card(row: dict) -> ArtifactCard:
+    return ArtifactCard(
+        id=ArtifactId(as_uuid(row["id"])),
+        title=row["title"],
+        source_type=ArtifactSourceType[row["source_type"]],
+        created_at=row["created_at"],
+        description=row.get("description"),
+        tags=row.get("tags") or [],
+        color=row.get("color"),
+        source_url=row.get("source_url")
+    )
+
+
+class PostgresArtifactsRepository:
+    """Mesma interface de `ArtifactsRepository`, com SQL direto e vetores em binário."""
+
+    def __init__(self, pool):
+        """
+        Inicializa o repositório.
+
+        Args:
+            pool: `AsyncConnectionPool` compartilhado (ver `postgres.pool.open_pool`)
+        """
+        self.pool = pool
+
+    async def save(self, artifact: Artifact, source_url: str | None = None, color: str | None = None) -> Artifact:
+        """Salva um artefato e seus chunks em uma única transação."""
+        async with self.pool.connection() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    """
+                    insert into artifacts (id, title, source_type, source_url, color, original_content, created_at)
+                    values (%s, %s, %s, %s, %s, %s, now())
+                    """,
+                    (
+                        artifact.id,
+                        artifact.title,
+                        artifact.source_type.name,
+                        source_url,
+                        color,
+                        artifact.original_content,
+                    ),
+                )
+                await self._insert_chunks(conn, artifact.id, artifact.chunks)
+
+        chunk_filter_index.invalidate()
+        artifact_list_cache.invalidate()
+        return artifact
+
+    async def find_by_id(
+        self,
+        artifact_id: ArtifactId,
+        projection: ArtifactProjection = ArtifactProjection.FULL
+    ) -> Artifact | None:
+        """
+        Busca um artefato por ID, com os chunks em ordem de posição.
+
+        `projection` limita as colunas lidas (ver `ArtifactProjection`).
+        """
+        full = projection is ArtifactProjection.FULL
+        artifact_columns = f"{ARTIFACT_HEADER_COLUMNS}, original_content" if full else ARTIFACT_HEADER_COLUMNS
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(
+                f"select {artifact_columns} from artifacts where id = %s",
+                (artifact_id,),
+            )
+            row = await cursor.fetchone()
+            if row is None:
+                return None
+            if projection is ArtifactProjection.HEADER:
+                return _row_to_artifact(row, [])
+            cursor = await conn.execute(
+                f"select {_CHUNK_COLUMNS if full else CHUNK_COLUMNS_WITHOUT_EMBEDDING} "
+                "from artifact_chunks where artifact_id = %s order by position",
+                (artifact_id,),
+                binary=True,
+            )
+            chunk_rows = await cursor.fetchall()
+
+        return _row_to_artifact(row, [_row_to_chunk(chunk_row) for chunk_row in chunk_rows])
+
+    async def find_original_content(self, artifact_id: ArtifactId) -> str | None:
+        """Busca só o conteúdo original do artefato (None se não houver)."""
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute("select original_content from artifacts where id = %s", (artifact_id,))
+            row = await cursor.fetchone()
+
+        return row["original_content"] if row is not None else None
+
+    async def find_card_by_id(self, artifact_id: ArtifactId) -> ArtifactCard | None:
+        """Busca os campos do card de um artefato (os mesmos da listagem), em uma consulta."""
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(
+                f"select {ARTIFACT_CARD_COLUMNS} from artifacts where id = %s",
+                (artifact_id,),
+            )
+            row = await cursor.fetchone()
+
+        return _row_to_card(row) if row is not None else None
+
+    async def update_artifact_tags(self, artifact_id: ArtifactId, tags: list[str]) -> None:
+        """Atualiza as tags de um artefato."""
+        await self._update(artifact_id, "tags", tags)
+        chunk_filter_index.invalidate()
+        artifact_list_cache.invalidate()
+
+    async def update_artifact_title(self, artifact_id: ArtifactId, title: str) -> None:
+        """Atualiza o título de um artefato."""
+        await self._update(artifact_id, "title", title)
+        # O título aparece nas citações em cache
+        citation_cache.invalidate()
+        artifact_list_cache.invalidate()
+
+    async def update_artifact_description(self, artifact_id: ArtifactId, description: str | None) -> None:
+        """Atualiza a descrição de um artefato."""
+        await self._update(artifact_id, "description", description)
+        artifact_list_cache.invalidate()
+
+    async def update_artifact_color(self, artifact_id: ArtifactId, color: str | None) -> None:
+        """Atualiza a cor de um artefato."""
+        await self._update(artifact_id, "color", color)
+        artifact_list_cache.invalidate()
+
+    async def update_source_url(self, artifact_id: ArtifactId, source_url: str) -> None:
+        """Atualiza a URL do source de um artefato."""
+        await self._update(artifact_id, "source_url", source_url)
+        artifact_list_cache.invalidate()
+
+    async def update_artifact_content(self, artifact_id: ArtifactId, new_content: str, embedding_generator) -> None:
+        """Atualiza o conteúdo de um artefato TEXT re-processando os chunks."""
+        from app.domain.artifacts.workflows import _generate_structured_chunks
+
+        # Os embeddings são gerados antes de abrir a transação
+        artifact_chunks = await asyncio.to_thread(
+            _generate_structured_chunks,
+            text_content=new_content,
+            artifact_id=artifact_id,
+            embedding_generator=embedding_generator,
+        )
+
+        async with self.pool.connection() as conn:
+            async with conn.transaction():
+                await conn.execute("delete from artifact_chunks where artifact_id = %s", (artifact_id,))
+                await self._insert_chunks(conn, artifact_id, artifact_chunks)
+                await conn.execute(
+                    "update artifacts set original_content = %s where id = %s",
+                    (new_content, artifact_id),
+                )
+        chunk_filter_index.invalidate()
+        citation_cache.invalidate()
+        artifact_list_cache.invalidate()
+
+    @coalesce("artifacts.find_all")
+    async def find_all(self) -> list[Artifact]:
+        """Busca todos os artefatos (sem chunks, apenas metadados)."""
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(
+                """
+                select id, title, source_type, source_url, original_content
+                from artifacts
+                order by created_at desc
+                """
+            )
+            rows = await cursor.fetchall()
+
+        return [_row_to_artifact(row, []) for row in rows]
+
+    async def list_cards(self, cursor: Cursor | None = None, limit: int = PAGE_SIZE_DEFAULT) -> Page[ArtifactCard]:
+        """
+        Lista uma página de artefatos com os campos do card, em uma consulta.
+
+        As páginas ficam em cache no processo até a próxima escrita de artefato.
+        """
+        page = artifact_list_cache.get((cursor, limit))
+        if page is not None:
+            return page
+        return await self._load_cards(cursor, limit)
+
+    @coalesce("artifacts.list_cards")
+    async def _load_cards(self, cursor: Cursor | None, limit: int) -> Page[ArtifactCard]:
+        generation = artifact_list_cache.generation
+        keyset, params = keyset_sql(cursor)
+        async with self.pool.connection() as conn:
+            result = await conn.execute(
+                f"select {ARTIFACT_CARD_COLUMNS} from artifacts where true{keyset}{order_sql()}",
+                (*params, limit + 1),
+            )
+            rows = await result.fetchall()
+
+        page = build_page(rows, limit, _row_to_card)
+        artifact_list_cache.store((cursor, limit), page, generation)
+        return page
+
+    async def delete(self, artifact_id: ArtifactId) -> None:
+        """Deleta um artefato e seus chunks."""
+        async with self.pool.connection() as conn:
+            async with conn.transaction():
+                await conn.execute("delete from artifact_chunks where artifact_id = %s", (artifact_id,))
+                await conn.execute("delete from artifacts where id = %s", (artifact_id,))
+        chunk_filter_index.invalidate()
+        citation_cache.invalidate()
+        artifact_list_cache.invalidate()
+
+    async def delete_chunks(self, artifact_id: ArtifactId) -> None:
+        """Deleta apenas os chunks de um artefato."""
+        async with self.pool.connection() as conn:
+            await conn.execute("delete from artifact_chunks where artifact_id = %s", (artifact_id,))
+        chunk_filter_index.invalidate()
+        citation_cache.invalidate()
+
+    async def save_chunks(self, artifact_id: ArtifactId, chunks: list) -> None:
+        """Salva chunks de um artefato."""
+        async with self.pool.connection() as conn:
+            await self._insert_chunks(conn, artifact_id, chunks)
+        chunk_filter_index.invalidate()
+
+    async def find_chunks_by_embedding(self, embedding: list[float], limit: int = 5) -> list[ArtifactChunk]:
+        """Busca os chunks mais similares pela distância de cosseno do pgvector."""
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(
+                f"select {_CHUNK_COLUMNS} from artifact_chunks order by embedding <=> %b limit %s",
+                (to_vector(embedding), limit),
+                binary=True,
+            )
+            rows = await cursor.fetchall()
+
+        return [_row_to_chunk(row) for row in rows]
+
+    async def _update(self, artifact_id: ArtifactId, column: str, value) -> None:
+        # `column` vem sempre de uma constante desta classe, nunca da requisição
+        async with self.pool.connection() as conn:
+            await conn.execute(f"update artifacts set {column} = %s where id = %s", (value, artifact_id))
+
+    @staticmethod
+    async def _insert_chunks(conn, artifact_id: ArtifactId, chunks: list[ArtifactChunk]) -> None:
+        if not chunks:
+            return
+        # `executemany` envia todas as linhas em pipeline, sem uma ida e volta por chunk
+        async with conn.cursor() as cursor:
+            await cursor.executemany(_INSERT_CHUNK, [_chunk_params(artifact_id, chunk) for chunk in chunks])
@@ -0,0 +1,391 @@
+"""Repositório de Conversas sobre o pool de conexões do Postgres."""
+import uuid
+
+from app.domain.conversations.types import Conversation, ConversationSummary, Message, Author, CitedSource
+from app.domain.shared_kernel import ConversationId, MessageId, ArtifactId, TopicId, ChunkId
+from app.infrastructure.persistence.config import PAGE_SIZE_DEFAULT
+from app.infrastructure.persistence.pagination import Cursor, Page, build_page, keyset_sql, order_sql
+from app.infrastructure.persistence.postgres.pool import as_list, as_uuid
+
+
+_CITED_CHUNK_COLUMNS = """
+    select
+        c.id, c.artifact_id, left(c.content, 200) as content_preview, c.section_title,
+        c.section_level, c.content_type, c.breadcrumbs, a.title as artifact_title
+    from artifact_chunks c
+    join artifacts a on a.id = c.artifact_id
+"""
+
+_CITED_CHUNKS = _CITED_CHUNK_COLUMNS + """
+    where c.id = any(
+        select unnest(m.cited_artifact_chunk_ids)::uuid from messages m where m.conversation_id = %s
+    )
+"""
+
+
+class PostgresConversationsRepository:
+    """Mesma interface de `ConversationsRepository`, com SQL direto."""
+
+    def __init__(self, pool):
+        """
+        Inicializa o repositório.
+
+        Args:
+            pool: `AsyncConnectionPool` compartilhado (ver `postgres.pool.open_pool`)
+        """
+        self.pool = pool
+
+    async def create(self) -> Conversation:
+        """Cria uma nova conversa."""
+        conversation_id = ConversationId(uuid.uuid4())
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(
+                "insert into conversations (id, created_at) values (%s, now()) returning created_at",
+                (conversation_id,),
+            )
+            row = await cursor.fetchone()
+
+        return Conversation(
+            id=conversation_id,
+            messages=[],
+            created_at=row["created_at"]
+        )
+
+    async def update_topic(
+        self,
+        conversation_id: ConversationId,
+        topic_id: TopicId | None
+    ) -> None:
+        """Atualiza o tópico de uma conversa e as contagens dos tópicos (migração 006)."""
+        async with self.pool.connection() as conn:
+            await conn.execute(
+                "select set_conversation_topic(%s, %s)",
+                (conversation_id, topic_id),
+            )
+
+    async def update_summary_and_title(
+        self,
+        conversation_id: ConversationId,
+        summary: str | None = None,
+        title: str | None = None
+    ) -> None:
+        """Atualiza o resumo e título de uma conversa (None mantém o valor atual)."""
+        if summary is None and title is None:
+            return
+        async with self.pool.connection() as conn:
+            await conn.execute(
+                """
+                update conversations
+                set summary = coalesce(%s, summary), title = coalesce(%s, title)
+                where id = %s
+                """,
+                (summary, title, conversation_id),
+            )
+
+    async def update_context_summary(
+        self,
+        conversation_id: ConversationId,
+        context_summary: str,
+        summarized_message_count: int
+    ) -> None:
+        """
+        Atualiza o resumo acumulado da conversa.
+
+        Só sobrescreve um resumo que cubra menos mensagens, para que uma atualização
+        atrasada não desfaça uma mais recente.
+        """
+        async with self.pool.connection() as conn:
+            await conn.execute(
+                """
+                update conversations
+                set context_summary = %s, summarized_message_count = %s
+                where id = %s and summarized_message_count < %s
+                """,
+                (context_summary, summarized_message_count, conversation_id, summarized_message_count),
+            )
+
+    async def find_topic_id(self, conversation_id: ConversationId) -> TopicId | None:
+        """Busca apenas o tópico de uma conversa (None se ainda não classificada)."""
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute("select topic_id from conversations where id = %s", (conversation_id,))
+            row = await cursor.fetchone()
+
+        if row is None or row["topic_id"] is None:
+            return None
+        return TopicId(as_uuid(row["topic_id"]))
+
+    async def find_summaries_page(
+        self,
+        topic_id: TopicId | None,
+        cursor: Cursor | None = None,
+        limit: int = PAGE_SIZE_DEFAULT
+    ) -> Page[ConversationSummary]:
+        """Busca uma página de resumos de conversas por tópico (None para todas), em uma consulta."""
+        query = """
+            select c.id, c.title, c.summary, c.created_at, t.name as topic_name
+            from conversations c
+            left join topics t on t.id = c.topic_id
+            where c.title is not null
+        """
+        params: tuple = ()
+        if topic_id is not None:
+            query += " and c.topic_id = %s"
+            params = (topic_id,)
+        keyset, keyset_params = keyset_sql(cursor, alias="c")
+
+        async with self.pool.connection() as conn:
+            result = await conn.execute(
+                query + keyset + order_sql(alias="c"),
+                (*params, *keyset_params, limit + 1),
+            )
+            rows = await result.fetchall()
+
+        return build_page(rows, limit, lambda row: ConversationSummary(
+            id=ConversationId(as_uuid(row["id"])),
+            title=row["title"],
+            summary=row["summary"] or "",
+            topic_name=row["topic_name"],
+            created_at=row["created_at"]
+        ))
+
+    async def find_untitled_page(
+        self,
+        cursor: Cursor | None = None,
+        limit: int = PAGE_SIZE_DEFAULT
+    ) -> Page[Conversation]:
+        """
+        Busca uma página de conversas sem título, em ordem cronológica (usado pelo backfill).
+
+        As mensagens de toda a página vêm em uma segunda consulta na mesma conexão,
+        sem as citações.
+        """
+        keyset, keyset_params = keyset_sql(cursor, desc=False)
+        async with self.pool.connection() as conn:
+            conversations_cursor = await conn.execute(
+                f"select id, created_at from conversations where title is null{keyset}{order_sql(desc=False)}",
+                (*keyset_params, limit + 1),
+            )
+            page = build_page(await conversations_cursor.fetchall(), limit, lambda row: row)
+            message_rows = []
+            if page.items:
+                messages_cursor = await conn.execute(
+                    """
+                    select id, conversation_id, author, content, created_at
+                    from messages where conversation_id = any(%s::uuid[]) order by created_at
+                    """,
+                    ([str(row["id"]) for row in page.items],),
+                )
+                message_rows = await messages_cursor.fetchall()
+
+        messages_by_conversation: dict[str, list[Message]] = {}
+        for row in message_rows:
+            messages_by_conversation.setdefault(str(row["conversation_id"]), []).append(_row_to_message(row, {}))
+
+        return Page(
+            items=[
+                Conversation(
+                    id=ConversationId(as_uuid(row["id"])),
+                    messages=messages_by_conversation.get(str(row["id"]), []),
+                    created_at=row["created_at"]
+                )
+                for row in page.items
+            ],
+            next_cursor=page.next_cursor
+        )
+
+    async def find_by_id(self, conversation_id: ConversationId) -> Conversation | None:
+        """
+        Busca uma conversa com as mensagens e as fontes citadas.
+
+        As três consultas (conversa, mensagens e chunks citados com o título do
+        artefato) seguem em pipeline na mesma conexão: uma única ida e volta.
+        """
+        async with self.pool.connection() as conn:
+            async with conn.pipeline():
+                conversation_cursor = await conn.execute(
+                    """
+                    select id, created_at, context_summary, summarized_message_count
+                    from conversations where id = %s
+                    """,
+                    (conversation_id,),
+                )
+                messages_cursor = await conn.execute(
+                    """
+                    select id, conversation_id, author, content, cited_artifact_chunk_ids, created_at
+                    from messages where conversation_id = %s order by created_at
+                    """,
+                    (conversation_id,),
+                )
+                chunks_cursor = await conn.execute(_CITED_CHUNKS, (conversation_id,))
+            conversation_row = await conversation_cursor.fetchone()
+            message_rows = await messages_cursor.fetchall()
+            chunk_rows = await chunks_cursor.fetchall()
+
+        if conversation_row is None:
+            return None
+
+        cited = {str(row["id"]): _row_to_cited_source(row) for row in chunk_rows}
+        messages = [_row_to_message(row, cited) for row in message_rows]
+
+        return Conversation(
+            id=ConversationId(as_uuid(conversation_row["id"])),
+            messages=messages,
+            created_at=conversation_row["created_at"],
+            context_summary=conversation_row.get("context_summary"),
+            summarized_message_count=conversation_row.get("summarized_message_count") or 0
+        )
+
+    async def find_turn_context(self, conversation_id: ConversationId) -> Conversation | None:
+        """
+        Busca o que é preciso para continuar a conversa: o resumo acumulado e as
+        mensagens que ele ainda não cobre, sem as citações.
+
+        Uma única consulta: as mensagens já resumidas são puladas no próprio SQL
+        (`message_offset` indica quantas são), com o mesmo `summarized_message_count`
+        devolvido junto. Retorna None se a conversa não existir.
+        """
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(
+                """
+                select
+                    c.id, c.created_at, c.context_summary,
+                    coalesce(c.summarized_message_count, 0) as summarized_message_count,
+                    m.id as message_id, m.author, m.content, m.created_at as message_created_at
+                from conversations c
+                left join lateral (
+                    select id, author, content, created_at from messages
+                    where conversation_id = c.id
+                    order by created_at
+                    offset coalesce(c.summarized_message_count, 0)
+                ) m on true
+                where c.id = %s
+                order by m.created_at
+                """,
+                (conversation_id,),
+            )
+            rows = await cursor.fetchall()
+
+        if not rows:
+            return None
+
+        first = rows[0]
+        return Conversation(
+            id=ConversationId(as_uuid(first["id"])),
+            messages=[
+                _row_to_message({
+                    "id": row["message_id"],
+                    "conversation_id": row["id"],
+                    "author": row["author"],
+                    "content": row["content"],
+                    "created_at": row["message_created_at"],
+                }, {})
+                for row in rows
+                if row["message_id"] is not None
+            ],
+            created_at=first["created_at"],
+            context_summary=first["context_summary"],
+            summarized_message_count=first["summarized_message_count"],
+            message_offset=first["summarized_message_count"]
+        )
+
+    async def find_messages_page(
+        self,
+        conversation_id: ConversationId,
+        cursor: Cursor | None = None,
+        limit: int = PAGE_SIZE_DEFAULT
+    ) -> Page[Message] | None:
+        """
+        Busca uma página de mensagens da conversa, em ordem cronológica.
+
+        A existência da conversa e a página seguem em pipeline; as citações da página
+        vêm em uma segunda consulta. Retorna None se a conversa não existir.
+        """
+        keyset, params = keyset_sql(cursor, desc=False)
+        async with self.pool.connection() as conn:
+            async with conn.pipeline():
+                conversation_cursor = await conn.execute(
+                    "select id from conversations where id = %s", (conversation_id,)
+                )
+                messages_cursor = await conn.execute(
+                    "select id, conversation_id, author, content, cited_artifact_chunk_ids, created_at "
+                    f"from messages where conversation_id = %s{keyset}{order_sql(desc=False)}",
+                    (conversation_id, *params, limit + 1),
+                )
+            conversation_row = await conversation_cursor.fetchone()
+            message_rows = await messages_cursor.fetchall()
+            if conversation_row is None:
+                return None
+
+            page = build_page(message_rows, limit, lambda row: row)
+            chunk_ids = list(dict.fromkeys(
+                str(chunk_id)
+                for row in page.items
+                for chunk_id in row.get("cited_artifact_chunk_ids") or []
+            ))
+            chunk_rows = []
+            if chunk_ids:
+                chunks_cursor = await conn.execute(
+                    _CITED_CHUNK_COLUMNS + " where c.id = any(%s::uuid[])", (chunk_ids,)
+                )
+                chunk_rows = await chunks_cursor.fetchall()
+
+        cited = {str(row["id"]): _row_to_cited_source(row) for row in chunk_rows}
+        return Page(
+            items=[_row_to_message(row, cited) for row in page.items],
+            next_cursor=page.next_cursor
+        )
+
+    async def save_messages(self, messages: list[Message]) -> list[Message]:
+        """Salva as mensagens novas de uma troca em um único insert (idempotente por ID)."""
+        if not messages:
+            return messages
+
+        values = ", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(messages))
+        params = [
+            value
+            for msg in messages
+            for value in (
+                msg.id,
+                msg.conversation_id,
+                msg.author.name,
+                msg.content,
+                [cs.chunk_id for cs in msg.cited_sources if cs.chunk_id],
+                msg.created_at,
+            )
+        ]
+        async with self.pool.connection() as conn:
+            await conn.execute(
+                "insert into messages (id, conversation_id, author, content, cited_artifact_chunk_ids, created_at) "
+                f"values {values} on conflict (id) do nothing",
+                params,
+            )
+
+        return messages
+
+
+def _row_to_cited_source(row: dict) -> CitedSource:
+    return CitedSource(
+        chunk_id=ChunkId(as_uuid(row["id"])),
+        artifact_id=ArtifactId(as_uuid(row["artifact_id"])),
+        title=row.get("artifact_title") or "",
+        chunk_content_preview=row.get("content_preview") or "",
+        section_title=row.get("section_title"),
+        section_level=row.get("section_level"),
+        content_type=row.get("content_type"),
+        breadcrumbs=as_list(row.get("breadcrumbs")),
+    )
+
+
+def _row_to_message(row: dict, cited: dict[str, CitedSource]) -> Message:
+    return Message(
+        id=MessageId(as_uuid(row["id"])),
+        conversation_id=ConversationId(as_uuid(row["conversation_id"])),
+        author=Author.USER if row["author"] == "USER" else Author.AGENT,
+        content=row["content"],
+        cited_sources=[
+            cited[str(chunk_id)]
+            for chunk_id in row.get("cited_artifact_chunk_ids") or []
+            if str(chunk_id) in cited
+        ],
+        created_at=row["created_at"]
+    )
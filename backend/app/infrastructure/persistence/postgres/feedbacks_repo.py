@@ -0,0 +1,205 @@
+"""Repositório de Feedbacks sobre o pool de conexões do Postgres."""
+from app.domain.feedbacks.types import PendingFeedback, FeedbackStatus, FeedbackWithPreview
+from app.domain.shared_kernel import FeedbackId, MessageId
+from app.infrastructure.persistence.config import PAGE_SIZE_DEFAULT
+from app.infrastructure.persistence.feedbacks_repo import MESSAGE_PREVIEW_CHARS
+from app.infrastructure.persistence.pagination import Cursor, Page, build_page, keyset_sql, order_sql
+from app.infrastructure.persistence.postgres.pool import as_uuid
+
+
+_COLUMNS = "id, message_id, feedback_text, status, created_at, feedback_type"
+
+# Mesmo recorte da view feedback_moderation, feito no banco
+_WITH_PREVIEW = f"""
+    select f.id, f.message_id, f.feedback_text, f.status, f.created_at, f.feedback_type,
+           case
+               when char_length(m.content) > {MESSAGE_PREVIEW_CHARS} then left(m.content, {MESSAGE_PREVIEW_CHARS}) || '...'
+               else m.content
+           end as message_preview
+    from pending_feedbacks f
+    left join messages m on m.id = f.message_id
+    where f.status = any(%s)
+"""
+
+
+def _row_to_feedback(row: dict) -> PendingFeedback:
+    return PendingFeedback(
+        id=FeedbackId(as_uuid(row["id"])),
+        message_id=MessageId(as_uuid(row["message_id"])),
+        feedback_text=row["feedback_text"],
+        status=FeedbackStatus[row["status"]],
+        created_at=row["created_at"],
+        feedback_type=row.get("feedback_type")
+    )
+
+
+class PostgresFeedbacksRepository:
+    """Mesma interface de `FeedbacksRepository`, com SQL direto."""
+
+    def __init__(self, pool):
+        """
+        Inicializa o repositório.
+
+        Args:
+            pool: `AsyncConnectionPool` compartilhado (ver `postgres.pool.open_pool`)
+        """
+        self.pool = pool
+
+    async def save(self, feedback: PendingFeedback) -> PendingFeedback:
+        """Salva um feedback."""
+        async with self.pool.connection() as conn:
+            await conn.execute(
+                f"insert into pending_feedbacks ({_COLUMNS}) values (%s, %s, %s, %s, %s, %s)",
+                (
+                    feedback.id,
+                    feedback.message_id,
+                    feedback.feedback_text,
+                    feedback.status.name,
+                    feedback.created_at,
+                    feedback.feedback_type,
+                ),
+            )
+        return feedback
+
+    async def find_by_id(self, feedback_id: FeedbackId) -> PendingFeedback | None:
+        """Busca um feedback por ID."""
+        rows = await self._fetch(f"select {_COLUMNS} from pending_feedbacks where id = %s", (feedback_id,))
+        return _row_to_feedback(rows[0]) if rows else None
+
+    async def find_pending(self) -> list[PendingFeedback]:
+        """Busca todos os feedbacks pendentes."""
+        rows = await self._fetch(
+            f"select {_COLUMNS} from pending_feedbacks where status = %s order by created_at desc",
+            (FeedbackStatus.PENDING.name,),
+        )
+        return [_row_to_feedback(row) for row in rows]
+
+    async def find_reviewed(self) -> list[PendingFeedback]:
+        """Busca todos os feedbacks revisados (aprovados ou rejeitados)."""
+        rows = await self._fetch(
+            f"select {_COLUMNS} from pending_feedbacks where status = any(%s) order by created_at desc",
+            ([FeedbackStatus.APPROVED.name, FeedbackStatus.REJECTED.name],),
+        )
+        return [_row_to_feedback(row) for row in rows]
+
+    async def find_pending_with_preview(
+        self, cursor: Cursor | None = None, limit: int = PAGE_SIZE_DEFAULT
+    ) -> Page[FeedbackWithPreview]:
+        """Busca uma página de feedbacks pendentes com o preview da mensagem, em uma consulta."""
+        return await self._find_with_preview([FeedbackStatus.PENDING.name], cursor, limit)
+
+    async def find_reviewed_with_preview(
+        self, cursor: Cursor | None = None, limit: int = PAGE_SIZE_DEFAULT
+    ) -> Page[FeedbackWithPreview]:
+        """Busca uma página de feedbacks revisados com o preview da mensagem, em uma consulta."""
+        return await self._find_with_preview(
+            [FeedbackStatus.APPROVED.name, FeedbackStatus.REJECTED.name], cursor, limit
+        )
+
+    async def _find_with_preview(
+        self, statuses: list[str], cursor: Cursor | None, limit: int
+    ) -> Page[FeedbackWithPreview]:
+        keyset, params = keyset_sql(cursor, alias="f")
+        rows = await self._fetch(
+            _WITH_PREVIEW + keyset + order_sql(alias="f"), (statuses, *params, limit + 1)
+        )
+        return build_page(
+            rows, limit, lambda row: FeedbackWithPreview(_row_to_feedback(row), row["message_preview"])
+        )
+
+    async def get_conversation_id_by_message_id(self, message_id: MessageId) -> str | None:
+        """Busca o conversation_id a partir de um message_id."""
+        rows = await self._fetch("select conversation_id from messages where id = %s", (message_id,))
+        if not rows or rows[0]["conversation_id"] is None:
+            return None
+        return str(rows[0]["conversation_id"])
+
+    async def find_by_message_id(self, message_id: MessageId) -> PendingFeedback | None:
+        """Busca o feedback mais recente de uma mensagem."""
+        rows = await self._fetch(
+            f"select {_COLUMNS} from pending_feedbacks where message_id = %s order by created_at desc limit 1",
+            (message_id,),
+        )
+        return _row_to_feedback(rows[0]) if rows else None
+
+    async def update(self, feedback_id: FeedbackId, feedback_text: str, feedback_type: str | None = None) -> PendingFeedback:
+        """Atualiza o texto e tipo de um feedback (tipo None mantém o atual)."""
+        rows = await self._fetch(
+            f"""
+            update pending_feedbacks
+            set feedback_text = %s, feedback_type = coalesce(%s, feedback_type)
+            where id = %s
+            returning {_COLUMNS}
+            """,
+            (feedback_text, feedback_type, feedback_id),
+        )
+        return _row_to_feedback(rows[0]) if rows else None
+
+    async def delete(self, feedback_id: FeedbackId) -> None:
+        """Deleta um feedback."""
+        async with self.pool.connection() as conn:
+            await conn.execute("delete from pending_feedbacks where id = %s", (feedback_id,))
+
+    async def update_status(self, feedback_id: FeedbackId, status: FeedbackStatus) -> PendingFeedback:
+        """Atualiza o status de um feedback."""
+        rows = await self._fetch(
+            f"update pending_feedbacks set status = %s where id = %s returning {_COLUMNS}",
+            (status.name, feedback_id),
+        )
+        return _row_to_feedback(rows[0]) if rows else None
+
+    async def find_by_ids(self, feedback_ids: list[FeedbackId]) -> dict[FeedbackId, PendingFeedback]:
+        """Busca vários feedbacks em uma única consulta, indexados pelo ID."""
+        if not feedback_ids:
+            return {}
+        rows = await self._fetch(
+            f"select {_COLUMNS} from pending_feedbacks where id = any(%s)",
+            (list(feedback_ids),),
+        )
+        feedbacks = [_row_to_feedback(row) for row in rows]
+        return {feedback.id: feedback for feedback in feedbacks}
+
+    async def update_status_many(
+        self,
+        feedback_ids: list[FeedbackId],
+        status: FeedbackStatus,
+        only_pending: bool = False
+    ) -> list[PendingFeedback]:
+        """
+        Atualiza o status de vários feedbacks em uma única escrita.
+
+        Com `only_pending`, só altera os que ainda estão pendentes. Retorna os
+        feedbacks efetivamente alterados.
+        """
+        if not feedback_ids:
+            return []
+        query = "update pending_feedbacks set status = %s where id = any(%s)"
+        params: tuple = (status.name, list(feedback_ids))
+        if only_pending:
+            query += " and status = %s"
+            params += (FeedbackStatus.PENDING.name,)
+        rows = await self._fetch(f"{query} returning {_COLUMNS}", params)
+        return [_row_to_feedback(row) for row in rows]
+
+    async def find_by_message_ids(self, message_ids: list[MessageId]) -> dict[str, PendingFeedback]:
+        """
+        Busca o feedback mais recente de cada mensagem informada.
+        Retorna um dicionário mapeando message_id (string) para PendingFeedback.
+        """
+        if not message_ids:
+            return {}
+        rows = await self._fetch(
+            f"""
+            select distinct on (message_id) {_COLUMNS}
+            from pending_feedbacks
+            where message_id = any(%s)
+            order by message_id, created_at desc
+            """,
+            (list(message_ids),),
+        )
+        return {str(row["message_id"]): _row_to_feedback(row) for row in rows}
+
+    async def _fetch(self, query: str, params: tuple) -> list[dict]:
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(query, params)
+            return await cursor.fetchall()
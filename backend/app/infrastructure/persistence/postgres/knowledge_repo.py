@@ -0,0 +1,55 @@
+"""Busca de conhecimento relevante (RAG) executando as funções SQL pelo pool do Postgres."""
+import uuid
+
+from app.infrastructure.persistence.knowledge_repo import KnowledgeRepository
+from app.infrastructure.persistence.postgres.pool import from_vector, to_vector
+
+
+# Argumentos nomeados de cada função; o embedding da consulta vai em binário (%b)
+_FUNCTION_ARGUMENTS = {
+    "rag_get_relevant_chunks": (
+        "query_embedding => %(query_embedding)b, match_limit => %(match_limit)s, "
+        "filter_chunk_ids => %(filter_chunk_ids)s::uuid[]"
+    ),
+    "rag_get_relevant_learnings": "query_embedding => %(query_embedding)b, match_limit => %(match_limit)s",
+}
+
+
+def _normalize_row(row: dict) -> dict:
+    """Deixa a linha no formato que o PostgREST devolveria (IDs em texto, vetores em lista)."""
+    normalized = {}
+    for key, value in row.items():
+        if isinstance(value, uuid.UUID):
+            value = str(value)
+        elif key == "embedding":
+            value = from_vector(value)
+        normalized[key] = value
+    return normalized
+
+
+class PostgresKnowledgeRepository(KnowledgeRepository):
+    """
+    `KnowledgeRepository` com as funções RPC chamadas direto no banco.
+
+    Os índices em memória (aprendizados e filtros de metadados) continuam sendo
+    carregados pelo cliente do Supabase; só as buscas por requisição usam o pool.
+    """
+
+    def __init__(self, pool, **kwargs):
+        super().__init__(**kwargs)
+        self.pool = pool
+
+    async def _call_supabase_rpc(self, function_name: str, params: dict) -> list[dict]:
+        """Executa a mesma função SQL que a RPC, em uma consulta preparada no pool."""
+        arguments = _FUNCTION_ARGUMENTS[function_name]
+        values = {
+            "query_embedding": to_vector(params["query_embedding"]),
+            "match_limit": params.get("match_limit", 5),
+            "filter_chunk_ids": params.get("filter_chunk_ids"),
+        }
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(
+                f"select * from {function_name}({arguments})", values, binary=True
+            )
+            rows = await cursor.fetchall()
+        return [_normalize_row(row) for row in rows]
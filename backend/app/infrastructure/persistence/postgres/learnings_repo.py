@@ -0,0 +1,97 @@
+"""Repositório de Aprendizados sobre o pool de conexões do Postgres."""
+from app.domain.learnings.types import Learning
+from app.domain.shared_kernel import Embedding, FeedbackId, LearningId
+from app.infrastructure.persistence.config import PAGE_SIZE_DEFAULT
+from app.infrastructure.persistence.learnings_index import learnings_index
+from app.infrastructure.persistence.pagination import Cursor, Page, build_page, keyset_sql, order_sql
+from app.infrastructure.persistence.postgres.pool import as_uuid, from_vector, to_vector
+
+
+_INSERT = """
+    insert into learnings (id, content, embedding, source_feedback_id, created_at)
+    values (%s, %s, %b, %s, %s)
+"""
+
+
+def _learning_params(learning: Learning) -> tuple:
+    return (
+        learning.id,
+        learning.content,
+        to_vector(learning.embedding.vector),
+        learning.source_feedback_id,
+        learning.created_at,
+    )
+
+
+class PostgresLearningsRepository:
+    """Mesma interface de `LearningsRepository`, com SQL direto e vetores em binário."""
+
+    def __init__(self, pool):
+        """
+        Inicializa o repositório.
+
+        Args:
+            pool: `AsyncConnectionPool` compartilhado (ver `postgres.pool.open_pool`)
+        """
+        self.pool = pool
+
+    async def save(self, learning: Learning) -> Learning:
+        """Salva um aprendizado."""
+        async with self.pool.connection() as conn:
+            await conn.execute(_INSERT, _learning_params(learning))
+
+        # Disponibiliza o novo aprendizado para a busca RAG deste processo sem recarregar
+        learnings_index.add(learning)
+        return learning
+
+    async def save_many(self, learnings: list[Learning]) -> list[Learning]:
+        """Salva vários aprendizados em uma única transação."""
+        if not learnings:
+            return []
+
+        async with self.pool.connection() as conn:
+            async with conn.transaction(), conn.cursor() as cursor:
+                await cursor.executemany(_INSERT, [_learning_params(learning) for learning in learnings])
+
+        for learning in learnings:
+            learnings_index.add(learning)
+        return learnings
+
+    async def find_all(self, with_embeddings: bool = False) -> list[Learning]:
+        """Busca todos os aprendizados (os vetores só com `with_embeddings=True`)."""
+        columns = "id, content, source_feedback_id, created_at" + (", embedding" if with_embeddings else "")
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(
+                f"select {columns} from learnings order by created_at desc",
+                binary=True,
+            )
+            rows = await cursor.fetchall()
+
+        return [
+            Learning(
+                id=LearningId(as_uuid(row["id"])),
+                content=row["content"],
+                embedding=Embedding(vector=from_vector(row.get("embedding"))),
+                source_feedback_id=FeedbackId(as_uuid(row["source_feedback_id"])),
+                created_at=row["created_at"]
+            )
+            for row in rows
+        ]
+
+    async def find_page(self, cursor: Cursor | None = None, limit: int = PAGE_SIZE_DEFAULT) -> Page[Learning]:
+        """Busca uma página de aprendizados, sem os vetores (o embedding vem vazio)."""
+        keyset, params = keyset_sql(cursor)
+        async with self.pool.connection() as conn:
+            result = await conn.execute(
+                f"select id, content, source_feedback_id, created_at from learnings where true{keyset}{order_sql()}",
+                (*params, limit + 1),
+            )
+            rows = await result.fetchall()
+
+        return build_page(rows, limit, lambda row: Learning(
+            id=LearningId(as_uuid(row["id"])),
+            content=row["content"],
+            embedding=Embedding(vector=[]),
+            source_feedback_id=FeedbackId(as_uuid(row["source_feedback_id"])),
+            created_at=row["created_at"]
+        ))
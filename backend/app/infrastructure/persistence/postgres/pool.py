@@ -0,0 +1,94 @@
+"""Pool assíncrono de conexões diretas ao Postgres (backend `postgres` dos repositórios)."""
+from __future__ import annotations
+
+import json
+import logging
+import uuid
+
+import numpy as np
+
+from app.infrastructure.persistence.config import (
+    DATABASE_POOL_MAX_SIZE,
+    DATABASE_POOL_MIN_SIZE,
+    DATABASE_PREPARE_THRESHOLD,
+    DATABASE_URL,
+)
+
+
+logger = logging.getLogger("app.persistence.postgres")
+
+
+async def _configure(conn) -> None:
+    """Registra os adaptadores do pgvector em cada conexão nova do pool."""
+    from pgvector.psycopg import register_vector_async
+
+    await register_vector_async(conn)
+
+
+async def open_pool(
+    dsn: str | None = DATABASE_URL,
+    min_size: int = DATABASE_POOL_MIN_SIZE,
+    max_size: int = DATABASE_POOL_MAX_SIZE,
+    prepare_threshold: int | None = DATABASE_PREPARE_THRESHOLD,
+):
+    """
+    Abre um `psycopg_pool.AsyncConnectionPool` em `dsn`.
+
+    As conexões devolvem linhas como dicionários, trabalham em autocommit (escritas
+    com mais de um comando abrem uma transação explícita) e preparam no servidor as
+    consultas executadas `prepare_threshold` vezes. Os vetores do pgvector trafegam
+    em formato binário (parâmetros `%b` e resultados com `binary=True`).
+    """
+    if not dsn:
+        raise ValueError("DATABASE_URL não configurada para o backend postgres")
+
+    from psycopg.rows import dict_row
+    from psycopg_pool import AsyncConnectionPool
+
+    pool = AsyncConnectionPool(
+        dsn,
+        min_size=min_size,
+        max_size=max_size,
+        kwargs={"autocommit": True, "row_factory": dict_row, "prepare_threshold": prepare_threshold},
+        configure=_configure,
+        open=False,
+    )
+    await pool.open(wait=True)
+    logger.info("Pool do Postgres aberto (%d-%d conexões)", min_size, max_size)
+    return pool
+
+
+def to_vector(values: list[float]) -> np.ndarray:
+    """Converte um embedding no tipo que o adaptador binário do pgvector envia."""
+    return np.asarray(values, dtype=np.float32)
+
+
+def from_vector(value) -> list[float]:
+    """Converte um vetor lido do banco (array do pgvector ou texto) em lista."""
+    if value is None:
+        return []
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            return []
+    return [float(item) for item in value]
+
+
+def as_uuid(value) -> uuid.UUID:
+    """Aceita colunas `uuid` (já convertidas pelo psycopg) ou `text`."""
+    return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+
+
+def as_list(value) -> list:
+    """Normaliza colunas de lista (array ou JSON em texto) para lista."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            return []
+    return list(value)
@@ -1,17 +1,24 @@
 """Repositório para persistência de configurações no Supabase."""
-from supabase import create_client, Client
-from app.infrastructure.persistence.config import SUPABASE_URL, SUPABASE_KEY
+from supabase import Client
+from app.infrastructure.persistence.blocking_io import supabase_io
+from app.infrastructure.persistence.supabase_clients import supabase_clients
 
 
 class SettingsRepository:
     """Repositório para gerenciar configurações do sistema."""
 
-    def __init__(self):
-        self.supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    def __init__(self, client: Client | None = None):
+        """
+        Inicializa o repositório.
+
+        Args:
+            client: Cliente Supabase compartilhado (padrão: o do pool do processo)
+        """
+        self.supabase: Client = client if client is not None else supabase_clients.default()
 
     async def get_custom_gemini_api_key(self) -> str | None:
         """Busca a chave de API personalizada do Gemini."""
-        result = self.supabase.table("settings").select("value").eq("key", "custom_gemini_api_key").execute()
+        result = await supabase_io.execute(self.supabase.table("settings").select("value").eq("key", "custom_gemini_api_key"))
         
         if result.data and len(result.data) > 0:
             return result.data[0]["value"]
@@ -20,16 +27,16 @@ class SettingsRepository:
     async def save_custom_gemini_api_key(self, api_key: str) -> None:
         """Salva a chave de API personalizada do Gemini."""
         # Verifica se já existe
-        existing = self.supabase.table("settings").select("key").eq("key", "custom_gemini_api_key").execute()
+        existing = await supabase_io.execute(self.supabase.table("settings").select("key").eq("key", "custom_gemini_api_key"))
         
         if existing.data and len(existing.data) > 0:
             # Atualiza
-            self.supabase.table("settings").update({"value": api_key}).eq("key", "custom_gemini_api_key").execute()
+            await supabase_io.execute(self.supabase.table("settings").update({"value": api_key}).eq("key", "custom_gemini_api_key"))
         else:
             # Insere
-            self.supabase.table("settings").insert({"key": "custom_gemini_api_key", "value": api_key}).execute()
+            await supabase_io.execute(self.supabase.table("settings").insert({"key": "custom_gemini_api_key", "value": api_key}))
 
     async def remove_custom_gemini_api_key(self) -> None:
         """Remove a chave de API personalizada do Gemini."""
-        self.supabase.table("settings").delete().eq("key", "custom_gemini_api_key").execute()
+        await supabase_io.execute(self.supabase.table("settings").delete().eq("key", "custom_gemini_api_key"))
 
@@ -0,0 +1,106 @@
+"""Pool de clientes do Supabase por conjunto de credenciais."""
+from __future__ import annotations
+
+import logging
+import threading
+
+from postgrest.exceptions import APIError
+from supabase import Client, create_client
+
+from app.infrastructure.persistence.config import (
+    SUPABASE_KEY,
+    SUPABASE_SERVICE_ROLE_KEY,
+    SUPABASE_URL,
+)
+
+
+logger = logging.getLogger("app.persistence.clients")
+
+# Filtros `in_` vão na URL do PostgREST; este limite deixa folga para o restante da URL
+# abaixo dos ~8 KB aceitos pelos proxies à frente do Supabase
+_IN_FILTER_MAX_CHARS = 4000
+
+
+def in_batches(values: list[str], max_chars: int = _IN_FILTER_MAX_CHARS) -> list[list[str]]:
+    """Divide os valores de um filtro `in_` em lotes cuja lista cabe na URL."""
+    batches: list[list[str]] = []
+    current: list[str] = []
+    size = 0
+    for value in values:
+        # Cada valor leva uma vírgula codificada (%2C) como separador
+        cost = len(value) + 3
+        if current and size + cost > max_chars:
+            batches.append(current)
+            current, size = [], 0
+        current.append(value)
+        size += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+# Códigos de erro (do Postgres ou do PostgREST) de objetos que ainda não existem no
+# banco, por exemplo quando uma migração não foi aplicada
+MISSING_RELATION = ("42P01", "PGRST205")
+MISSING_FUNCTION = ("42883", "PGRST202")
+MISSING_COLUMN = ("42703", "PGRST204")
+
+
+def is_missing_schema_error(error: BaseException, codes: tuple[str, ...]) -> bool:
+    """Indica se o erro é de um objeto ausente do esquema, entre os `codes` informados."""
+    return isinstance(error, APIError) and error.code in codes
+
+
+class SupabaseClientPool:
+    """
+    Mantém um único cliente Supabase por par (URL, chave).
+
+    Cada cliente guarda suas conexões HTTP (PostgREST e Storage) abertas entre
+    requisições; criá-lo a cada uso refaria o handshake TLS e descartaria o pool
+    de conexões. `close` encerra todas as conexões no desligamento da aplicação.
+    """
+
+    def __init__(self):
+        self._clients: dict[tuple[str, str], Client] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def get(self, url: str | None, key: str | None) -> Client | None:
+        """Retorna o cliente das credenciais (None se não estiverem configuradas)."""
+        if not url or not key:
+            return None
+        with self._lock:
+            client = self._clients.get((url, key))
+            if client is None:
+                client = create_client(url, key)
+                self._clients[(url, key)] = client
+            return client
+
+    def default(self) -> Client | None:
+        """Cliente com a chave padrão (anon)."""
+        return self.get(SUPABASE_URL, SUPABASE_KEY)
+
+    def service(self) -> Client | None:
+        """Cliente com a chave de serviço (Storage e funções RPC do RAG)."""
+        return self.get(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+
+    def close(self) -> None:
+        """Fecha as conexões de todos os clientes."""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            # Os subclientes só existem se foram usados; `aclose` é síncrono no cliente síncrono
+            for subclient in (client._postgrest, client._storage):
+                if subclient is None:
+                    continue
+                try:
+                    subclient.aclose()
+                except Exception:  # pragma: no-cover - encerramento em melhor esforço
+                    logger.debug("Falha ao fechar conexões do Supabase", exc_info=True)
+
+
+# Instância compartilhada pelo processo (container da aplicação e scripts)
+supabase_clients = SupabaseClientPool()
@@ -0,0 +1,138 @@
+"""Índice em memória dos centroides de embedding dos tópicos."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+
+from app.domain.shared_kernel import TopicId
+from app.domain.topics.types import Topic
+from app.infrastructure.persistence.blocking_io import supabase_io
+from app.infrastructure.persistence.config import TOPIC_CENTROID_REFRESH_SECONDS
+from app.infrastructure.persistence.learnings_index import _parse_datetime, _parse_vector
+
+
+logger = logging.getLogger("app.topics.centroids")
+
+_COLUMNS = "id, name, created_at, centroid, centroid_count"
+
+
+def _normalize(vector: list[float]) -> list[float]:
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+@dataclass
+class _Centroid:
+    topic: Topic
+    # Média dos embeddings (normalizados) das primeiras perguntas das conversas do tópico
+    vector: list[float]
+    count: int
+    # Versão normalizada do vetor, usada na similaridade de cosseno
+    unit: list[float]
+
+
+class TopicCentroidIndex:
+    """
+    Mantém em memória o centroide de cada tópico.
+
+    O centroide é a média dos embeddings das primeiras perguntas das conversas do
+    tópico, atualizada incrementalmente a cada conversa classificada (`add_member`).
+    Tópicos ainda sem centroide (criados antes desta coluna existir) ficam listados
+    à parte, para que o classificador os ofereça ao LLM. O índice é recarregado do
+    banco no máximo uma vez a cada `refresh_interval` segundos, para incorporar as
+    atualizações feitas por outras instâncias.
+    """
+
+    def __init__(self, refresh_interval: float = TOPIC_CENTROID_REFRESH_SECONDS):
+        self.refresh_interval = refresh_interval
+        self._centroids: dict[TopicId, _Centroid] = {}
+        self._without_centroid: dict[TopicId, Topic] = {}
+        self._loaded = False
+        self._last_load = 0.0
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._centroids)
+
+    def reset(self) -> None:
+        """Descarta o conteúdo do índice, forçando um recarregamento completo."""
+        self._centroids = {}
+        self._without_centroid = {}
+        self._loaded = False
+        self._last_load = 0.0
+
+    async def ensure_fresh(self, client) -> None:
+        """Carrega o índice na primeira chamada e o recarrega quando expira."""
+        if self._loaded and time.monotonic() - self._last_load < self.refresh_interval:
+            return
+
+        async with self._lock:
+            if self._loaded and time.monotonic() - self._last_load < self.refresh_interval:
+                return
+            rows = await supabase_io.run(self._fetch_rows, client)
+            centroids: dict[TopicId, _Centroid] = {}
+            without_centroid: dict[TopicId, Topic] = {}
+            for row in rows:
+                topic = Topic(
+                    id=TopicId(uuid.UUID(row["id"])),
+                    name=row["name"],
+                    created_at=_parse_datetime(row.get("created_at")),
+                )
+                vector = _parse_vector(row.get("centroid"))
+                count = row.get("centroid_count") or 0
+                if vector and count:
+                    centroids[topic.id] = _Centroid(topic, vector, count, _normalize(vector))
+                else:
+                    without_centroid[topic.id] = topic
+            self._centroids = centroids
+            self._without_centroid = without_centroid
+            self._loaded = True
+            self._last_load = time.monotonic()
+
+    def nearest(self, embedding: list[float], limit: int) -> list[tuple[Topic, float]]:
+        """Retorna até `limit` tópicos em ordem decrescente de similaridade de cosseno."""
+        if not embedding or limit <= 0:
+            return []
+        query = _normalize(embedding)
+        scored = [
+            (centroid.topic, sum(a * b for a, b in zip(centroid.unit, query)))
+            for centroid in self._centroids.values()
+            if len(centroid.unit) == len(query)
+        ]
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:limit]
+
+    def topics_without_centroid(self) -> list[Topic]:
+        """Tópicos conhecidos que ainda não têm centroide."""
+        return list(self._without_centroid.values())
+
+    def add_member(self, topic: Topic, embedding: list[float]) -> tuple[list[float], int]:
+        """
+        Incorpora o embedding de uma nova conversa ao centroide do tópico.
+
+        Retorna o novo centroide e a quantidade de conversas que ele representa.
+        """
+        unit = _normalize(embedding)
+        centroid = self._centroids.get(topic.id)
+        if centroid is None or len(centroid.vector) != len(unit):
+            vector, count = unit, 1
+        else:
+            count = centroid.count + 1
+            # Média incremental: não é preciso guardar os embeddings anteriores
+            vector = [mean + (value - mean) / count for mean, value in zip(centroid.vector, unit)]
+        self._centroids[topic.id] = _Centroid(topic, vector, count, _normalize(vector))
+        self._without_centroid.pop(topic.id, None)
+        return vector, count
+
+    def _fetch_rows(self, client) -> list[dict]:
+        response = client.table("topics").select(_COLUMNS).execute()
+        return getattr(response, "data", None) or []
+
+
+# Instância compartilhada pelo processo (classificação de tópicos)
+topic_centroids = TopicCentroidIndex()
@@ -1,50 +1,107 @@
 """Repositório de Tópicos usando Supabase."""
-from supabase import create_client, Client
-from app.domain.topics.types import Topic
+import logging
+from supabase import Client
+from app.domain.topics.types import Topic, TopicWithCount
 from app.domain.shared_kernel import TopicId
-from app.infrastructure.persistence.config import SUPABASE_URL, SUPABASE_KEY
+from app.infrastructure.persistence.blocking_io import supabase_io
+from app.infrastructure.persistence.supabase_clients import MISSING_COLUMN, is_missing_schema_error, supabase_clients
+from app.infrastructure.persistence.topic_centroids import topic_centroids
+from app.infrastructure.single_flight import coalesce
+from collections import Counter
 from datetime import datetime
 import uuid
 
 
+logger = logging.getLogger("app.persistence.topics")
+
+
 class TopicsRepository:
     """Repositório para persistência de tópicos no Supabase."""
     
-    def __init__(self):
-        """Inicializa o repositório com cliente Supabase."""
+    def __init__(self, client: Client | None = None):
+        """
+        Inicializa o repositório.
+        
+        Args:
+            client: Cliente Supabase compartilhado (padrão: o do pool do processo)
+        """
         try:
-            if SUPABASE_URL and SUPABASE_KEY:
-                self.supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-            else:
-                self.supabase = None
+            self.supabase: Client | None = client if client is not None else supabase_clients.default()
         except Exception:
             self.supabase = None
     
+    @coalesce("topics.find_all")
     async def find_all(self) -> list[Topic]:
-        """Busca todos os tópicos."""
+        """Busca todos os tópicos (chamadas concorrentes compartilham a consulta)."""
+        return await supabase_io.run(self._load_all)
+    
+    def _load_all(self) -> list[Topic]:
         if not self.supabase:
             return []
         
         try:
-            response = self.supabase.table("topics").select("*").order("name").execute()
-            topics = []
-            for row in response.data:
-                topics.append(Topic(
-                    id=TopicId(uuid.UUID(row["id"])),
-                    name=row["name"],
-                    created_at=datetime.fromisoformat(row["created_at"].replace("Z", "+00:00"))
-                ))
-            return topics
+            response = self.supabase.table("topics").select("id, name, created_at").order("name").execute()
+            return [self._row_to_topic(row) for row in response.data]
         except Exception:
             return []
     
+    @staticmethod
+    def _row_to_topic(row: dict) -> Topic:
+        return Topic(
+            id=TopicId(uuid.UUID(row["id"])),
+            name=row["name"],
+            created_at=datetime.fromisoformat(row["created_at"].replace("Z", "+00:00"))
+        )
+    
+    @coalesce("topics.find_all_with_counts")
+    async def find_all_with_counts(self) -> list[TopicWithCount]:
+        """
+        Busca todos os tópicos com a contagem de conversas, em uma consulta.
+        
+        A contagem é a coluna mantida por `set_conversation_topic` (migração 006),
+        então o custo não depende do número de conversas.
+        """
+        if not self.supabase:
+            return []
+        
+        try:
+            result = await supabase_io.execute(
+                self.supabase.table("topics").select("id, name, created_at, conversation_count").order("name")
+            )
+            return [
+                TopicWithCount(self._row_to_topic(row), row.get("conversation_count") or 0)
+                for row in result.data
+            ]
+        except Exception as error:
+            if not is_missing_schema_error(error, MISSING_COLUMN):
+                logger.warning("Erro ao buscar os tópicos com contagem", exc_info=True)
+                raise
+        
+        # Banco sem a coluna: conta os tópicos das conversas aqui
+        topics = await self.find_all()
+        conversations = await supabase_io.execute(self.supabase.table("conversations").select("topic_id"))
+        counts = Counter(row.get("topic_id") for row in conversations.data)
+        return [TopicWithCount(topic, counts.get(str(topic.id), 0)) for topic in topics]
+    
+    async def reconcile_conversation_counts(self) -> int:
+        """
+        Recalcula as contagens de conversas a partir da tabela de conversas.
+        
+        Corrige divergências deixadas por escritas fora de `set_conversation_topic`
+        (edições manuais, conversas apagadas). Retorna quantos tópicos foram corrigidos.
+        """
+        if not self.supabase:
+            return 0
+        result = await supabase_io.execute(self.supabase.rpc("reconcile_topic_conversation_counts", {}))
+        return result.data or 0
+    
     async def find_by_name(self, name: str) -> Topic | None:
         """Busca um tópico pelo nome."""
         if not self.supabase:
             return None
         
         try:
-            response = self.supabase.table("topics").select("*").eq("name", name).limit(1).execute()
+            response = await supabase_io.execute(self.supabase.table("topics").select("id, name, created_at").eq("name", name).limit(1))
             if response.data:
                 row = response.data[0]
                 return Topic(
@@ -67,7 +124,7 @@ class TopicsRepository:
                     "name": name,
                     "created_at": "now()"
                 }
-                result = self.supabase.table("topics").insert(topic_data).execute()
+                result = await supabase_io.execute(self.supabase.table("topics").insert(topic_data))
                 print(f"Tópico criado com sucesso: {name} (ID: {topic_id})")
                 if result.data:
                     print(f"Dados retornados: {result.data}")
@@ -93,7 +150,7 @@ class TopicsRepository:
             return None
         
         try:
-            response = self.supabase.table("topics").select("*").eq("id", str(topic_id)).limit(1).execute()
+            response = await supabase_io.execute(self.supabase.table("topics").select("id, name, created_at").eq("id", str(topic_id)).limit(1))
             if response.data:
                 row = response.data[0]
                 return Topic(
@@ -104,4 +161,39 @@ class TopicsRepository:
             return None
         except Exception:
             return None
-
+    
+    async def find_nearest(self, embedding: list[float], limit: int) -> list[tuple[Topic, float]]:
+        """
+        Busca os tópicos cujo centroide é mais similar ao embedding.
+        
+        Retorna pares (tópico, similaridade de cosseno) em ordem decrescente.
+        """
+        if not self.supabase:
+            return []
+        await topic_centroids.ensure_fresh(self.supabase)
+        return topic_centroids.nearest(embedding, limit)
+    
+    async def find_without_centroid(self) -> list[Topic]:
+        """Busca os tópicos que ainda não têm centroide (não entram em `find_nearest`)."""
+        if not self.supabase:
+            return []
+        await topic_centroids.ensure_fresh(self.supabase)
+        return topic_centroids.topics_without_centroid()
+    
+    async def add_to_centroid(self, topic: Topic, embedding: list[float]) -> None:
+        """
+        Incorpora ao centroide do tópico o embedding da primeira pergunta de uma conversa.
+        
+        A média é atualizada em memória e gravada no tópico. Atualizações simultâneas
+        em instâncias diferentes podem perder uma contribuição, o que só desloca o
+        centroide levemente.
+        """
+        if not self.supabase:
+            return
+        await topic_centroids.ensure_fresh(self.supabase)
+        centroid, count = topic_centroids.add_member(topic, embedding)
+        await supabase_io.execute(
+            self.supabase.table("topics")
+            .update({"centroid": centroid, "centroid_count": count})
+            .eq("id", str(topic.id))
+        )
@@ -0,0 +1,85 @@
+"""Coalescência de chamadas assíncronas idênticas e concorrentes (single-flight)."""
+from __future__ import annotations
+
+import asyncio
+import functools
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Agrupa chamadas concorrentes com a mesma chave em uma única execução.
+
+    A primeira chamada para uma chave dispara a função em uma tarefa do grupo; ela e
+    as que chegam enquanto a tarefa está em andamento aguardam o mesmo resultado (ou
+    a mesma exceção). Nada é
+    guardado depois que a execução termina: isto não é um cache, só evita trabalho
+    duplicado em rajadas. O resultado é compartilhado entre os chamadores, que não
+    devem modificá-lo.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight: dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            # A execução pertence ao grupo, não ao primeiro chamador: cancelar
+            # quem a iniciou não cancela os demais que aguardam o resultado
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(functools.partial(self._finish, key))
+        # shield: o cancelamento de um chamador não cancela a execução compartilhada
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Evita o aviso de exceção não lida quando ninguém mais aguardava
+            task.exception()
+
+    def snapshot(self) -> dict:
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._in_flight)}
+
+
+_groups: dict[str, SingleFlight] = {}
+
+
+def single_flight_group(name: str) -> SingleFlight:
+    """Retorna o grupo de coalescência com o nome informado (criado na primeira chamada)."""
+    group = _groups.get(name)
+    if group is None:
+        group = _groups[name] = SingleFlight(name)
+    return group
+
+
+def single_flight_stats() -> dict[str, dict]:
+    """Contadores de todos os grupos, para a rota de métricas."""
+    return {name: group.snapshot() for name, group in _groups.items()}
+
+
+def coalesce(name: str):
+    """
+    Decorador para métodos assíncronos: chamadas concorrentes na mesma instância e
+    com os mesmos argumentos compartilham uma única execução.
+    """
+    group = single_flight_group(name)
+
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            key = (id(self), args, tuple(sorted(kwargs.items())))
+            return await group.do(key, lambda: method(self, *args, **kwargs))
+        return wrapper
+
+    return decorator
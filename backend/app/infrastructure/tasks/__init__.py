@@ -0,0 +1,2 @@
+# Infrastructure tasks module
+
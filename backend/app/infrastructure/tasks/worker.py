@@ -0,0 +1,162 @@
+"""Worker em processo para tarefas em segundo plano."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+from app.infrastructure.persistence.config import (
+    TOPIC_WORKER_CONCURRENCY,
+    TOPIC_WORKER_MAX_ATTEMPTS,
+)
+
+
+logger = logging.getLogger("app.tasks")
+
+QUEUED = "queued"
+RUNNING = "running"
+RETRYING = "retrying"
+DONE = "done"
+FAILED = "failed"
+
+PENDING_STATUSES = (QUEUED, RUNNING, RETRYING)
+
+
+class BackgroundWorker:
+    """
+    Fila em memória processada por um número limitado de tarefas asyncio.
+
+    Cada job tem um identificador; enquanto um job com o mesmo identificador está
+    pendente, novos envios são ignorados. Falhas são repetidas com backoff
+    exponencial até `max_attempts`. O status dos jobs recentes fica disponível em
+    `status` para consultas de progresso. `drain` aguarda a fila esvaziar no
+    encerramento da aplicação.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        concurrency: int = 2,
+        max_attempts: int = 3,
+        retry_base_seconds: float = 1.0,
+        history_size: int = 1000,
+    ):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base_seconds = retry_base_seconds
+        self.history_size = history_size
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self._statuses: OrderedDict[str, str] = OrderedDict()
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._accepting = True
+
+    def start(self) -> None:
+        """Inicia as tarefas do worker no event loop atual."""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._accepting = True
+        self._tasks = [
+            asyncio.create_task(self._run(), name=f"{self.name}-{i}")
+            for i in range(self.concurrency)
+        ]
+
+    def enqueue(self, job_id: str, job: Callable[[], Awaitable[None]]) -> bool:
+        """
+        Agenda um job. Retorna False se ele foi ignorado (já pendente ou worker encerrando).
+        """
+        if not self._accepting:
+            logger.warning("Worker %s encerrando; job %s descartado", self.name, job_id)
+            return False
+        if self._statuses.get(job_id) in PENDING_STATUSES:
+            return False
+        if self._loop is not asyncio.get_running_loop():
+            # Sem lifespan (ex.: scripts e testes), o worker inicia no primeiro envio
+            self.start()
+
+        self._set_status(job_id, QUEUED)
+        self._queue.put_nowait((job_id, job))
+        return True
+
+    def status(self, job_id: str) -> str | None:
+        """Status do job (None se nunca foi enviado a este processo ou já saiu do histórico)."""
+        return self._statuses.get(job_id)
+
+    async def drain(self, timeout: float) -> None:
+        """Para de aceitar jobs, aguarda os pendentes por até `timeout` segundos e encerra."""
+        self._accepting = False
+        if self._queue is not None and self._loop is asyncio.get_running_loop():
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    "Worker %s encerrado com %d job(s) pendentes", self.name, self._queue.qsize()
+                )
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._loop = None
+
+    def snapshot(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": sum(1 for status in self._statuses.values() if status in (RUNNING, RETRYING)),
+            "completed": self.completed,
+            "failed": self.failed,
+            "retried": self.retried,
+        }
+
+    def _set_status(self, job_id: str, status: str) -> None:
+        self._statuses[job_id] = status
+        self._statuses.move_to_end(job_id)
+        while len(self._statuses) > self.history_size:
+            oldest, oldest_status = next(iter(self._statuses.items()))
+            if oldest_status in PENDING_STATUSES:
+                break
+            del self._statuses[oldest]
+
+    async def _run(self) -> None:
+        while True:
+            job_id, job = await self._queue.get()
+            try:
+                await self._execute(job_id, job)
+            finally:
+                self._queue.task_done()
+
+    async def _execute(self, job_id: str, job: Callable[[], Awaitable[None]]) -> None:
+        for attempt in range(self.max_attempts):
+            self._set_status(job_id, RUNNING)
+            try:
+                await job()
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                if attempt + 1 >= self.max_attempts:
+                    self.failed += 1
+                    self._set_status(job_id, FAILED)
+                    logger.exception("Job %s do worker %s falhou: %s", job_id, self.name, error)
+                    return
+                self.retried += 1
+                self._set_status(job_id, RETRYING)
+                delay = self.retry_base_seconds * (2 ** attempt)
+                await asyncio.sleep(random.uniform(delay / 2, delay))
+            else:
+                self.completed += 1
+                self._set_status(job_id, DONE)
+                return
+
+
+# Instância compartilhada pelo processo (classificação de conversas por tópico)
+topic_classification_worker = BackgroundWorker(
+    "topic-classification",
+    concurrency=TOPIC_WORKER_CONCURRENCY,
+    max_attempts=TOPIC_WORKER_MAX_ATTEMPTS,
+)
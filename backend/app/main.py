@@ -1,11 +1,48 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.api.dependencies import build_container
 from app.api.routes import artifacts, conversations, feedbacks, learnings, agent, topics, settings
+from app.infrastructure.ai.client_registry import gemini_clients
+from app.infrastructure.ai.gemini_service import gemini_api_key_cache, llm_call_stats
+from app.infrastructure.ai.prompt_cache import prompt_prefix_cache
+from app.infrastructure.ai.resilience import embedding_resilience, generation_resilience
+from app.infrastructure.ai.topic_classifier import topic_classification_stats
+from app.infrastructure.persistence.artifact_list_cache import artifact_list_cache
+from app.infrastructure.persistence.blocking_io import supabase_io
+from app.infrastructure.persistence.citation_cache import citation_cache
+from app.infrastructure.persistence.config import PERSISTENCE_BACKEND, TOPIC_WORKER_DRAIN_SECONDS
+from app.infrastructure.persistence.postgres.pool import open_pool
+from app.infrastructure.persistence.supabase_clients import supabase_clients
+from app.infrastructure.single_flight import single_flight_stats
+from app.infrastructure.tasks.worker import topic_classification_worker
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Clientes do Supabase, pool do Postgres (backend "postgres") e repositórios são
+    # criados uma única vez e injetados nas rotas
+    pool = await open_pool() if PERSISTENCE_BACKEND == "postgres" else None
+    container = build_container(supabase_clients, pool)
+    app.state.container = container
+    gemini_api_key_cache.configure(container.settings_repo)
+    topic_classification_worker.start()
+    yield
+    # Conclui as classificações pendentes antes de encerrar
+    await topic_classification_worker.drain(TOPIC_WORKER_DRAIN_SECONDS)
+    supabase_clients.close()
+    supabase_io.shutdown()
+    if pool is not None:
+        await pool.close()
+    # Fecha as conexões (gRPC síncronas e assíncronas) do pool de clientes do Gemini
+    await gemini_clients.close()
+
 
 app = FastAPI(
     title="API do Agente Cultural",
     description="API para gerenciar Artefatos Culturais e interagir com o Agente de IA",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -36,3 +73,23 @@ async def root():
 async def health():
     return {"status": "healthy"}
 
+
+@app.get("/metrics")
+async def metrics():
+    """Métricas internas do processo (chamadas ao LLM, cache de prompt, resiliência, workers e I/O)."""
+    return {
+        "llm": llm_call_stats.snapshot(),
+        "prompt_cache": prompt_prefix_cache.snapshot(),
+        "resilience": {
+            "generate": generation_resilience.snapshot(),
+            "embed": embedding_resilience.snapshot(),
+        },
+        "single_flight": single_flight_stats(),
+        "topic_classification": topic_classification_stats.snapshot(),
+        "workers": {
+            "topic_classification": topic_classification_worker.snapshot(),
+        },
+        "supabase_io": supabase_io.snapshot(),
+        "citation_cache": citation_cache.snapshot(),
+        "artifact_list_cache": artifact_list_cache.snapshot(),
+    }
@@ -0,0 +1,44 @@
+-- Pré-filtragem por metadados na busca RAG.
+-- A aplicação resolve tags/artefatos/tipos/seções em uma lista de IDs de chunks
+-- candidatos e a envia em `filter_chunk_ids`; a similaridade só é calculada
+-- para esses chunks. NULL mantém a busca em todo o corpus.
+
+drop function if exists rag_get_relevant_chunks(vector, integer);
+
+create or replace function rag_get_relevant_chunks(
+    query_embedding vector(768),
+    match_limit integer default 5,
+    filter_chunk_ids uuid[] default null
+)
+returns table (
+    id uuid,
+    artifact_id uuid,
+    content text,
+    embedding vector(768),
+    section_title text,
+    section_level integer,
+    content_type text,
+    chunk_position integer,
+    token_count integer,
+    breadcrumbs jsonb,
+    similarity double precision
+)
+language sql stable
+as $$
+    select
+        c.id,
+        c.artifact_id,
+        c.content,
+        c.embedding,
+        c.section_title,
+        c.section_level,
+        c.content_type,
+        c.position as chunk_position,
+        c.token_count,
+        to_jsonb(c.breadcrumbs) as breadcrumbs,
+        1 - (c.embedding <=> query_embedding) as similarity
+    from artifact_chunks c
+    where filter_chunk_ids is null or c.id = any(filter_chunk_ids)
+    order by c.embedding <=> query_embedding
+    limit match_limit;
+$$;
@@ -0,0 +1,8 @@
+-- Resumo acumulado das conversas usado no prompt do agente.
+-- `context_summary` cobre as `summarized_message_count` primeiras mensagens; o
+-- prompt leva esse resumo mais as trocas recentes, mantendo tamanho constante.
+-- É atualizado fora do caminho da requisição, após cada troca.
+
+alter table conversations
+    add column if not exists context_summary text,
+    add column if not exists summarized_message_count integer not null default 0;
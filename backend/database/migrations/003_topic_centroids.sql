@@ -0,0 +1,8 @@
+-- Centroide de embedding de cada tópico, usado na classificação de conversas.
+-- `centroid` é a média dos embeddings das primeiras perguntas das `centroid_count`
+-- conversas classificadas no tópico. Tópicos existentes começam sem centroide e
+-- continuam sendo oferecidos ao LLM até receberem a primeira conversa.
+
+alter table topics
+    add column if not exists centroid vector(768),
+    add column if not exists centroid_count integer not null default 0;
@@ -0,0 +1,20 @@
+-- Visão de moderação: cada feedback com o preview da mensagem avaliada.
+-- O preview é cortado no banco (200 caracteres + "..."), então as listas de
+-- pendentes e revisados saem em uma única consulta sem trafegar a mensagem inteira.
+-- `security_invoker` mantém as políticas de RLS das tabelas de origem.
+
+create or replace view feedback_moderation
+with (security_invoker = true) as
+select
+    f.id,
+    f.message_id,
+    f.feedback_text,
+    f.status,
+    f.created_at,
+    f.feedback_type,
+    case
+        when char_length(m.content) > 200 then left(m.content, 200) || '...'
+        else m.content
+    end as message_preview
+from pending_feedbacks f
+left join messages m on m.id = f.message_id;
@@ -0,0 +1,25 @@
+-- Índices da paginação por cursor (keyset) em (created_at, id).
+-- Cada listagem filtra por `(created_at, id) < (cursor)` e ordena pelas mesmas
+-- colunas; com o índice composto a página seguinte é uma varredura curta do
+-- índice, sem OFFSET e sem ordenar a tabela inteira.
+
+create index if not exists artifacts_created_at_id_idx
+    on artifacts (created_at desc, id desc);
+
+create index if not exists learnings_created_at_id_idx
+    on learnings (created_at desc, id desc);
+
+-- Moderação: pendentes e revisados filtram por status
+create index if not exists pending_feedbacks_status_created_at_id_idx
+    on pending_feedbacks (status, created_at desc, id desc);
+
+-- Conversas por tópico e a listagem geral
+create index if not exists conversations_topic_created_at_id_idx
+    on conversations (topic_id, created_at desc, id desc);
+
+create index if not exists conversations_created_at_id_idx
+    on conversations (created_at desc, id desc);
+
+-- Mensagens de uma conversa, em ordem cronológica
+create index if not exists messages_conversation_created_at_id_idx
+    on messages (conversation_id, created_at, id);
@@ -0,0 +1,51 @@
+-- Contagem de conversas mantida em cada tópico.
+-- `set_conversation_topic` troca o tópico da conversa e ajusta os contadores do
+-- tópico anterior e do novo na mesma transação, então `GET /topics` lê só a tabela
+-- de tópicos. `reconcile_topic_conversation_counts` recalcula as contagens a partir
+-- das conversas (backfill abaixo e job periódico em scripts/reconcile_topic_counts.py)
+-- e devolve quantos tópicos estavam divergentes.
+
+alter table topics
+    add column if not exists conversation_count integer not null default 0;
+
+create or replace function set_conversation_topic(p_conversation_id uuid, p_topic_id uuid)
+returns void
+language plpgsql
+as $$
+declare
+    v_previous uuid;
+begin
+    -- Trava a conversa: classificações simultâneas da mesma conversa não contam duas vezes
+    select topic_id into v_previous from conversations where id = p_conversation_id for update;
+    if not found or v_previous is not distinct from p_topic_id then
+        return;
+    end if;
+
+    update conversations set topic_id = p_topic_id where id = p_conversation_id;
+    update topics set conversation_count = greatest(conversation_count - 1, 0) where id = v_previous;
+    update topics set conversation_count = conversation_count + 1 where id = p_topic_id;
+end;
+$$;
+
+create or replace function reconcile_topic_conversation_counts()
+returns integer
+language plpgsql
+as $$
+declare
+    v_fixed integer;
+begin
+    update topics t
+    set conversation_count = counts.total
+    from (
+        select tp.id, count(c.id)::integer as total
+        from topics tp
+        left join conversations c on c.topic_id = tp.id
+        group by tp.id
+    ) counts
+    where counts.id = t.id and t.conversation_count <> counts.total;
+    get diagnostics v_fixed = row_count;
+    return v_fixed;
+end;
+$$;
+
+select reconcile_topic_conversation_counts();
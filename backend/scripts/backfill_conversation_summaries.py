@@ -0,0 +1,77 @@
+"""
+Grava título e resumo nas conversas antigas que ainda não os têm.
+
+Conversas novas recebem título e resumo na primeira resposta do agente; este job
+preenche as anteriores com a mesma regra (`describe_first_exchange`). Percorre as
+conversas sem título em ordem cronológica, uma página por vez, e grava o cursor da
+última página concluída em `--checkpoint`: se for interrompido, a próxima execução
+continua de onde parou. Conversas que ainda não têm uma troca completa são puladas.
+
+Usa o mesmo backend da API: SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY, ou DATABASE_URL
+com PERSISTENCE_BACKEND=postgres.
+
+Uso (a partir de backend/):
+
+    python -m scripts.backfill_conversation_summaries --batch-size 200
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from pathlib import Path
+
+from app.domain.conversations.workflows import describe_first_exchange
+from app.infrastructure.persistence.blocking_io import supabase_io
+from app.infrastructure.persistence.config import PERSISTENCE_BACKEND
+from app.infrastructure.persistence.conversations_repo import ConversationsRepository
+from app.infrastructure.persistence.pagination import Cursor
+from app.infrastructure.persistence.postgres.conversations_repo import PostgresConversationsRepository
+from app.infrastructure.persistence.postgres.pool import open_pool
+from app.infrastructure.persistence.supabase_clients import supabase_clients
+
+
+async def main(batch_size: int, checkpoint: Path) -> None:
+    pool = None
+    if PERSISTENCE_BACKEND == "postgres":
+        pool = await open_pool(min_size=1, max_size=1)
+        repo = PostgresConversationsRepository(pool)
+    else:
+        service = supabase_clients.service()
+        if service is None:
+            raise SystemExit("Configure SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY")
+        repo = ConversationsRepository(service)
+
+    token = checkpoint.read_text().strip() if checkpoint.exists() else ""
+    cursor = Cursor.decode(token) if token else None
+    updated = skipped = 0
+    try:
+        while True:
+            page = await repo.find_untitled_page(cursor, batch_size)
+            for conversation in page.items:
+                description = describe_first_exchange(conversation.messages)
+                if description is None:
+                    skipped += 1
+                    continue
+                title, summary = description
+                await repo.update_summary_and_title(conversation.id, summary=summary, title=title)
+                updated += 1
+            print(f"{updated} conversa(s) atualizada(s), {skipped} sem troca completa")
+            if page.next_cursor is None:
+                break
+            # A página inteira foi gravada: a próxima execução começa depois dela
+            checkpoint.write_text(page.next_cursor)
+            cursor = Cursor.decode(page.next_cursor)
+        checkpoint.unlink(missing_ok=True)
+    finally:
+        supabase_clients.close()
+        supabase_io.shutdown()
+        if pool is not None:
+            await pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--checkpoint", type=Path, default=Path(".backfill_conversation_summaries"))
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, args.checkpoint))
@@ -0,0 +1,169 @@
+"""
+Compara a latência por chamada dos repositórios nos dois backends de persistência.
+
+Requer um Postgres local com o schema e as migrações aplicados (DATABASE_URL) e um
+PostgREST/Supabase local apontando para o mesmo banco (SUPABASE_URL, SUPABASE_KEY e
+SUPABASE_SERVICE_ROLE_KEY). Os dados de teste são criados pelo pool e removidos ao final.
+
+Uso (a partir de backend/):
+
+    python -m scripts.benchmark_persistence --iterations 200 --messages 20 --chunks 30
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from app.domain.artifacts.types import Artifact, ArtifactChunk, ArtifactSourceType, ChunkMetadata
+from app.domain.conversations.types import Author, CitedSource, Message
+from app.domain.shared_kernel import ArtifactId, ChunkId, ConversationId, Embedding, MessageId
+from app.infrastructure.persistence.artifacts_repo import ArtifactsRepository
+from app.infrastructure.persistence.conversations_repo import ConversationsRepository
+from app.infrastructure.persistence.knowledge_repo import KnowledgeRepository
+from app.infrastructure.persistence.postgres.artifacts_repo import PostgresArtifactsRepository
+from app.infrastructure.persistence.postgres.conversations_repo import PostgresConversationsRepository
+from app.infrastructure.persistence.postgres.knowledge_repo import PostgresKnowledgeRepository
+from app.infrastructure.persistence.postgres.pool import open_pool
+from app.infrastructure.persistence.supabase_clients import supabase_clients
+
+
+_DIMENSIONS = 768
+
+
+def _random_vector() -> list[float]:
+    return [random.uniform(-1.0, 1.0) for _ in range(_DIMENSIONS)]
+
+
+async def _seed(pool, message_count: int, chunk_count: int) -> tuple[ArtifactId, ConversationId]:
+    """Cria um artefato com chunks e uma conversa que cita alguns deles."""
+    artifact_id = ArtifactId(uuid.uuid4())
+    chunks = [
+        ArtifactChunk(
+            id=ChunkId(uuid.uuid4()),
+            artifact_id=artifact_id,
+            content=f"Trecho {position} do artefato de benchmark. " * 20,
+            embedding=Embedding(vector=_random_vector()),
+            metadata=ChunkMetadata(
+                section_title=f"Seção {position // 5}",
+                section_level=2,
+                content_type="text",
+                position=position,
+                token_count=120,
+                breadcrumbs=["Benchmark", f"Seção {position // 5}"],
+            ),
+        )
+        for position in range(chunk_count)
+    ]
+    await PostgresArtifactsRepository(pool).save(
+        Artifact(
+            id=artifact_id,
+            title="Artefato de benchmark",
+            source_type=ArtifactSourceType.TEXT,
+            chunks=chunks,
+            original_content="benchmark",
+        )
+    )
+
+    conversations = PostgresConversationsRepository(pool)
+    conversation = await conversations.create()
+    started = datetime.now(timezone.utc)
+    messages = []
+    for index in range(message_count):
+        cited = random.sample(chunks, k=min(3, len(chunks))) if index % 2 else []
+        messages.append(
+            Message(
+                id=MessageId(uuid.uuid4()),
+                conversation_id=conversation.id,
+                author=Author.AGENT if index % 2 else Author.USER,
+                content=f"Mensagem {index} da conversa de benchmark.",
+                cited_sources=[
+                    CitedSource(chunk_id=chunk.id, artifact_id=artifact_id, title="", chunk_content_preview="")
+                    for chunk in cited
+                ],
+                created_at=started + timedelta(milliseconds=index),
+            )
+        )
+    await conversations.save_messages(messages)
+    return artifact_id, conversation.id
+
+
+async def _cleanup(pool, artifact_id: ArtifactId, conversation_id: ConversationId) -> None:
+    async with pool.connection() as conn:
+        async with conn.transaction():
+            await conn.execute("delete from messages where conversation_id = %s", (conversation_id,))
+            await conn.execute("delete from conversations where id = %s", (conversation_id,))
+            await conn.execute("delete from artifact_chunks where artifact_id = %s", (artifact_id,))
+            await conn.execute("delete from artifacts where id = %s", (artifact_id,))
+
+
+async def _measure(call, iterations: int, warmup: int) -> list[float]:
+    for _ in range(warmup):
+        await call()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await call()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def _summary(samples: list[float]) -> str:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"p50 {statistics.median(ordered):7.2f} ms   p95 {p95:7.2f} ms   média {statistics.fmean(ordered):7.2f} ms"
+
+
+async def main(iterations: int, warmup: int, message_count: int, chunk_count: int) -> None:
+    pool = await open_pool(min_size=1, max_size=4)
+    supabase = supabase_clients.default()
+    service = supabase_clients.service()
+    if supabase is None or service is None:
+        raise SystemExit("Configure SUPABASE_URL, SUPABASE_KEY e SUPABASE_SERVICE_ROLE_KEY")
+
+    artifact_id, conversation_id = await _seed(pool, message_count, chunk_count)
+    query_embedding = _random_vector()
+    rpc_params = {"query_embedding": query_embedding, "match_limit": 5}
+
+    backends = {
+        "http": (
+            ArtifactsRepository(supabase),
+            ConversationsRepository(supabase),
+            KnowledgeRepository(client=service),
+        ),
+        "postgres": (
+            PostgresArtifactsRepository(pool),
+            PostgresConversationsRepository(pool),
+            PostgresKnowledgeRepository(pool, client=service),
+        ),
+    }
+    try:
+        for backend, (artifacts, conversations, knowledge) in backends.items():
+            operations = {
+                "conversations.find_by_id": lambda: conversations.find_by_id(conversation_id),
+                "artifacts.find_by_id": lambda: artifacts.find_by_id(artifact_id),
+                "artifacts.find_all": artifacts.find_all,
+                "rag_get_relevant_chunks": lambda: knowledge._call_supabase_rpc("rag_get_relevant_chunks", rpc_params),
+            }
+            print(f"\n[{backend}] {iterations} chamadas por operação")
+            for name, call in operations.items():
+                samples = await _measure(call, iterations, warmup)
+                print(f"  {name:<28} {_summary(samples)}")
+    finally:
+        await _cleanup(pool, artifact_id, conversation_id)
+        await pool.close()
+        supabase_clients.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--chunks", type=int, default=30)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations, args.warmup, args.messages, args.chunks))
@@ -0,0 +1,36 @@
+"""
+Recalcula a contagem de conversas de cada tópico (`topics.conversation_count`).
+
+As contagens são mantidas na escrita por `set_conversation_topic` (migração 006);
+este job corrige divergências deixadas por escritas fora dela, como edições manuais
+ou conversas apagadas. Pode ser agendado (ex.: uma vez por dia) e é idempotente.
+
+Requer SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY.
+
+Uso (a partir de backend/):
+
+    python -m scripts.reconcile_topic_counts
+"""
+from __future__ import annotations
+
+import asyncio
+
+from app.infrastructure.persistence.blocking_io import supabase_io
+from app.infrastructure.persistence.supabase_clients import supabase_clients
+from app.infrastructure.persistence.topics_repo import TopicsRepository
+
+
+async def main() -> None:
+    service = supabase_clients.service()
+    if service is None:
+        raise SystemExit("Configure SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY")
+    try:
+        fixed = await TopicsRepository(service).reconcile_conversation_counts()
+        print(f"Contagens de conversas corrigidas em {fixed} tópico(s)")
+    finally:
+        supabase_clients.close()
+        supabase_io.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
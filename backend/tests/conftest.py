@@ -112,6 +112,7 @@ def mock_embedding_generator():
     """Retorna um mock de EmbeddingGenerator."""
     mock = Mock()
     mock.generate = Mock(return_value=[0.1, 0.2, 0.3] * 33)  # ~100 dimensões
+    mock.generate_query_embedding = AsyncMock(return_value=[0.1, 0.2, 0.3] * 33)
     return mock
 
 
@@ -1,9 +1,12 @@
 """Testes para rotas da API."""
 import pytest
+from dataclasses import replace
 from fastapi.testclient import TestClient
 from unittest.mock import Mock, AsyncMock, patch, MagicMock
 from datetime import datetime
 import uuid
+import asyncio
+import time
 import os
 
 # Mock das variáveis de ambiente antes de importar app
@@ -18,16 +21,41 @@ with patch('supabase.create_client') as mock_create:
     mock_client = Mock()
     mock_create.return_value = mock_client
     from app.main import app
-from app.domain.shared_kernel import ArtifactId, ConversationId, MessageId, FeedbackId
-from app.domain.artifacts.types import Artifact, ArtifactChunk, ArtifactSourceType, ChunkMetadata
-from app.domain.conversations.types import Conversation, Message, Author
-from app.domain.feedbacks.types import PendingFeedback, FeedbackStatus
+from app.domain.shared_kernel import ArtifactId, ConversationId, MessageId, FeedbackId, TopicId
+from app.domain.artifacts.types import Artifact, ArtifactCard, ArtifactChunk, ArtifactSourceType, ChunkMetadata
+from app.domain.conversations.types import Conversation, ConversationSummary, Message, Author
+from app.domain.feedbacks.types import PendingFeedback, FeedbackStatus, FeedbackWithPreview
 from app.domain.learnings.types import Learning
 from app.domain.agent.types import AgentInstruction
+from app.domain.topics.types import Topic, TopicWithCount
+from app.api.dependencies import Container
+from app.infrastructure.persistence.artifacts_repo import ArtifactProjection
+from app.infrastructure.persistence.config import PAGE_SIZE_DEFAULT
+from app.infrastructure.persistence.pagination import Cursor, Page
 
 
 @pytest.fixture
-def client():
+def container():
+    """Container com repositórios simulados, instalado no estado da aplicação."""
+    container = Container(
+        supabase=MagicMock(),
+        storage=MagicMock(),
+        artifacts_repo=MagicMock(),
+        conversations_repo=MagicMock(),
+        knowledge_repo=MagicMock(),
+        agent_settings_repo=MagicMock(),
+        topics_repo=MagicMock(),
+        feedbacks_repo=MagicMock(),
+        learnings_repo=MagicMock(),
+        settings_repo=MagicMock(),
+    )
+    app.state.container = container
+    yield container
+    del app.state.container
+
+
+@pytest.fixture
+def client(container):
     """Retorna um cliente de teste para a API."""
     return TestClient(app)
 
@@ -46,45 +74,50 @@ class TestMainRoutes:
         response = client.get("/health")
         assert response.status_code == 200
         assert response.json() == {"status": "healthy"}
+    
+    def test_metrics(self, client):
+        """Testa rota de métricas do processo."""
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert "peak_in_flight" in response.json()["llm"]
 
 
 class TestArtifactsRoutes:
     """Testes para rotas de artefatos."""
     
     @pytest.mark.asyncio
-    @patch('app.api.routes.artifacts.artifacts_repo')
-    async def test_list_artifacts(self, mock_repo, client):
+    async def test_list_artifacts(self, container, client):
         """Testa listagem de artefatos."""
-        artifact_id = ArtifactId(uuid.uuid4())
-        artifact = Artifact(
-            id=artifact_id,
+        mock_repo = container.artifacts_repo
+        created_at = datetime(2024, 5, 1, 12, 30)
+        card = ArtifactCard(
+            id=ArtifactId(uuid.uuid4()),
             title="Artefato de Teste",
             source_type=ArtifactSourceType.TEXT,
-            chunks=[],
-            source_url=None
+            created_at=created_at,
+            tags=["cultura"]
         )
-        
-        mock_repo.find_all = AsyncMock(return_value=[artifact])
-        mock_repo.get_artifact_data = AsyncMock(return_value={
-            "description": None,
-            "tags": [],
-            "color": None
-        })
+        mock_repo.list_cards = AsyncMock(return_value=Page(items=[card]))
+        mock_repo.find_card_by_id = AsyncMock()
         
         response = client.get("/api/v1/artifacts")
         assert response.status_code == 200
         data = response.json()
-        assert isinstance(data, list)
-        if len(data) > 0:
-            assert "id" in data[0]
-            assert "title" in data[0]
-            assert "source_type" in data[0]
+        assert data["next_cursor"] is None
+        item = data["items"][0]
+        assert item["id"] == str(card.id)
+        assert item["title"] == "Artefato de Teste"
+        assert item["source_type"] == "TEXT"
+        assert item["tags"] == ["cultura"]
+        # Data real do banco, e nenhuma consulta por artefato
+        assert item["created_at"] == created_at.isoformat()
+        mock_repo.find_card_by_id.assert_not_called()
     
     @pytest.mark.asyncio
     @patch('app.api.routes.artifacts.embedding_generator')
-    @patch('app.api.routes.artifacts.artifacts_repo')
-    async def test_create_artifact_from_text(self, mock_repo, mock_embedding, client):
+    async def test_create_artifact_from_text(self, mock_embedding, container, client):
         """Testa criação de artefato a partir de texto."""
+        mock_repo = container.artifacts_repo
         artifact_id = ArtifactId(uuid.uuid4())
         artifact = Artifact(
             id=artifact_id,
@@ -96,11 +129,12 @@ class TestArtifactsRoutes:
         
         mock_embedding.generate = Mock(return_value=[0.1] * 100)
         mock_repo.save = AsyncMock(return_value=artifact)
-        mock_repo.get_artifact_data = AsyncMock(return_value={
-            "description": None,
-            "tags": [],
-            "color": None
-        })
+        mock_repo.find_card_by_id = AsyncMock(side_effect=lambda artifact_id: ArtifactCard(
+            id=artifact_id,
+            title="Novo Artefato",
+            source_type=ArtifactSourceType.TEXT,
+            created_at=datetime.utcnow()
+        ))
         
         response = client.post(
             "/api/v1/artifacts",
@@ -114,43 +148,44 @@ class TestArtifactsRoutes:
         assert response.status_code in [201, 500]
     
     @pytest.mark.asyncio
-    @patch('app.api.routes.artifacts.artifacts_repo')
-    async def test_get_artifact_by_id(self, mock_repo, client):
-        """Testa obtenção de artefato por ID."""
+    async def test_get_artifact_by_id(self, container, client):
+        """Testa obtenção de artefato por ID, em uma consulta e com a data real."""
+        mock_repo = container.artifacts_repo
         artifact_id = ArtifactId(uuid.uuid4())
-        artifact = Artifact(
+        created_at = datetime(2024, 5, 1, 12, 30)
+        card = ArtifactCard(
             id=artifact_id,
             title="Artefato",
             source_type=ArtifactSourceType.TEXT,
-            chunks=[],
-            source_url=None
+            created_at=created_at,
+            tags=["cultura"]
         )
         
-        mock_repo.find_by_id = AsyncMock(return_value=artifact)
-        mock_repo.get_artifact_data = AsyncMock(return_value={
-            "description": None,
-            "tags": [],
-            "color": None
-        })
+        mock_repo.find_card_by_id = AsyncMock(return_value=card)
+        mock_repo.find_by_id = AsyncMock()
         
         response = client.get(f"/api/v1/artifacts/{artifact_id}")
-        # Pode retornar 200 ou 404 se não encontrar
-        assert response.status_code in [200, 404]
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created_at"] == created_at.isoformat()
+        assert data["tags"] == ["cultura"]
+        mock_repo.find_card_by_id.assert_awaited_once_with(artifact_id)
+        mock_repo.find_by_id.assert_not_called()
     
     @pytest.mark.asyncio
-    @patch('app.api.routes.artifacts.artifacts_repo')
-    async def test_get_artifact_not_found(self, mock_repo, client):
+    async def test_get_artifact_not_found(self, container, client):
         """Testa obtenção de artefato inexistente."""
+        mock_repo = container.artifacts_repo
         artifact_id = ArtifactId(uuid.uuid4())
-        mock_repo.find_by_id = AsyncMock(return_value=None)
+        mock_repo.find_card_by_id = AsyncMock(return_value=None)
         
         response = client.get(f"/api/v1/artifacts/{artifact_id}")
         assert response.status_code == 404
     
     @pytest.mark.asyncio
-    @patch('app.api.routes.artifacts.artifacts_repo')
-    async def test_get_artifact_content(self, mock_repo, client):
+    async def test_get_artifact_content(self, container, client):
         """Testa obtenção de conteúdo de artefato."""
+        mock_repo = container.artifacts_repo
         artifact_id = ArtifactId(uuid.uuid4())
         chunk = ArtifactChunk(
             id=uuid.uuid4(),
@@ -175,16 +210,27 @@ class TestArtifactsRoutes:
             original_content="Texto original"
         )
         
-        mock_repo.find_by_id = AsyncMock(return_value=artifact)
+        mock_repo.find_by_id = AsyncMock(return_value=replace(artifact, chunks=[], original_content=None))
+        mock_repo.find_original_content = AsyncMock(return_value="Texto original")
         
         response = client.get(f"/api/v1/artifacts/{artifact_id}/content")
         assert response.status_code == 200
         assert response.json() == {"source_type": "TEXT", "content": "Texto original"}
+        # Só o cabeçalho e o conteúdo original: nem chunks nem embeddings
+        mock_repo.find_by_id.assert_awaited_once_with(artifact_id, ArtifactProjection.HEADER)
+        
+        # Sem o conteúdo original, o texto vem dos chunks (sem os vetores)
+        mock_repo.find_by_id = AsyncMock(side_effect=[replace(artifact, chunks=[]), artifact])
+        mock_repo.find_original_content = AsyncMock(return_value=None)
+        
+        response = client.get(f"/api/v1/artifacts/{artifact_id}/content")
+        assert response.json() == {"source_type": "TEXT", "content": "Conteúdo do chunk"}
+        assert mock_repo.find_by_id.call_args.args == (artifact_id, ArtifactProjection.CHUNKS)
     
     @pytest.mark.asyncio
-    @patch('app.api.routes.artifacts.artifacts_repo')
-    async def test_delete_artifact(self, mock_repo, client):
+    async def test_delete_artifact(self, container, client):
         """Testa deleção de artefato."""
+        mock_repo = container.artifacts_repo
         artifact_id = ArtifactId(uuid.uuid4())
         artifact = Artifact(
             id=artifact_id,
@@ -201,40 +247,55 @@ class TestArtifactsRoutes:
         assert response.status_code in [204, 404]
     
     @pytest.mark.asyncio
-    @patch('app.api.routes.artifacts.artifacts_repo')
-    async def test_update_artifact_tags(self, mock_repo, client):
+    async def test_update_artifact_tags(self, container, client):
         """Testa atualização de tags de artefato."""
+        mock_repo = container.artifacts_repo
         artifact_id = ArtifactId(uuid.uuid4())
-        artifact = Artifact(
+        
+        mock_repo.find_card_by_id = AsyncMock(return_value=ArtifactCard(
             id=artifact_id,
             title="Artefato",
             source_type=ArtifactSourceType.TEXT,
-            chunks=[],
-            source_url=None
-        )
-        
-        mock_repo.find_by_id = AsyncMock(return_value=artifact)
+            created_at=datetime.utcnow()
+        ))
         mock_repo.update_artifact_tags = AsyncMock()
-        mock_repo.get_artifact_data = AsyncMock(return_value={
-            "description": None,
-            "tags": ["tag1", "tag2"],
-            "color": None
-        })
         
         response = client.patch(
             f"/api/v1/artifacts/{artifact_id}/tags",
             json={"tags": ["tag1", "tag2"]}
         )
-        assert response.status_code in [200, 404]
+        assert response.status_code == 200
+        assert response.json()["tags"] == ["tag1", "tag2"]
+        mock_repo.update_artifact_tags.assert_awaited_once_with(artifact_id, ["tag1", "tag2"])
 
+    
+    @pytest.mark.asyncio
+    async def test_update_artifact_deleted_meanwhile(self, container, client):
+        """Testa que a atualização responde 404 se o artefato sumir antes da releitura."""
+        mock_repo = container.artifacts_repo
+        artifact_id = ArtifactId(uuid.uuid4())
+        
+        mock_repo.find_by_id = AsyncMock(return_value=Artifact(
+            id=artifact_id,
+            title="Artefato",
+            source_type=ArtifactSourceType.TEXT,
+            chunks=[],
+            source_url=None
+        ))
+        mock_repo.update_artifact_title = AsyncMock()
+        mock_repo.find_card_by_id = AsyncMock(return_value=None)
+        
+        response = client.patch(f"/api/v1/artifacts/{artifact_id}", data={"title": "Novo título"})
+        assert response.status_code == 404
+        mock_repo.update_artifact_title.assert_awaited_once_with(artifact_id, "Novo título")
 
 class TestConversationsRoutes:
     """Testes para rotas de conversas."""
     
     @pytest.mark.asyncio
-    @patch('app.api.routes.conversations.conversations_repo')
-    async def test_create_conversation(self, mock_repo, client):
+    async def test_create_conversation(self, container, client):
         """Testa criação de conversa."""
+        mock_repo = container.conversations_repo
         conversation_id = ConversationId(uuid.uuid4())
         conversation = Conversation(
             id=conversation_id,
@@ -250,9 +311,9 @@ class TestConversationsRoutes:
         assert "conversation_id" in data
     
     @pytest.mark.asyncio
-    @patch('app.api.routes.conversations.conversations_repo')
-    async def test_get_conversation_messages(self, mock_repo, client):
+    async def test_get_conversation_messages(self, container, client):
         """Testa obtenção de mensagens de conversa."""
+        mock_repo = container.conversations_repo
         conversation_id = ConversationId(uuid.uuid4())
         message = Message(
             id=MessageId(uuid.uuid4()),
@@ -262,21 +323,42 @@ class TestConversationsRoutes:
             cited_sources=[],
             created_at=datetime.utcnow()
         )
-        conversation = Conversation(
-            id=conversation_id,
-            messages=[message],
-            created_at=datetime.utcnow()
-        )
+        mock_repo.find_messages_page = AsyncMock(return_value=Page(items=[message], next_cursor="abc"))
+        cursor = Cursor(created_at="2024-05-01T12:30:00+00:00", id=str(uuid.uuid4()))
         
-        mock_repo.find_by_id = AsyncMock(return_value=conversation)
+        response = client.get(
+            f"/api/v1/conversations/{conversation_id}/messages",
+            params={"cursor": cursor.encode(), "limit": 20}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert [item["id"] for item in data["items"]] == [str(message.id)]
+        assert data["next_cursor"] == "abc"
+        assert mock_repo.find_messages_page.call_args.args == (conversation_id, cursor, 20)
+    
+    @pytest.mark.asyncio
+    async def test_get_conversation_messages_rejects_bad_page_params(self, container, client):
+        """Cursor inválido ou página acima do máximo são recusados antes do repositório."""
+        mock_repo = container.conversations_repo
+        mock_repo.find_messages_page = AsyncMock()
+        url = f"/api/v1/conversations/{uuid.uuid4()}/messages"
+        
+        assert client.get(url, params={"cursor": "não-é-cursor"}).status_code == 400
+        assert client.get(url, params={"limit": 100000}).status_code == 422
+        mock_repo.find_messages_page.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_get_conversation_messages_not_found(self, container, client):
+        """Conversa inexistente responde 404."""
+        container.conversations_repo.find_messages_page = AsyncMock(return_value=None)
         
-        response = client.get(f"/api/v1/conversations/{conversation_id}/messages")
-        assert response.status_code in [200, 404]
+        response = client.get(f"/api/v1/conversations/{uuid.uuid4()}/messages")
+        assert response.status_code == 404
     
     @pytest.mark.asyncio
-    @patch('app.api.routes.conversations.conversations_repo')
-    async def test_get_conversation_topic(self, mock_repo, client):
+    async def test_get_conversation_topic(self, container, client):
         """Testa obtenção de tópico de conversa."""
+        mock_repo = container.conversations_repo
         conversation_id = ConversationId(uuid.uuid4())
         conversation = Conversation(
             id=conversation_id,
@@ -292,15 +374,180 @@ class TestConversationsRoutes:
             data = response.json()
             assert "topic" in data
             assert "is_processing" in data
+    
+    @pytest.mark.asyncio
+    @patch('app.api.routes.conversations.topic_classification_worker')
+    async def test_get_conversation_topic_reports_pending_classification(self, mock_worker, container,
+                                                                         client):
+        """Testa que o tópico em classificação no worker é reportado sem consultar o banco."""
+        mock_repo = container.conversations_repo
+        conversation_id = ConversationId(uuid.uuid4())
+        mock_worker.status = Mock(return_value="running")
+        mock_repo.find_by_id = AsyncMock()
+        
+        response = client.get(f"/api/v1/conversations/{conversation_id}/topic")
+        assert response.status_code == 200
+        assert response.json() == {"topic": None, "is_processing": True, "status": "running"}
+        mock_repo.find_by_id.assert_not_called()
+
+
+    @pytest.mark.asyncio
+    @patch('app.api.routes.conversations.EmbeddingGenerator')
+    @patch('app.api.routes.conversations.GeminiService')
+    @patch('app.api.routes.conversations.get_gemini_api_key')
+    async def test_post_message_loads_only_unsummarized_messages(self, mock_get_api_key, mock_gemini_class,
+                                                                 mock_embedding_class, container, client):
+        """Testa que a troca usa o resumo e a janela não resumida, sem carregar o histórico inteiro."""
+        mock_conv_repo = container.conversations_repo
+        conversation_id = ConversationId(uuid.uuid4())
+        recent = [
+            Message(id=MessageId(uuid.uuid4()), conversation_id=conversation_id, author=author,
+                    content=content, cited_sources=[], created_at=datetime.utcnow())
+            for author, content in [(Author.USER, "Pergunta recente"), (Author.AGENT, "Resposta recente")]
+        ]
+        conversation = Conversation(
+            id=conversation_id, messages=recent, created_at=datetime.utcnow(),
+            context_summary="Resumo", summarized_message_count=6, message_offset=6
+        )
+        mock_conv_repo.find_turn_context = AsyncMock(return_value=conversation)
+        mock_conv_repo.find_by_id = AsyncMock()
+        mock_conv_repo.save_messages = AsyncMock()
+        mock_conv_repo.update_summary_and_title = AsyncMock()
+        container.agent_settings_repo.get_instruction = AsyncMock(return_value=AgentInstruction(
+            content="Instrução", updated_at=datetime.utcnow()
+        ))
+        container.knowledge_repo.find_relevant_knowledge = AsyncMock(
+            return_value=Mock(relevant_artifacts=[], relevant_learnings=[])
+        )
+        mock_get_api_key.return_value = "test-key"
+        mock_embedding_class.return_value.generate_query_embedding = AsyncMock(return_value=[0.1] * 3)
+        mock_gemini_class.return_value.generate_advice = AsyncMock(return_value=("Resposta nova", []))
+        
+        with patch('app.api.routes.conversations._update_context_summary', new=AsyncMock()):
+            response = client.post(
+                f"/api/v1/conversations/{conversation_id}/messages",
+                json={"content": "Pergunta nova"}
+            )
+        
+        assert response.status_code == 200
+        assert response.json()["content"] == "Resposta nova"
+        mock_conv_repo.find_by_id.assert_not_called()
+        call = mock_gemini_class.return_value.generate_advice.call_args
+        assert call.kwargs["conversation_history"] == recent
+        assert call.kwargs["conversation_summary"] == "Resumo"
+        # Com mensagens já resumidas, não é a primeira troca: título e resumo não mudam
+        mock_conv_repo.update_summary_and_title.assert_not_called()
+    
+    @pytest.mark.asyncio
+    @patch('app.api.routes.conversations.TopicClassifier')
+    @patch('app.api.routes.conversations.EmbeddingGenerator')
+    async def test_topic_job_updates_centroid_after_assignment(self, mock_embedding_class, mock_llm_class):
+        """Testa que o centroide só recebe o embedding depois que a conversa recebe o tópico."""
+        from app.api.routes.conversations import _classify_conversation_topic
+        conversation_id = ConversationId(uuid.uuid4())
+        messages = [
+            Message(id=MessageId(uuid.uuid4()), conversation_id=conversation_id, author=author,
+                    content=content, cited_sources=[], created_at=datetime.utcnow())
+            for author, content in [(Author.USER, "Pergunta"), (Author.AGENT, "Resposta")]
+        ]
+        conversation = Conversation(id=conversation_id, messages=messages, created_at=datetime.utcnow())
+        topic = Topic(id=TopicId(uuid.uuid4()), name="Feedbacks", created_at=datetime.utcnow())
+        mock_embedding_class.return_value.generate_query_embedding = AsyncMock(return_value=[0.1, 0.2])
+        conversations_repo = Mock()
+        conversations_repo.update_topic = AsyncMock(side_effect=RuntimeError("falha ao gravar"))
+        topics_repo = Mock()
+        topics_repo.find_nearest = AsyncMock(return_value=[(topic, 0.99)])
+        topics_repo.add_to_centroid = AsyncMock()
+        
+        # Falha ao gravar o tópico: o worker repete o job e o centroide fica intacto
+        with pytest.raises(RuntimeError):
+            await _classify_conversation_topic(conversation, "test-key", conversations_repo, topics_repo)
+        topics_repo.add_to_centroid.assert_not_called()
+        
+        conversations_repo.update_topic = AsyncMock()
+        await _classify_conversation_topic(conversation, "test-key", conversations_repo, topics_repo)
+        conversations_repo.update_topic.assert_awaited_once_with(conversation_id, topic.id)
+        topics_repo.add_to_centroid.assert_awaited_once_with(topic, [0.1, 0.2])
+
+
+class TestConversationStreamingRoutes:
+    """Testes para a rota de mensagens em streaming (SSE)."""
+    
+    @pytest.mark.asyncio
+    @patch('app.api.routes.conversations.EmbeddingGenerator')
+    @patch('app.api.routes.conversations.GeminiService')
+    @patch('app.api.routes.conversations.get_gemini_api_key')
+    async def test_post_message_stream(self, mock_get_api_key, mock_gemini_class, mock_embedding_class,
+                                       container, client):
+        """Testa a ordem dos eventos SSE e a persistência após o fechamento do stream."""
+        mock_conv_repo = container.conversations_repo
+        mock_settings_repo = container.agent_settings_repo
+        mock_knowledge_repo = container.knowledge_repo
+        import json
+        conversation_id = ConversationId(uuid.uuid4())
+        previous_agent_message = Message(
+            id=MessageId(uuid.uuid4()),
+            conversation_id=conversation_id,
+            author=Author.AGENT,
+            content="Resposta anterior",
+            cited_sources=[],
+            created_at=datetime.utcnow()
+        )
+        conversation = Conversation(id=conversation_id, messages=[previous_agent_message], created_at=datetime.utcnow())
+        chunk = ArtifactChunk(
+            id=uuid.uuid4(),
+            artifact_id=uuid.uuid4(),
+            content="Conteúdo citado",
+            embedding=Mock(),
+            metadata=None,
+        )
+        
+        mock_conv_repo.find_turn_context = AsyncMock(return_value=conversation)
+        mock_conv_repo.save_messages = AsyncMock()
+        mock_settings_repo.get_instruction = AsyncMock(return_value=AgentInstruction(
+            content="Instrução", updated_at=datetime.utcnow()
+        ))
+        mock_get_api_key.return_value = "test-key"
+        mock_embedding_class.return_value.generate_query_embedding = AsyncMock(return_value=[0.1] * 3)
+        knowledge = Mock(relevant_artifacts=[chunk], relevant_learnings=[])
+        mock_knowledge_repo.find_relevant_knowledge = AsyncMock(return_value=knowledge)
+        
+        async def fake_stream(prompt):
+            for delta in ["Olá", ", mundo"]:
+                yield delta
+        
+        mock_gemini = mock_gemini_class.return_value
+        mock_gemini.build_advice_prompt = Mock(return_value=("prompt", [chunk]))
+        mock_gemini.stream_advice = fake_stream
+        
+        response = client.post(
+            f"/api/v1/conversations/{conversation_id}/messages/stream",
+            json={"content": "Pergunta"}
+        )
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [
+            (block.split("\n")[0].removeprefix("event: "), json.loads(block.split("\n")[1].removeprefix("data: ")))
+            for block in response.text.strip().split("\n\n")
+        ]
+        assert [name for name, _ in events] == ["retrieval", "delta", "delta", "done"]
+        assert events[0][1]["cited_sources"][0]["chunk_id"] == str(chunk.id)
+        
+        # Só as mensagens da troca são persistidas
+        saved = mock_conv_repo.save_messages.call_args.args[0]
+        assert [message.author.name for message in saved] == ["USER", "AGENT"]
+        assert saved[-1].content == "Olá, mundo"
+        assert str(saved[-1].id) == events[-1][1]["message_id"]
 
 
 class TestAgentRoutes:
     """Testes para rotas do agente."""
     
     @pytest.mark.asyncio
-    @patch('app.api.routes.agent.agent_settings_repo')
-    async def test_get_agent_instruction(self, mock_repo, client):
+    async def test_get_agent_instruction(self, container, client):
         """Testa obtenção de instrução do agente."""
+        mock_repo = container.agent_settings_repo
         instruction = AgentInstruction(
             content="Instrução de teste",
             updated_at=datetime.utcnow()
@@ -315,9 +562,9 @@ class TestAgentRoutes:
         assert "updated_at" in data
     
     @pytest.mark.asyncio
-    @patch('app.api.routes.agent.agent_settings_repo')
-    async def test_update_agent_instruction(self, mock_repo, client):
+    async def test_update_agent_instruction(self, container, client):
         """Testa atualização de instrução do agente."""
+        mock_repo = container.agent_settings_repo
         instruction = AgentInstruction(
             content="Nova instrução",
             updated_at=datetime.utcnow()
@@ -338,9 +585,9 @@ class TestFeedbacksRoutes:
     """Testes para rotas de feedbacks."""
     
     @pytest.mark.asyncio
-    @patch('app.api.routes.feedbacks.feedbacks_repo')
-    async def test_submit_feedback(self, mock_repo, client):
+    async def test_submit_feedback(self, container, client):
         """Testa submissão de feedback."""
+        mock_repo = container.feedbacks_repo
         feedback_id = FeedbackId(uuid.uuid4())
         message_id = MessageId(uuid.uuid4())
         
@@ -365,22 +612,34 @@ class TestFeedbacksRoutes:
         assert response.status_code in [201, 400]
     
     @pytest.mark.asyncio
-    @patch('app.api.routes.feedbacks.feedbacks_repo')
-    async def test_list_pending_feedbacks(self, mock_repo, client):
+    async def test_list_pending_feedbacks(self, container, client):
         """Testa listagem de feedbacks pendentes."""
-        mock_repo.find_pending = AsyncMock(return_value=[])
+        mock_repo = container.feedbacks_repo
+        feedback = PendingFeedback(
+            id=FeedbackId(uuid.uuid4()),
+            message_id=MessageId(uuid.uuid4()),
+            feedback_text="Feedback",
+            status=FeedbackStatus.PENDING,
+            created_at=datetime.utcnow()
+        )
+        mock_repo.find_pending_with_preview = AsyncMock(return_value=Page(items=[
+            FeedbackWithPreview(feedback=feedback, message_preview="Início da resposta...")
+        ]))
         
         response = client.get("/api/v1/feedbacks/pending")
         assert response.status_code == 200
         data = response.json()
-        assert isinstance(data, list)
+        assert data["items"][0]["id"] == str(feedback.id)
+        assert data["items"][0]["message_preview"] == "Início da resposta..."
+        # O preview vem da consulta do repositório, sem buscar mensagem por mensagem
+        container.supabase.table.assert_not_called()
     
     @pytest.mark.asyncio
     @patch('app.api.routes.feedbacks.synthesize_learning_from_feedback')
     @patch('app.api.routes.feedbacks.get_gemini_api_key')
-    @patch('app.api.routes.feedbacks.feedbacks_repo')
-    async def test_approve_feedback(self, mock_feedback_repo, mock_get_api_key, mock_synthesize, client):
+    async def test_approve_feedback(self, mock_get_api_key, mock_synthesize, container, client):
         """Testa aprovação de feedback."""
+        mock_feedback_repo = container.feedbacks_repo
         from app.domain.shared_kernel import LearningId
         from app.domain.learnings.types import Learning
         from app.domain.shared_kernel import Embedding
@@ -420,74 +679,136 @@ class TestFeedbacksRoutes:
         response = client.post(f"/api/v1/feedbacks/{feedback_id}/approve")
         # Pode retornar 200 ou 500 se não tiver configuração de LLM
         assert response.status_code in [200, 500]
+    
+    @pytest.mark.asyncio
+    @patch('app.api.routes.feedbacks.EmbeddingGenerator')
+    @patch('app.api.routes.feedbacks.GeminiService')
+    @patch('app.api.routes.feedbacks.get_gemini_api_key')
+    async def test_approve_feedbacks_batch(self, mock_get_api_key, mock_gemini_class, mock_embedding_class,
+                                           container, client):
+        """Testa a aprovação em lote com status por item e uma chamada por etapa."""
+        mock_feedback_repo = container.feedbacks_repo
+        mock_learnings_repo = container.learnings_repo
+        def make_feedback(status):
+            return PendingFeedback(
+                id=FeedbackId(uuid.uuid4()),
+                message_id=MessageId(uuid.uuid4()),
+                feedback_text="Feedback",
+                status=status,
+                created_at=datetime.utcnow()
+            )
+        
+        ok, no_learning, reviewed = (
+            make_feedback(FeedbackStatus.PENDING),
+            make_feedback(FeedbackStatus.PENDING),
+            make_feedback(FeedbackStatus.REJECTED),
+        )
+        missing_id = FeedbackId(uuid.uuid4())
+        approved = [replace(ok, status=FeedbackStatus.APPROVED), replace(no_learning, status=FeedbackStatus.APPROVED)]
+        
+        mock_feedback_repo.find_by_ids = AsyncMock(return_value={f.id: f for f in (ok, no_learning, reviewed)})
+        mock_feedback_repo.update_status_many = AsyncMock(side_effect=[approved, []])
+        mock_get_api_key.return_value = "test-key"
+        mock_gemini_class.return_value.synthesize_learnings = AsyncMock(return_value=["Aprendizado", None])
+        mock_embedding_class.return_value.generate_batch = Mock(return_value=[[0.1] * 3])
+        mock_learnings_repo.save_many = AsyncMock(side_effect=lambda learnings: learnings)
+        
+        response = client.post(
+            "/api/v1/feedbacks/batch/approve",
+            json={"feedback_ids": [str(ok.id), str(no_learning.id), str(reviewed.id), str(missing_id)]}
+        )
+        
+        assert response.status_code == 200
+        statuses = [item["status"] for item in response.json()]
+        assert statuses == ["APPROVED", "FAILED", "ALREADY_PROCESSED", "NOT_FOUND"]
+        assert response.json()[0]["learning"]["content"] == "Aprendizado"
+        mock_gemini_class.return_value.synthesize_learnings.assert_awaited_once_with(["Feedback", "Feedback"])
+        mock_embedding_class.return_value.generate_batch.assert_called_once_with(["Aprendizado"])
+        mock_learnings_repo.save_many.assert_awaited_once()
+        # O feedback sem aprendizado volta a ficar pendente
+        reverted = mock_feedback_repo.update_status_many.call_args_list[1]
+        assert reverted.args == ([no_learning.id], FeedbackStatus.PENDING)
 
 
 class TestLearningsRoutes:
     """Testes para rotas de aprendizados."""
     
     @pytest.mark.asyncio
-    @patch('app.api.routes.learnings.learnings_repo')
-    async def test_list_learnings(self, mock_repo, client):
+    async def test_list_learnings(self, container, client):
         """Testa listagem de aprendizados."""
-        mock_repo.find_all = AsyncMock(return_value=[])
+        mock_repo = container.learnings_repo
+        mock_repo.find_page = AsyncMock(return_value=Page(items=[], next_cursor=None))
         
         response = client.get("/api/v1/learnings")
         assert response.status_code == 200
-        data = response.json()
-        assert isinstance(data, list)
+        assert response.json() == {"items": [], "next_cursor": None}
+        assert mock_repo.find_page.call_args.args == (None, PAGE_SIZE_DEFAULT)
 
 
 class TestTopicsRoutes:
     """Testes para rotas de tópicos."""
     
     @pytest.mark.asyncio
-    @patch('app.api.routes.topics.create_client')
-    async def test_list_topics(self, mock_create_client, client):
-        """Testa listagem de tópicos."""
-        # Mock do Supabase
-        mock_supabase = Mock()
-        mock_table = Mock()
-        mock_select = Mock()
-        mock_table.select.return_value = mock_select
-        mock_select.order.return_value = mock_select
-        mock_select.execute.return_value = Mock(data=[])
-        
-        mock_conv_table = Mock()
-        mock_conv_select = Mock()
-        mock_conv_table.select.return_value = mock_conv_select
-        mock_conv_select.execute.return_value = Mock(data=[])
-        
-        def table_side_effect(table_name):
-            if table_name == "topics":
-                return mock_table
-            elif table_name == "conversations":
-                return mock_conv_table
-            return Mock()
-        
-        mock_supabase.table.side_effect = table_side_effect
-        mock_create_client.return_value = mock_supabase
-        
-        # Mock das variáveis de ambiente
-        with patch('app.api.routes.topics.SUPABASE_URL', 'https://test.supabase.co'), \
-             patch('app.api.routes.topics.SUPABASE_KEY', 'test-key'):
-            response = client.get("/api/v1/topics")
-            # Pode retornar 200 ou 500 se não tiver configuração
-            assert response.status_code in [200, 500]
+    async def test_list_topics(self, container, client):
+        """Testa listagem de tópicos com a contagem mantida na escrita."""
+        topic = Topic(id=TopicId(uuid.uuid4()), name="Música", created_at=datetime.utcnow())
+        container.topics_repo.find_all_with_counts = AsyncMock(return_value=[TopicWithCount(topic, 3)])
+        
+        response = client.get("/api/v1/topics")
+        
+        assert response.status_code == 200
+        assert response.json() == [{"id": str(topic.id), "name": "Música", "conversation_count": 3}]
     
     @pytest.mark.asyncio
-    async def test_get_conversations_all(self, client):
-        """Testa obtenção de todas as conversas."""
+    async def test_get_conversations_all(self, container, client):
+        """Testa obtenção de uma página de resumos de todas as conversas."""
+        summary = ConversationSummary(
+            id=ConversationId(uuid.uuid4()),
+            title="Catalogação",
+            summary="Resumo",
+            topic_name="Acervos",
+            created_at=datetime(2024, 5, 1, 12, 0)
+        )
+        container.conversations_repo.find_summaries_page = AsyncMock(
+            return_value=Page(items=[summary], next_cursor="proximo")
+        )
+        
         response = client.get("/api/v1/topics/conversations")
-        assert response.status_code in [200, 500]
+        
+        assert response.status_code == 200
+        assert response.json() == {
+            "items": [{
+                "id": str(summary.id),
+                "title": "Catalogação",
+                "summary": "Resumo",
+                "topic": "Acervos",
+                "created_at": "2024-05-01T12:00:00"
+            }],
+            "next_cursor": "proximo"
+        }
+        assert container.conversations_repo.find_summaries_page.call_args.args == (None, None, PAGE_SIZE_DEFAULT)
+    
+    @pytest.mark.asyncio
+    async def test_get_conversations_by_topic_passes_page(self, container, client):
+        """O tópico, o cursor decodificado e o limite chegam ao repositório."""
+        container.conversations_repo.find_summaries_page = AsyncMock(return_value=Page())
+        topic_id = uuid.uuid4()
+        cursor = Cursor(created_at="2024-05-10T00:00:00+00:00", id=str(uuid.uuid4()))
+        
+        response = client.get(f"/api/v1/topics/{topic_id}/conversations", params={"cursor": cursor.encode(), "limit": 2})
+        
+        assert response.status_code == 200
+        assert response.json() == {"items": [], "next_cursor": None}
+        assert container.conversations_repo.find_summaries_page.call_args.args == (topic_id, cursor, 2)
 
 
 class TestSettingsRoutes:
     """Testes para rotas de configurações."""
     
     @pytest.mark.asyncio
-    @patch('app.api.routes.settings.settings_repo')
-    async def test_get_settings(self, mock_repo, client):
+    async def test_get_settings(self, container, client):
         """Testa obtenção de configurações."""
+        mock_repo = container.settings_repo
         mock_repo.get_custom_gemini_api_key = AsyncMock(return_value=None)
         
         response = client.get("/api/v1/settings")
@@ -496,9 +817,10 @@ class TestSettingsRoutes:
         assert "hasCustomApiKey" in data
     
     @pytest.mark.asyncio
-    @patch('app.api.routes.settings.settings_repo')
-    async def test_save_gemini_api_key(self, mock_repo, client):
+    @patch('app.api.routes.settings.gemini_api_key_cache')
+    async def test_save_gemini_api_key(self, mock_cache, container, client):
         """Testa salvamento de chave de API."""
+        mock_repo = container.settings_repo
         mock_repo.save_custom_gemini_api_key = AsyncMock()
         
         response = client.put(
@@ -506,11 +828,12 @@ class TestSettingsRoutes:
             json={"api_key": "test-key"}
         )
         assert response.status_code == 200
+        mock_cache.invalidate.assert_called_once()
     
     @pytest.mark.asyncio
-    @patch('app.api.routes.settings.settings_repo')
-    async def test_remove_gemini_api_key(self, mock_repo, client):
+    async def test_remove_gemini_api_key(self, container, client):
         """Testa remoção de chave de API."""
+        mock_repo = container.settings_repo
         mock_repo.remove_custom_gemini_api_key = AsyncMock()
         
         response = client.put(
@@ -518,3 +841,40 @@ class TestSettingsRoutes:
             json={"api_key": ""}
         )
         assert response.status_code == 200
+
+
+class TestConcurrentRequests:
+    """Testes de concorrência entre requisições."""
+    
+    @pytest.mark.asyncio
+    async def test_blocking_supabase_calls_do_not_serialize_requests(self, container):
+        """Testa que chamadas lentas ao Supabase rodam em paralelo, fora do event loop."""
+        from httpx import ASGITransport, AsyncClient
+        from app.infrastructure.persistence.feedbacks_repo import FeedbacksRepository
+        
+        call_seconds = 0.1
+        
+        def slow_execute():
+            time.sleep(call_seconds)
+            return Mock(data=[])
+        
+        query = MagicMock()
+        for method in ("select", "eq", "order", "limit"):
+            getattr(query, method).return_value = query
+        query.execute.side_effect = slow_execute
+        supabase = MagicMock()
+        supabase.table.return_value = query
+        container.feedbacks_repo = FeedbacksRepository(supabase)
+        
+        in_flight = 8
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as http:
+            started = time.perf_counter()
+            responses = await asyncio.gather(*(
+                http.get(f"/api/v1/messages/{uuid.uuid4()}/feedback") for _ in range(in_flight)
+            ))
+            elapsed = time.perf_counter() - started
+        
+        assert all(response.status_code == 200 for response in responses)
+        assert query.execute.call_count == in_flight
+        # Serializadas, as requisições levariam in_flight * call_seconds (0.8 s)
+        assert elapsed < in_flight * call_seconds / 2
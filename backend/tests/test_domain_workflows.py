@@ -5,20 +5,21 @@ from unittest.mock import Mock, AsyncMock
 from app.domain.artifacts.workflows import (
     chunk_text, create_artifact_from_text, create_artifact_from_pdf
 )
-from app.domain.conversations.workflows import continue_conversation
+from app.domain.conversations.workflows import continue_conversation, describe_first_exchange, summarize_conversation
 from app.domain.feedbacks.workflows import (
-    submit_feedback, approve_feedback, reject_feedback
+    submit_feedback, approve_feedback, approve_feedbacks, reject_feedback
 )
 from app.domain.agent.workflows import (
     get_agent_instruction, update_agent_instruction
 )
-from app.domain.learnings.workflows import synthesize_learning_from_feedback
+from app.domain.learnings.workflows import synthesize_learning_from_feedback, synthesize_learnings_from_feedbacks
 from app.domain.feedbacks.types import FeedbackStatus
 from app.domain.shared_kernel import MessageId, FeedbackId, LearningId
 from app.domain.agent.types import AgentInstruction
 from app.domain.learnings.types import Learning
 from app.domain.artifacts.types import ArtifactChunk
 import uuid
+from dataclasses import replace
 
 
 class TestChunkText:
@@ -160,7 +161,8 @@ class TestContinueConversation:
             []
         ))
         
-        updated_conversation = await continue_conversation(
+        previous_messages = list(sample_conversation.messages)
+        turn_messages = await continue_conversation(
             conversation=sample_conversation,
             user_query="Pergunta de teste",
             embedding_generator=mock_embedding_generator,
@@ -169,15 +171,17 @@ class TestContinueConversation:
             agent_instruction=agent_instruction
         )
         
-        assert updated_conversation.id == sample_conversation.id
-        assert len(updated_conversation.messages) == 2  # Mensagem do usuário + resposta do agente
-        assert updated_conversation.messages[0].author.name == "USER"
-        assert updated_conversation.messages[1].author.name == "AGENT"
-        assert updated_conversation.messages[0].content == "Pergunta de teste"
-        assert updated_conversation.messages[1].content == "Resposta do agente"
+        assert len(turn_messages) == 2  # Mensagem do usuário + resposta do agente
+        assert all(message.conversation_id == sample_conversation.id for message in turn_messages)
+        assert turn_messages[0].author.name == "USER"
+        assert turn_messages[1].author.name == "AGENT"
+        assert turn_messages[0].content == "Pergunta de teste"
+        assert turn_messages[1].content == "Resposta do agente"
+        # A conversa recebida não é alterada nem copiada
+        assert sample_conversation.messages == previous_messages
         
         # Verifica que os métodos foram chamados
-        mock_embedding_generator.generate.assert_called_once()
+        mock_embedding_generator.generate_query_embedding.assert_awaited_once()
         mock_knowledge_repo.find_relevant_knowledge.assert_called_once()
         mock_llm_service.generate_advice.assert_called_once()
     
@@ -206,7 +210,7 @@ class TestContinueConversation:
             [sample_artifact_chunk]
         ))
         
-        updated_conversation = await continue_conversation(
+        turn_messages = await continue_conversation(
             conversation=sample_conversation,
             user_query="Pergunta",
             embedding_generator=mock_embedding_generator,
@@ -215,13 +219,123 @@ class TestContinueConversation:
             agent_instruction=agent_instruction
         )
         
-        agent_message = updated_conversation.messages[1]
+        agent_message = turn_messages[1]
         assert len(agent_message.cited_sources) == 1
         assert agent_message.cited_sources[0].artifact_id == sample_artifact_chunk.artifact_id
         assert agent_message.cited_sources[0].chunk_id == sample_artifact_chunk.id
         assert agent_message.cited_sources[0].section_title == sample_artifact_chunk.metadata.section_title
 
 
+class TestSummarizeConversation:
+    """Testes para summarize_conversation."""
+    
+    @staticmethod
+    def _conversation(message_count: int, summary=None, summarized=0):
+        from app.domain.conversations.types import Conversation, Message, Author
+        conversation_id = uuid.uuid4()
+        messages = [
+            Message(
+                id=MessageId(uuid.uuid4()),
+                conversation_id=conversation_id,
+                author=Author.USER if i % 2 == 0 else Author.AGENT,
+                content=f"Mensagem {i}",
+                cited_sources=[],
+                created_at=datetime.utcnow()
+            )
+            for i in range(message_count)
+        ]
+        return Conversation(
+            id=conversation_id,
+            messages=messages,
+            created_at=datetime.utcnow(),
+            context_summary=summary,
+            summarized_message_count=summarized
+        )
+    
+    @pytest.mark.asyncio
+    async def test_folds_messages_outside_recent_window(self):
+        """Testa que só as mensagens fora da janela recente entram no resumo."""
+        conversation = self._conversation(8, summary="Resumo anterior", summarized=2)
+        summarizer = Mock()
+        summarizer.summarize = AsyncMock(return_value="Resumo novo")
+        
+        summarized = await summarize_conversation(conversation, summarizer, recent_messages=4)
+        
+        previous, pending = summarizer.summarize.call_args.args
+        assert previous == "Resumo anterior"
+        assert [m.content for m in pending] == ["Mensagem 2", "Mensagem 3"]
+        assert summarized.context_summary == "Resumo novo"
+        assert summarized.summarized_message_count == 4
+        assert summarized.unsummarized_messages() == conversation.messages[4:]
+    
+    @pytest.mark.asyncio
+    async def test_counts_turn_messages_not_yet_in_conversation(self):
+        """Testa que as mensagens da troca entram na conta sem serem anexadas à conversa."""
+        full = self._conversation(8, summarized=2)
+        conversation = replace(full, messages=full.messages[:6])
+        summarizer = Mock()
+        summarizer.summarize = AsyncMock(return_value="Resumo")
+        
+        summarized = await summarize_conversation(
+            conversation, summarizer, recent_messages=4, new_messages=full.messages[6:]
+        )
+        
+        _, pending = summarizer.summarize.call_args.args
+        assert [m.content for m in pending] == ["Mensagem 2", "Mensagem 3"]
+        assert summarized.summarized_message_count == 4
+    
+    @pytest.mark.asyncio
+    async def test_positions_count_messages_not_loaded(self):
+        """Testa o resumo de uma conversa carregada só a partir das mensagens não resumidas."""
+        full = self._conversation(10, summary="Resumo anterior", summarized=4)
+        conversation = replace(full, messages=full.messages[4:], message_offset=4)
+        summarizer = Mock()
+        summarizer.summarize = AsyncMock(return_value="Resumo novo")
+        
+        assert conversation.unsummarized_messages() == full.unsummarized_messages()
+        summarized = await summarize_conversation(conversation, summarizer, recent_messages=4)
+        
+        _, pending = summarizer.summarize.call_args.args
+        assert [m.content for m in pending] == ["Mensagem 4", "Mensagem 5"]
+        assert summarized.summarized_message_count == 6
+        assert summarized.unsummarized_messages() == full.messages[6:]
+    
+    @pytest.mark.asyncio
+    async def test_nothing_to_summarize(self):
+        """Testa que conversas curtas não chamam o LLM."""
+        summarizer = Mock()
+        summarizer.summarize = AsyncMock()
+        
+        result = await summarize_conversation(self._conversation(4), summarizer, recent_messages=4)
+        
+        assert result is None
+        summarizer.summarize.assert_not_called()
+
+
+class TestDescribeFirstExchange:
+    """Testes para describe_first_exchange."""
+    
+    def test_title_and_summary_come_from_first_exchange(self):
+        """O título é a primeira linha da pergunta; o resumo, o início da resposta."""
+        conversation = TestSummarizeConversation._conversation(4)
+        messages = [
+            replace(conversation.messages[0], content="Como catalogar acervos?\nDetalhes"),
+            replace(conversation.messages[1], content="R" * 400),
+            *conversation.messages[2:],
+        ]
+        
+        title, summary = describe_first_exchange(messages)
+        
+        assert title == "Como catalogar acervos?"
+        assert summary == "R" * 300 + "..."
+    
+    def test_incomplete_exchange(self):
+        """Sem resposta do agente ainda não há título nem resumo."""
+        conversation = TestSummarizeConversation._conversation(1)
+        
+        assert describe_first_exchange(conversation.messages) is None
+
+
 class TestSubmitFeedback:
     """Testes para submit_feedback."""
     
@@ -338,6 +452,51 @@ class TestApproveFeedback:
             )
 
 
+class TestApproveFeedbacks:
+    """Testes para approve_feedbacks (aprovação em lote)."""
+    
+    @pytest.mark.asyncio
+    async def test_approve_feedbacks_reports_skipped_items(self, mock_feedback_repo):
+        """Testa que só os pendentes são aprovados, em uma escrita, e os demais têm motivo."""
+        from app.domain.feedbacks.types import PendingFeedback
+        from dataclasses import replace
+        
+        def make_feedback(status):
+            return PendingFeedback(
+                id=FeedbackId(uuid.uuid4()),
+                message_id=MessageId(uuid.uuid4()),
+                feedback_text="Feedback",
+                status=status,
+                created_at=datetime.utcnow()
+            )
+        
+        pending, raced, approved = (
+            make_feedback(FeedbackStatus.PENDING),
+            make_feedback(FeedbackStatus.PENDING),
+            make_feedback(FeedbackStatus.APPROVED),
+        )
+        missing_id = FeedbackId(uuid.uuid4())
+        mock_feedback_repo.find_by_ids = AsyncMock(return_value={f.id: f for f in (pending, raced, approved)})
+        # `raced` foi aprovado por outro moderador entre a leitura e a escrita
+        mock_feedback_repo.update_status_many = AsyncMock(
+            return_value=[replace(pending, status=FeedbackStatus.APPROVED)]
+        )
+        
+        result, skipped = await approve_feedbacks(
+            [pending.id, raced.id, approved.id, missing_id], mock_feedback_repo
+        )
+        
+        assert [feedback.id for feedback in result] == [pending.id]
+        assert skipped == {
+            raced.id: "already_processed",
+            approved.id: "already_processed",
+            missing_id: "not_found",
+        }
+        mock_feedback_repo.update_status_many.assert_awaited_once_with(
+            [pending.id, raced.id], FeedbackStatus.APPROVED, only_pending=True
+        )
+
+
 class TestRejectFeedback:
     """Testes para reject_feedback."""
     
@@ -451,3 +610,106 @@ class TestSynthesizeLearningFromFeedback:
         mock_llm_service.synthesize_learning.assert_called_once_with("Feedback de teste")
         mock_embedding_generator.generate.assert_called_once()
         mock_learning_repo.save.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_synthesize_learning_embeds_off_the_event_loop(self, mock_llm_service,
+                                                                 mock_embedding_generator):
+        """O embedding (bloqueante, com retries) é gerado em outra thread."""
+        import threading
+        from app.domain.feedbacks.types import PendingFeedback
+        
+        feedback = PendingFeedback(
+            id=FeedbackId(uuid.uuid4()),
+            message_id=MessageId(uuid.uuid4()),
+            feedback_text="Feedback de teste",
+            status=FeedbackStatus.APPROVED,
+            created_at=datetime.utcnow()
+        )
+        threads = []
+        mock_embedding_generator.generate = Mock(
+            side_effect=lambda text: threads.append(threading.get_ident()) or [0.1]
+        )
+        mock_llm_service.synthesize_learning = AsyncMock(return_value="Aprendizado")
+        mock_learning_repo = AsyncMock()
+        mock_learning_repo.save = AsyncMock(side_effect=lambda learning: learning)
+        
+        await synthesize_learning_from_feedback(
+            feedback=feedback,
+            llm_service=mock_llm_service,
+            embedding_generator=mock_embedding_generator,
+            learning_repo=mock_learning_repo
+        )
+        
+        assert threads and threads[0] != threading.get_ident()
+    
+    @pytest.mark.asyncio
+    async def test_synthesize_learnings_from_feedbacks(self, mock_llm_service, mock_embedding_generator):
+        """Testa a síntese em lote: uma chamada ao LLM, um lote de embeddings e uma escrita."""
+        from app.domain.feedbacks.types import PendingFeedback
+        
+        feedbacks = [
+            PendingFeedback(
+                id=FeedbackId(uuid.uuid4()),
+                message_id=MessageId(uuid.uuid4()),
+                feedback_text=f"Feedback {n}",
+                status=FeedbackStatus.APPROVED,
+                created_at=datetime.utcnow()
+            )
+            for n in range(3)
+        ]
+        mock_llm_service.synthesize_learnings = AsyncMock(return_value=["A", None, "C"])
+        mock_embedding_generator.generate_batch = Mock(return_value=[[0.1], [0.2]])
+        mock_learning_repo = AsyncMock()
+        mock_learning_repo.save_many = AsyncMock(side_effect=lambda learnings: learnings)
+        
+        learnings, missing = await synthesize_learnings_from_feedbacks(
+            feedbacks=feedbacks,
+            llm_service=mock_llm_service,
+            embedding_generator=mock_embedding_generator,
+            learning_repo=mock_learning_repo
+        )
+        
+        assert [(l.content, l.source_feedback_id) for l in learnings] == [("A", feedbacks[0].id), ("C", feedbacks[2].id)]
+        assert missing == [feedbacks[1]]
+        mock_embedding_generator.generate_batch.assert_called_once_with(["A", "C"])
+        mock_learning_repo.save_many.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_synthesize_learnings_keeps_the_event_loop_responsive(self, mock_llm_service,
+                                                                         mock_embedding_generator):
+        """Um lote de embeddings lento não impede o event loop de atender outras tarefas."""
+        import asyncio
+        import time
+        from app.domain.feedbacks.types import PendingFeedback
+        
+        feedback = PendingFeedback(
+            id=FeedbackId(uuid.uuid4()),
+            message_id=MessageId(uuid.uuid4()),
+            feedback_text="Feedback",
+            status=FeedbackStatus.APPROVED,
+            created_at=datetime.utcnow()
+        )
+        mock_llm_service.synthesize_learnings = AsyncMock(return_value=["A"])
+        mock_embedding_generator.generate_batch = Mock(
+            side_effect=lambda texts: time.sleep(0.3) or [[0.1]] * len(texts)
+        )
+        mock_learning_repo = AsyncMock()
+        mock_learning_repo.save_many = AsyncMock(side_effect=lambda learnings: learnings)
+        
+        async def tick():
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            return time.perf_counter() - started
+        
+        tick_latency, (learnings, _) = await asyncio.gather(
+            tick(),
+            synthesize_learnings_from_feedbacks(
+                feedbacks=[feedback],
+                llm_service=mock_llm_service,
+                embedding_generator=mock_embedding_generator,
+                learning_repo=mock_learning_repo
+            )
+        )
+        
+        assert len(learnings) == 1
+        assert tick_latency < 0.15
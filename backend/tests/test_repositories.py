@@ -1,36 +1,37 @@
 """Testes para repositórios."""
 import pytest
+from contextlib import asynccontextmanager
 from unittest.mock import Mock, AsyncMock, patch, MagicMock
 from datetime import datetime
 import uuid
+from dataclasses import replace
+from postgrest.exceptions import APIError
 from app.domain.shared_kernel import (
     ArtifactId, ConversationId, MessageId, ChunkId,
     FeedbackId, LearningId, TopicId, Embedding
 )
 from app.domain.artifacts.types import Artifact, ArtifactChunk, ArtifactSourceType, ChunkMetadata
-from app.domain.conversations.types import Conversation, Message, Author
+from app.domain.conversations.types import Conversation, Message, Author, CitedSource
 from app.domain.feedbacks.types import PendingFeedback, FeedbackStatus
 from app.domain.learnings.types import Learning
 from app.domain.topics.types import Topic
 from app.domain.agent.types import AgentInstruction
+from app.infrastructure.persistence.pagination import Cursor, Page, build_page, keyset_sql
 
 
 class TestArtifactsRepository:
     """Testes para ArtifactsRepository."""
     
     @pytest.mark.asyncio
-    @patch('app.infrastructure.persistence.artifacts_repo.create_client')
-    async def test_save_artifact(self, mock_create_client):
+    async def test_save_artifact(self):
         """Testa salvamento de artefato."""
         from app.infrastructure.persistence.artifacts_repo import ArtifactsRepository
         
         mock_supabase = Mock()
         mock_table = Mock()
         mock_supabase.table.return_value = mock_table
-        mock_create_client.return_value = mock_supabase
         
-        repo = ArtifactsRepository()
-        repo.supabase = mock_supabase
+        repo = ArtifactsRepository(mock_supabase)
         
         artifact_id = ArtifactId(uuid.uuid4())
         chunk = ArtifactChunk(
@@ -61,8 +62,7 @@ class TestArtifactsRepository:
         assert mock_table.insert.call_count >= 1
     
     @pytest.mark.asyncio
-    @patch('app.infrastructure.persistence.artifacts_repo.create_client')
-    async def test_find_by_id(self, mock_create_client):
+    async def test_find_by_id(self):
         """Testa busca de artefato por ID."""
         from app.infrastructure.persistence.artifacts_repo import ArtifactsRepository
         
@@ -103,10 +103,8 @@ class TestArtifactsRepository:
             return Mock()
         
         mock_supabase.table.side_effect = table_side_effect
-        mock_create_client.return_value = mock_supabase
         
-        repo = ArtifactsRepository()
-        repo.supabase = mock_supabase
+        repo = ArtifactsRepository(mock_supabase)
         
         artifact_id = ArtifactId(uuid.uuid4())
         result = await repo.find_by_id(artifact_id)
@@ -115,8 +113,60 @@ class TestArtifactsRepository:
         assert result is None or isinstance(result, Artifact)
     
     @pytest.mark.asyncio
-    @patch('app.infrastructure.persistence.artifacts_repo.create_client')
-    async def test_find_all(self, mock_create_client):
+    async def test_find_by_id_projections_skip_embeddings_and_content(self):
+        """HEADER não lê chunks; CHUNKS lê os chunks sem o vetor; nenhum dos dois lê o conteúdo original."""
+        from app.infrastructure.persistence.artifacts_repo import ArtifactProjection, ArtifactsRepository
+        
+        artifact_id = uuid.uuid4()
+        artifacts_table, chunks_table = MagicMock(), MagicMock()
+        artifacts_table.select.return_value.eq.return_value.execute.return_value = Mock(data=[{
+            "id": str(artifact_id), "title": "Artefato", "source_type": "TEXT", "source_url": None
+        }])
+        chunks_table.select.return_value.eq.return_value.execute.return_value = Mock(data=[{
+            "id": str(uuid.uuid4()), "artifact_id": str(artifact_id), "content": "Conteúdo",
+            "section_title": "Seção", "section_level": 1, "content_type": "paragraph",
+            "position": 0, "token_count": 10, "breadcrumbs": ["Seção"],
+        }])
+        mock_supabase = MagicMock()
+        mock_supabase.table.side_effect = lambda name: artifacts_table if name == "artifacts" else chunks_table
+        repo = ArtifactsRepository(mock_supabase)
+        
+        header = await repo.find_by_id(ArtifactId(artifact_id), ArtifactProjection.HEADER)
+        
+        assert header.title == "Artefato" and header.chunks == []
+        chunks_table.select.assert_not_called()
+        assert "original_content" not in artifacts_table.select.call_args.args[0]
+        
+        with_chunks = await repo.find_by_id(ArtifactId(artifact_id), ArtifactProjection.CHUNKS)
+        
+        assert with_chunks.chunks[0].content == "Conteúdo"
+        assert with_chunks.chunks[0].embedding.vector == []
+        assert "embedding" not in chunks_table.select.call_args.args[0]
+        assert "*" not in artifacts_table.select.call_args.args[0]
+    
+    @pytest.mark.asyncio
+    async def test_find_card_by_id_reads_card_columns_in_one_query(self):
+        """O card de um artefato vem em uma consulta, com a data de criação do banco."""
+        from app.infrastructure.persistence.artifacts_repo import ArtifactsRepository
+        
+        artifact_id = uuid.uuid4()
+        mock_supabase = MagicMock()
+        table = mock_supabase.table.return_value
+        table.select.return_value.eq.return_value.execute.return_value = Mock(data=[{
+            "id": str(artifact_id), "title": "Artefato", "source_type": "PDF", "description": "Descrição",
+            "tags": None, "color": "#fff", "source_url": "https://exemplo/a.pdf",
+            "created_at": "2024-05-01T12:30:00Z",
+        }])
+        
+        card = await ArtifactsRepository(mock_supabase).find_card_by_id(ArtifactId(artifact_id))
+        
+        table.select.assert_called_once()
+        assert "original_content" not in table.select.call_args.args[0]
+        assert card.created_at == datetime.fromisoformat("2024-05-01T12:30:00+00:00")
+        assert (card.description, card.tags, card.color) == ("Descrição", [], "#fff")
+    
+    @pytest.mark.asyncio
+    async def test_find_all(self):
         """Testa busca de todos os artefatos."""
         from app.infrastructure.persistence.artifacts_repo import ArtifactsRepository
         
@@ -133,18 +183,68 @@ class TestArtifactsRepository:
         }])
         
         mock_supabase.table.return_value = mock_table
-        mock_create_client.return_value = mock_supabase
         
-        repo = ArtifactsRepository()
-        repo.supabase = mock_supabase
+        repo = ArtifactsRepository(mock_supabase)
         
         result = await repo.find_all()
         
         assert isinstance(result, list)
     
     @pytest.mark.asyncio
-    @patch('app.infrastructure.persistence.artifacts_repo.create_client')
-    async def test_delete(self, mock_create_client):
+    async def test_list_cards_selects_card_fields_once_until_a_write(self):
+        """A listagem sai de uma consulta só com os campos do card e fica em cache até uma escrita."""
+        from app.infrastructure.persistence.artifact_list_cache import ArtifactListCache
+        from app.infrastructure.persistence.artifacts_repo import ArtifactsRepository
+        
+        mock_supabase = MagicMock()
+        table = mock_supabase.table.return_value
+        table.select.return_value.order.return_value.order.return_value.limit.return_value.execute.return_value = Mock(data=[{
+            "id": str(uuid.uuid4()),
+            "title": "Artefato",
+            "source_type": "PDF",
+            "description": "Descrição",
+            "tags": None,
+            "color": "#fff",
+            "source_url": "https://exemplo/a.pdf",
+            "created_at": "2024-05-01T12:30:00+00:00",
+        }])
+        
+        cache = ArtifactListCache(ttl_seconds=60)
+        with patch('app.infrastructure.persistence.artifacts_repo.artifact_list_cache', cache):
+            repo = ArtifactsRepository(mock_supabase)
+            cards = (await repo.list_cards()).items
+            await repo.list_cards()
+            assert table.select.call_count == 1
+            
+            # Outra página tem sua própria entrada no cache
+            await repo.list_cards(limit=10)
+            assert table.select.call_count == 2
+            
+            await repo.update_artifact_color(cards[0].id, "#000")
+            await repo.list_cards()
+        
+        assert table.select.call_count == 3
+        columns = table.select.call_args.args[0]
+        assert "original_content" not in columns and "*" not in columns
+        assert cards[0].created_at == datetime.fromisoformat("2024-05-01T12:30:00+00:00")
+        assert cards[0].tags == []
+    
+    def test_artifact_list_cache_ignores_reads_started_before_a_write(self):
+        """Uma leitura iniciada antes da invalidação não grava resultado desatualizado."""
+        from app.infrastructure.persistence.artifact_list_cache import ArtifactListCache
+        
+        cache = ArtifactListCache(ttl_seconds=60)
+        key = (None, 50)
+        generation = cache.generation
+        cache.invalidate()
+        cache.store(key, Page(), generation)
+        
+        assert cache.get(key) is None
+        cache.store(key, Page(), cache.generation)
+        assert cache.get(key) == Page()
+    
+    @pytest.mark.asyncio
+    async def test_delete(self):
         """Testa deleção de artefato."""
         from app.infrastructure.persistence.artifacts_repo import ArtifactsRepository
         
@@ -156,10 +256,8 @@ class TestArtifactsRepository:
         mock_delete.execute.return_value = Mock()
         
         mock_supabase.table.return_value = mock_table
-        mock_create_client.return_value = mock_supabase
         
-        repo = ArtifactsRepository()
-        repo.supabase = mock_supabase
+        repo = ArtifactsRepository(mock_supabase)
         
         artifact_id = ArtifactId(uuid.uuid4())
         await repo.delete(artifact_id)
@@ -171,8 +269,7 @@ class TestConversationsRepository:
     """Testes para ConversationsRepository."""
     
     @pytest.mark.asyncio
-    @patch('app.infrastructure.persistence.conversations_repo.create_client')
-    async def test_create_conversation(self, mock_create_client):
+    async def test_create_conversation(self):
         """Testa criação de conversa."""
         from app.infrastructure.persistence.conversations_repo import ConversationsRepository
         
@@ -181,10 +278,8 @@ class TestConversationsRepository:
         mock_table.insert.return_value = Mock()
         mock_table.insert.return_value.execute.return_value = Mock()
         mock_supabase.table.return_value = mock_table
-        mock_create_client.return_value = mock_supabase
         
-        repo = ConversationsRepository()
-        repo.supabase = mock_supabase
+        repo = ConversationsRepository(mock_supabase)
         
         result = await repo.create()
         
@@ -192,8 +287,7 @@ class TestConversationsRepository:
         assert len(result.messages) == 0
     
     @pytest.mark.asyncio
-    @patch('app.infrastructure.persistence.conversations_repo.create_client')
-    async def test_find_by_id(self, mock_create_client):
+    async def test_find_by_id(self):
         """Testa busca de conversa por ID."""
         from app.infrastructure.persistence.conversations_repo import ConversationsRepository
         
@@ -222,23 +316,247 @@ class TestConversationsRepository:
             return Mock()
         
         mock_supabase.table.side_effect = table_side_effect
-        mock_create_client.return_value = mock_supabase
         
-        repo = ConversationsRepository()
-        repo.supabase = mock_supabase
+        repo = ConversationsRepository(mock_supabase)
         
         conversation_id = ConversationId(uuid.uuid4())
         result = await repo.find_by_id(conversation_id)
         
         assert result is None or isinstance(result, Conversation)
+    
+    @pytest.mark.asyncio
+    async def test_find_by_id_hydrates_citations_in_one_query_and_caches(self):
+        """As citações de todas as mensagens vêm de um único `in_` e ficam em cache."""
+        from app.infrastructure.persistence.citation_cache import CitationCache
+        from app.infrastructure.persistence.conversations_repo import ConversationsRepository
+        
+        conversation_id = str(uuid.uuid4())
+        artifact_id = str(uuid.uuid4())
+        chunk_ids = [str(uuid.uuid4()) for _ in range(6)]
+        now = datetime.utcnow().isoformat()
+        message_rows = [
+            {
+                "id": str(uuid.uuid4()),
+                "conversation_id": conversation_id,
+                "author": "AGENT",
+                "content": f"Resposta {index}",
+                "cited_artifact_chunk_ids": chunk_ids[index * 2:index * 2 + 3],
+                "created_at": now,
+            }
+            for index in range(3)
+        ]
+        chunk_rows = [
+            {
+                "id": chunk_id,
+                "artifact_id": artifact_id,
+                "content": "x" * 300,
+                "section_title": "Seção",
+                "section_level": 2,
+                "content_type": "text",
+                "breadcrumbs": '["Doc", "Seção"]',
+                "artifacts": {"title": "Documento"},
+            }
+            for chunk_id in chunk_ids
+        ]
+        
+        # As três tabelas compartilham o mock; cada consulta usa uma cadeia diferente
+        mock_supabase = MagicMock()
+        select = mock_supabase.table.return_value.select.return_value
+        select.eq.return_value.execute.return_value = Mock(data=[{"id": conversation_id, "created_at": now}])
+        select.eq.return_value.order.return_value.execute.return_value = Mock(data=message_rows)
+        select.in_.return_value.execute.return_value = Mock(data=chunk_rows)
+        
+        cache = CitationCache(max_entries=100)
+        with patch('app.infrastructure.persistence.conversations_repo.citation_cache', cache):
+            repo = ConversationsRepository(mock_supabase)
+            result = await repo.find_by_id(ConversationId(uuid.UUID(conversation_id)))
+            await repo.find_by_id(ConversationId(uuid.UUID(conversation_id)))
+        
+        select.in_.assert_called_once()
+        assert sorted(select.in_.call_args.args[1]) == sorted(chunk_ids)
+        assert [len(message.cited_sources) for message in result.messages] == [3, 3, 2]
+        source = result.messages[0].cited_sources[0]
+        assert source.title == "Documento"
+        assert source.breadcrumbs == ["Doc", "Seção"]
+        assert len(source.chunk_content_preview) == 200
+        assert cache.snapshot()["hits"] == 6
+    
+    def test_citation_cache_ignores_stale_reads_and_expires(self):
+        """Leituras anteriores a uma invalidação não são gravadas e as entradas expiram."""
+        from app.infrastructure.persistence.citation_cache import CitationCache
+        
+        source = CitedSource(
+            chunk_id=ChunkId(uuid.uuid4()),
+            artifact_id=ArtifactId(uuid.uuid4()),
+            title="Documento",
+            chunk_content_preview="Trecho"
+        )
+        cache = CitationCache(max_entries=10, ttl_seconds=60)
+        generation = cache.generation
+        cache.invalidate()
+        cache.put_many({"c1": source}, generation)
+        
+        assert cache.get_many(["c1"]) == ({}, ["c1"])
+        cache.put_many({"c1": source}, cache.generation)
+        assert cache.get_many(["c1"]) == ({"c1": source}, [])
+        
+        cache.ttl_seconds = 0
+        assert cache.get_many(["c1"]) == ({}, ["c1"])
+    
+    @pytest.mark.asyncio
+    async def test_save_messages_is_one_idempotent_upsert(self):
+        """Testa que as mensagens da troca vão em um único upsert, sem consultas prévias."""
+        from app.infrastructure.persistence.conversations_repo import ConversationsRepository
+        
+        mock_supabase = MagicMock()
+        conversation_id = ConversationId(uuid.uuid4())
+        messages = [
+            Message(
+                id=MessageId(uuid.uuid4()),
+                conversation_id=conversation_id,
+                author=author,
+                content="Olá",
+                cited_sources=[],
+                created_at=datetime.utcnow(),
+            )
+            for author in (Author.USER, Author.AGENT)
+        ]
+        
+        repo = ConversationsRepository(mock_supabase)
+        await repo.save_messages(messages)
+        
+        table = mock_supabase.table.return_value
+        table.select.assert_not_called()
+        table.upsert.assert_called_once()
+        rows = table.upsert.call_args.args[0]
+        assert [row["author"] for row in rows] == ["USER", "AGENT"]
+        assert table.upsert.call_args.kwargs["ignore_duplicates"] is True
+    
+    def test_in_batches_splits_by_url_length(self):
+        """Listas de IDs longas são quebradas em lotes que cabem no limite."""
+        from app.infrastructure.persistence.supabase_clients import in_batches
+        
+        ids = [str(uuid.uuid4()) for _ in range(10)]
+        batches = in_batches(ids, max_chars=(36 + 3) * 4)
+        
+        assert [len(batch) for batch in batches] == [4, 4, 2]
+        assert [value for batch in batches for value in batch] == ids
+        assert in_batches([]) == []
+
+
+    @pytest.mark.asyncio
+    async def test_update_topic_adjusts_counts_in_one_rpc(self):
+        """A troca de tópico e o ajuste das contagens vão juntos na função SQL."""
+        from app.infrastructure.persistence.conversations_repo import ConversationsRepository
+        
+        mock_supabase = MagicMock()
+        conversation_id, topic_id = uuid.uuid4(), uuid.uuid4()
+        
+        await ConversationsRepository(mock_supabase).update_topic(ConversationId(conversation_id), TopicId(topic_id))
+        
+        mock_supabase.rpc.assert_called_once_with("set_conversation_topic", {
+            "p_conversation_id": str(conversation_id),
+            "p_topic_id": str(topic_id),
+        })
+        mock_supabase.table.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_update_topic_falls_back_only_when_the_function_is_missing(self):
+        """Sem a função, troca o tópico direto; outros erros da RPC são propagados."""
+        from app.infrastructure.persistence.conversations_repo import ConversationsRepository
+        
+        conversation_id, topic_id = uuid.uuid4(), uuid.uuid4()
+        mock_supabase = MagicMock()
+        repo = ConversationsRepository(mock_supabase)
+        
+        mock_supabase.rpc.return_value.execute.side_effect = APIError(
+            {"code": "PGRST202", "message": "Could not find the function public.set_conversation_topic"}
+        )
+        await repo.update_topic(ConversationId(conversation_id), TopicId(topic_id))
+        mock_supabase.table.return_value.update.assert_called_once_with({"topic_id": str(topic_id)})
+        
+        mock_supabase.rpc.return_value.execute.side_effect = APIError(
+            {"code": "23503", "message": "violates foreign key constraint"}
+        )
+        with pytest.raises(APIError):
+            await repo.update_topic(ConversationId(conversation_id), TopicId(topic_id))
+        mock_supabase.table.return_value.update.assert_called_once()
 
 
+    @pytest.mark.asyncio
+    async def test_find_summaries_page_is_one_projection_query(self):
+        """Os resumos vêm das colunas gravadas, sem consultar mensagens."""
+        from app.infrastructure.persistence.conversations_repo import ConversationsRepository
+        
+        rows = [
+            {
+                "id": str(uuid.uuid4()),
+                "title": f"Conversa {index}",
+                "summary": "Resumo",
+                "created_at": f"2024-05-0{9 - index}T12:00:00+00:00",
+                "topics": {"name": "Acervos"} if index == 0 else None,
+            }
+            for index in range(3)
+        ]
+        mock_supabase = MagicMock()
+        query = mock_supabase.table.return_value.select.return_value.not_.is_.return_value
+        query.or_.return_value.order.return_value.order.return_value.limit.return_value.execute.return_value = Mock(data=rows)
+        cursor = Cursor(created_at="2024-05-10T00:00:00+00:00", id=str(uuid.uuid4()))
+        
+        page = await ConversationsRepository(mock_supabase).find_summaries_page(None, cursor, 2)
+        
+        mock_supabase.table.assert_called_once_with("conversations")
+        assert [(item.title, item.topic_name) for item in page.items] == [("Conversa 0", "Acervos"), ("Conversa 1", None)]
+        assert Cursor.decode(page.next_cursor) == Cursor(created_at=rows[1]["created_at"], id=rows[1]["id"])
+        assert '"2024-05-10T00:00:00+00:00"' in query.or_.call_args.args[0]
+        query.or_.return_value.order.return_value.order.return_value.limit.assert_called_once_with(3)
+
+    
+    @pytest.mark.asyncio
+    async def test_find_turn_context_skips_summarized_messages(self):
+        """Testa que a troca lê o resumo e só as mensagens que ele não cobre, sem citações."""
+        from app.infrastructure.persistence.conversations_repo import ConversationsRepository
+        conversation_id = uuid.uuid4()
+        mock_supabase = MagicMock()
+        conversations = mock_supabase.table.return_value.select.return_value.eq.return_value
+        conversations.execute.return_value = Mock(data=[{
+            "id": str(conversation_id),
+            "created_at": "2024-05-01T12:00:00+00:00",
+            "context_summary": "Resumo",
+            "summarized_message_count": 4,
+        }])
+        messages = conversations.order.return_value.offset.return_value
+        messages.execute.return_value = Mock(data=[{
+            "id": str(uuid.uuid4()),
+            "conversation_id": str(conversation_id),
+            "author": "AGENT",
+            "content": "Resposta",
+            "created_at": "2024-05-01T12:05:00+00:00",
+        }])
+        
+        conversation = await ConversationsRepository(mock_supabase).find_turn_context(ConversationId(conversation_id))
+        
+        conversations.order.return_value.offset.assert_called_once_with(4)
+        assert [table.args[0] for table in mock_supabase.table.call_args_list] == ["conversations", "messages"]
+        assert conversation.context_summary == "Resumo"
+        assert conversation.message_offset == 4
+        assert [m.content for m in conversation.unsummarized_messages()] == ["Resposta"]
+    
+    @pytest.mark.asyncio
+    async def test_pages_without_supabase_are_empty(self):
+        """Testa que as páginas de conversas sem Supabase configurado vêm vazias, sem erro."""
+        from app.infrastructure.persistence.conversations_repo import ConversationsRepository
+        repo = ConversationsRepository(Mock())
+        repo.supabase = None
+        
+        assert await repo.find_untitled_page(None, 10) == Page()
+        assert await repo.find_messages_page(ConversationId(uuid.uuid4()), None, 10) == Page()
+
 class TestFeedbacksRepository:
     """Testes para FeedbacksRepository."""
     
     @pytest.mark.asyncio
-    @patch('app.infrastructure.persistence.feedbacks_repo.create_client')
-    async def test_save_feedback(self, mock_create_client):
+    async def test_save_feedback(self):
         """Testa salvamento de feedback."""
         from app.infrastructure.persistence.feedbacks_repo import FeedbacksRepository
         
@@ -247,10 +565,8 @@ class TestFeedbacksRepository:
         mock_table.insert.return_value = Mock()
         mock_table.insert.return_value.execute.return_value = Mock()
         mock_supabase.table.return_value = mock_table
-        mock_create_client.return_value = mock_supabase
         
-        repo = FeedbacksRepository()
-        repo.supabase = mock_supabase
+        repo = FeedbacksRepository(mock_supabase)
         
         feedback = PendingFeedback(
             id=FeedbackId(uuid.uuid4()),
@@ -267,8 +583,7 @@ class TestFeedbacksRepository:
         mock_table.insert.assert_called_once()
     
     @pytest.mark.asyncio
-    @patch('app.infrastructure.persistence.feedbacks_repo.create_client')
-    async def test_find_by_id(self, mock_create_client):
+    async def test_find_by_id(self):
         """Testa busca de feedback por ID."""
         from app.infrastructure.persistence.feedbacks_repo import FeedbacksRepository
         
@@ -290,18 +605,15 @@ class TestFeedbacksRepository:
         }])
         
         mock_supabase.table.return_value = mock_table
-        mock_create_client.return_value = mock_supabase
         
-        repo = FeedbacksRepository()
-        repo.supabase = mock_supabase
+        repo = FeedbacksRepository(mock_supabase)
         
         result = await repo.find_by_id(feedback_id)
         
         assert result is None or isinstance(result, PendingFeedback)
     
     @pytest.mark.asyncio
-    @patch('app.infrastructure.persistence.feedbacks_repo.create_client')
-    async def test_find_pending(self, mock_create_client):
+    async def test_find_pending(self):
         """Testa busca de feedbacks pendentes."""
         from app.infrastructure.persistence.feedbacks_repo import FeedbacksRepository
         
@@ -314,18 +626,86 @@ class TestFeedbacksRepository:
         mock_select.execute.return_value = Mock(data=[])
         
         mock_supabase.table.return_value = mock_table
-        mock_create_client.return_value = mock_supabase
         
-        repo = FeedbacksRepository()
-        repo.supabase = mock_supabase
+        repo = FeedbacksRepository(mock_supabase)
         
         result = await repo.find_pending()
         
         assert isinstance(result, list)
     
     @pytest.mark.asyncio
-    @patch('app.infrastructure.persistence.feedbacks_repo.create_client')
-    async def test_update_status(self, mock_create_client):
+    async def test_find_reviewed_with_preview_uses_moderation_view(self):
+        """Testa que feedbacks e previews vêm de uma única consulta à view."""
+        from app.infrastructure.persistence.feedbacks_repo import FeedbacksRepository
+        
+        row = {
+            "id": str(uuid.uuid4()),
+            "message_id": str(uuid.uuid4()),
+            "feedback_text": "Feedback",
+            "status": "APPROVED",
+            "created_at": datetime.utcnow().isoformat(),
+            "feedback_type": "POSITIVE",
+            "message_preview": "Resposta...",
+        }
+        mock_supabase = MagicMock()
+        query = mock_supabase.table.return_value.select.return_value.in_.return_value
+        query.order.return_value.order.return_value.limit.return_value.execute.return_value = Mock(data=[row])
+        
+        repo = FeedbacksRepository(mock_supabase)
+        result = (await repo.find_reviewed_with_preview()).items
+        
+        mock_supabase.table.assert_called_once_with("feedback_moderation")
+        assert mock_supabase.table.return_value.select.return_value.in_.call_args.args == (
+            "status", ["APPROVED", "REJECTED"]
+        )
+        assert result[0].feedback.status == FeedbackStatus.APPROVED
+        assert result[0].message_preview == "Resposta..."
+    
+    @pytest.mark.asyncio
+    async def test_find_pending_with_preview_falls_back_to_embedded_join(self):
+        """Sem a view, o preview sai do join embutido e é cortado em 200 caracteres."""
+        from app.infrastructure.persistence.feedbacks_repo import FeedbacksRepository
+        
+        row = {
+            "id": str(uuid.uuid4()),
+            "message_id": str(uuid.uuid4()),
+            "feedback_text": "Feedback",
+            "status": "PENDING",
+            "created_at": datetime.utcnow().isoformat(),
+            "messages": {"content": "x" * 250},
+        }
+        view_table, feedbacks_table = MagicMock(), MagicMock()
+        view_table.select.return_value.in_.return_value.order.return_value.order.return_value.limit.return_value.execute.side_effect = APIError(
+            {"code": "42P01", "message": 'relation "feedback_moderation" does not exist'}
+        )
+        feedbacks_table.select.return_value.in_.return_value.order.return_value.order.return_value.limit.return_value.execute.return_value = Mock(data=[row])
+        mock_supabase = Mock()
+        mock_supabase.table.side_effect = lambda name: view_table if name == "feedback_moderation" else feedbacks_table
+        
+        repo = FeedbacksRepository(mock_supabase)
+        result = (await repo.find_pending_with_preview()).items
+        
+        assert feedbacks_table.select.call_args.args == ("*, messages(content)",)
+        assert result[0].message_preview == "x" * 200 + "..."
+    
+    @pytest.mark.asyncio
+    async def test_find_pending_with_preview_propagates_other_view_errors(self):
+        """Só a ausência da view ativa o join embutido; outros erros são propagados."""
+        from app.infrastructure.persistence.feedbacks_repo import FeedbacksRepository
+        
+        mock_supabase = MagicMock()
+        mock_supabase.table.return_value.select.return_value.in_.return_value.order.return_value.order.return_value.limit.return_value.execute.side_effect = APIError(
+            {"code": "57014", "message": "canceling statement due to statement timeout"}
+        )
+        
+        repo = FeedbacksRepository(mock_supabase)
+        with pytest.raises(APIError):
+            await repo.find_pending_with_preview()
+        
+        mock_supabase.table.assert_called_once_with("feedback_moderation")
+    
+    @pytest.mark.asyncio
+    async def test_update_status(self):
         """Testa atualização de status de feedback."""
         from app.infrastructure.persistence.feedbacks_repo import FeedbacksRepository
         
@@ -357,10 +737,8 @@ class TestFeedbacksRepository:
         mock_select.execute.return_value = mock_result
         
         mock_supabase.table.return_value = mock_table
-        mock_create_client.return_value = mock_supabase
         
-        repo = FeedbacksRepository()
-        repo.supabase = mock_supabase
+        repo = FeedbacksRepository(mock_supabase)
         
         result = await repo.update_status(feedback_id, FeedbackStatus.APPROVED)
         
@@ -372,8 +750,7 @@ class TestAgentSettingsRepository:
     """Testes para AgentSettingsRepository."""
     
     @pytest.mark.asyncio
-    @patch('app.infrastructure.persistence.agent_settings_repo.create_client')
-    async def test_get_instruction(self, mock_create_client):
+    async def test_get_instruction(self):
         """Testa obtenção de instrução do agente."""
         from app.infrastructure.persistence.agent_settings_repo import AgentSettingsRepository
         
@@ -393,10 +770,8 @@ class TestAgentSettingsRepository:
         mock_select.execute.return_value = mock_result
         
         mock_supabase.table.return_value = mock_table
-        mock_create_client.return_value = mock_supabase
         
-        repo = AgentSettingsRepository()
-        repo.supabase = mock_supabase
+        repo = AgentSettingsRepository(mock_supabase)
         
         result = await repo.get_instruction()
         
@@ -404,8 +779,7 @@ class TestAgentSettingsRepository:
         assert result.content == "Instrução de teste"
     
     @pytest.mark.asyncio
-    @patch('app.infrastructure.persistence.agent_settings_repo.create_client')
-    async def test_update_instruction(self, mock_create_client):
+    async def test_update_instruction(self):
         """Testa atualização de instrução do agente."""
         from app.infrastructure.persistence.agent_settings_repo import AgentSettingsRepository
         
@@ -435,10 +809,8 @@ class TestAgentSettingsRepository:
         mock_update.execute.return_value = Mock()
         
         mock_supabase.table.return_value = mock_table
-        mock_create_client.return_value = mock_supabase
         
-        repo = AgentSettingsRepository()
-        repo.supabase = mock_supabase
+        repo = AgentSettingsRepository(mock_supabase)
         
         result = await repo.update_instruction("Nova instrução")
         
@@ -450,8 +822,7 @@ class TestLearningsRepository:
     """Testes para LearningsRepository."""
     
     @pytest.mark.asyncio
-    @patch('app.infrastructure.persistence.learnings_repo.create_client')
-    async def test_save_learning(self, mock_create_client):
+    async def test_save_learning(self):
         """Testa salvamento de aprendizado."""
         from app.infrastructure.persistence.learnings_repo import LearningsRepository
         
@@ -460,10 +831,8 @@ class TestLearningsRepository:
         mock_table.insert.return_value = Mock()
         mock_table.insert.return_value.execute.return_value = Mock()
         mock_supabase.table.return_value = mock_table
-        mock_create_client.return_value = mock_supabase
         
-        repo = LearningsRepository()
-        repo.supabase = mock_supabase
+        repo = LearningsRepository(mock_supabase)
         
         learning = Learning(
             id=LearningId(uuid.uuid4()),
@@ -479,8 +848,7 @@ class TestLearningsRepository:
         mock_table.insert.assert_called_once()
     
     @pytest.mark.asyncio
-    @patch('app.infrastructure.persistence.learnings_repo.create_client')
-    async def test_find_all(self, mock_create_client):
+    async def test_find_all(self):
         """Testa busca de todos os aprendizados."""
         from app.infrastructure.persistence.learnings_repo import LearningsRepository
         
@@ -492,22 +860,42 @@ class TestLearningsRepository:
         mock_select.execute.return_value = Mock(data=[])
         
         mock_supabase.table.return_value = mock_table
-        mock_create_client.return_value = mock_supabase
         
-        repo = LearningsRepository()
-        repo.supabase = mock_supabase
+        repo = LearningsRepository(mock_supabase)
         
         result = await repo.find_all()
         
         assert isinstance(result, list)
 
 
+    @pytest.mark.asyncio
+    async def test_find_all_skips_embeddings_by_default(self):
+        """A listagem completa só lê os vetores quando pedida com `with_embeddings`."""
+        from app.infrastructure.persistence.learnings_repo import LearningsRepository
+        
+        mock_supabase = MagicMock()
+        select = mock_supabase.table.return_value.select
+        select.return_value.order.return_value.execute.return_value = Mock(data=[{
+            "id": str(uuid.uuid4()),
+            "content": "Aprendizado",
+            "source_feedback_id": str(uuid.uuid4()),
+            "created_at": datetime.utcnow().isoformat()
+        }])
+        repo = LearningsRepository(mock_supabase)
+        
+        learnings = await repo.find_all()
+        
+        assert learnings[0].embedding.vector == []
+        assert "embedding" not in select.call_args.args[0] and "*" not in select.call_args.args[0]
+        await repo.find_all(with_embeddings=True)
+        assert "embedding" in select.call_args.args[0]
+
+
 class TestTopicsRepository:
     """Testes para TopicsRepository."""
     
     @pytest.mark.asyncio
-    @patch('app.infrastructure.persistence.topics_repo.create_client')
-    async def test_create_topic(self, mock_create_client):
+    async def test_create_topic(self):
         """Testa criação de tópico."""
         from app.infrastructure.persistence.topics_repo import TopicsRepository
         
@@ -521,10 +909,8 @@ class TestTopicsRepository:
         }])
         
         mock_supabase.table.return_value = mock_table
-        mock_create_client.return_value = mock_supabase
         
-        repo = TopicsRepository()
-        repo.supabase = mock_supabase
+        repo = TopicsRepository(mock_supabase)
         
         result = await repo.create("Tópico")
         
@@ -532,8 +918,7 @@ class TestTopicsRepository:
         assert result.name == "Tópico"
     
     @pytest.mark.asyncio
-    @patch('app.infrastructure.persistence.topics_repo.create_client')
-    async def test_find_all(self, mock_create_client):
+    async def test_find_all(self):
         """Testa busca de todos os tópicos."""
         from app.infrastructure.persistence.topics_repo import TopicsRepository
         
@@ -545,11 +930,750 @@ class TestTopicsRepository:
         mock_select.execute.return_value = Mock(data=[])
         
         mock_supabase.table.return_value = mock_table
-        mock_create_client.return_value = mock_supabase
         
-        repo = TopicsRepository()
-        repo.supabase = mock_supabase
+        repo = TopicsRepository(mock_supabase)
         
         result = await repo.find_all()
         
         assert isinstance(result, list)
+
+
+    @pytest.mark.asyncio
+    async def test_find_all_with_counts_reads_the_maintained_column(self):
+        """A contagem vem da coluna dos tópicos, sem ler a tabela de conversas."""
+        from app.infrastructure.persistence.topics_repo import TopicsRepository
+        
+        mock_supabase = MagicMock()
+        query = mock_supabase.table.return_value.select.return_value.order.return_value
+        query.execute.return_value = Mock(data=[{
+            "id": str(uuid.uuid4()),
+            "name": "Música",
+            "created_at": datetime.utcnow().isoformat(),
+            "conversation_count": 7
+        }])
+        
+        result = await TopicsRepository(mock_supabase).find_all_with_counts()
+        
+        assert [(item.topic.name, item.conversation_count) for item in result] == [("Música", 7)]
+        mock_supabase.table.assert_called_once_with("topics")
+        assert "conversation_count" in mock_supabase.table.return_value.select.call_args.args[0]
+    
+    @pytest.mark.asyncio
+    async def test_find_all_with_counts_falls_back_to_counting_conversations(self):
+        """Sem a coluna (migração 006 não aplicada), conta os tópicos das conversas."""
+        from app.infrastructure.persistence.topics_repo import TopicsRepository
+        
+        topic_id = str(uuid.uuid4())
+        topics_table = MagicMock()
+        topics_table.select.return_value.order.return_value.execute.side_effect = [
+            APIError({"code": "42703", "message": "column topics.conversation_count does not exist"}),
+            Mock(data=[{"id": topic_id, "name": "Música", "created_at": datetime.utcnow().isoformat()}]),
+        ]
+        conversations_table = MagicMock()
+        conversations_table.select.return_value.execute.return_value = Mock(
+            data=[{"topic_id": topic_id}, {"topic_id": topic_id}, {"topic_id": None}]
+        )
+        mock_supabase = MagicMock()
+        mock_supabase.table.side_effect = lambda name: topics_table if name == "topics" else conversations_table
+        
+        result = await TopicsRepository(mock_supabase).find_all_with_counts()
+        
+        assert [item.conversation_count for item in result] == [2]
+    
+    @pytest.mark.asyncio
+    async def test_find_all_with_counts_propagates_other_errors(self):
+        """Só a ausência da coluna ativa a contagem local; outros erros são propagados."""
+        from app.infrastructure.persistence.topics_repo import TopicsRepository
+        
+        mock_supabase = MagicMock()
+        mock_supabase.table.return_value.select.return_value.order.return_value.execute.side_effect = APIError(
+            {"code": "57014", "message": "canceling statement due to statement timeout"}
+        )
+        
+        with pytest.raises(APIError):
+            await TopicsRepository(mock_supabase).find_all_with_counts()
+        
+        mock_supabase.table.assert_called_once_with("topics")
+
+
+class TestPagination:
+    """Testes para os cursores e a montagem das páginas."""
+    
+    def test_cursor_round_trip(self):
+        """O cursor codificado volta à mesma posição; tokens adulterados são rejeitados."""
+        cursor = Cursor(created_at="2024-05-01T12:00:00+00:00", id=str(uuid.uuid4()))
+        
+        assert Cursor.decode(cursor.encode()) == cursor
+        for token in ["", "nao-e-um-cursor", cursor.encode()[:-4]]:
+            with pytest.raises(ValueError):
+                Cursor.decode(token)
+    
+    def test_build_page_points_next_cursor_at_last_item(self):
+        """A linha extra só sinaliza a próxima página; sem ela, next_cursor é None."""
+        rows = [
+            {"id": str(uuid.uuid4()), "created_at": datetime(2024, 5, 3 - index)}
+            for index in range(3)
+        ]
+        
+        page = build_page(rows, 2, lambda row: row["id"])
+        
+        assert page.items == [rows[0]["id"], rows[1]["id"]]
+        assert Cursor.decode(page.next_cursor) == Cursor.from_row(rows[1])
+        assert build_page(rows, 3, lambda row: row["id"]).next_cursor is None
+    
+    def test_keyset_sql_compares_the_row_tuple(self):
+        """O filtro SQL compara (created_at, id) com o cursor, na direção da ordenação."""
+        cursor = Cursor(created_at="2024-05-01T12:00:00+00:00", id=str(uuid.uuid4()))
+        
+        assert keyset_sql(None) == ("", ())
+        sql, params = keyset_sql(cursor, desc=False, alias="f")
+        assert "(f.created_at, f.id) >" in sql
+        assert params == (cursor.created_at, cursor.id)
+
+
+class TestSingleFlight:
+    """Testes para a coalescência de chamadas concorrentes."""
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_find_all_shares_one_query(self):
+        """Chamadas simultâneas de find_all fazem uma única consulta ao Supabase."""
+        import asyncio
+        import time
+        from app.infrastructure.persistence.topics_repo import TopicsRepository
+        from app.infrastructure.single_flight import single_flight_group
+        
+        def slow_execute():
+            time.sleep(0.05)
+            return Mock(data=[{
+                "id": str(uuid.uuid4()),
+                "name": "Tópico",
+                "created_at": datetime.utcnow().isoformat()
+            }])
+        
+        mock_supabase = Mock()
+        mock_supabase.table.return_value.select.return_value.order.return_value.execute = Mock(
+            side_effect=slow_execute
+        )
+        repo = TopicsRepository(mock_supabase)
+        group = single_flight_group("topics.find_all")
+        coalesced_before = group.coalesced
+        
+        results = await asyncio.gather(*[repo.find_all() for _ in range(5)])
+        
+        assert all(result[0].name == "Tópico" for result in results)
+        assert mock_supabase.table.return_value.select.return_value.order.return_value.execute.call_count == 1
+        assert group.coalesced - coalesced_before == 4
+        
+        await repo.find_all()
+        assert mock_supabase.table.return_value.select.return_value.order.return_value.execute.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_errors_are_shared_and_not_retained(self):
+        """Uma falha é repassada a todos os chamadores em espera e não fica guardada."""
+        import asyncio
+        from app.infrastructure.single_flight import SingleFlight
+        
+        group = SingleFlight("teste")
+        calls = 0
+        
+        async def failing():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise ValueError("falhou")
+        
+        results = await asyncio.gather(*[group.do("k", failing) for _ in range(3)], return_exceptions=True)
+        
+        assert calls == 1
+        assert all(isinstance(result, ValueError) for result in results)
+        assert group.snapshot() == {"calls": 3, "coalesced": 2, "in_flight": 0}
+
+    
+    @pytest.mark.asyncio
+    async def test_cancelling_the_leader_does_not_cancel_followers(self):
+        """Cancelar quem iniciou a execução não afeta quem aguarda o mesmo resultado."""
+        import asyncio
+        from app.infrastructure.single_flight import SingleFlight
+        
+        group = SingleFlight("teste")
+        release = asyncio.Event()
+        calls = 0
+        
+        async def slow():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "resultado"
+        
+        leader = asyncio.ensure_future(group.do("k", slow))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(group.do("k", slow))
+        await asyncio.sleep(0)
+        
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        
+        assert await follower == "resultado"
+        assert leader.cancelled()
+        assert calls == 1
+        assert group.snapshot() == {"calls": 2, "coalesced": 1, "in_flight": 0}
+
+class TestLearningsIndex:
+    """Testes para o índice de aprendizados em memória."""
+    
+    @staticmethod
+    def _learning(vector, content="Aprendizado"):
+        return Learning(
+            id=LearningId(uuid.uuid4()),
+            content=content,
+            embedding=Embedding(vector=vector),
+            source_feedback_id=FeedbackId(uuid.uuid4()),
+            created_at=datetime.utcnow()
+        )
+    
+    def test_search_orders_by_similarity(self):
+        """Testa que a busca retorna os aprendizados mais similares primeiro."""
+        from app.infrastructure.persistence.learnings_index import LearningsIndex
+        
+        index = LearningsIndex()
+        near = self._learning([1.0, 0.1, 0.0], "perto")
+        far = self._learning([0.0, 0.0, 1.0], "longe")
+        middle = self._learning([0.5, 0.5, 0.0], "meio")
+        for learning in (far, near, middle):
+            assert index.add(learning)
+        
+        result = index.search([1.0, 0.0, 0.0], limit=2)
+        
+        assert [learning.content for learning in result] == ["perto", "meio"]
+    
+    def test_add_ignores_duplicates_and_other_dimensions(self):
+        """Testa que IDs repetidos e dimensões diferentes não entram no índice."""
+        from app.infrastructure.persistence.learnings_index import LearningsIndex
+        
+        index = LearningsIndex()
+        learning = self._learning([0.1] * 4)
+        
+        assert index.add(learning)
+        assert not index.add(learning)
+        assert not index.add(self._learning([0.1] * 8))
+        assert len(index) == 1
+    
+    @pytest.mark.asyncio
+    async def test_ensure_fresh_loads_once_and_polls_incrementally(self):
+        """Testa a carga inicial e o poll incremental de mudanças."""
+        from app.infrastructure.persistence.learnings_index import LearningsIndex
+        
+        first_row = {
+            "id": str(uuid.uuid4()),
+            "content": "Primeiro",
+            "embedding": "[1.0, 0.0]",
+            "source_feedback_id": str(uuid.uuid4()),
+            "created_at": "2024-01-01T00:00:00+00:00",
+        }
+        second_row = dict(first_row, id=str(uuid.uuid4()), content="Segundo",
+                          embedding=[0.0, 1.0], created_at="2024-01-02T00:00:00+00:00")
+        
+        mock_client = Mock()
+        mock_query = Mock()
+        mock_client.table.return_value.select.return_value = mock_query
+        mock_query.gte.return_value = mock_query
+        mock_query.order.return_value = mock_query
+        mock_query.range.return_value = mock_query
+        mock_query.execute.side_effect = [Mock(data=[first_row]), Mock(data=[first_row, second_row])]
+        
+        index = LearningsIndex(refresh_interval=0)
+        await index.ensure_fresh(mock_client)
+        await index.ensure_fresh(mock_client)
+        
+        assert len(index) == 2
+        mock_query.gte.assert_called_once()
+        assert index.search([0.0, 1.0], limit=1)[0].content == "Segundo"
+    
+    @pytest.mark.asyncio
+    async def test_poll_rereads_lookback_window_and_reloads_fully(self):
+        """O poll relê a janela antes do watermark do banco; a recarga completa descarta apagados."""
+        from app.infrastructure.persistence.learnings_index import LearningsIndex
+        
+        row = {
+            "id": str(uuid.uuid4()),
+            "content": "Do banco",
+            "embedding": [1.0, 0.0],
+            "source_feedback_id": str(uuid.uuid4()),
+            "created_at": "2024-01-02T00:00:00+00:00",
+        }
+        late_row = dict(row, id=str(uuid.uuid4()), content="Atrasado", created_at="2024-01-01T23:59:00+00:00")
+        
+        mock_client = Mock()
+        mock_query = Mock()
+        mock_client.table.return_value.select.return_value = mock_query
+        mock_query.gte.return_value = mock_query
+        mock_query.order.return_value = mock_query
+        mock_query.range.return_value = mock_query
+        mock_query.execute.side_effect = [Mock(data=[row]), Mock(data=[row, late_row]), Mock(data=[late_row])]
+        
+        index = LearningsIndex(refresh_interval=0, lookback=300, full_reload_interval=3600)
+        await index.ensure_fresh(mock_client)
+        # Um aprendizado local com relógio adiantado não move o watermark
+        local = replace(self._learning([0.6, 0.8]), created_at=datetime(2030, 1, 1))
+        index.add(local)
+        await index.ensure_fresh(mock_client)
+        
+        assert mock_query.gte.call_args.args == ("created_at", "2024-01-01T23:55:00+00:00")
+        assert {learning.content for learning in index._learnings} >= {"Do banco", "Atrasado"}
+        
+        index.full_reload_interval = 0
+        await index.ensure_fresh(mock_client)
+        
+        assert [learning.content for learning in index._learnings] == ["Atrasado"]
+    
+    @pytest.mark.asyncio
+    async def test_repository_save_appends_to_index(self):
+        """Testa que salvar um aprendizado o adiciona ao índice compartilhado."""
+        from app.infrastructure.persistence.learnings_repo import LearningsRepository
+        from app.infrastructure.persistence import learnings_repo as learnings_repo_module
+        
+        mock_supabase = Mock()
+        repo = LearningsRepository(mock_supabase)
+        learning = self._learning([0.3, 0.4])
+        
+        with patch.object(learnings_repo_module, 'learnings_index') as mock_index:
+            await repo.save(learning)
+        
+        mock_index.add.assert_called_once_with(learning)
+
+
+class TestChunkFilterIndex:
+    """Testes para o índice de filtros de metadados dos chunks."""
+    
+    @staticmethod
+    def _build_index():
+        from app.infrastructure.persistence.chunk_filter_index import ChunkFilterIndex
+        
+        artifact_a, artifact_b = str(uuid.uuid4()), str(uuid.uuid4())
+        chunk_rows = [
+            {"id": "c1", "artifact_id": artifact_a, "content_type": "paragraph",
+             "breadcrumbs": ["Valores", "Respeito"]},
+            {"id": "c2", "artifact_id": artifact_a, "content_type": "list",
+             "breadcrumbs": '["Valores", "Autonomia"]'},
+            {"id": "c3", "artifact_id": artifact_b, "content_type": "paragraph",
+             "breadcrumbs": [], "section_title": "Carreira"},
+        ]
+        artifact_rows = [
+            {"id": artifact_a, "tags": ["Cultura", "Valores"]},
+            {"id": artifact_b, "tags": ["RH"]},
+        ]
+        index = ChunkFilterIndex()
+        index.build(chunk_rows, artifact_rows)
+        return index, artifact_a, artifact_b
+    
+    def test_resolve_without_filter_returns_none(self):
+        """Testa que sem filtro a busca não é restringida."""
+        from app.domain.artifacts.types import KnowledgeFilter
+        
+        index, _, _ = self._build_index()
+        
+        assert index.resolve(None) is None
+        assert index.resolve(KnowledgeFilter()) is None
+    
+    def test_resolve_combines_dimensions(self):
+        """Testa OU dentro de uma dimensão e E entre dimensões."""
+        from app.domain.artifacts.types import KnowledgeFilter
+        
+        index, artifact_a, artifact_b = self._build_index()
+        
+        assert index.resolve(KnowledgeFilter(tags=["cultura", "rh"])) == ["c1", "c2", "c3"]
+        assert index.resolve(KnowledgeFilter(tags=["Valores"], content_types=["paragraph"])) == ["c1"]
+        assert index.resolve(KnowledgeFilter(artifact_ids=[ArtifactId(uuid.UUID(artifact_b))])) == ["c3"]
+        assert index.resolve(KnowledgeFilter(section_prefixes=["valores › aut"])) == ["c2"]
+        assert index.resolve(KnowledgeFilter(tags=["inexistente"])) == []
+    
+    @pytest.mark.asyncio
+    async def test_knowledge_repo_sends_candidate_ids_to_rpc(self):
+        """Testa que o filtro é resolvido antes da RPC de similaridade."""
+        from app.domain.artifacts.types import KnowledgeFilter
+        from app.infrastructure.persistence.knowledge_repo import KnowledgeRepository
+        from app.infrastructure.persistence.learnings_index import LearningsIndex
+        
+        index, _, _ = self._build_index()
+        learnings = LearningsIndex()
+        learnings.ensure_fresh = AsyncMock()
+        repo = KnowledgeRepository(client=Mock(), index=learnings, filter_index=index)
+        repo._call_supabase_rpc = AsyncMock(return_value=[])
+        
+        await repo.find_relevant_knowledge("Pergunta", [0.1], KnowledgeFilter(content_types=["list"]))
+        params = repo._call_supabase_rpc.call_args.args[1]
+        assert params["filter_chunk_ids"] == ["c2"]
+        
+        repo._call_supabase_rpc.reset_mock()
+        await repo.find_relevant_knowledge("Pergunta", [0.1], KnowledgeFilter(tags=["inexistente"]))
+        repo._call_supabase_rpc.assert_not_called()
+
+
+class TestSupabaseClientPool:
+    """Testes para o pool de clientes do Supabase."""
+    
+    @patch('app.infrastructure.persistence.supabase_clients.create_client')
+    def test_reuses_one_client_per_credentials(self, mock_create_client):
+        """Testa que cada par (URL, chave) gera um único cliente."""
+        from app.infrastructure.persistence.supabase_clients import SupabaseClientPool
+        
+        mock_create_client.side_effect = lambda url, key: Mock()
+        pool = SupabaseClientPool()
+        
+        first = pool.get('https://a.supabase.co', 'anon')
+        assert pool.get('https://a.supabase.co', 'anon') is first
+        assert pool.get('https://a.supabase.co', 'service') is not first
+        assert pool.get('https://a.supabase.co', None) is None
+        assert mock_create_client.call_count == 2
+        assert len(pool) == 2
+    
+    @patch('app.infrastructure.persistence.supabase_clients.create_client')
+    def test_close_releases_connections(self, mock_create_client):
+        """Testa que `close` fecha os subclientes já abertos e esvazia o pool."""
+        from app.infrastructure.persistence.supabase_clients import SupabaseClientPool
+        
+        client = Mock()
+        client._storage = None
+        mock_create_client.return_value = client
+        pool = SupabaseClientPool()
+        pool.get('https://a.supabase.co', 'anon')
+        
+        pool.close()
+        
+        client._postgrest.aclose.assert_called_once()
+        assert len(pool) == 0
+
+
+class _FakeCursor:
+    def __init__(self, rows: list[dict]):
+        self.rows = rows
+    
+    async def fetchone(self):
+        return self.rows[0] if self.rows else None
+    
+    async def fetchall(self):
+        return list(self.rows)
+
+
+class _FakeConnection:
+    """Conexão assíncrona mínima: responde consultas pelo trecho de SQL e registra as chamadas."""
+    
+    def __init__(self, responses: dict[str, list[dict]] | None = None):
+        self.responses = responses or {}
+        self.executed: list[tuple] = []
+        self.executemany_calls: list[tuple] = []
+        self.transactions = 0
+        self.pipelines = 0
+    
+    async def execute(self, query, params=None, binary=False):
+        self.executed.append((query, params, binary))
+        for fragment, rows in self.responses.items():
+            if fragment in query:
+                return _FakeCursor(rows)
+        return _FakeCursor([])
+    
+    @asynccontextmanager
+    async def transaction(self):
+        self.transactions += 1
+        yield
+    
+    @asynccontextmanager
+    async def pipeline(self):
+        self.pipelines += 1
+        yield
+    
+    @asynccontextmanager
+    async def cursor(self):
+        connection = self
+        
+        class _Cursor:
+            async def executemany(self, query, params_seq):
+                connection.executemany_calls.append((query, list(params_seq)))
+        
+        yield _Cursor()
+
+
+class _FakePool:
+    def __init__(self, connection: _FakeConnection):
+        self.conn = connection
+    
+    @asynccontextmanager
+    async def connection(self):
+        yield self.conn
+
+
+class TestPostgresRepositories:
+    """Testes para os repositórios do backend `postgres` (pool de conexões diretas)."""
+    
+    @pytest.mark.asyncio
+    async def test_artifact_find_by_id_chunks_projection_skips_vectors(self):
+        """Testa que a projeção CHUNKS não lê os vetores nem o conteúdo original."""
+        from app.infrastructure.persistence.artifacts_repo import ArtifactProjection
+        from app.infrastructure.persistence.postgres.artifacts_repo import PostgresArtifactsRepository
+        
+        artifact_id = uuid.uuid4()
+        conn = _FakeConnection({
+            "from artifacts where id": [{
+                "id": artifact_id, "title": "Artefato", "source_type": "TEXT", "source_url": None,
+            }],
+            "from artifact_chunks where artifact_id": [{
+                "id": uuid.uuid4(), "artifact_id": artifact_id, "content": "Trecho",
+                "section_title": "Seção", "section_level": 1, "content_type": "text",
+                "position": 0, "token_count": 5, "breadcrumbs": ["Seção"],
+            }],
+        })
+        repo = PostgresArtifactsRepository(_FakePool(conn))
+        
+        artifact = await repo.find_by_id(ArtifactId(artifact_id), ArtifactProjection.CHUNKS)
+        
+        assert artifact.chunks[0].embedding.vector == []
+        assert artifact.original_content is None
+        artifact_sql, chunks_sql = conn.executed[0][0], conn.executed[1][0]
+        assert "original_content" not in artifact_sql
+        assert "embedding" not in chunks_sql
+        
+        await repo.find_by_id(ArtifactId(artifact_id), ArtifactProjection.HEADER)
+        assert len(conn.executed) == 3
+    
+    @pytest.mark.asyncio
+    async def test_conversation_update_topic_calls_counting_function(self):
+        """Testa que a troca de tópico passa pela função que mantém as contagens."""
+        from app.infrastructure.persistence.postgres.conversations_repo import PostgresConversationsRepository
+        
+        conn = _FakeConnection()
+        conversation_id, topic_id = uuid.uuid4(), uuid.uuid4()
+        
+        await PostgresConversationsRepository(_FakePool(conn)).update_topic(ConversationId(conversation_id), TopicId(topic_id))
+        
+        assert conn.executed == [("select set_conversation_topic(%s, %s)", (conversation_id, topic_id), False)]
+    
+    @pytest.mark.asyncio
+    async def test_conversation_find_by_id_hydrates_citations_in_one_pipeline(self):
+        """Testa que conversa, mensagens e fontes citadas vêm de um único pipeline."""
+        from app.infrastructure.persistence.postgres.conversations_repo import PostgresConversationsRepository
+        
+        conversation_id = uuid.uuid4()
+        chunk_id = uuid.uuid4()
+        artifact_id = uuid.uuid4()
+        now = datetime.now()
+        conn = _FakeConnection({
+            "from conversations where id": [{
+                "id": conversation_id, "created_at": now,
+                "context_summary": "Resumo", "summarized_message_count": 2,
+            }],
+            "from messages where conversation_id": [{
+                "id": uuid.uuid4(), "conversation_id": conversation_id, "author": "AGENT",
+                "content": "Resposta", "cited_artifact_chunk_ids": [str(chunk_id)], "created_at": now,
+            }],
+            "from artifact_chunks c": [{
+                "id": chunk_id, "artifact_id": artifact_id, "content_preview": "Trecho",
+                "section_title": "Seção", "section_level": 2, "content_type": "text",
+                "breadcrumbs": ["Manual", "Seção"], "artifact_title": "Manual",
+            }],
+        })
+        repo = PostgresConversationsRepository(_FakePool(conn))
+        
+        conversation = await repo.find_by_id(ConversationId(conversation_id))
+        
+        assert conn.pipelines == 1
+        assert len(conn.executed) == 3
+        assert conversation.context_summary == "Resumo"
+        source = conversation.messages[0].cited_sources[0]
+        assert source.chunk_id == chunk_id
+        assert source.title == "Manual"
+        assert source.breadcrumbs == ["Manual", "Seção"]
+    
+    @pytest.mark.asyncio
+    async def test_conversation_find_untitled_page_groups_messages(self):
+        """Testa a página de conversas sem título com as mensagens de todas em uma consulta."""
+        from app.infrastructure.persistence.postgres.conversations_repo import PostgresConversationsRepository
+        
+        first, second, third = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        now = datetime.now()
+        conn = _FakeConnection({
+            "from conversations where title is null": [
+                {"id": first, "created_at": now},
+                {"id": second, "created_at": now},
+                {"id": third, "created_at": now},
+            ],
+            "from messages where conversation_id = any": [
+                {"id": uuid.uuid4(), "conversation_id": first, "author": author, "content": content, "created_at": now}
+                for author, content in (("USER", "Pergunta"), ("AGENT", "Resposta"))
+            ],
+        })
+        repo = PostgresConversationsRepository(_FakePool(conn))
+        cursor = Cursor(created_at="2024-05-10T00:00:00+00:00", id=str(uuid.uuid4()))
+        
+        page = await repo.find_untitled_page(cursor, 2)
+        
+        assert [item.id for item in page.items] == [first, second]
+        assert [message.author for message in page.items[0].messages] == [Author.USER, Author.AGENT]
+        assert page.items[1].messages == []
+        assert Cursor.decode(page.next_cursor).id == str(second)
+        conversations_params, messages_params = conn.executed[0][1], conn.executed[1][1]
+        assert conversations_params == (cursor.created_at, cursor.id, 3)
+        assert messages_params == ([str(first), str(second)],)
+    
+    @pytest.mark.asyncio
+    async def test_conversation_find_turn_context_is_one_query(self):
+        """Testa que resumo e mensagens não resumidas vêm de uma única consulta, sem citações."""
+        from app.infrastructure.persistence.postgres.conversations_repo import PostgresConversationsRepository
+        
+        conversation_id = uuid.uuid4()
+        now = datetime.now()
+        conversation_row = {
+            "id": conversation_id, "created_at": now, "context_summary": "Resumo",
+            "summarized_message_count": 2,
+        }
+        conn = _FakeConnection({
+            "left join lateral": [
+                {**conversation_row, "message_id": uuid.uuid4(), "author": author,
+                 "content": content, "message_created_at": now}
+                for author, content in (("USER", "Pergunta"), ("AGENT", "Resposta"))
+            ],
+        })
+        repo = PostgresConversationsRepository(_FakePool(conn))
+        
+        conversation = await repo.find_turn_context(ConversationId(conversation_id))
+        
+        assert len(conn.executed) == 1
+        assert "artifact_chunks" not in conn.executed[0][0]
+        assert conversation.message_offset == 2
+        assert [m.author for m in conversation.unsummarized_messages()] == [Author.USER, Author.AGENT]
+        
+        # Conversa sem mensagens a partir do resumo: o left join devolve uma linha vazia
+        empty = PostgresConversationsRepository(_FakePool(_FakeConnection({
+            "left join lateral": [{**conversation_row, "message_id": None, "author": None,
+                                   "content": None, "message_created_at": None}],
+        })))
+        assert (await empty.find_turn_context(ConversationId(conversation_id))).messages == []
+        assert await PostgresConversationsRepository(_FakePool(_FakeConnection())).find_turn_context(
+            ConversationId(conversation_id)
+        ) is None
+    
+    @pytest.mark.asyncio
+    async def test_conversation_save_messages_is_one_idempotent_batch(self):
+        """Testa que as mensagens vão em um único insert de várias linhas com `on conflict do nothing`."""
+        from app.infrastructure.persistence.postgres.conversations_repo import PostgresConversationsRepository
+        
+        conn = _FakeConnection()
+        repo = PostgresConversationsRepository(_FakePool(conn))
+        conversation_id = ConversationId(uuid.uuid4())
+        messages = [
+            Message(
+                id=MessageId(uuid.uuid4()),
+                conversation_id=conversation_id,
+                author=author,
+                content="Olá",
+                cited_sources=[],
+                created_at=datetime.now(),
+            )
+            for author in (Author.USER, Author.AGENT)
+        ]
+        
+        await repo.save_messages(messages)
+        
+        assert conn.executemany_calls == []
+        assert len(conn.executed) == 1
+        query, params, _ = conn.executed[0]
+        assert "on conflict (id) do nothing" in query
+        assert query.count("(%s, %s, %s, %s, %s, %s)") == 2
+        assert params[2::6] == ["USER", "AGENT"]
+    
+    @pytest.mark.asyncio
+    async def test_artifact_save_sends_binary_vectors_in_one_transaction(self):
+        """Testa que os embeddings seguem como float32 em parâmetros binários, numa transação."""
+        import numpy as np
+        from app.infrastructure.persistence.postgres.artifacts_repo import PostgresArtifactsRepository
+        
+        conn = _FakeConnection()
+        repo = PostgresArtifactsRepository(_FakePool(conn))
+        artifact_id = ArtifactId(uuid.uuid4())
+        chunks = [
+            ArtifactChunk(
+                id=ChunkId(uuid.uuid4()),
+                artifact_id=artifact_id,
+                content=f"Trecho {position}",
+                embedding=Embedding(vector=[0.1, 0.2, 0.3]),
+                metadata=ChunkMetadata(
+                    section_title=None, section_level=None, content_type="text",
+                    position=position, token_count=3, breadcrumbs=[],
+                ),
+            )
+            for position in range(3)
+        ]
+        artifact = Artifact(
+            id=artifact_id, title="Manual", source_type=ArtifactSourceType.TEXT, chunks=chunks
+        )
+        
+        with patch('app.infrastructure.persistence.postgres.artifacts_repo.chunk_filter_index') as mock_index:
+            await repo.save(artifact)
+        
+        assert conn.transactions == 1
+        query, rows = conn.executemany_calls[0]
+        assert "%b" in query
+        assert len(rows) == 3
+        assert isinstance(rows[0][3], np.ndarray) and rows[0][3].dtype == np.float32
+        mock_index.invalidate.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_knowledge_rpc_runs_sql_function_with_binary_results(self):
+        """Testa que a busca RAG chama a função SQL pelo pool e normaliza as linhas."""
+        import numpy as np
+        from app.infrastructure.persistence.postgres.knowledge_repo import PostgresKnowledgeRepository
+        
+        chunk_id = uuid.uuid4()
+        conn = _FakeConnection({
+            "rag_get_relevant_chunks": [{
+                "id": chunk_id, "artifact_id": uuid.uuid4(), "content": "Trecho",
+                "embedding": np.array([0.5, 0.5], dtype=np.float32), "similarity": 0.9,
+            }],
+        })
+        repo = PostgresKnowledgeRepository(_FakePool(conn), client=Mock())
+        
+        rows = await repo._call_supabase_rpc(
+            "rag_get_relevant_chunks", {"query_embedding": [0.1, 0.2], "match_limit": 5}
+        )
+        
+        query, params, binary = conn.executed[0]
+        assert binary is True
+        assert "query_embedding => %(query_embedding)b" in query
+        assert params["filter_chunk_ids"] is None
+        assert rows[0]["id"] == str(chunk_id)
+        assert rows[0]["embedding"] == [0.5, 0.5]
+
+
+class TestBoundedExecutor:
+    """Testes para o executor das chamadas síncronas ao Supabase."""
+    
+    @pytest.mark.asyncio
+    async def test_limits_concurrent_blocking_calls(self):
+        """Testa que no máximo `max_workers` chamadas bloqueantes rodam ao mesmo tempo."""
+        import asyncio
+        import threading
+        import time
+        from app.infrastructure.persistence.blocking_io import BoundedExecutor
+        
+        executor = BoundedExecutor("test-io", max_workers=2)
+        lock = threading.Lock()
+        running = 0
+        peak = 0
+        
+        def blocking_call(value):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+            return value
+        
+        results = await asyncio.gather(*(executor.run(blocking_call, value) for value in range(6)))
+        executor.shutdown()
+        
+        assert results == list(range(6))
+        assert peak == 2
+        assert executor.snapshot()["peak_in_flight"] == 6
+        assert executor.snapshot()["in_flight"] == 0
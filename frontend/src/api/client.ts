@@ -152,11 +152,36 @@ export interface ConversationTopic {
 }
 
 // API calls
+// Listagens paginadas por cursor: o backend responde { items, next_cursor }
+export interface Page<T> {
+  items: T[]
+  next_cursor: string | null
+}
+
+// Busca uma página; as views pedem a próxima (com o next_cursor) sob demanda
+const fetchPage = async <T>(url: string, cursor?: string | null): Promise<Page<T>> => {
+  const params: Record<string, string> = cursor ? { cursor } : {}
+  const response = await apiClient.get<Page<T>>(url, { params })
+  return response.data
+}
+
+// Listagens em ordem decrescente de criação: segue o next_cursor só até passar de `since`
+const fetchPagesSince = async <T extends { created_at: string }>(url: string, since: Date): Promise<T[]> => {
+  const items: T[] = []
+  let cursor: string | null = null
+  do {
+    const page: Page<T> = await fetchPage<T>(url, cursor)
+    const recent = page.items.filter((item) => new Date(item.created_at) >= since)
+    items.push(...recent)
+    cursor = recent.length === page.items.length ? page.next_cursor : null
+  } while (cursor)
+  return items
+}
+
 export const api = {
   // Artifacts
-  listArtifacts: async (): Promise<Artifact[]> => {
-    const response = await apiClient.get('/artifacts')
-    return response.data
+  listArtifacts: async (cursor?: string | null): Promise<Page<Artifact>> => {
+    return fetchPage<Artifact>('/artifacts', cursor)
   },
   
   createArtifact: async (formData: FormData): Promise<Artifact> => {
@@ -198,9 +223,16 @@ export const api = {
     return response.data
   },
   
+  // O chat exibe a conversa inteira em ordem cronológica: segue as páginas de uma conversa
   getConversationMessages: async (conversation_id: string): Promise<Message[]> => {
-    const response = await apiClient.get(`/conversations/${conversation_id}/messages`)
-    return response.data
+    const messages: Message[] = []
+    let cursor: string | null = null
+    do {
+      const page: Page<Message> = await fetchPage<Message>(`/conversations/${conversation_id}/messages`, cursor)
+      messages.push(...page.items)
+      cursor = page.next_cursor
+    } while (cursor)
+    return messages
   },
   
   postMessage: async (conversation_id: string, content: string): Promise<Message> => {
@@ -214,9 +246,8 @@ export const api = {
     return response.data
   },
   
-  listPendingFeedbacks: async (): Promise<PendingFeedback[]> => {
-    const response = await apiClient.get('/feedbacks/pending')
-    return response.data
+  listPendingFeedbacks: async (cursor?: string | null): Promise<Page<PendingFeedback>> => {
+    return fetchPage<PendingFeedback>('/feedbacks/pending', cursor)
   },
   
   approveFeedback: async (feedback_id: string): Promise<{ feedback: PendingFeedback; learning: Learning }> => {
@@ -229,9 +260,17 @@ export const api = {
     return response.data
   },
 
-  listReviewedFeedbacks: async (): Promise<PendingFeedback[]> => {
-    const response = await apiClient.get('/feedbacks/reviewed')
-    return response.data
+  listReviewedFeedbacks: async (cursor?: string | null): Promise<Page<PendingFeedback>> => {
+    return fetchPage<PendingFeedback>('/feedbacks/reviewed', cursor)
+  },
+
+  // Feedbacks (pendentes e revisados) criados a partir de `since`, para as estatísticas
+  listFeedbacksSince: async (since: Date): Promise<PendingFeedback[]> => {
+    const [pending, reviewed] = await Promise.all([
+      fetchPagesSince<PendingFeedback>('/feedbacks/pending', since),
+      fetchPagesSince<PendingFeedback>('/feedbacks/reviewed', since),
+    ])
+    return [...pending, ...reviewed]
   },
 
   getConversationIdByMessageId: async (message_id: string): Promise<{ conversation_id: string }> => {
@@ -259,9 +298,8 @@ export const api = {
   },
   
   // Learnings
-  listLearnings: async (): Promise<Learning[]> => {
-    const response = await apiClient.get('/learnings')
-    return response.data
+  listLearnings: async (cursor?: string | null): Promise<Page<Learning>> => {
+    return fetchPage<Learning>('/learnings', cursor)
   },
   
   // Agent
@@ -281,10 +319,14 @@ export const api = {
     return response.data
   },
   
-  getConversationsByTopic: async (topic_id?: string): Promise<ConversationSummary[]> => {
+  getConversationsByTopic: async (topic_id?: string, cursor?: string | null): Promise<Page<ConversationSummary>> => {
     const url = topic_id ? `/topics/${topic_id}/conversations` : '/topics/conversations'
-    const response = await apiClient.get(url)
-    return response.data
+    return fetchPage<ConversationSummary>(url, cursor)
+  },
+
+  // Conversas criadas a partir de `since`, para as estatísticas
+  listConversationsSince: async (since: Date): Promise<ConversationSummary[]> => {
+    return fetchPagesSince<ConversationSummary>('/topics/conversations', since)
   },
   
   // Conversation Topic
@@ -0,0 +1,28 @@
+import { useMemo } from 'react'
+import { QueryKey, useInfiniteQuery } from '@tanstack/react-query'
+import { Page } from '@/api/client'
+
+interface PagedQueryOptions<T> {
+  queryKey: QueryKey
+  queryFn: (cursor: string | null) => Promise<Page<T>>
+  enabled?: boolean
+  staleTime?: number
+  refetchOnMount?: boolean
+  refetchOnWindowFocus?: boolean
+}
+
+// Listagem por cursor: carrega a primeira página e as seguintes só quando a view pede (fetchNextPage)
+export function usePagedQuery<T>({ queryKey, queryFn, ...options }: PagedQueryOptions<T>) {
+  const query = useInfiniteQuery({
+    queryKey,
+    queryFn: ({ pageParam }) => queryFn(pageParam),
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage) => lastPage.next_cursor,
+    placeholderData: (previousData) => previousData,
+    ...options,
+  })
+
+  const items = useMemo(() => query.data?.pages.flatMap((page) => page.items) ?? [], [query.data])
+
+  return { ...query, items }
+}
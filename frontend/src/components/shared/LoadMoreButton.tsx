@@ -0,0 +1,25 @@
+import { Loader2 } from 'lucide-react'
+import { Button } from '@/components/ui/button'
+import { cn } from '@/lib/utils'
+
+interface LoadMoreButtonProps {
+  hasNextPage: boolean
+  isFetchingNextPage: boolean
+  onLoadMore: () => void
+  className?: string
+}
+
+const LoadMoreButton = ({ hasNextPage, isFetchingNextPage, onLoadMore, className }: LoadMoreButtonProps) => {
+  if (!hasNextPage) return null
+
+  return (
+    <div className={cn('flex justify-center py-4', className)}>
+      <Button variant="outline" onClick={onLoadMore} disabled={isFetchingNextPage}>
+        {isFetchingNextPage && <Loader2 className="h-4 w-4 animate-spin" />}
+        {isFetchingNextPage ? 'Carregando...' : 'Carregar mais'}
+      </Button>
+    </div>
+  )
+}
+
+export default LoadMoreButton
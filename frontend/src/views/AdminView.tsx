@@ -1,6 +1,8 @@
 import { useState, useEffect } from 'react'
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
-import { api, Artifact, ArtifactChunk, ArtifactContentResponse } from '@/api/client'
+import { api, Artifact, ArtifactChunk, ArtifactContentResponse, PendingFeedback } from '@/api/client'
+import { usePagedQuery } from '@/api/usePagedQuery'
+import LoadMoreButton from '@/components/shared/LoadMoreButton'
 import { Loader2, Plus, Trash2, Check, X, Shield, FileText, MessageSquare, Bot } from 'lucide-react'
 import { Button } from '@/components/ui/button'
 import { Input } from '@/components/ui/input'
@@ -40,11 +42,12 @@ function AdminView() {
   const [deletingArtifactId, setDeletingArtifactId] = useState<string | null>(null)
   const [feedbackAlert, setFeedbackAlert] = useState<{ type: 'success' | 'error'; message: string } | null>(null)
 
-  // Busca artefatos
-  const { data: artifacts = [] } = useQuery({
+  // Busca artefatos (página a página, sob demanda)
+  const artifactsQuery = usePagedQuery<Artifact>({
     queryKey: ['artifacts'],
     queryFn: api.listArtifacts,
   })
+  const artifacts = artifactsQuery.items
 
   // Busca instrução do agente
   const { data: agentInstructionData } = useQuery({
@@ -59,11 +62,12 @@ function AdminView() {
     }
   }, [agentInstructionData])
 
-  // Busca feedbacks pendentes
-  const { data: pendingFeedbacks = [] } = useQuery({
+  // Busca feedbacks pendentes (página a página, sob demanda)
+  const pendingFeedbacksQuery = usePagedQuery<PendingFeedback>({
     queryKey: ['pending-feedbacks'],
     queryFn: api.listPendingFeedbacks,
   })
+  const pendingFeedbacks = pendingFeedbacksQuery.items
 
   // Atualiza instrução do agente
   const updateInstructionMutation = useMutation({
@@ -319,7 +323,7 @@ function AdminView() {
               Feedbacks
               {pendingFeedbacks.length > 0 && (
                 <Badge variant="destructive" className="ml-1">
-                  {pendingFeedbacks.length}
+                  {pendingFeedbacks.length}{pendingFeedbacksQuery.hasNextPage && '+'}
                 </Badge>
               )}
             </TabsTrigger>
@@ -453,6 +457,11 @@ function AdminView() {
                     ))}
                   </div>
                 )}
+                <LoadMoreButton
+                  hasNextPage={artifactsQuery.hasNextPage}
+                  isFetchingNextPage={artifactsQuery.isFetchingNextPage}
+                  onLoadMore={() => artifactsQuery.fetchNextPage()}
+                />
               </CardContent>
             </Card>
           </TabsContent>
@@ -527,6 +536,11 @@ function AdminView() {
                     ))}
                   </div>
                 )}
+                <LoadMoreButton
+                  hasNextPage={pendingFeedbacksQuery.hasNextPage}
+                  isFetchingNextPage={pendingFeedbacksQuery.isFetchingNextPage}
+                  onLoadMore={() => pendingFeedbacksQuery.fetchNextPage()}
+                />
               </CardContent>
             </Card>
           </TabsContent>
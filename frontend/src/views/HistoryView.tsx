@@ -1,13 +1,15 @@
 import { useState } from 'react'
 import { useQuery } from '@tanstack/react-query'
 import { useNavigate } from 'react-router-dom'
-import { api } from '@/api/client'
+import { api, ConversationSummary } from '@/api/client'
+import { usePagedQuery } from '@/api/usePagedQuery'
 import { Search, Loader2, X } from 'lucide-react'
 import { Input } from '@/components/ui/input'
 import { Button } from '@/components/ui/button'
 import { Card, CardContent } from '@/components/ui/card'
 import { Skeleton } from '@/components/ui/skeleton'
 import Sidebar from '@/components/shared/Sidebar'
+import LoadMoreButton from '@/components/shared/LoadMoreButton'
 import { cn } from '@/lib/utils'
 
 function HistoryView() {
@@ -30,18 +32,20 @@ function HistoryView() {
     placeholderData: (previousData) => previousData, // Mantém dados anteriores enquanto busca
   })
 
-  // Busca conversas por tópico
+  // Busca conversas por tópico (página a página, sob demanda; mantém os dados anteriores enquanto busca)
   const { 
-    data: conversations = [], 
+    items: conversations, 
     isLoading: isLoadingConversations,
-    isFetching: isFetchingConversations
-  } = useQuery({
+    isFetching: isFetchingConversations,
+    hasNextPage,
+    isFetchingNextPage,
+    fetchNextPage
+  } = usePagedQuery<ConversationSummary>({
     queryKey: ['conversations', selectedTopicId],
-    queryFn: () => api.getConversationsByTopic(selectedTopicId || undefined),
+    queryFn: (cursor) => api.getConversationsByTopic(selectedTopicId || undefined, cursor),
     staleTime: 1000 * 60 * 2, // 2 minutos - dados permanecem válidos
     refetchOnMount: false, // Não refaz a busca automaticamente ao montar se os dados estão frescos
     refetchOnWindowFocus: true, // Apenas refaz quando a janela recebe foco
-    placeholderData: (previousData) => previousData, // Mantém dados anteriores enquanto busca
   })
 
   // Filtra tópicos pela busca
@@ -195,7 +199,7 @@ function HistoryView() {
             <div className="flex items-center justify-between mb-4 md:mb-6">
               <h2 className="text-lg md:text-xl font-semibold text-foreground">Resumos de Conversas</h2>
               {/* Indicador de atualização em background */}
-              {isFetchingConversations && !isLoadingConversations && (
+              {isFetchingConversations && !isLoadingConversations && !isFetchingNextPage && (
                 <div className="flex items-center gap-2 text-xs md:text-sm text-muted-foreground">
                   <Loader2 className="h-3 w-3 md:h-4 md:w-4 animate-spin" />
                   <span className="hidden md:inline">Atualizando...</span>
@@ -205,7 +209,7 @@ function HistoryView() {
             
             <div className="flex flex-col gap-2 md:gap-3 relative">
               {/* Overlay sutil durante atualização em background */}
-              {isFetchingConversations && !isLoadingConversations && conversations.length > 0 && (
+              {isFetchingConversations && !isLoadingConversations && !isFetchingNextPage && conversations.length > 0 && (
                 <div className="absolute inset-0 bg-background/20 backdrop-blur-[1px] z-10 pointer-events-none rounded-lg" />
               )}
               {isLoadingConversations ? (
@@ -270,6 +274,12 @@ function HistoryView() {
                 ))
               )}
             </div>
+
+            <LoadMoreButton
+              hasNextPage={hasNextPage}
+              isFetchingNextPage={isFetchingNextPage}
+              onLoadMore={() => fetchNextPage()}
+            />
           </div>
         </div>
       </main>
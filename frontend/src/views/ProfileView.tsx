@@ -60,10 +60,17 @@ function ProfileView() {
   const [profileName, setProfileName] = useState('Colaborador Cultural')
   const [profileEmail, setProfileEmail] = useState('colaborador.nome@empresa.com')
 
+  // As estatísticas cobrem o mês atual e os 4 anteriores (o período do gráfico mensal):
+  // só as páginas desse período são buscadas, e não o histórico inteiro
+  const statsSince = useMemo(() => {
+    const date = new Date()
+    return new Date(date.getFullYear(), date.getMonth() - 4, 1)
+  }, [])
+
   // Fetch conversations to calculate statistics
   const { data: conversations = [], isLoading: isLoadingConversations } = useQuery({
-    queryKey: ['all-conversations'],
-    queryFn: () => api.getConversationsByTopic(),
+    queryKey: ['all-conversations', statsSince.toISOString()],
+    queryFn: () => api.listConversationsSince(statsSince),
   })
 
   const { data: topics = [], isLoading: isLoadingTopics } = useQuery({
@@ -71,23 +78,14 @@ function ProfileView() {
     queryFn: () => api.listTopics(),
   })
 
-  // Fetch feedbacks to calculate positive/negative counts
-  const { data: pendingFeedbacks = [], isLoading: isLoadingPendingFeedbacks } = useQuery({
-    queryKey: ['pending-feedbacks'],
-    queryFn: () => api.listPendingFeedbacks(),
-  })
-
-  const { data: reviewedFeedbacks = [], isLoading: isLoadingReviewedFeedbacks } = useQuery({
-    queryKey: ['reviewed-feedbacks'],
-    queryFn: () => api.listReviewedFeedbacks(),
+  // Fetch feedbacks (pendentes e revisados) to calculate positive/negative counts
+  const { data: allFeedbacks = [], isLoading: isLoadingFeedbacks } = useQuery({
+    queryKey: ['feedbacks-since', statsSince.toISOString()],
+    queryFn: () => api.listFeedbacksSince(statsSince),
   })
 
-  const isLoadingFeedbacks = isLoadingPendingFeedbacks || isLoadingReviewedFeedbacks
-
   // Calculate statistics from conversations and messages
   const stats: ProfileStats = useMemo(() => {
-    const allFeedbacks = [...pendingFeedbacks, ...reviewedFeedbacks]
-    
     const positiveFeedbacks = allFeedbacks.filter(f => f.feedback_type === 'POSITIVE').length
     const negativeFeedbacks = allFeedbacks.filter(f => f.feedback_type === 'NEGATIVE').length
     const detailedFeedbacks = allFeedbacks.filter(f => f.feedback_type !== 'POSITIVE' && f.feedback_type !== 'NEGATIVE').length
@@ -149,7 +147,7 @@ function ProfileView() {
       })),
       monthlyTrend,
     }
-  }, [conversations, topics, pendingFeedbacks, reviewedFeedbacks])
+  }, [conversations, topics, allFeedbacks])
 
   const handleSavePreferences = () => {
     // Implementar salvamento de preferências
@@ -269,7 +267,7 @@ function ProfileView() {
                       </div>
                     </div>
                     <p className="text-xs text-muted-foreground mt-1">
-                      Positivos, negativos e detalhados
+                      Positivos, negativos e detalhados (últimos 5 meses)
                     </p>
                   </>
                 )}
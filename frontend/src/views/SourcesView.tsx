@@ -9,7 +9,9 @@ import { Skeleton } from '@/components/ui/skeleton'
 import { Dialog, DialogContent, DialogHeader, DialogTitle } from '@/components/ui/dialog'
 import { ScrollArea } from '@/components/ui/scroll-area'
 import Sidebar from '@/components/shared/Sidebar'
+import LoadMoreButton from '@/components/shared/LoadMoreButton'
 import { api, Artifact, ArtifactContentResponse } from '@/api/client'
+import { usePagedQuery } from '@/api/usePagedQuery'
 import { cn } from '@/lib/utils'
 import ReactMarkdown from 'react-markdown'
 import remarkGfm from 'remark-gfm'
@@ -21,17 +23,19 @@ function SourcesView() {
   const [selectedArtifact, setSelectedArtifact] = useState<Artifact | null>(null)
   const itemsPerPage = 6
 
-  // Busca artefatos
+  // Busca artefatos (página a página, sob demanda)
   const { 
-    data: artifacts = [], 
-    isLoading: isLoadingArtifacts
-  } = useQuery({
+    items: artifacts, 
+    isLoading: isLoadingArtifacts,
+    hasNextPage,
+    isFetchingNextPage,
+    fetchNextPage
+  } = usePagedQuery<Artifact>({
     queryKey: ['artifacts'],
     queryFn: api.listArtifacts,
     staleTime: 1000 * 60 * 5, // 5 minutos - artefatos mudam raramente
     refetchOnMount: false, // Não refaz automaticamente se dados estão frescos
     refetchOnWindowFocus: true, // Apenas refaz quando a janela recebe foco
-    placeholderData: (previousData) => previousData,
   })
 
   // Busca conteúdo do artefato selecionado
@@ -301,6 +305,13 @@ function SourcesView() {
                 )}
               </>
             )}
+
+            {/* Próxima página de artefatos do servidor */}
+            <LoadMoreButton
+              hasNextPage={hasNextPage}
+              isFetchingNextPage={isFetchingNextPage}
+              onLoadMore={() => fetchNextPage()}
+            />
           </div>
         </div>
       </main>
@@ -1,6 +1,7 @@
 import { useState } from 'react'
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
 import { api, Artifact, ArtifactChunk, ArtifactContentResponse } from '@/api/client'
+import { usePagedQuery } from '@/api/usePagedQuery'
 import { Loader2, Plus, Trash2, FileText, File, Check } from 'lucide-react'
 import { Button } from '@/components/ui/button'
 import { Input } from '@/components/ui/input'
@@ -14,6 +15,7 @@ import { Tabs, TabsContent, TabsList, TabsTrigger } from '@/components/ui/tabs'
 import { ScrollArea } from '@/components/ui/scroll-area'
 import { Alert, AlertDescription, AlertTitle } from '@/components/ui/alert'
 import AdminSidebar from '@/components/shared/AdminSidebar'
+import LoadMoreButton from '@/components/shared/LoadMoreButton'
 
 // Paleta de cores inspirada no shadcn-ui com bordas e fundos sutis
 const COLOR_PALETTE = [
@@ -126,8 +128,14 @@ function AdminArtifactsView() {
   const [feedbackAlert, setFeedbackAlert] = useState<{ type: 'success' | 'error'; message: string } | null>(null)
   const [isDeleting, setIsDeleting] = useState<string | null>(null)
 
-  // Busca artefatos
-  const { data: artifacts = [], isLoading: isLoadingArtifacts } = useQuery({
+  // Busca artefatos (página a página, sob demanda)
+  const {
+    items: artifacts,
+    isLoading: isLoadingArtifacts,
+    hasNextPage,
+    isFetchingNextPage,
+    fetchNextPage,
+  } = usePagedQuery<Artifact>({
     queryKey: ['artifacts'],
     queryFn: api.listArtifacts,
   })
@@ -475,6 +483,12 @@ function AdminArtifactsView() {
                   })
                 )}
               </div>
+
+              <LoadMoreButton
+                hasNextPage={hasNextPage}
+                isFetchingNextPage={isFetchingNextPage}
+                onLoadMore={() => fetchNextPage()}
+              />
             </section>
           </div>
         </div>
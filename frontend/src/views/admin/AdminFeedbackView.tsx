@@ -1,6 +1,7 @@
 import { useState } from 'react'
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
-import { api } from '@/api/client'
+import { api, PendingFeedback } from '@/api/client'
+import { usePagedQuery } from '@/api/usePagedQuery'
 import { Check, X, Loader2, MessageSquare } from 'lucide-react'
 import { Button } from '@/components/ui/button'
 import { Card, CardContent } from '@/components/ui/card'
@@ -9,6 +10,7 @@ import { Dialog, DialogContent, DialogDescription, DialogFooter, DialogHeader, D
 import { Badge } from '@/components/ui/badge'
 import { Skeleton } from '@/components/ui/skeleton'
 import AdminSidebar from '@/components/shared/AdminSidebar'
+import LoadMoreButton from '@/components/shared/LoadMoreButton'
 import { cn } from '@/lib/utils'
 import ReactMarkdown from 'react-markdown'
 
@@ -17,17 +19,19 @@ function AdminFeedbackView() {
   const [activeTab, setActiveTab] = useState<'pending' | 'reviewed'>('pending')
   const [selectedFeedback, setSelectedFeedback] = useState<string | null>(null)
 
-  // Busca feedbacks pendentes
-  const { data: pendingFeedbacks = [], isLoading: isLoadingPending } = useQuery({
+  // Busca feedbacks pendentes (página a página, sob demanda)
+  const pendingQuery = usePagedQuery<PendingFeedback>({
     queryKey: ['pending-feedbacks'],
     queryFn: api.listPendingFeedbacks,
   })
+  const { items: pendingFeedbacks, isLoading: isLoadingPending } = pendingQuery
 
-  // Busca feedbacks revisados
-  const { data: reviewedFeedbacks = [], isLoading: isLoadingReviewed } = useQuery({
+  // Busca feedbacks revisados (página a página, sob demanda)
+  const reviewedQuery = usePagedQuery<PendingFeedback>({
     queryKey: ['reviewed-feedbacks'],
     queryFn: api.listReviewedFeedbacks,
   })
+  const { items: reviewedFeedbacks, isLoading: isLoadingReviewed } = reviewedQuery
 
   // Busca conversation_id a partir de message_id
   const { data: conversationIdData, isLoading: isLoadingConversationId } = useQuery({
@@ -192,13 +196,13 @@ function AdminFeedbackView() {
                     value="pending"
                     className="pb-2 md:pb-3 text-sm md:text-base border-b-2 border-transparent data-[state=active]:border-primary data-[state=active]:text-primary rounded-none"
                   >
-                    Pendentes {pendingFeedbacks.length > 0 && `(${pendingFeedbacks.length})`}
+                    Pendentes {pendingFeedbacks.length > 0 && `(${pendingFeedbacks.length}${pendingQuery.hasNextPage ? '+' : ''})`}
                   </TabsTrigger>
                   <TabsTrigger
                     value="reviewed"
                     className="pb-2 md:pb-3 text-sm md:text-base border-b-2 border-transparent data-[state=active]:border-primary data-[state=active]:text-primary rounded-none"
                   >
-                    Revisados {reviewedFeedbacks.length > 0 && `(${reviewedFeedbacks.length})`}
+                    Revisados {reviewedFeedbacks.length > 0 && `(${reviewedFeedbacks.length}${reviewedQuery.hasNextPage ? '+' : ''})`}
                   </TabsTrigger>
                 </TabsList>
 
@@ -237,6 +241,11 @@ function AdminFeedbackView() {
                       pendingFeedbacks.map((feedback) => renderFeedbackCard(feedback, true))
                     )}
                   </div>
+                  <LoadMoreButton
+                    hasNextPage={pendingQuery.hasNextPage}
+                    isFetchingNextPage={pendingQuery.isFetchingNextPage}
+                    onLoadMore={() => pendingQuery.fetchNextPage()}
+                  />
                 </TabsContent>
 
                 <TabsContent value="reviewed" className="mt-0">
@@ -270,6 +279,11 @@ function AdminFeedbackView() {
                       reviewedFeedbacks.map((feedback) => renderFeedbackCard(feedback, false))
                     )}
                   </div>
+                  <LoadMoreButton
+                    hasNextPage={reviewedQuery.hasNextPage}
+                    isFetchingNextPage={reviewedQuery.isFetchingNextPage}
+                    onLoadMore={() => reviewedQuery.fetchNextPage()}
+                  />
                 </TabsContent>
               </Tabs>
             </section>